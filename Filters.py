@@ -5,17 +5,496 @@ Applique des règles pour marquer les entreprises à filtrer dans le champ 'Filt
 """
 
 import argparse
-import csv
+import hashlib
+import json
+import operator
 import os
 import sys
-from typing import Dict, List
+import time
+from contextlib import ExitStack
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from fichiers_csv import CsvReader, CsvWriter, is_csv_path
+from historique_colonnaire import ColumnarTable, copy_columnar, is_columnar
+from horaires import (
+    HOURS_FIELD,
+    SCHEDULE_PREDICATES,
+    SLOTS_FIELD,
+    parse_bitmap,
+    parse_opening_hours,
+    parse_window,
+    record_schedule,
+)
+
+# NumPy est optionnel: il n'est utilisé que par l'évaluation vectorisée (--vectorise)
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - dépend de l'environnement
+    np = None
+
+# Fichier des règles par défaut, livré avec le script
+DEFAULT_RULES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "regles_filtrage.json")
+
+# Résultat de evaluate_rules quand aucune règle ne s'applique
+NO_RULE = -1
+
+# Conversion des valeurs CSV selon le type déclaré de la règle
+VALUE_PARSERS: Dict[str, Callable[[str], float]] = {"entier": int, "decimal": float}
+
+OPERATORS: Dict[str, Callable[[float, float], bool]] = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "=": operator.eq,
+    "!=": operator.ne,
+}
+
+# Type des règles sur les horaires d'ouverture: le seuil est une plage horaire ("dimanche 08:00-12:00")
+# et l'opérateur un prédicat de horaires.SCHEDULE_PREDICATES
+SCHEDULE_TYPE = "horaires"
+
+REQUIRED_RULE_KEYS = ("id", "priorite", "champ", "type", "operateur", "seuil", "raison")
+
+# Colonne de l'empreinte des champs utilisés par les règles (mode --incremental)
+FINGERPRINT_FIELD = "Empreinte_Filtrage"
+NO_FILTER_REASON = "Pas de filtre"
+
+# Nombre de lignes lues, évaluées puis écrites ensemble (mémoire constante quelle que soit la taille du fichier)
+DEFAULT_BATCH_SIZE = 10_000
+
+
+class FilterRule:
+    """
+    Règle de filtrage compilée
+
+    La condition "champ operateur seuil" (restreinte à un métier si la règle en déclare un) est compilée
+    une seule fois en fonction matches(record) -> bool. Une valeur vide ou non convertible ne déclenche
+    pas la règle. Une règle de type "horaires" compare les créneaux d'ouverture de l'entreprise au masque
+    de sa plage horaire (test bit à bit); des horaires inconnus ne la déclenchent pas.
+    """
+
+    def __init__(self, rule_id: int, definition: Dict):
+        self.rule_id = rule_id
+        self.definition = definition
+        self.code: str = definition["id"]
+        self.priorite = definition["priorite"]
+        self.champ: str = definition["champ"]
+        self.type: str = definition["type"]
+        self.operateur: str = definition["operateur"]
+        self.seuil = definition["seuil"]
+        self.metier: Optional[str] = definition.get("metier")
+        self.raison: str = definition["raison"]
+        self.libelle: str = definition.get("libelle", definition["raison"])
+        self.matches = self._compile()
+
+    def _compile(self) -> Callable[[Dict[str, str]], bool]:
+        if self.type == SCHEDULE_TYPE:
+            return self._compile_schedule()
+        field = self.champ
+        parse = VALUE_PARSERS[self.type]
+        compare = OPERATORS[self.operateur]
+        threshold = self.seuil
+        metier = self.metier.lower() if self.metier else None
+
+        def matches(record: Dict[str, str]) -> bool:
+            if metier is not None and (record.get("Metier_normalise") or "").strip().lower() != metier:
+                return False
+            value = (record.get(field) or "").strip()
+            if not value:
+                return False
+            try:
+                return compare(parse(value), threshold)
+            except ValueError:
+                # Si conversion impossible, ignorer cette règle
+                return False
+
+        return matches
+
+    def _compile_schedule(self) -> Callable[[Dict[str, str]], bool]:
+        predicate = SCHEDULE_PREDICATES[self.operateur]
+        window = parse_window(self.seuil)
+        metier = self.metier.lower() if self.metier else None
+
+        def matches(record: Dict[str, str]) -> bool:
+            if metier is not None and (record.get("Metier_normalise") or "").strip().lower() != metier:
+                return False
+            bitmap = record_schedule(record)
+            return bitmap is not None and predicate(bitmap, window)
+
+        return matches
+
+
+def validate_schedule_rule(definition: Dict):
+    """Vérifie l'opérateur et la plage horaire d'une règle de type "horaires" (ValueError sinon)"""
+    if definition["operateur"] not in SCHEDULE_PREDICATES:
+        raise ValueError(
+            f"Règle {definition['id']}: opérateur d'horaires inconnu '{definition['operateur']}'"
+            f" (attendu: {', '.join(SCHEDULE_PREDICATES)})"
+        )
+    if not isinstance(definition["seuil"], str):
+        raise ValueError(f"Règle {definition['id']}: le seuil doit être une plage horaire")
+    try:
+        parse_window(definition["seuil"])
+    except ValueError as e:
+        raise ValueError(f"Règle {definition['id']}: {e}") from e
+
+
+def validate_rule(definition: Dict):
+    """Vérifie les clés, le type, l'opérateur et le seuil d'une définition de règle (ValueError sinon)"""
+    missing = [key for key in REQUIRED_RULE_KEYS if key not in definition]
+    if missing:
+        raise ValueError(f"Règle {definition.get('id', '?')}: clés manquantes {', '.join(missing)}")
+    if definition["type"] == SCHEDULE_TYPE:
+        validate_schedule_rule(definition)
+    elif definition["type"] not in VALUE_PARSERS:
+        raise ValueError(
+            f"Règle {definition['id']}: type inconnu '{definition['type']}'"
+            f" (attendu: {', '.join(list(VALUE_PARSERS) + [SCHEDULE_TYPE])})"
+        )
+    elif definition["operateur"] not in OPERATORS:
+        raise ValueError(f"Règle {definition['id']}: opérateur inconnu '{definition['operateur']}'")
+    elif not isinstance(definition["seuil"], (int, float)) or isinstance(definition["seuil"], bool):
+        raise ValueError(f"Règle {definition['id']}: le seuil doit être un nombre")
+
+
+def compile_rules(definitions: List[Dict]) -> List[FilterRule]:
+    """
+    Valide et compile des définitions de règles
+
+    Les règles sont triées par priorité (la plus petite en premier, ordre du fichier à égalité):
+    la première règle vérifiée donne la raison du filtrage.
+
+    Raises:
+        ValueError: Si une définition est invalide
+    """
+    codes = set()
+    for definition in definitions:
+        validate_rule(definition)
+        if definition["id"] in codes:
+            raise ValueError(f"Règle {definition['id']} définie plusieurs fois")
+        codes.add(definition["id"])
+
+    ordered = sorted(definitions, key=lambda definition: definition["priorite"])
+    return [FilterRule(rule_id, definition) for rule_id, definition in enumerate(ordered)]
+
+
+def load_rules(rules_file: str = DEFAULT_RULES_FILE) -> List[FilterRule]:
+    """Charge et compile le fichier JSON des règles ({"regles": [...]})"""
+    with open(rules_file, "r", encoding="utf-8") as file:
+        config = json.load(file)
+    return compile_rules(config.get("regles", []))
+
+
+@lru_cache(maxsize=1)
+def default_rules() -> List[FilterRule]:
+    """Règles du fichier par défaut, compilées une seule fois"""
+    return load_rules(DEFAULT_RULES_FILE)
+
+
+def rules_version(rules: List[FilterRule]) -> str:
+    """Version d'un jeu de règles: empreinte de leurs définitions (change dès qu'une règle change)"""
+    canonical = json.dumps([rule.definition for rule in rules], sort_keys=True, ensure_ascii=False)
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def rule_fields(rules: List[FilterRule]) -> List[str]:
+    """Champs lus par les règles, dans un ordre stable"""
+    fields = {rule.champ for rule in rules}
+    if any(rule.metier for rule in rules):
+        fields.add("Metier_normalise")
+    if any(rule.type == SCHEDULE_TYPE for rule in rules):
+        fields.update((HOURS_FIELD, SLOTS_FIELD))
+    return sorted(fields)
+
+
+def filter_columns(rules: List[FilterRule], incremental: bool = False, verbose: bool = False) -> List[str]:
+    """
+    Colonnes lues par le filtrage: champs des règles, résultat précédent (Filtré, Raison_Filtrage),
+    empreinte en mode incrémental et nom pour l'affichage détaillé
+
+    Un historique colonnaire n'est lu que sur ces colonnes.
+    """
+    columns = rule_fields(rules) + ["Filtré", "Raison_Filtrage"]
+    if incremental:
+        columns.append(FINGERPRINT_FIELD)
+    if verbose:
+        columns.append("Nom")
+    return columns
+
+
+def record_fingerprint(record: Dict[str, str], fields: List[str], version: str) -> str:
+    """Empreinte des champs utilisés par les règles et de la version des règles"""
+    text = "\x1f".join([version] + [record.get(field) or "" for field in fields])
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def previous_rule_id(record: Dict[str, str], rules_by_reason: Dict[str, int]) -> Optional[int]:
+    """
+    Règle du filtrage précédent d'après Filtré et Raison_Filtrage
+
+    Returns:
+        Identifiant de règle, NO_RULE, ou None si le résultat précédent n'est pas un résultat des règles
+        (par exemple un filtrage manuel): l'enregistrement doit alors être réévalué
+    """
+    filtre = record.get("Filtré")
+    raison = record.get("Raison_Filtrage")
+    if filtre == "NON" and raison == NO_FILTER_REASON:
+        return NO_RULE
+    if filtre == "OUI" and raison in rules_by_reason:
+        return rules_by_reason[raison]
+    return None
+
+
+def evaluate_rules(record: Dict[str, str], rules: List[FilterRule]) -> int:
+    """Retourne l'identifiant (rang) de la première règle vérifiée, ou NO_RULE"""
+    for rule in rules:
+        if rule.matches(record):
+            return rule.rule_id
+    return NO_RULE
+
+
+def are_exclusive(left: FilterRule, right: FilterRule) -> bool:
+    """Deux règles restreintes à des métiers différents ne peuvent pas être vérifiées par le même enregistrement"""
+    return bool(left.metier and right.metier and left.metier.lower() != right.metier.lower())
+
+
+# Plan d'évaluation: pour chaque règle, dans l'ordre d'évaluation, les règles prioritaires à vérifier si elle
+# est déclenchée (celles qui n'ont pas encore été évaluées et qui ne lui sont pas exclusives)
+EvaluationPlan = List[Tuple[FilterRule, List[FilterRule]]]
+
+
+def build_evaluation_plan(rules: List[FilterRule], order: Optional[List[FilterRule]] = None) -> EvaluationPlan:
+    """
+    Construit le plan d'évaluation des règles dans un ordre donné (ordre des priorités par défaut)
+
+    Quand une règle évaluée tôt est déclenchée, seules les règles plus prioritaires pas encore évaluées
+    restent à vérifier: la règle retenue est toujours la plus prioritaire, comme dans evaluate_rules,
+    et Raison_Filtrage ne dépend pas de l'ordre d'évaluation.
+    """
+    order = rules if order is None else order
+    plan: EvaluationPlan = []
+    for position, rule in enumerate(order):
+        evaluated = {other.rule_id for other in order[:position]}
+        checks = [
+            other for other in rules[: rule.rule_id] if other.rule_id not in evaluated and not are_exclusive(other, rule)
+        ]
+        plan.append((rule, checks))
+    return plan
+
+
+def evaluate_plan(record: Dict[str, str], plan: EvaluationPlan) -> int:
+    """Comme evaluate_rules, en suivant un plan d'évaluation"""
+    for rule, checks in plan:
+        if rule.matches(record):
+            for other in checks:
+                if other.matches(record):
+                    return other.rule_id
+            return rule.rule_id
+    return NO_RULE
+
+
+class RuleProfiler:
+    """
+    Profil des règles: nombre d'évaluations, de déclenchements et temps cumulé de chaque règle
+
+    La sélectivité d'une règle (déclenchements / évaluations) et son coût moyen servent à
+    optimize_rule_order.
+    """
+
+    def __init__(self, rules: List[FilterRule]):
+        self.rules = rules
+        self.records = 0
+        self.evaluations = [0] * len(rules)
+        self.hits = [0] * len(rules)
+        self.nanoseconds = [0] * len(rules)
+
+    def _matches(self, rule: FilterRule, record: Dict[str, str]) -> bool:
+        start = time.perf_counter_ns()
+        matched = rule.matches(record)
+        self.nanoseconds[rule.rule_id] += time.perf_counter_ns() - start
+        self.evaluations[rule.rule_id] += 1
+        if matched:
+            self.hits[rule.rule_id] += 1
+        return matched
+
+    def evaluate(self, record: Dict[str, str], plan: EvaluationPlan) -> int:
+        """Comme evaluate_plan, en mesurant chaque évaluation de règle"""
+        self.records += 1
+        for rule, checks in plan:
+            if self._matches(rule, record):
+                for other in checks:
+                    if self._matches(other, record):
+                        return other.rule_id
+                return rule.rule_id
+        return NO_RULE
+
+    def score(self, rule: FilterRule) -> float:
+        """Sélectivité / coût moyen: déclenchements par microseconde d'évaluation (0 si jamais mesurée)"""
+        nanoseconds = self.nanoseconds[rule.rule_id]
+        return self.hits[rule.rule_id] * 1000 / nanoseconds if nanoseconds else 0.0
+
+    def report(self, plan: Optional[EvaluationPlan] = None) -> Dict:
+        """Rapport du profil (sérialisable en JSON)"""
+        regles = []
+        for rule in self.rules:
+            evaluations = self.evaluations[rule.rule_id]
+            nanoseconds = self.nanoseconds[rule.rule_id]
+            regles.append(
+                {
+                    "id": rule.code,
+                    "priorite": rule.priorite,
+                    "libelle": rule.libelle,
+                    "evaluations": evaluations,
+                    "declenchements": self.hits[rule.rule_id],
+                    "selectivite": self.hits[rule.rule_id] / evaluations if evaluations else 0.0,
+                    "temps_ms": nanoseconds / 1e6,
+                    "cout_moyen_ns": nanoseconds / evaluations if evaluations else 0.0,
+                    "score": self.score(rule),
+                }
+            )
+        plan = build_evaluation_plan(self.rules) if plan is None else plan
+        return {
+            "entrees": self.records,
+            "ordre_evaluation": [rule.code for rule, _ in plan],
+            "regles": regles,
+        }
+
+    def save(self, report_file: str, plan: Optional[EvaluationPlan] = None):
+        """Écrit le rapport JSON"""
+        with open(report_file, "w", encoding="utf-8") as file:
+            json.dump(self.report(plan), file, ensure_ascii=False, indent=2)
+
+
+def optimize_rule_order(rules: List[FilterRule], profiler: RuleProfiler) -> List[FilterRule]:
+    """
+    Ordre d'évaluation des règles par sélectivité / coût décroissant
+
+    Les règles les plus souvent déclenchées pour le moins de temps sont évaluées en premier; les règles
+    jamais mesurées restent à la fin dans l'ordre des priorités. À utiliser avec build_evaluation_plan,
+    qui garantit le même résultat que l'ordre des priorités.
+    """
+    return sorted(rules, key=lambda rule: (-profiler.score(rule), rule.rule_id))
+
+
+def encode_column(records: List[Dict[str, str]], field: str) -> Tuple["np.ndarray", List[Optional[str]]]:
+    """
+    Encode une colonne en codes catégoriels
+
+    Returns:
+        Tuple (code de chaque ligne, valeurs distinctes indexées par code, None pour une valeur absente)
+    """
+    try:
+        # Cas courant (CsvReader.records): la colonne existe dans chaque ligne, None si la ligne est trop courte
+        values = list(map(operator.itemgetter(field), records))
+    except KeyError:
+        values = [record.get(field) for record in records]
+    categories = list(dict.fromkeys(values))
+    index = {category: code for code, category in enumerate(categories)}
+    codes = np.fromiter(map(index.__getitem__, values), dtype=np.int32, count=len(values))
+    return codes, categories
+
 
+def parse_categories(categories: List[Optional[str]], value_type: str) -> Tuple["np.ndarray", "np.ndarray"]:
+    """
+    Convertit chaque valeur distincte une seule fois (mêmes règles que FilterRule: vide ou invalide -> NaN)
+
+    Returns:
+        Tuple (valeurs numériques, masque des valeurs valides)
+    """
+    parse = VALUE_PARSERS[value_type]
+    values = np.full(len(categories), np.nan)
+    valid = np.zeros(len(categories), dtype=bool)
+    for code, category in enumerate(categories):
+        text = (category or "").strip()
+        if not text:
+            continue
+        try:
+            values[code] = parse(text)
+            valid[code] = True
+        except ValueError:
+            pass
+    return values, valid
+
+
+def schedule_rule_mask(
+    rule: FilterRule, encoded_column: Callable[[str], Tuple["np.ndarray", List[Optional[str]]]]
+) -> "np.ndarray":
+    """
+    Masque d'une règle de type "horaires" (sans la restriction de métier)
 
-def apply_filter_rules(record: Dict[str, str]) -> tuple[str, str]:
+    Chaque texte d'horaires et chaque valeur de Creneaux_ouverture distincts ne sont analysés et testés
+    qu'une fois; Creneaux_ouverture l'emporte quand il est renseigné, comme dans horaires.record_schedule.
+    """
+    predicate = SCHEDULE_PREDICATES[rule.operateur]
+    window = parse_window(rule.seuil)
+
+    def category_matches(categories: List[Optional[str]], parse) -> Tuple["np.ndarray", "np.ndarray"]:
+        known = np.zeros(len(categories), dtype=bool)
+        matched = np.zeros(len(categories), dtype=bool)
+        for code, category in enumerate(categories):
+            bitmap = parse(category or "")
+            if bitmap is not None:
+                known[code] = True
+                matched[code] = predicate(bitmap, window)
+        return known, matched
+
+    text_codes, text_categories = encoded_column(HOURS_FIELD)
+    _, text_matched = category_matches(text_categories, parse_opening_hours)
+    slot_codes, slot_categories = encoded_column(SLOTS_FIELD)
+    slot_known, slot_matched = category_matches(slot_categories, parse_bitmap)
+    return np.where(slot_known[slot_codes], slot_matched[slot_codes], text_matched[text_codes])
+
+
+def evaluate_rules_columnar(records: List[Dict[str, str]], rules: List[FilterRule]) -> "np.ndarray":
+    """
+    Évalue les règles colonne par colonne (NumPy)
+
+    Chaque colonne utilisée est convertie une seule fois en tableau (NaN pour les valeurs manquantes),
+    Metier_normalise est encodé en codes catégoriels, puis chaque règle devient un masque booléen.
+    Les masques sont appliqués de la priorité la plus faible à la plus forte: la règle prioritaire
+    vérifiée l'emporte, comme dans evaluate_rules.
+
+    Returns:
+        Identifiant de règle de chaque enregistrement (NO_RULE si aucune)
+    """
+    columns: Dict[Tuple[str, str], Tuple["np.ndarray", "np.ndarray"]] = {}
+    encoded: Dict[str, Tuple["np.ndarray", List[Optional[str]]]] = {}
+
+    def encoded_column(field: str) -> Tuple["np.ndarray", List[Optional[str]]]:
+        if field not in encoded:
+            encoded[field] = encode_column(records, field)
+        return encoded[field]
+
+    rule_ids = np.full(len(records), NO_RULE, dtype=np.int32)
+    with np.errstate(invalid="ignore"):
+        for rule in reversed(rules):
+            if rule.type == SCHEDULE_TYPE:
+                mask = schedule_rule_mask(rule, encoded_column)
+            else:
+                key = (rule.champ, rule.type)
+                if key not in columns:
+                    codes, categories = encoded_column(rule.champ)
+                    values, valid = parse_categories(categories, rule.type)
+                    columns[key] = (values[codes], valid[codes])
+                values, valid = columns[key]
+                mask = valid & OPERATORS[rule.operateur](values, rule.seuil)
+
+            if rule.metier:
+                codes, categories = encoded_column("Metier_normalise")
+                metier = rule.metier.lower()
+                mask &= np.array([(category or "").strip().lower() == metier for category in categories], dtype=bool)[codes]
+            rule_ids[mask] = rule.rule_id
+
+    return rule_ids
+
+
+def apply_filter_rules(record: Dict[str, str], rules: Optional[List[FilterRule]] = None) -> tuple[str, str]:
     """
     Applique les règles métier pour déterminer si une entreprise doit être filtrée
 
-    Règles:
+    Règles par défaut (data/regles_filtrage.json):
     1. Si nombre_avis < 20 alors Filtré = "OUI"
     2. Si jours_fermeture > 3 alors Filtré = "OUI"
     3. Si metier_normalise = "Restaurant" et note < 4.5 alors Filtré = "OUI"
@@ -23,76 +502,285 @@ def apply_filter_rules(record: Dict[str, str]) -> tuple[str, str]:
 
     Args:
         record: Dictionnaire contenant les données d'une entreprise
+        rules: Règles compilées (règles par défaut si absent)
 
     Returns:
         Tuple (filtré, raison) - ("OUI"/"NON", raison du filtrage ou "")
     """
-    try:
-        # Récupération des valeurs avec gestion des champs vides
-        nombre_avis = record.get("Nombre_avis", "").strip()
-        jours_fermeture = record.get("Jours_fermeture", "").strip()
-        note = record.get("Note", "").strip()
-        metier_normalise = record.get("Metier_normalise", "").strip()
-
-        # Règle 1: Nombre d'avis < 20
-        if nombre_avis:
-            try:
-                nb_avis = int(nombre_avis)
-                if nb_avis < 20:
-                    return ("OUI", "Nombre d'avis insuffisant (< 20)")
-            except ValueError:
-                # Si conversion impossible, ignorer cette règle
-                pass
+    rules = default_rules() if rules is None else rules
+    rule_id = evaluate_rules(record, rules)
+    if rule_id == NO_RULE:
+        return ("NON", NO_FILTER_REASON)
+    return ("OUI", rules[rule_id].raison)
+
+
+def build_incremental_context(rules: List[FilterRule]) -> Tuple[str, List[str], Dict[str, int]]:
+    """Prépare le mode incrémental: (version des règles, champs lus par les règles, règle par raison)"""
+    rules_by_reason: Dict[str, int] = {}
+    for rule in rules:
+        rules_by_reason.setdefault(rule.raison, rule.rule_id)
+    return rules_version(rules), rule_fields(rules), rules_by_reason
+
+
+def classify_records(
+    records: List[Dict[str, str]],
+    rules: List[FilterRule],
+    vectorized: bool = False,
+    incremental_context: Optional[Tuple[str, List[str], Dict[str, int]]] = None,
+    plan: Optional[EvaluationPlan] = None,
+    profiler: Optional[RuleProfiler] = None,
+) -> Tuple[List[int], int]:
+    """
+    Détermine la règle appliquée à chaque enregistrement d'un lot
 
-        # Règle 2: Jours de fermeture > 3
-        if jours_fermeture:
-            try:
-                jours_fermes = int(jours_fermeture)
-                if jours_fermes > 3:
-                    return ("OUI", "Trop de jours de fermeture (> 3)")
-            except ValueError:
-                # Si conversion impossible, ignorer cette règle
-                pass
-
-        # Règle 3: Restaurant avec note < 4.5
-        if metier_normalise.lower() == "restaurant":
-            if note:
-                try:
-                    note_float = float(note)
-                    if note_float < 4.5:
-                        return ("OUI", "Restaurant - Note insuffisante (< 4.5)")
-                except ValueError:
-                    # Si conversion impossible, ignorer cette règle
-                    pass
-
-        # Règle 4: Coiffeur_Barbier avec note < 4
-        if metier_normalise.lower() == "coiffeur_barbier":
-            if note:
-                try:
-                    note_float = float(note)
-                    if note_float < 4.0:
-                        return ("OUI", "Coiffeur/Barbier - Note insuffisante (< 4.0)")
-                except ValueError:
-                    # Si conversion impossible, ignorer cette règle
-                    pass
-
-        # Si aucune règle ne s'applique, ne pas filtrer
-        return ("NON", "Pas de filtre")
+    En mode incrémental, l'empreinte de chaque enregistrement est recalculée et écrite dans
+    Empreinte_Filtrage; le résultat précédent est conservé quand elle n'a pas changé.
+    L'évaluation ligne par ligne suit le plan d'évaluation s'il est donné, et est mesurée par le
+    profileur s'il est donné.
+
+    Returns:
+        Tuple (identifiant de règle de chaque enregistrement, nombre d'évaluations évitées)
+    """
+    rule_ids: List[Optional[int]] = [None] * len(records)
+    if incremental_context is not None:
+        version, fields, rules_by_reason = incremental_context
+        for index, record in enumerate(records):
+            fingerprint = record_fingerprint(record, fields, version)
+            if record.get(FINGERPRINT_FIELD) == fingerprint:
+                rule_ids[index] = previous_rule_id(record, rules_by_reason)
+            record[FINGERPRINT_FIELD] = fingerprint
+    pending = [index for index, rule_id in enumerate(rule_ids) if rule_id is None]
+    skipped_count = len(records) - len(pending)
+
+    if vectorized:
+        pending_ids = evaluate_rules_columnar([records[index] for index in pending], rules).tolist()
+    elif profiler is not None:
+        plan = build_evaluation_plan(rules) if plan is None else plan
+        pending_ids = [profiler.evaluate(records[index], plan) for index in pending]
+    elif plan is not None:
+        pending_ids = [evaluate_plan(records[index], plan) for index in pending]
+    else:
+        pending_ids = [evaluate_rules(records[index], rules) for index in pending]
+    for index, rule_id in zip(pending, pending_ids):
+        rule_ids[index] = rule_id
+
+    return rule_ids, skipped_count
+
+
+def iter_batches(reader: Iterable[Dict[str, str]], batch_size: int) -> Iterator[List[Dict[str, str]]]:
+    """Découpe un flux d'enregistrements en lots de taille bornée"""
+    batch: List[Dict[str, str]] = []
+    for record in reader:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def new_filter_stats(rules: List[FilterRule]) -> Dict:
+    """Compteurs pour les statistiques (un compteur par règle, indexé par son identifiant)"""
+    return {"total": 0, "filtres": 0, "evites": 0, "regles": [0] * len(rules)}
+
+
+def apply_rule_ids(
+    records: List[Dict[str, str]], rule_ids: List[int], rules: List[FilterRule], stats: Dict, verbose: bool = False
+):
+    """Met à jour Filtré et Raison_Filtrage d'un lot d'après la règle de chaque enregistrement"""
+    stats["total"] += len(records)
+    for record, rule_id in zip(records, rule_ids):
+        original_filtre = record.get("Filtré", "NON")
+
+        # Application des règles métier
+        if rule_id == NO_RULE:
+            new_filtre, raison = "NON", NO_FILTER_REASON
+        else:
+            new_filtre, raison = "OUI", rules[rule_id].raison
+            # Comptage pour les statistiques
+            stats["filtres"] += 1
+            stats["regles"][rule_id] += 1
+
+        # Mise à jour des champs
+        record["Filtré"] = new_filtre
+        record["Raison_Filtrage"] = raison
+
+        # Affichage détaillé si demandé
+        if verbose and (new_filtre != original_filtre):
+            print(f"🔄 {record.get('Nom', 'Inconnu')}: {original_filtre} → {new_filtre} ({raison})")
+
+
+def print_filter_stats(stats: Dict, rules: List[FilterRule], incremental: bool = False):
+    """Affiche les statistiques de filtrage"""
+    print(f"📊 {stats['total']} entrées trouvées")
+    print()
+    print("📈 Statistiques de filtrage:")
+    print(f"   Total des entrées: {stats['total']}")
+    print(f"   Entrées filtrées (Filtré=OUI): {stats['filtres']}")
+    print(f"   Entrées non filtrées (Filtré=NON): {stats['total'] - stats['filtres']}")
+    if incremental:
+        print(f"   Évaluations évitées (empreinte inchangée): {stats['evites']}")
+    print()
+    print("📋 Détail des règles appliquées:")
+    for rule in rules:
+        print(f"   Règle {rule.rule_id + 1} ({rule.libelle}): {stats['regles'][rule.rule_id]} entrées")
+    print()
+
+
+def resolve_evaluation_mode(vectorized: bool, profile_file: Optional[str], optimize: bool) -> Tuple[bool, Optional[str], bool]:
+    """Désactive les options incompatibles (NumPy absent, profil en mode vectorisé) en prévenant l'utilisateur"""
+    if vectorized and np is None:
+        print("⚠️  NumPy non installé: évaluation ligne par ligne")
+        vectorized = False
+    if vectorized and (profile_file or optimize):
+        print("⚠️  Le profil et l'optimisation de l'ordre des règles ne s'appliquent qu'à l'évaluation ligne par ligne")
+        profile_file, optimize = None, False
+    return vectorized, profile_file, optimize
+
+
+def open_filter_input(stack: ExitStack, input_file: str, output_file: str):
+    """
+    Ouvre l'entrée du filtrage: CsvReader, ou ColumnarTable du dossier de sortie pour un historique colonnaire
+    (le dossier de sortie est une copie de l'entrée dont les colonnes de résultat sont réécrites)
+    """
+    if not is_columnar(input_file):
+        return stack.enter_context(CsvReader(input_file))
+    if os.path.abspath(output_file) != os.path.abspath(input_file):
+        copy_columnar(input_file, output_file)
+    return stack.enter_context(ColumnarTable(output_file))
+
+
+def check_filter_columns(fieldnames: Optional[List[str]]) -> bool:
+    """Vérifie que les colonnes requises sont présentes (elles doivent être créées par maj_historique)"""
+    if not fieldnames:
+        print("❌ Erreur: Impossible de lire les colonnes du fichier")
+        return False
+
+    missing_columns = [column for column in ("Filtré", "Raison_Filtrage") if column not in fieldnames]
+    if missing_columns:
+        print(f"❌ Erreur: Colonnes requises manquantes: {', '.join(missing_columns)}")
+        print(f"   Le fichier d'entrée doit être généré par maj_historique.py")
+        print(f"   Colonnes disponibles: {', '.join(fieldnames)}")
+        return False
+
+    print(f"📋 Colonnes détectées: {', '.join(fieldnames)}")
+    print()
+    return True
 
-    except Exception as e:
-        print(f"⚠️  Erreur lors de l'application des règles pour {record.get('Nom', 'Inconnu')}: {e}")
-        return ("NON", "Pas de filtre")
 
+def open_filter_output(
+    stack: ExitStack, source, temp_output: str, rules: List[FilterRule], incremental: bool, verbose: bool
+) -> Tuple[Iterator[Dict[str, str]], Callable[[List[Dict[str, str]]], None]]:
+    """
+    Prépare la lecture des enregistrements et l'écriture des lots filtrés
+
+    En CSV, chaque lot est écrit en entier dans le fichier temporaire; en colonnaire, seules les colonnes
+    du filtrage sont lues et seules les colonnes de résultat sont réécrites.
 
-def process_filter_file(input_file: str, output_file: str, verbose: bool = False):
+    Returns:
+        Tuple[Iterator, Callable]: (enregistrements à filtrer, écriture d'un lot)
+    """
+    if isinstance(source, CsvReader):
+        fieldnames = list(source.fieldnames)
+        if incremental and FINGERPRINT_FIELD not in fieldnames:
+            fieldnames.append(FINGERPRINT_FIELD)
+        return source.records(), stack.enter_context(CsvWriter(temp_output, fieldnames)).write_records
+
+    columns = filter_columns(rules, incremental, verbose)
+    print(f"📦 Historique colonnaire: {len(source.existing(columns))} colonne(s) lue(s) sur {len(source.fieldnames)}")
+    print()
+    records_source = source.reader(columns).records()
+    result_columns = ["Filtré", "Raison_Filtrage"] + ([FINGERPRINT_FIELD] if incremental else [])
+    update = stack.enter_context(source.update_columns(result_columns))
+    result_values = operator.itemgetter(*result_columns)
+
+    def write_batch(records: List[Dict[str, str]]):
+        update.writerows(map(result_values, records))
+
+    return records_source, write_batch
+
+
+def filter_batches(
+    records_source: Iterable[Dict[str, str]],
+    write_batch: Callable[[List[Dict[str, str]]], None],
+    rules: List[FilterRule],
+    stats: Dict,
+    vectorized: bool = False,
+    incremental: bool = False,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    profile_file: Optional[str] = None,
+    optimize: bool = False,
+    verbose: bool = False,
+) -> Tuple[EvaluationPlan, Optional[RuleProfiler]]:
+    """
+    Évalue et écrit les enregistrements lot par lot
+
+    Returns:
+        Tuple[EvaluationPlan, Optional[RuleProfiler]]: (plan d'évaluation final, profil des règles)
+    """
+    incremental_context = build_incremental_context(rules) if incremental else None
+    plan = build_evaluation_plan(rules)
+    profiler = RuleProfiler(rules) if profile_file or optimize else None
+
+    for records in iter_batches(records_source, batch_size):
+        rule_ids, batch_skipped = classify_records(records, rules, vectorized, incremental_context, plan, profiler)
+        if optimize:
+            # Le premier lot, évalué dans l'ordre des priorités, sert de mesure
+            plan = build_evaluation_plan(rules, optimize_rule_order(rules, profiler))
+            optimize = False
+            if not profile_file:
+                profiler = None
+        stats["evites"] += batch_skipped
+        apply_rule_ids(records, rule_ids, rules, stats, verbose)
+        write_batch(records)
+
+    return plan, profiler
+
+
+def print_rule_order(plan: EvaluationPlan, profile_file: Optional[str] = None):
+    """Affiche l'ordre d'évaluation des règles retenu (et le fichier du profil)"""
+    print(f"⚡ Ordre d'évaluation des règles: {', '.join(rule.code for rule, _ in plan)}")
+    if profile_file:
+        print(f"⏱️  Profil des règles sauvegardé: {profile_file}")
+    print()
+
+
+def process_filter_file(
+    input_file: str,
+    output_file: str,
+    verbose: bool = False,
+    rules: Optional[List[FilterRule]] = None,
+    vectorized: bool = False,
+    incremental: bool = False,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    profile_file: Optional[str] = None,
+    optimize: bool = False,
+):
     """
     Traite le fichier d'entrée et applique les règles de filtrage
 
+    Le fichier est traité en flux, par lots de batch_size lignes (mémoire constante): chaque lot est lu,
+    évalué puis écrit dans un fichier temporaire, qui remplace le fichier de sortie à la fin
+    (la sortie peut donc être le fichier d'entrée).
+    Un historique colonnaire (historique_colonnaire.py) n'est lu que sur les colonnes du filtrage
+    (filter_columns); seules les colonnes de résultat du dossier de sortie sont réécrites.
+
     Args:
-        input_file: Chemin vers le fichier d'entrée
-        output_file: Chemin vers le fichier de sortie
+        input_file: Chemin vers le fichier d'entrée (CSV ou dossier colonnaire)
+        output_file: Chemin vers le fichier de sortie (dossier colonnaire si l'entrée est colonnaire)
         verbose: Afficher les détails du traitement
+        rules: Règles compilées (règles par défaut si absent)
+        vectorized: Évaluation colonne par colonne avec NumPy (ligne par ligne si NumPy est absent)
+        incremental: Ne réévalue que les enregistrements dont l'empreinte (champs utilisés par les règles
+            et version des règles) a changé depuis le filtrage précédent; l'empreinte est écrite dans
+            la colonne Empreinte_Filtrage
+        batch_size: Nombre de lignes évaluées ensemble
+        profile_file: Fichier JSON du profil des règles (évaluations, déclenchements, temps cumulé)
+        optimize: Réordonne l'évaluation des règles par sélectivité / coût, mesurés sur le premier lot
+            (la raison du filtrage reste celle de la règle la plus prioritaire)
     """
+    rules = default_rules() if rules is None else rules
+    vectorized, profile_file, optimize = resolve_evaluation_mode(vectorized, profile_file, optimize)
 
     if not os.path.exists(input_file):
         print(f"❌ Erreur: Fichier d'entrée '{input_file}' non trouvé")
@@ -103,94 +791,36 @@ def process_filter_file(input_file: str, output_file: str, verbose: bool = False
     print(f"   Sortie: {output_file}")
     print()
 
-    try:
-        # Lecture du fichier d'entrée
-        with open(input_file, "r", encoding="utf-8") as infile:
-            reader = csv.DictReader(infile)
-            fieldnames = reader.fieldnames
-
-            if not fieldnames:
-                print("❌ Erreur: Impossible de lire les colonnes du fichier")
-                return
-
-            # Vérifier que les colonnes requises sont présentes (elles doivent être créées par maj_historique)
-            required_columns = ["Filtré", "Raison_Filtrage"]
-            missing_columns = [col for col in required_columns if col not in fieldnames]
+    # Écriture dans un fichier temporaire du même dossier, renommé à la fin (remplacement atomique)
+    temp_output = output_file + ".tmp"
 
-            if missing_columns:
-                print(f"❌ Erreur: Colonnes requises manquantes: {', '.join(missing_columns)}")
-                print(f"   Le fichier d'entrée doit être généré par maj_historique.py")
-                print(f"   Colonnes disponibles: {', '.join(fieldnames)}")
+    try:
+        with ExitStack() as stack:
+            source = open_filter_input(stack, input_file, output_file)
+            if not check_filter_columns(source.fieldnames):
                 return
-
-            print(f"📋 Colonnes détectées: {', '.join(fieldnames)}")
-
-            # Compteurs pour les statistiques
-            total_records = 0
-            filtered_count = 0
-            rule1_count = 0  # Nombre d'avis < 20
-            rule2_count = 0  # Jours fermeture > 3
-            rule3_count = 0  # Restaurant note < 4.5
-            rule4_count = 0  # Coiffeur_Barbier note < 4
-
-            # Lecture de tous les enregistrements
-            records = list(reader)
-            total_records = len(records)
-
-            print(f"📊 {total_records} entrées trouvées")
-            print()
-
-            # Traitement des enregistrements
-            for record in records:
-                original_filtre = record.get("Filtré", "NON")
-
-                # Application des règles métier
-                new_filtre, raison = apply_filter_rules(record)
-
-                # Mise à jour des champs
-                record["Filtré"] = new_filtre
-                record["Raison_Filtrage"] = raison
-
-                # Comptage pour les statistiques
-                if new_filtre == "OUI":
-                    filtered_count += 1
-
-                    # Détail des règles appliquées (pour les statistiques)
-                    if "Nombre d'avis insuffisant" in raison:
-                        rule1_count += 1
-                    elif "Trop de jours de fermeture" in raison:
-                        rule2_count += 1
-                    elif "Restaurant - Note insuffisante" in raison:
-                        rule3_count += 1
-                    elif "Coiffeur/Barbier - Note insuffisante" in raison:
-                        rule4_count += 1
-
-                # Affichage détaillé si demandé
-                if verbose and (new_filtre != original_filtre):
-                    print(f"🔄 {record.get('Nom', 'Inconnu')}: {original_filtre} → {new_filtre} ({raison})")
-
-        # Écriture du fichier de sortie
-        with open(output_file, "w", newline="", encoding="utf-8") as outfile:
-            writer = csv.DictWriter(outfile, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(records)
-
-        # Affichage des statistiques
-        print("📈 Statistiques de filtrage:")
-        print(f"   Total des entrées: {total_records}")
-        print(f"   Entrées filtrées (Filtré=OUI): {filtered_count}")
-        print(f"   Entrées non filtrées (Filtré=NON): {total_records - filtered_count}")
-        print()
-        print("📋 Détail des règles appliquées:")
-        print(f"   Règle 1 (Nombre d'avis < 20): {rule1_count} entrées")
-        print(f"   Règle 2 (Jours fermeture > 3): {rule2_count} entrées")
-        print(f"   Règle 3 (Restaurant note < 4.5): {rule3_count} entrées")
-        print(f"   Règle 4 (Coiffeur/Barbier note < 4.0): {rule4_count} entrées")
-        print()
+            records_source, write_batch = open_filter_output(stack, source, temp_output, rules, incremental, verbose)
+            stats = new_filter_stats(rules)
+            plan, profiler = filter_batches(
+                records_source, write_batch, rules, stats, vectorized, incremental, batch_size, profile_file, optimize, verbose
+            )
+
+        # Le fichier d'entrée est fermé: le remplacement fonctionne aussi sous Windows
+        if isinstance(source, CsvReader):
+            os.replace(temp_output, output_file)
+        if profile_file:
+            profiler.save(profile_file, plan)
+
+        print_filter_stats(stats, rules, incremental)
+        if optimize or profile_file:
+            print_rule_order(plan, profile_file)
         print(f"✅ Fichier filtré sauvegardé: {output_file}")
 
     except Exception as e:
         print(f"❌ Erreur lors du traitement: {e}")
+    finally:
+        if os.path.exists(temp_output):
+            os.remove(temp_output)
 
 
 def main():
@@ -199,7 +829,7 @@ def main():
         description="Applique des règles de filtrage métier aux entreprises",
         formatter_class=argparse.RawDescriptionHelpFormatter,
         epilog="""
-Règles de filtrage appliquées:
+Règles de filtrage par défaut (data/regles_filtrage.json):
   1. Si Nombre_avis < 20 alors Filtré = "OUI"
   2. Si Jours_fermeture > 3 alors Filtré = "OUI"
   3. Si Metier_normalise = "Restaurant" et Note < 4.5 alors Filtré = "OUI"
@@ -208,26 +838,85 @@ Règles de filtrage appliquées:
 Exemples d'usage:
   python Filters.py historique.csv historique_filtre.csv
   python Filters.py historique.csv historique_filtre.csv --verbose
+  python Filters.py historique.csv historique_filtre.csv --regles mes_regles.json
+  python Filters.py historique.csv historique_filtre.csv --vectorise
+  python Filters.py historique.csv historique.csv --incremental
+  python Filters.py historique.csv historique.csv --lot 50000
+  python Filters.py historique.csv historique_filtre.csv --profil profil_regles.json --optimise
         """,
     )
 
     parser.add_argument("input_file", help="Fichier CSV d'entrée (historique)")
     parser.add_argument("output_file", help="Fichier CSV de sortie (historique filtré)")
     parser.add_argument("--verbose", "-v", action="store_true", help="Afficher les détails du traitement")
+    parser.add_argument(
+        "--vectorise",
+        action="store_true",
+        help="Évaluation vectorisée des règles colonne par colonne (nécessite NumPy)",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Ne réévalue que les entrées dont les champs utilisés par les règles, ou les règles, ont changé",
+    )
+    parser.add_argument(
+        "--lot",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=f"Nombre de lignes lues, évaluées puis écrites ensemble (défaut: {DEFAULT_BATCH_SIZE})",
+    )
+    parser.add_argument(
+        "--profil", help="Écrit le profil des règles (évaluations, déclenchements, temps cumulé) dans ce fichier JSON"
+    )
+    parser.add_argument(
+        "--optimise",
+        action="store_true",
+        help="Évalue d'abord les règles les plus sélectives et les moins coûteuses (mesurées sur le premier lot)",
+    )
+    parser.add_argument(
+        "--regles", default=DEFAULT_RULES_FILE, help="Fichier JSON des règles de filtrage (défaut: data/regles_filtrage.json)"
+    )
 
     args = parser.parse_args()
 
     # Validation des arguments
-    if not args.input_file.endswith(".csv"):
-        print("❌ Erreur: Le fichier d'entrée doit être un fichier CSV")
+    if is_columnar(args.input_file):
+        if is_csv_path(args.output_file):
+            print("❌ Erreur: La sortie d'un historique colonnaire est un dossier colonnaire")
+            sys.exit(1)
+    elif not is_csv_path(args.input_file):
+        print("❌ Erreur: Le fichier d'entrée doit être un fichier CSV (ou un historique colonnaire)")
         sys.exit(1)
-
-    if not args.output_file.endswith(".csv"):
+    elif not is_csv_path(args.output_file):
         print("❌ Erreur: Le fichier de sortie doit être un fichier CSV")
         sys.exit(1)
 
+    if args.lot < 1:
+        print("❌ Erreur: --lot doit être au moins 1")
+        sys.exit(1)
+
+    # Compilation des règles (une seule fois, avant le traitement)
+    try:
+        rules = load_rules(args.regles)
+    except FileNotFoundError:
+        print(f"❌ Erreur: Fichier de règles '{args.regles}' non trouvé")
+        sys.exit(1)
+    except (ValueError, KeyError) as e:
+        print(f"❌ Erreur dans le fichier de règles '{args.regles}': {e}")
+        sys.exit(1)
+
     # Traitement
-    process_filter_file(args.input_file, args.output_file, args.verbose)
+    process_filter_file(
+        args.input_file,
+        args.output_file,
+        args.verbose,
+        rules,
+        args.vectorise,
+        args.incremental,
+        args.lot,
+        args.profil,
+        args.optimise,
+    )
 
 
 if __name__ == "__main__":
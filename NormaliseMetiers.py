@@ -1,10 +1,12 @@
 import csv
 import sys
 
+from fichiers_csv import CsvReader, CsvWriter, open_csv
+
 
 def charger_metiers_reference(fichier_reference):
     metiers = {}
-    with open(fichier_reference, newline="", encoding="utf-8") as ref_file:
+    with open_csv(fichier_reference) as ref_file:
         reader = csv.reader(ref_file)
         for row in reader:
             if len(row) >= 2:
@@ -12,20 +14,60 @@ def charger_metiers_reference(fichier_reference):
     return metiers
 
 
+def colonnes_sortie(input_fieldnames):
+    # Toutes les colonnes d'entrée sauf Metier, puis la colonne normalisée
+    output_fieldnames = []
+    for field in input_fieldnames:
+        if field != "Metier":  # On garde toutes les colonnes sauf Metier
+            output_fieldnames.append(field)
+    output_fieldnames.append("Metier_normalise")  # On ajoute la colonne normalisée
+    return output_fieldnames
+
+
+def normaliser_metier(metier, metiers_ref, stats):
+    """Métier normalisé d'un métier (déjà en minuscules), INCONNU(...) s'il est absent de la référence"""
+    if metier in metiers_ref:
+        stats["metiers_normalises"] += 1
+        return metiers_ref[metier]
+    stats["metiers_non_traites"] += 1
+    return f"INCONNU({metier})"
+
+
+def normaliser_lignes(lignes, input_fieldnames, metiers_ref, stats):
+    """Normalise le métier de chaque ligne (générateur) et met à jour les compteurs de stats"""
+    # Toutes les colonnes de sortie sauf la dernière (Metier_normalise) viennent du fichier d'entrée
+    colonnes_conservees = colonnes_sortie(input_fieldnames)[:-1]
+
+    for row in lignes:
+        stats["lignes_lues"] += 1
+        # Une ligne courte n'a pas de valeur (None) pour ses dernières colonnes
+        metier = (row.get("Metier") or "").strip().lower()
+
+        # Création de la ligne de sortie avec toutes les colonnes conservées
+        output_row = {field: row.get(field, "") for field in colonnes_conservees}
+        output_row["Metier_normalise"] = normaliser_metier(metier, metiers_ref, stats)
+
+        yield output_row
+
+
+def afficher_statistiques(stats):
+    print(f"\n=== Statistiques de traitement ===")
+    print(f"   Lignes lues: {stats['lignes_lues']}")
+    print(f"   Métiers normalisés: {stats['metiers_normalises']}")
+    print(f"   Métiers non traités (INCONNU): {stats['metiers_non_traites']}")
+
+    if stats["lignes_lues"] > 0:
+        pourcentage_normalise = (stats["metiers_normalises"] / stats["lignes_lues"]) * 100
+        print(f"   Taux de normalisation: {pourcentage_normalise:.1f}%")
+
+
 def convertir_csv(fichier_entree, fichier_sortie, fichier_reference):
     metiers_ref = charger_metiers_reference(fichier_reference)
 
     # Compteurs pour les statistiques
-    lignes_lues = 0
-    metiers_normalises = 0
-    metiers_non_traites = 0
-
-    with (
-        open(fichier_entree, newline="", encoding="utf-8") as csv_in,
-        open(fichier_sortie, "w", newline="", encoding="utf-8") as csv_out,
-    ):
-        reader = csv.DictReader(csv_in)
+    stats = {"lignes_lues": 0, "metiers_normalises": 0, "metiers_non_traites": 0}
 
+    with CsvReader(fichier_entree) as reader:
         # Détection automatique des colonnes d'entrée
         input_fieldnames = reader.fieldnames
         if not input_fieldnames:
@@ -34,46 +76,12 @@ def convertir_csv(fichier_entree, fichier_sortie, fichier_reference):
 
         print(f"Colonnes détectées dans le fichier d'entrée: {input_fieldnames}")
 
-        # Création des colonnes de sortie : toutes les colonnes d'entrée + Metier_normalise
-        output_fieldnames = []
-        for field in input_fieldnames:
-            if field != "Metier":  # On garde toutes les colonnes sauf Metier
-                output_fieldnames.append(field)
-        output_fieldnames.append("Metier_normalise")  # On ajoute la colonne normalisée
-
-        writer = csv.DictWriter(csv_out, fieldnames=output_fieldnames)
-        writer.writeheader()
-
-        for row in reader:
-            lignes_lues += 1
-            metier = row.get("Metier", "").strip().lower()
-
-            if metier in metiers_ref:
-                metier_normalise = metiers_ref[metier]
-                metiers_normalises += 1
-            else:
-                metier_normalise = f"INCONNU({metier})"
-                metiers_non_traites += 1
-
-            # Création de la ligne de sortie avec toutes les colonnes conservées
-            output_row = {}
-            for field in output_fieldnames:
-                if field == "Metier_normalise":
-                    output_row[field] = metier_normalise
-                elif field in input_fieldnames:
-                    output_row[field] = row.get(field, "")
-
-            writer.writerow(output_row)
+        # Même normalisation que l'étape NormaliseMetiers de pipeline.py, écrite en flux
+        with CsvWriter(fichier_sortie, colonnes_sortie(input_fieldnames)) as writer:
+            writer.write_records(normaliser_lignes(reader.records(), input_fieldnames, metiers_ref, stats))
 
     # Affichage des statistiques
-    print(f"\n=== Statistiques de traitement ===")
-    print(f"   Lignes lues: {lignes_lues}")
-    print(f"   Métiers normalisés: {metiers_normalises}")
-    print(f"   Métiers non traités (INCONNU): {metiers_non_traites}")
-
-    if lignes_lues > 0:
-        pourcentage_normalise = (metiers_normalises / lignes_lues) * 100
-        print(f"   Taux de normalisation: {pourcentage_normalise:.1f}%")
+    afficher_statistiques(stats)
 
 
 if __name__ == "__main__":
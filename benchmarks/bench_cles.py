@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark des clés de dédoublonnage: mémoire et débit
+Compare l'approche historique (hash MD5 hexadécimal dans un set Python) aux empreintes
+binaires blake2b de cles_compactes stockées dans un CompactKeySet (64 et 128 bits)
+"""
+
+import argparse
+import hashlib
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterator
+
+# Ajouter le répertoire parent au path pour importer les modules du projet
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from cles_compactes import CompactKeySet, digest_key
+
+
+def generate_keys(count: int) -> Iterator[str]:
+    """Génère des clés composites synthétiques nom|adresse|ville|métier"""
+    for i in range(count):
+        yield f"entreprise {i}|{i % 300} rue de la republique|ville {i % 5000}|metier {i % 27}"
+
+
+def bench_md5_set(count: int) -> Dict[str, float]:
+    """Approche historique: hexdigest MD5 (32 caractères) dans un set"""
+    seen = set()
+    start = time.perf_counter()
+    for key in generate_keys(count):
+        seen.add(hashlib.md5(key.encode("utf-8")).hexdigest())
+    insert_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    hits = sum(1 for key in generate_keys(count) if hashlib.md5(key.encode("utf-8")).hexdigest() in seen)
+    lookup_seconds = time.perf_counter() - start
+
+    # Tous les hexdigest ont la même taille: un échantillon suffit
+    sample = hashlib.md5(b"").hexdigest()
+    memory = sys.getsizeof(seen) + len(seen) * sys.getsizeof(sample)
+    return {"insert_s": insert_seconds, "lookup_s": lookup_seconds, "memory_bytes": memory, "hits": hits}
+
+
+def bench_compact_set(count: int, digest_size: int) -> Dict[str, float]:
+    """Empreintes blake2b binaires dans un CompactKeySet"""
+    seen = CompactKeySet(digest_size)
+    start = time.perf_counter()
+    for key in generate_keys(count):
+        seen.add(digest_key(key, digest_size))
+    insert_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    hits = sum(1 for key in generate_keys(count) if digest_key(key, digest_size) in seen)
+    lookup_seconds = time.perf_counter() - start
+
+    return {"insert_s": insert_seconds, "lookup_s": lookup_seconds, "memory_bytes": seen.memory_bytes(), "hits": hits}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark mémoire/débit des clés de dédoublonnage")
+    parser.add_argument("--keys", "-n", type=int, default=10_000_000, help="Nombre de clés (défaut: 10 000 000)")
+    args = parser.parse_args()
+
+    print(f"🏁 Benchmark des clés ({args.keys:,} clés)")
+    print(f"{'Approche':<28} {'Mémoire':>12} {'Octets/clé':>11} {'Insertion':>14} {'Recherche':>14}")
+
+    approaches = [
+        ("set + MD5 hex (actuel)", lambda: bench_md5_set(args.keys)),
+        ("CompactKeySet 64 bits", lambda: bench_compact_set(args.keys, 8)),
+        ("CompactKeySet 128 bits", lambda: bench_compact_set(args.keys, 16)),
+    ]
+    for name, run in approaches:
+        result = run()
+        if result["hits"] != args.keys:
+            print(f"❌ {name}: {result['hits']} clés retrouvées sur {args.keys}")
+            sys.exit(1)
+        print(
+            f"{name:<28} {result['memory_bytes'] / 1024 / 1024:>9.1f} Mo {result['memory_bytes'] / args.keys:>11.1f}"
+            f" {args.keys / result['insert_s']:>10,.0f} c/s {args.keys / result['lookup_s']:>10,.0f} c/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Benchmark de l'historique colonnaire
+Compare, sur le même historique en CSV et en dossier colonnaire (historique_colonnaire.py), le filtrage
+complet (Filters.process_filter_file) et la lecture des colonnes de la clé de dédoublonnage
+(supprime_doublons.DEDUPE_COLUMNS), et vérifie que les résultats sont identiques
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+# Ajouter le répertoire parent au path pour importer les modules du projet
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from fichiers_csv import CsvReader, CsvWriter
+from Filters import process_filter_file
+from historique_colonnaire import ColumnarTable, import_csv, open_reader
+from supprime_doublons import DEDUPE_COLUMNS
+
+FIELDNAMES = [
+    "Nom",
+    "Adresse",
+    "Ville",
+    "Metier_normalise",
+    "Heures_ouverture",
+    "Nombre_avis",
+    "Note",
+    "Jours_fermeture",
+    "Place_id",
+    "Date_introduction",
+    "Date_verification",
+    "Actif",
+    "Filtré",
+    "Raison_Filtrage",
+]
+
+METIERS = ["Restaurant", "Coiffeur_Barbier", "Boulanger_Patissier", "Pharmacien", "Fleuriste"]
+
+HOURS = "; ".join(
+    f"{day}: 09:00 – 12:30, 14:00 – 19:00" for day in ("lundi", "mardi", "mercredi", "jeudi", "vendredi", "samedi")
+)
+
+
+def generate_file(path: str, rows: int):
+    """Génère un historique synthétique"""
+    with CsvWriter(path, FIELDNAMES) as writer:
+        for i in range(rows):
+            writer.writerow(
+                [
+                    f"Entreprise {i}",
+                    f"{i % 300} rue de la République",
+                    f"Ville {i % 5000}",
+                    METIERS[i % len(METIERS)],
+                    HOURS + "; dimanche: Fermé",
+                    str((i * 7) % 400),
+                    f"{3 + (i % 21) / 10:.1f}",
+                    str(i % 5),
+                    f"ChIJ{i:012d}",
+                    "2024-01-15",
+                    "2024-06-01",
+                    "Oui",
+                    "NON",
+                    "",
+                ]
+            )
+
+
+def timed(function: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        function()
+    return time.perf_counter() - start
+
+
+def print_result(name: str, csv_seconds: float, columnar_seconds: float):
+    print(f"{name:<34} {csv_seconds:>7.2f}s {columnar_seconds:>10.2f}s {csv_seconds / columnar_seconds:>6.2f}x")
+
+
+def count_keys(path: str) -> int:
+    """Lecture des colonnes de la clé de dédoublonnage"""
+    with open_reader(path, DEDUPE_COLUMNS) as reader:
+        return len({tuple(row) for row in reader})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de l'historique colonnaire")
+    parser.add_argument("--rows", "-n", type=int, default=300_000, help="Nombre de lignes (défaut: 300 000)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench_colonnaire_") as work_dir:
+        csv_file = os.path.join(work_dir, "historique.csv")
+        columnar_dir = os.path.join(work_dir, "historique_colonnes")
+        generate_file(csv_file, args.rows)
+        import_seconds = timed(lambda: import_csv(csv_file, columnar_dir))
+        print(f"🏁 Benchmark colonnaire ({args.rows:,} lignes, {os.path.getsize(csv_file) / 1024 / 1024:.1f} Mo)")
+        print(f"   Import CSV -> colonnaire: {import_seconds:.2f}s")
+        print(f"{'Étape':<34} {'CSV':>8} {'Colonnaire':>11} {'Gain':>7}")
+
+        filtered_csv = os.path.join(work_dir, "filtre.csv")
+        filtered_dir = os.path.join(work_dir, "filtre_colonnes")
+        csv_seconds = timed(lambda: process_filter_file(csv_file, filtered_csv))
+        columnar_seconds = timed(lambda: process_filter_file(columnar_dir, filtered_dir))
+        print_result("Filtrage (process_filter_file)", csv_seconds, columnar_seconds)
+
+        keys = {}
+        csv_seconds = timed(lambda: keys.setdefault("csv", count_keys(csv_file)))
+        columnar_seconds = timed(lambda: keys.setdefault("colonnaire", count_keys(columnar_dir)))
+        print_result("Colonnes de la clé (dédoublonnage)", csv_seconds, columnar_seconds)
+
+        with CsvReader(filtered_csv) as reader:
+            csv_results = [row[-2:] for row in reader]
+        with ColumnarTable(filtered_dir) as table, table.reader(["Filtré", "Raison_Filtrage"]) as reader:
+            columnar_results = list(reader)
+        if csv_results != columnar_results or keys["csv"] != keys["colonnaire"]:
+            print("❌ Les résultats colonnaires diffèrent des résultats CSV")
+            sys.exit(1)
+        print("✅ Résultats identiques")
+
+
+if __name__ == "__main__":
+    main()
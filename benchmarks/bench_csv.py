@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la lecture et de l'écriture CSV
+Compare csv.DictReader / csv.DictWriter (approche historique des scripts) au module fichiers_csv:
+enregistrements en dictionnaires (CsvReader.records / CsvWriter.write_records), lignes en listes
+accédées par index, et lignes en listes dans un fichier compressé gzip. Vérifie que les fichiers
+produits sont identiques.
+"""
+
+import argparse
+import csv
+import gzip
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict
+
+# Ajouter le répertoire parent au path pour importer les modules du projet
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from fichiers_csv import CsvReader, CsvWriter
+
+FIELDNAMES = [
+    "Nom",
+    "Adresse",
+    "Ville",
+    "Metier_normalise",
+    "Heures_ouverture",
+    "Nombre_avis",
+    "Note",
+    "Jours_fermeture",
+    "Place_id",
+    "Date_introduction",
+    "Date_verification",
+    "Actif",
+    "Filtré",
+    "Raison_Filtrage",
+]
+
+
+def generate_file(path: str, rows: int):
+    """Génère un historique synthétique"""
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(FIELDNAMES)
+        for i in range(rows):
+            writer.writerow(
+                [
+                    f"Entreprise {i}",
+                    f"{i % 300} rue de la République",
+                    f"Ville {i % 5000}",
+                    "Restaurant",
+                    "lundi: 12:00 – 14:30, 19:00 – 22:30; mardi: Fermé",
+                    str((i * 7) % 400),
+                    f"{3 + (i % 21) / 10:.1f}",
+                    str(i % 5),
+                    f"ChIJ{i:012d}",
+                    "2024-01-15",
+                    "2024-06-01",
+                    "Oui",
+                    "Non",
+                    "",
+                ]
+            )
+
+
+def copy_dict(input_file: str, output_file: str) -> int:
+    """Approche historique: csv.DictReader puis csv.DictWriter, accès aux colonnes par nom"""
+    count = 0
+    with open(input_file, "r", encoding="utf-8") as infile:
+        with open(output_file, "w", newline="", encoding="utf-8") as outfile:
+            reader = csv.DictReader(infile)
+            writer = csv.DictWriter(outfile, fieldnames=reader.fieldnames)
+            writer.writeheader()
+            for record in reader:
+                count += record["Nom"] != ""
+                writer.writerow(record)
+    return count
+
+
+def copy_records(input_file: str, output_file: str) -> int:
+    """fichiers_csv, enregistrements en dictionnaires"""
+    count = 0
+    with CsvReader(input_file) as reader, CsvWriter(output_file, reader.fieldnames) as writer:
+        for record in reader.records():
+            count += record["Nom"] != ""
+            writer.write_record(record)
+    return count
+
+
+def copy_rows(input_file: str, output_file: str) -> int:
+    """fichiers_csv, lignes en listes et colonne accédée par index précalculé"""
+    count = 0
+    with CsvReader(input_file) as reader, CsvWriter(output_file, reader.fieldnames) as writer:
+        nom = reader.schema.index["Nom"]
+        for row in reader:
+            count += row[nom] != ""
+            writer.writerow(row)
+    return count
+
+
+def bench(copy: Callable[[str, str], int], input_file: str, output_file: str, rows: int) -> Dict[str, float]:
+    start = time.perf_counter()
+    count = copy(input_file, output_file)
+    seconds = time.perf_counter() - start
+    if count != rows:
+        raise AssertionError(f"{count} lignes lues sur {rows}")
+    return {"seconds": seconds, "rows_per_s": rows / seconds, "bytes": os.path.getsize(output_file)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la lecture/écriture CSV")
+    parser.add_argument("--rows", "-n", type=int, default=500_000, help="Nombre de lignes (défaut: 500 000)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench_csv_") as work_dir:
+        input_file = os.path.join(work_dir, "historique.csv")
+        generate_file(input_file, args.rows)
+        print(f"🏁 Benchmark CSV ({args.rows:,} lignes, {os.path.getsize(input_file) / 1024 / 1024:.1f} Mo)")
+        print(f"{'Approche':<34} {'Durée':>8} {'Débit':>14} {'Taille':>10} {'Gain':>7}")
+
+        outputs = {}
+        approaches = [
+            ("DictReader/DictWriter (actuel)", copy_dict, "dict.csv"),
+            ("CsvReader.records/CsvWriter", copy_records, "records.csv"),
+            ("CsvReader lignes (index)", copy_rows, "lignes.csv"),
+            ("CsvReader lignes -> gzip", copy_rows, "lignes.csv.gz"),
+        ]
+        reference_seconds = None
+        for name, copy, output_name in approaches:
+            outputs[output_name] = os.path.join(work_dir, output_name)
+            result = bench(copy, input_file, outputs[output_name], args.rows)
+            reference_seconds = reference_seconds or result["seconds"]
+            print(
+                f"{name:<34} {result['seconds']:>7.2f}s {result['rows_per_s']:>10,.0f} l/s"
+                f" {result['bytes'] / 1024 / 1024:>7.1f} Mo {reference_seconds / result['seconds']:>6.2f}x"
+            )
+
+        # Lecture du fichier compressé produit (décompression transparente)
+        start = time.perf_counter()
+        with CsvReader(outputs["lignes.csv.gz"]) as reader:
+            count = sum(1 for _ in reader)
+        seconds = time.perf_counter() - start
+        print(f"{'Lecture gzip (CsvReader)':<34} {seconds:>7.2f}s {count / seconds:>10,.0f} l/s")
+
+        with open(outputs["dict.csv"], "rb") as file:
+            reference = file.read()
+        for output_name, path in outputs.items():
+            opener = gzip.open if output_name.endswith(".gz") else open
+            with opener(path, "rb") as file:
+                if file.read() != reference:
+                    print(f"❌ {output_name} diffère de la sortie de csv.DictWriter")
+                    sys.exit(1)
+        print("✅ Fichiers produits identiques")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark de l'évaluation des règles de Filters.py
+Compare l'évaluation ligne par ligne (evaluate_rules), ligne par ligne dans l'ordre optimisé par le profil
+des règles (evaluate_plan) et vectorisée colonne par colonne (evaluate_rules_columnar, NumPy), et vérifie
+que toutes donnent les mêmes règles
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+# Ajouter le répertoire parent au path pour importer les modules du projet
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from Filters import (
+    RuleProfiler,
+    build_evaluation_plan,
+    default_rules,
+    evaluate_plan,
+    evaluate_rules,
+    evaluate_rules_columnar,
+    np,
+    optimize_rule_order,
+)
+
+# Entreprises mesurées par le profileur avant de calculer l'ordre optimisé
+PROFILE_SAMPLE = 10_000
+
+METIERS = ["Restaurant", "Coiffeur_Barbier", "Boulanger_Patissier", "Pharmacien", "Fleuriste"]
+
+
+def generate_record(i: int) -> Dict[str, str]:
+    """Génère une entreprise synthétique (avec quelques valeurs manquantes ou invalides)"""
+    return {
+        "Nom": f"Entreprise {i}",
+        "Metier_normalise": METIERS[i % len(METIERS)],
+        "Nombre_avis": "" if i % 97 == 0 else str((i * 7) % 400),
+        "Note": "n/a" if i % 89 == 0 else f"{3 + (i % 21) / 10:.1f}",
+        "Jours_fermeture": str(i % 5),
+    }
+
+
+def bench_rules(records: List[Dict[str, str]]):
+    """Retourne les durées (ligne par ligne, ordre optimisé, vectorisée) en secondes après vérification de l'équivalence"""
+    rules = default_rules()
+
+    start = time.perf_counter()
+    row_ids = [evaluate_rules(record, rules) for record in records]
+    row_seconds = time.perf_counter() - start
+
+    profiler = RuleProfiler(rules)
+    priority_plan = build_evaluation_plan(rules)
+    for record in records[:PROFILE_SAMPLE]:
+        profiler.evaluate(record, priority_plan)
+    plan = build_evaluation_plan(rules, optimize_rule_order(rules, profiler))
+
+    start = time.perf_counter()
+    optimized_ids = [evaluate_plan(record, plan) for record in records]
+    optimized_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    columnar_ids = evaluate_rules_columnar(records, rules)
+    columnar_seconds = time.perf_counter() - start
+
+    if optimized_ids != row_ids:
+        raise AssertionError("Les évaluations dans l'ordre des priorités et dans l'ordre optimisé diffèrent")
+    if columnar_ids.tolist() != row_ids:
+        raise AssertionError("Les évaluations ligne par ligne et vectorisée diffèrent")
+    return row_seconds, optimized_seconds, columnar_seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de l'évaluation des règles de filtrage")
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[100_000, 1_000_000],
+        help="Nombres d'entreprises à mesurer (défaut: 100 000 1 000 000)",
+    )
+    args = parser.parse_args()
+
+    if np is None:
+        print("❌ NumPy n'est pas installé: l'évaluation vectorisée n'est pas disponible")
+        sys.exit(1)
+
+    print("🏁 Benchmark des règles de filtrage (ligne par ligne / ordre optimisé / vectorisé)")
+    print(f"{'Entreprises':>12} {'Lignes':>10} {'Optimisé':>10} {'Vectorisé':>10} {'Gain':>8}")
+
+    for size in args.sizes:
+        records = [generate_record(i) for i in range(size)]
+        row_seconds, optimized_seconds, columnar_seconds = bench_rules(records)
+        print(
+            f"{size:>12,} {row_seconds:>9.2f}s {optimized_seconds:>9.2f}s {columnar_seconds:>9.2f}s"
+            f" {row_seconds / columnar_seconds:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
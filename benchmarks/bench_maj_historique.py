@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la fusion historique/candidats de maj_historique.process_updates
+Mesure le temps de fusion pour des tailles croissantes d'historique afin de vérifier
+que le coût par ligne reste constant (passage à l'échelle linéaire)
+"""
+
+import argparse
+import contextlib
+import io
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+# Ajouter le répertoire parent au path pour importer les modules du projet
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from maj_historique import create_composite_key, create_location_key, digest_key, process_updates
+
+FIELDNAMES = ["Nom", "Adresse", "Ville", "Metier_normalise", "Note", "Nombre_avis"]
+HISTORIQUE_FIELDNAMES = FIELDNAMES + ["Date_introduction", "Date_verification", "Actif"]
+
+
+def generate_record(i: int) -> Dict[str, str]:
+    """Génère une entreprise synthétique"""
+    return {
+        "Nom": f"Entreprise {i}",
+        "Adresse": f"{i % 300} rue de la République",
+        "Ville": f"Ville {i % 5000}",
+        "Metier_normalise": f"Metier_{i % 27}",
+        "Note": f"{3 + (i % 20) / 10:.1f}",
+        "Nombre_avis": str(i % 500),
+    }
+
+
+def build_dataset(history_size: int, candidate_ratio: float) -> Tuple[Dict, Dict, List[Dict]]:
+    """
+    Construit l'historique indexé et les candidats
+
+    La moitié des candidats correspond exactement à une entrée de l'historique (avec une note modifiée),
+    l'autre moitié est constituée de nouvelles entreprises.
+    """
+    historique_composite: Dict[bytes, Dict] = {}
+    historique_location: Dict[bytes, List[Dict]] = {}
+    for i in range(history_size):
+        row = generate_record(i)
+        row.update({"Date_introduction": "2024-01-01", "Date_verification": "2024-01-01", "Actif": "Oui"})
+        composite = digest_key(create_composite_key(row["Nom"], row["Adresse"], row["Ville"], row["Metier_normalise"]))
+        historique_composite[composite] = row
+        location = digest_key(create_location_key(row["Adresse"], row["Ville"], row["Metier_normalise"]))
+        historique_location.setdefault(location, []).append(row)
+
+    candidate_count = max(1, int(history_size * candidate_ratio))
+    candidats = []
+    for j in range(candidate_count):
+        if j % 2 == 0:
+            candidat = generate_record((j * 7919) % history_size)
+            candidat["Note"] = "5.0"
+        else:
+            candidat = generate_record(history_size + j)
+        candidats.append(candidat)
+
+    return historique_composite, historique_location, candidats
+
+
+def bench_merge(history_size: int, candidate_ratio: float) -> float:
+    """Retourne la durée de process_updates en secondes (sorties console ignorées)"""
+    historique_composite, historique_location, candidats = build_dataset(history_size, candidate_ratio)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        process_updates(historique_composite, historique_location, candidats, FIELDNAMES, HISTORIQUE_FIELDNAMES)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de passage à l'échelle de la fusion de l'historique")
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[10_000, 100_000, 1_000_000],
+        help="Tailles d'historique à mesurer (défaut: 10 000 100 000 1 000 000)",
+    )
+    parser.add_argument(
+        "--candidate-ratio", type=float, default=0.1, help="Nombre de candidats rapporté à l'historique (défaut: 0.1)"
+    )
+    args = parser.parse_args()
+
+    print(f"🏁 Benchmark de la fusion historique/candidats (candidats = {args.candidate_ratio:.0%} de l'historique)")
+    print(f"{'Historique':>12} {'Candidats':>10} {'Durée':>10} {'µs/ligne':>10}")
+
+    reference = None
+    for size in args.sizes:
+        seconds = bench_merge(size, args.candidate_ratio)
+        per_row = seconds / size * 1_000_000
+        reference = reference or per_row
+        print(
+            f"{size:>12,} {max(1, int(size * args.candidate_ratio)):>10,} {seconds:>9.2f}s {per_row:>10.2f}"
+            f"  (x{per_row / reference:.2f} par ligne)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Suite de benchmarks de la chaîne complète sur données synthétiques
+Mesure la durée et le pic de mémoire (tracemalloc) de chaque étape, sur un jeu de données généré par
+donnees_synthetiques.py (10k, 100k ou 1M lignes de recherche):
+
+1. convertir_csv (NormaliseMetiers.py)
+2. remove_duplicates (supprime_doublons.py)
+3. process_updates (maj_historique.py, chargement de l'historique et des candidats compris)
+4. process_filter_file (Filters.py)
+
+Les résultats sont enregistrés en références JSON (--enregistrer) ; --comparer signale les étapes plus
+lentes ou plus gourmandes en mémoire que la référence au-delà d'une tolérance (code de sortie 1).
+La durée est le meilleur de --repetitions exécutions sans tracemalloc ; le pic de mémoire est mesuré
+par une exécution supplémentaire sous tracemalloc (qui ralentit l'exécution).
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Ajouter le répertoire parent au path pour importer les modules du projet
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from donnees_synthetiques import DEFAULT_SEED, REFERENCE_FILE, SIZES, generate_dataset, parse_size
+
+from fichiers_csv import CsvReader
+from Filters import process_filter_file
+from maj_historique import load_candidats, load_historique, process_updates, save_updated_historique
+from NormaliseMetiers import convertir_csv
+from supprime_doublons import remove_duplicates
+
+BASELINE_DIR = str(Path(__file__).parent / "references")
+BASELINE_VERSION = 1
+
+# Dégradation tolérée par rapport à la référence (20 %)
+DEFAULT_TOLERANCE = 0.20
+# Écarts absolus en dessous desquels une dégradation est considérée comme du bruit de mesure
+MIN_SECONDS_DELTA = 0.05
+MIN_MEMORY_DELTA_MB = 1.0
+
+STAGES = ["convertir_csv", "remove_duplicates", "process_updates", "process_filter_file"]
+
+# Mesures comparées: clé JSON, libellé, unité, écart absolu minimal
+METRICS = [
+    ("secondes", "durée", "s", MIN_SECONDS_DELTA),
+    ("memoire_max_mo", "mémoire", " Mo", MIN_MEMORY_DELTA_MB),
+]
+
+
+def size_label(rows: int) -> str:
+    """Nom de la taille (10k, 100k, 1M) ou nombre de lignes"""
+    return next((label for label, size in SIZES.items() if size == rows), str(rows))
+
+
+def count_rows(*paths: str) -> int:
+    """Nombre total de lignes (hors en-tête) de fichiers CSV"""
+    total = 0
+    for path in paths:
+        with CsvReader(path) as reader:
+            total += sum(1 for _ in reader)
+    return total
+
+
+def run_quietly(function: Callable[[], object]) -> object:
+    """Exécute une étape sans ses affichages"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return function()
+
+
+def measure(function: Callable[[], object], repetitions: int) -> Tuple[float, float, object]:
+    """
+    Mesure une étape
+
+    Returns:
+        Tuple (meilleure durée en secondes, pic de mémoire en Mo, résultat de la dernière exécution)
+    """
+    best = float("inf")
+    for _ in range(repetitions):
+        gc.collect()
+        start = time.perf_counter()
+        run_quietly(function)
+        best = min(best, time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = run_quietly(function)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak / 1024 / 1024, result
+
+
+def run_suite(rows: int, work_dir: str, repetitions: int = 1, seed: int = DEFAULT_SEED) -> Dict:
+    """
+    Génère le jeu de données puis mesure chaque étape, la sortie d'une étape étant l'entrée de la suivante
+
+    Returns:
+        Résultats au format des références JSON
+    """
+    start = time.perf_counter()
+    paths = generate_dataset(work_dir, rows, seed)
+    print(f"🏭 Jeu de données {size_label(rows)} généré en {time.perf_counter() - start:.1f}s")
+
+    normalisees = os.path.join(work_dir, "entreprises_normalisees.csv")
+    uniques = os.path.join(work_dir, "entreprises_sans_doublons.csv")
+    historique_maj = os.path.join(work_dir, "historique_maj.csv")
+    historique_filtre = os.path.join(work_dir, "historique_filtre.csv")
+
+    def update_historique():
+        historique_composite, historique_location, historique_fieldnames = load_historique(paths["historique.csv"])
+        candidats, candidats_fieldnames = load_candidats(uniques)
+        return process_updates(
+            historique_composite, historique_location, candidats, candidats_fieldnames, historique_fieldnames
+        )
+
+    stages: List[Tuple[str, Callable[[], object], Tuple[str, ...]]] = [
+        (
+            "convertir_csv",
+            lambda: convertir_csv(paths["entreprises.csv"], normalisees, REFERENCE_FILE),
+            (paths["entreprises.csv"],),
+        ),
+        ("remove_duplicates", lambda: remove_duplicates(normalisees, uniques), (normalisees,)),
+        ("process_updates", update_historique, (paths["historique.csv"], uniques)),
+        ("process_filter_file", lambda: process_filter_file(historique_maj, historique_filtre), (historique_maj,)),
+    ]
+
+    results = {}
+    for name, function, inputs in stages:
+        seconds, memory_mb, result = measure(function, repetitions)
+        if name == "process_updates":
+            # Sauvegarde (non mesurée) de l'historique mis à jour, entrée du filtrage
+            updated_historique, _, output_fieldnames = result
+            run_quietly(lambda: save_updated_historique(updated_historique, historique_maj, output_fieldnames))
+            del updated_historique, result
+        input_rows = count_rows(*inputs)
+        results[name] = {
+            "secondes": round(seconds, 4),
+            "lignes": input_rows,
+            "lignes_par_seconde": round(input_rows / seconds),
+            "memoire_max_mo": round(memory_mb, 2),
+        }
+        print(f"   {name:<22} {seconds:>8.2f}s {input_rows / seconds:>12,.0f} l/s {memory_mb:>9.1f} Mo")
+
+    return {
+        "version": BASELINE_VERSION,
+        "taille": size_label(rows),
+        "lignes": rows,
+        "graine": seed,
+        "repetitions": repetitions,
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plateforme": platform.platform(),
+        "etapes": results,
+    }
+
+
+def baseline_path(baseline_dir: str, label: str) -> str:
+    return os.path.join(baseline_dir, f"pipeline_{label}.json")
+
+
+def save_baseline(results: Dict, baseline_dir: str) -> str:
+    """Enregistre les résultats comme référence de leur taille (remplace la référence existante)"""
+    os.makedirs(baseline_dir, exist_ok=True)
+    path = baseline_path(baseline_dir, results["taille"])
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(results, file, ensure_ascii=False, indent=2)
+        file.write("\n")
+    return path
+
+
+def load_baseline(baseline_dir: str, label: str) -> Optional[Dict]:
+    path = baseline_path(baseline_dir, label)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as file:
+        baseline = json.load(file)
+    if baseline.get("version") != BASELINE_VERSION:
+        raise ValueError(f"Version de référence non supportée dans {path}: {baseline.get('version')}")
+    return baseline
+
+
+def load_baselines(baseline_dir: str, labels: List[str]) -> Dict[str, Dict]:
+    """
+    Références de plusieurs tailles
+
+    Raises:
+        ValueError: Si une taille n'a pas de référence, ou si une référence est dans une version non supportée
+    """
+    baselines = {label: load_baseline(baseline_dir, label) for label in labels}
+    missing = [label for label, baseline in baselines.items() if baseline is None]
+    if missing:
+        raise ValueError(
+            f"Aucune référence pour {', '.join(missing)} dans {baseline_dir} (enregistrez-la d'abord avec --enregistrer)"
+        )
+    return baselines
+
+
+def compare_results(results: Dict, baseline: Dict, tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """
+    Compare des résultats à une référence de même taille
+
+    Une étape régresse si sa durée ou son pic de mémoire dépasse la référence de plus de tolerance
+    (et d'un écart absolu supérieur au bruit de mesure: MIN_SECONDS_DELTA, MIN_MEMORY_DELTA_MB).
+
+    Returns:
+        Liste des régressions (messages), vide si aucune
+    """
+    regressions = []
+    print(f"{'Étape':<22} {'Durée':>9} {'Réf.':>9} {'Écart':>8} {'Mémoire':>10} {'Réf.':>10} {'Écart':>8}")
+    for name in STAGES:
+        current, reference = results["etapes"].get(name), baseline["etapes"].get(name)
+        if current is None or reference is None:
+            continue
+        flags = []
+        for metric, label, unit, min_delta in METRICS:
+            value, reference_value = current[metric], reference[metric]
+            if value > reference_value * (1 + tolerance) and value - reference_value > min_delta:
+                flags.append(metric)
+                regressions.append(f"{name}: {label} {value:.2f}{unit} au lieu de {reference_value:.2f}{unit}")
+        status = "❌" if flags else "✅"
+
+        def change(metric: str) -> str:
+            return f"{(current[metric] / reference[metric] - 1) * 100:+.0f} %" if reference[metric] else "n/a"
+
+        print(
+            f"{name:<22} {current['secondes']:>8.2f}s {reference['secondes']:>8.2f}s {change('secondes'):>8}"
+            f" {current['memoire_max_mo']:>7.1f} Mo {reference['memoire_max_mo']:>7.1f} Mo"
+            f" {change('memoire_max_mo'):>8} {status}"
+        )
+    return regressions
+
+
+def run_size(rows: int, args: argparse.Namespace, baselines: Dict[str, Dict]) -> List[str]:
+    """
+    Mesure la chaîne pour une taille, puis la compare à sa référence et/ou l'enregistre
+
+    Returns:
+        Liste des régressions (messages préfixés par la taille), vide si aucune
+    """
+    print(f"\n🏁 Benchmark de la chaîne ({rows:,} lignes)")
+    with tempfile.TemporaryDirectory(prefix="bench_pipeline_") as work_dir:
+        results = run_suite(rows, work_dir, args.repetitions, args.graine)
+
+    regressions = []
+    if args.comparer:
+        baseline = baselines[results["taille"]]
+        if baseline.get("graine") != results["graine"]:
+            print(f"⚠️  Référence générée avec une autre graine ({baseline.get('graine')})")
+        print(f"\n📏 Comparaison à la référence du {baseline['date']} (tolérance {args.tolerance:.0%})")
+        regressions = [f"[{results['taille']}] {message}" for message in compare_results(results, baseline, args.tolerance)]
+
+    if args.enregistrer:
+        print(f"💾 Référence enregistrée: {save_baseline(results, args.references)}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmarks de la chaîne complète sur données synthétiques",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemples d'utilisation:
+  python benchmarks/bench_pipeline.py --tailles 10k 100k --enregistrer
+  python benchmarks/bench_pipeline.py --tailles 10k 100k --comparer
+  python benchmarks/bench_pipeline.py --tailles 1M --repetitions 3 --comparer --tolerance 0.1
+        """,
+    )
+    parser.add_argument(
+        "--tailles",
+        nargs="+",
+        type=parse_size,
+        default=[SIZES["10k"]],
+        help=f"Tailles des jeux de données ({', '.join(SIZES)} ou un nombre de lignes, défaut: 10k)",
+    )
+    parser.add_argument("--repetitions", type=int, default=1, help="Exécutions mesurées par étape (meilleure durée)")
+    parser.add_argument("--graine", type=int, default=DEFAULT_SEED, help=f"Graine du générateur (défaut: {DEFAULT_SEED})")
+    parser.add_argument(
+        "--references", default=BASELINE_DIR, help="Dossier des références JSON (défaut: benchmarks/references)"
+    )
+    parser.add_argument("--enregistrer", action="store_true", help="Enregistre les résultats comme nouvelles références")
+    parser.add_argument("--comparer", action="store_true", help="Compare aux références et signale les régressions")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help=f"Dégradation tolérée avant de signaler une régression (défaut: {DEFAULT_TOLERANCE})",
+    )
+    args = parser.parse_args()
+
+    if args.repetitions < 1:
+        print("❌ Erreur: --repetitions doit être au moins 1")
+        sys.exit(1)
+
+    # Références chargées avant toute mesure: une comparaison sans référence est une erreur, pas un succès
+    baselines = {}
+    if args.comparer:
+        try:
+            baselines = load_baselines(args.references, [size_label(rows) for rows in args.tailles])
+        except ValueError as e:
+            print(f"❌ Erreur: {e}")
+            sys.exit(1)
+
+    regressions = []
+    for rows in args.tailles:
+        regressions.extend(run_size(rows, args, baselines))
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} régression(s):")
+        for message in regressions:
+            print(f"   {message}")
+        sys.exit(1)
+    if args.comparer:
+        print("\n✅ Aucune régression")
+
+
+if __name__ == "__main__":
+    main()
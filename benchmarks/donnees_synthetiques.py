@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Générateur déterministe d'entreprises synthétiques pour les benchmarks
+Produit, pour une graine et une taille données, toujours les mêmes fichiers:
+
+- entreprises.csv: résultat de recherche (métiers bruts de data/referencesMetiers.csv, environ 8 % de doublons
+  exacts et 2 % de métiers absents de la référence), entrée de NormaliseMetiers.py
+- historique.csv: historique au format de maj_historique.py, qui recouvre 80 % des entreprises recherchées
+  (anciennes notes, lignes antérieures à la colonne Place_id, quelques entreprises renommées)
+
+Chaque entreprise est entièrement déterminée par la graine et son numéro: une même entreprise a les mêmes
+nom, adresse, métier et horaires dans les deux fichiers.
+"""
+
+import argparse
+import os
+import random
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+# Ajouter le répertoire parent au path pour importer les modules du projet
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from fichiers_csv import CsvWriter
+from NormaliseMetiers import charger_metiers_reference
+
+DEFAULT_SEED = 2024
+REFERENCE_FILE = str(Path(__file__).parent.parent / "data" / "referencesMetiers.csv")
+
+# Tailles nommées des jeux de données
+SIZES = {"10k": 10_000, "100k": 100_000, "1M": 1_000_000}
+
+ENTREPRISES_FIELDNAMES = [
+    "Nom",
+    "Adresse",
+    "Ville",
+    "Metier",
+    "Heures_ouverture",
+    "Nombre_avis",
+    "Note",
+    "Jours_fermeture",
+    "Place_id",
+]
+HISTORIQUE_FIELDNAMES = [
+    "Nom",
+    "Adresse",
+    "Ville",
+    "Metier_normalise",
+    "Heures_ouverture",
+    "Nombre_avis",
+    "Note",
+    "Jours_fermeture",
+    "Place_id",
+    "Date_introduction",
+    "Date_verification",
+    "Filtré",
+    "Raison_Filtrage",
+    "Actif",
+]
+
+# Une ligne sur DUPLICATE_PERIOD répète une entreprise déjà rencontrée
+DUPLICATE_PERIOD = 13
+# Une entreprise sur UNKNOWN_METIER_PERIOD a un métier absent de la référence
+UNKNOWN_METIER_PERIOD = 50
+# Dans l'historique: une ligne sur LEGACY_PERIOD n'a pas de Place_id, une sur RENAMED_PERIOD a changé de nom
+LEGACY_PERIOD = 3
+RENAMED_PERIOD = 60
+
+UNKNOWN_METIERS = ["fleuriste", "garagiste", "opticien", "librairie", "toiletteur"]
+
+# Début du nom selon le métier normalisé
+NAME_PREFIXES = {
+    "Boulanger_Patissier": ["Boulangerie", "Pâtisserie", "Au Fournil de", "Maison"],
+    "Coiffeur_Barbier": ["Salon", "Coiffure", "Barbier", "L'Atelier de"],
+    "Restaurant": ["Restaurant", "Brasserie", "Bistrot", "Chez", "Le Comptoir de"],
+    "Pharmacien": ["Pharmacie", "Pharmacie du Centre", "Grande Pharmacie"],
+    "Boucherie_traiteur_rotisseur": ["Boucherie", "Maison", "Traiteur"],
+    "Superette": ["Épicerie", "Primeur", "Marché de", "Bio &"],
+    "Poissonnerie": ["Poissonnerie", "La Marée de"],
+    "Fromagerie_Laiterie": ["Fromagerie", "Crèmerie"],
+    "Vin_Spritueux": ["Cave", "Le Cellier de", "Caviste"],
+}
+DEFAULT_PREFIXES = ["Cabinet", "Entreprise", "Atelier", "Maison"]
+
+SURNAMES = [
+    "Martin",
+    "Bernard",
+    "Dubois",
+    "Thomas",
+    "Robert",
+    "Richard",
+    "Petit",
+    "Durand",
+    "Leroy",
+    "Moreau",
+    "Simon",
+    "Laurent",
+    "Lefèvre",
+    "Michel",
+    "Garcia",
+    "Fournier",
+    "Girard",
+    "Bonnet",
+    "Mercier",
+    "Rousseau",
+    "Blanc",
+    "Guérin",
+    "Muller",
+    "Faure",
+]
+
+STREET_TYPES = ["Rue", "Avenue", "Boulevard", "Place", "Chemin", "Impasse", "Allée", "Quai", "Cours"]
+STREET_NAMES = [
+    "de la République",
+    "Victor Hugo",
+    "Jean Jaurès",
+    "du Général de Gaulle",
+    "Pasteur",
+    "de la Gare",
+    "des Lilas",
+    "de la Paix",
+    "Gambetta",
+    "Émile Zola",
+    "du Marché",
+    "des Écoles",
+    "Nationale",
+    "Voltaire",
+    "de l'Église",
+    "des Alpes",
+]
+TOWNS = [
+    ("Paris", "75011"),
+    ("Lyon", "69003"),
+    ("Marseille", "13001"),
+    ("Toulouse", "31000"),
+    ("Nice", "06000"),
+    ("Nantes", "44000"),
+    ("Strasbourg", "67000"),
+    ("Montpellier", "34000"),
+    ("Bordeaux", "33000"),
+    ("Lille", "59000"),
+    ("Rennes", "35000"),
+    ("Grenoble", "38000"),
+    ("Voiron", "38500"),
+    ("Moirans", "38430"),
+    ("Annecy", "74000"),
+    ("Saint-Étienne", "42000"),
+]
+
+DAYS = ["lundi", "mardi", "mercredi", "jeudi", "vendredi", "samedi", "dimanche"]
+# Plages horaires d'une journée ouverte, selon le type d'établissement
+OPENING_SLOTS = [
+    "09:00 – 12:30, 14:00 – 19:00",
+    "08:00 – 20:00",
+    "07:00 – 13:00, 15:30 – 19:30",
+    "10:00 – 18:30",
+]
+RESTAURANT_SLOTS = ["12:00 – 14:30, 19:00 – 22:30", "11:30 – 15:00, 18:30 – 23:00", "09:00 – 22:30"]
+
+
+def load_metiers(reference_file: str = REFERENCE_FILE) -> Dict[str, str]:
+    """Métiers bruts de la référence (en minuscules) -> métier normalisé"""
+    reference = charger_metiers_reference(reference_file)
+    reference.pop("metier", None)  # En-tête du fichier
+    return reference
+
+
+class BusinessGenerator:
+    """
+    Entreprises synthétiques déterministes
+
+    Usage:
+        generator = BusinessGenerator(seed=2024)
+        row = generator.business(42)  # Toujours la même entreprise pour la même graine
+    """
+
+    def __init__(self, seed: int = DEFAULT_SEED, reference_file: str = REFERENCE_FILE):
+        self.seed = seed
+        self.metiers = load_metiers(reference_file)
+        self.raw_metiers = sorted(self.metiers)
+
+    def business(self, index: int) -> Dict[str, str]:
+        """Entreprise numéro index, telle que renvoyée par la recherche (métier brut)"""
+        rng = random.Random(f"{self.seed}-{index}")
+
+        if index % UNKNOWN_METIER_PERIOD == UNKNOWN_METIER_PERIOD - 1:
+            metier = rng.choice(UNKNOWN_METIERS)
+        else:
+            metier = rng.choice(self.raw_metiers)
+            if rng.random() < 0.3:
+                metier = metier.capitalize()
+        metier_normalise = self.metiers.get(metier.lower(), "")
+
+        prefix = rng.choice(NAME_PREFIXES.get(metier_normalise, DEFAULT_PREFIXES))
+        nom = f"{prefix} {rng.choice(SURNAMES)}"
+        if rng.random() < 0.5:
+            nom += f" {index % 1000}"
+
+        ville, code_postal = rng.choice(TOWNS)
+        numero = rng.randint(1, 400)
+        rue = f"{rng.choice(STREET_TYPES)} {rng.choice(STREET_NAMES)}"
+        adresse = f"{numero} {rue}, {code_postal} {ville}, France"
+
+        heures, jours_fermeture = self.opening_hours(rng, metier_normalise == "Restaurant")
+
+        return {
+            "Nom": nom,
+            "Adresse": adresse,
+            "Ville": ville,
+            "Metier": metier,
+            "Heures_ouverture": heures,
+            "Nombre_avis": "" if rng.random() < 0.01 else str(min(int((rng.paretovariate(1.1) - 1) * 20), 5000)),
+            "Note": f"{rng.triangular(2.5, 5.0, 4.4):.1f}",
+            "Jours_fermeture": str(jours_fermeture),
+            "Place_id": f"ChIJ{index:08d}{rng.getrandbits(40):010x}",
+        }
+
+    @staticmethod
+    def opening_hours(rng: random.Random, restaurant: bool):
+        """Horaires au format Google Places ("lundi: 09:00 – 19:00; mardi: Fermé; ...") et nombre de jours fermés"""
+        if rng.random() < 0.03:
+            return "Non disponible", 0
+        if rng.random() < 0.04:
+            return "; ".join(f"{day}: Ouvert 24h/24" for day in DAYS), 0
+
+        slots = rng.choice(RESTAURANT_SLOTS if restaurant else OPENING_SLOTS)
+        closed = set(rng.sample(range(7), rng.choice([0, 1, 1, 2, 2, 3, 5])))
+        hours = "; ".join(f"{day}: {'Fermé' if number in closed else slots}" for number, day in enumerate(DAYS))
+        return hours, len(closed)
+
+    def entreprise_indices(self, rows: int) -> List[int]:
+        """Numéros des entreprises des rows lignes de recherche (une ligne sur DUPLICATE_PERIOD est un doublon)"""
+        indices = []
+        next_index = 0
+        for line in range(rows):
+            if line % DUPLICATE_PERIOD == DUPLICATE_PERIOD - 1 and next_index > 0:
+                indices.append(random.Random(f"{self.seed}-doublon-{line}").randrange(next_index))
+            else:
+                indices.append(next_index)
+                next_index += 1
+        return indices
+
+    def historique_record(self, index: int) -> Dict[str, str]:
+        """Entreprise numéro index telle qu'enregistrée dans l'historique lors d'une exécution précédente"""
+        record = self.business(index)
+        rng = random.Random(f"{self.seed}-historique-{index}")
+        metier = record.pop("Metier")
+        record["Metier_normalise"] = self.metiers.get(metier.lower(), f"INCONNU({metier.lower()})")
+        record["Note"] = f"{rng.triangular(2.5, 5.0, 4.4):.1f}"
+        if index % LEGACY_PERIOD == 0:
+            record["Place_id"] = ""
+        if index % RENAMED_PERIOD == 0:
+            record["Nom"] += " (ancien nom)"
+            record["Place_id"] = ""
+        record["Date_introduction"] = f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        record["Date_verification"] = "2025-01-15"
+        record["Filtré"] = "NON"
+        record["Raison_Filtrage"] = ""
+        record["Actif"] = "Oui"
+        return record
+
+    def write_entreprises(self, path: str, rows: int) -> int:
+        """Écrit le fichier de recherche de rows lignes"""
+        with CsvWriter(path, ENTREPRISES_FIELDNAMES) as writer:
+            writer.write_records(map(self.business, self.entreprise_indices(rows)))
+        return rows
+
+    def write_historique(self, path: str, rows: int) -> int:
+        """
+        Écrit l'historique correspondant à une recherche de rows lignes
+
+        Il contient les entreprises recherchées à partir de 20 %, puis autant d'entreprises absentes de
+        la recherche (désactivées par maj_historique), soit environ rows entrées.
+        """
+        unique_businesses = max(self.entreprise_indices(rows), default=-1) + 1
+        start = unique_businesses // 5
+        indices = range(start, start + unique_businesses)
+        with CsvWriter(path, HISTORIQUE_FIELDNAMES) as writer:
+            writer.write_records(map(self.historique_record, indices))
+        return len(indices)
+
+
+def generate_dataset(directory: str, rows: int, seed: int = DEFAULT_SEED) -> Dict[str, str]:
+    """
+    Génère entreprises.csv et historique.csv dans directory
+
+    Returns:
+        Dictionnaire nom du fichier -> chemin
+    """
+    os.makedirs(directory, exist_ok=True)
+    generator = BusinessGenerator(seed)
+    paths = {name: os.path.join(directory, name) for name in ("entreprises.csv", "historique.csv")}
+    generator.write_entreprises(paths["entreprises.csv"], rows)
+    generator.write_historique(paths["historique.csv"], rows)
+    return paths
+
+
+def parse_size(value: str) -> int:
+    """Taille nommée (10k, 100k, 1M) ou nombre de lignes"""
+    if value in SIZES:
+        return SIZES[value]
+    try:
+        rows = int(value.replace("_", ""))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Taille invalide: {value} (valeurs: {', '.join(SIZES)} ou un nombre de lignes)")
+    if rows <= 0:
+        raise argparse.ArgumentTypeError(f"Taille invalide: {value}")
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Génère un jeu de données synthétique déterministe",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemples d'utilisation:
+  python benchmarks/donnees_synthetiques.py 10k donnees_10k/
+  python benchmarks/donnees_synthetiques.py 250000 donnees/ --graine 7
+        """,
+    )
+    parser.add_argument("taille", type=parse_size, help=f"Nombre de lignes de recherche ({', '.join(SIZES)} ou un nombre)")
+    parser.add_argument("dossier", help="Dossier de sortie")
+    parser.add_argument("--graine", type=int, default=DEFAULT_SEED, help=f"Graine du générateur (défaut: {DEFAULT_SEED})")
+    args = parser.parse_args()
+
+    paths = generate_dataset(args.dossier, args.taille, args.graine)
+    for path in paths.values():
+        print(f"✅ {path} ({os.path.getsize(path) / 1024 / 1024:.1f} Mo)")
+
+
+if __name__ == "__main__":
+    main()
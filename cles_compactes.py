@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Module partagé de clés compactes pour le dédoublonnage et la mise à jour de l'historique
+Produit des empreintes binaires de 64 ou 128 bits (blake2b) et les stocke dans un ensemble
+à adressage ouvert adossé à des tableaux d'entiers, sans objet Python par clé
+"""
+
+import hashlib
+from array import array
+from typing import Dict, Iterable, List
+
+# Taille des empreintes en octets (8 = 64 bits, 16 = 128 bits)
+DEFAULT_DIGEST_SIZE = 16
+SUPPORTED_DIGEST_SIZES = (8, 16)
+
+# Capacité initiale et taux de remplissage maximal de la table
+DEFAULT_CAPACITY = 1024
+MAX_LOAD_FACTOR = 0.7
+
+WORD_MASK = (1 << 64) - 1
+
+# Identifiant stable Google Places: clé de jointure prioritaire sur la clé composite
+PLACE_ID_FIELD = "Place_id"
+
+
+def normalize_key_text(text: str) -> str:
+    """Normalise le texte d'un champ de clé (minuscules, espaces supprimés)"""
+    return text.strip().lower().replace("  ", " ")
+
+
+def build_composite_key(nom: str, adresse: str, ville: str, metier: str) -> str:
+    """Crée la clé composite nom|adresse|ville|métier normalisée"""
+    return f"{normalize_key_text(nom)}|{normalize_key_text(adresse)}|{normalize_key_text(ville)}|{normalize_key_text(metier)}"
+
+
+def record_composite_key(record: Dict[str, str]) -> str:
+    """Crée la clé composite d'un enregistrement (Metier_normalise, ou Metier à défaut)"""
+    return build_composite_key(
+        record.get("Nom", "") or "",
+        record.get("Adresse", "") or "",
+        record.get("Ville", "") or "",
+        record.get("Metier_normalise", record.get("Metier", "")) or "",
+    )
+
+
+def digest_key(key: str, digest_size: int = DEFAULT_DIGEST_SIZE) -> bytes:
+    """
+    Calcule l'empreinte binaire d'une clé
+
+    Args:
+        key: Clé textuelle (déjà normalisée)
+        digest_size: Taille de l'empreinte en octets (8 ou 16)
+
+    Returns:
+        Empreinte blake2b de digest_size octets
+    """
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=digest_size).digest()
+
+
+def record_digest(record: Dict[str, str], digest_size: int = DEFAULT_DIGEST_SIZE) -> bytes:
+    """Calcule l'empreinte binaire de la clé composite d'un enregistrement"""
+    return digest_key(record_composite_key(record), digest_size)
+
+
+def record_place_id(record: Dict[str, str]) -> str:
+    """Identifiant Google Places d'un enregistrement (vide pour les lignes antérieures à la colonne Place_id)"""
+    return (record.get(PLACE_ID_FIELD) or "").strip()
+
+
+def is_other_place(candidat: Dict[str, str], existing: Dict[str, str]) -> bool:
+    """Vrai si le candidat et l'entrée existante ont chacun un identifiant Places, et qu'ils diffèrent"""
+    place_id = record_place_id(candidat)
+    existing_place_id = record_place_id(existing)
+    return bool(place_id and existing_place_id and place_id != existing_place_id)
+
+
+def place_id_digest(place_id: str, digest_size: int = DEFAULT_DIGEST_SIZE) -> bytes:
+    """Calcule l'empreinte d'un identifiant Places (préfixée pour ne pas rencontrer une clé composite)"""
+    return digest_key(f"{PLACE_ID_FIELD}|{place_id.strip()}", digest_size)
+
+
+def record_identity_digest(record: Dict[str, str], digest_size: int = DEFAULT_DIGEST_SIZE) -> bytes:
+    """
+    Calcule l'empreinte de l'identité d'une entreprise: son identifiant Places s'il est renseigné,
+    sa clé composite à défaut (un changement de nom ou d'adresse ne change pas l'identité)
+    """
+    place_id = record_place_id(record)
+    if place_id:
+        return place_id_digest(place_id, digest_size)
+    return record_digest(record, digest_size)
+
+
+class CompactKeySet:
+    """
+    Ensemble d'empreintes binaires à adressage ouvert (sondage linéaire)
+
+    Chaque empreinte est découpée en mots de 64 bits (poids faible, poids fort) rangés dans des tableaux array("Q"):
+    8 ou 16 octets par emplacement au lieu d'un objet str et d'une entrée de set par clé.
+    Un emplacement entièrement nul est considéré comme vide; l'empreinte nulle (improbable)
+    est gérée à part.
+    """
+
+    def __init__(self, digest_size: int = DEFAULT_DIGEST_SIZE, capacity: int = DEFAULT_CAPACITY):
+        if digest_size not in SUPPORTED_DIGEST_SIZES:
+            raise ValueError(f"Taille d'empreinte non supportée: {digest_size} (attendu: {SUPPORTED_DIGEST_SIZES})")
+
+        self.digest_size = digest_size
+        self._words = digest_size // 8
+        self._size = 0
+        self._has_zero = False
+
+        # Capacité arrondie à la puissance de 2 supérieure pour indexer par masque
+        table_capacity = 1
+        while table_capacity < max(capacity, 8):
+            table_capacity <<= 1
+        self._allocate(table_capacity)
+
+    def _allocate(self, capacity: int):
+        self._capacity = capacity
+        self._mask = capacity - 1
+        self._columns: List[array] = [array("Q", bytes(8 * capacity)) for _ in range(self._words)]
+
+    def _check(self, digest: bytes) -> int:
+        if len(digest) != self.digest_size:
+            raise ValueError(f"Empreinte de {len(digest)} octets, attendu {self.digest_size}")
+        return int.from_bytes(digest, "little")
+
+    def _find_slot(self, key: int) -> int:
+        """Retourne l'emplacement de la clé, ou le premier emplacement vide rencontré"""
+        mask = self._mask
+        slot = key & mask
+        if self._words == 1:
+            first = self._columns[0]
+            while True:
+                current = first[slot]
+                if current == key or current == 0:
+                    return slot
+                slot = (slot + 1) & mask
+
+        low, high = self._columns
+        key_low = key & WORD_MASK
+        key_high = key >> 64
+        while True:
+            current_low = low[slot]
+            current_high = high[slot]
+            if current_low == key_low and current_high == key_high:
+                return slot
+            if current_low == 0 and current_high == 0:
+                return slot
+            slot = (slot + 1) & mask
+
+    def _slot_key(self, slot: int) -> int:
+        if self._words == 1:
+            return self._columns[0][slot]
+        low, high = self._columns
+        return low[slot] | (high[slot] << 64)
+
+    def _store(self, slot: int, key: int):
+        if self._words == 1:
+            self._columns[0][slot] = key
+        else:
+            low, high = self._columns
+            low[slot] = key & WORD_MASK
+            high[slot] = key >> 64
+
+    def _grow(self):
+        old_columns = self._columns
+        self._allocate(self._capacity * 2)
+        for slot in range(len(old_columns[0])):
+            key = old_columns[0][slot] if self._words == 1 else old_columns[0][slot] | (old_columns[1][slot] << 64)
+            if key:
+                self._store(self._find_slot(key), key)
+
+    def add(self, digest: bytes) -> bool:
+        """
+        Ajoute une empreinte
+
+        Returns:
+            True si l'empreinte était absente (nouvelle clé), False sinon
+        """
+        key = self._check(digest)
+        if key == 0:
+            added = not self._has_zero
+            self._has_zero = True
+            self._size += added
+            return added
+
+        slot = self._find_slot(key)
+        if self._slot_key(slot) == key:
+            return False
+
+        self._store(slot, key)
+        self._size += 1
+        if self._size > self._capacity * MAX_LOAD_FACTOR:
+            self._grow()
+        return True
+
+    def update(self, digests: Iterable[bytes]):
+        """Ajoute plusieurs empreintes"""
+        for digest in digests:
+            self.add(digest)
+
+    def __contains__(self, digest: object) -> bool:
+        if not isinstance(digest, bytes):
+            return False
+        key = self._check(digest)
+        if key == 0:
+            return self._has_zero
+        return self._slot_key(self._find_slot(key)) == key
+
+    def __len__(self) -> int:
+        return self._size
+
+    def memory_bytes(self) -> int:
+        """Taille des tableaux d'empreintes en octets"""
+        return sum(column.itemsize * len(column) for column in self._columns)
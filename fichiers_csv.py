@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Module partagé de lecture et d'écriture des fichiers CSV du projet
+Remplace csv.DictReader / csv.DictWriter dans les scripts de la chaîne:
+
+- l'en-tête est lu et analysé une seule fois (CsvSchema): vérification des colonnes requises
+  et index de chaque colonne calculés avant la première ligne
+- les lignes sont des listes de valeurs, accédées par index précalculé (CsvSchema.getter); les
+  dictionnaires ne sont construits que pour les étapes qui en ont besoin (CsvReader.records)
+- lectures et écritures par blocs de BUFFER_SIZE octets
+- compression transparente: gzip (.gz) et zstd (.zst, module optionnel zstandard), détectée
+  à la lecture par la signature du fichier et à l'écriture par l'extension
+"""
+
+import csv
+import gzip
+import io
+import os
+from operator import itemgetter
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, TextIO
+
+# zstandard est optionnel: il n'est nécessaire que pour les fichiers .zst
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - dépend de l'environnement
+    zstandard = None
+
+# Taille des blocs lus et écrits (1 Mo)
+BUFFER_SIZE = 1 << 20
+
+ENCODING = "utf-8"
+
+# Signatures et extensions des formats compressés
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+COMPRESSION_SUFFIXES = {".gz": "gzip", ".zst": "zstd"}
+CSV_SUFFIXES = (".csv",) + tuple(".csv" + suffix for suffix in COMPRESSION_SUFFIXES)
+
+# Suffixe des fichiers temporaires renommés à la fin de l'écriture (la compression suit le nom final)
+TEMP_SUFFIX = ".tmp"
+
+# Colonnes d'identification d'une entreprise, et colonnes métier par ordre de préférence
+BUSINESS_COLUMNS = ("Nom", "Adresse", "Ville")
+METIER_COLUMNS = ("Metier_normalise", "Metier")
+
+
+def compression_for_path(path: str) -> Optional[str]:
+    """Compression associée à l'extension d'un fichier ("gzip", "zstd" ou None), sans tenir compte de .tmp"""
+    if path.endswith(TEMP_SUFFIX):
+        path = path[: -len(TEMP_SUFFIX)]
+    return COMPRESSION_SUFFIXES.get(os.path.splitext(path)[1].lower())
+
+
+def is_csv_path(path: str) -> bool:
+    """Vrai pour un fichier .csv, éventuellement compressé (.csv.gz, .csv.zst)"""
+    return path.lower().endswith(CSV_SUFFIXES)
+
+
+def detect_compression(path: str) -> Optional[str]:
+    """Compression d'un fichier existant, d'après sa signature ("gzip", "zstd" ou None)"""
+    with open(path, "rb") as file:
+        magic = file.read(4)
+    if magic.startswith(GZIP_MAGIC):
+        return "gzip"
+    if magic.startswith(ZSTD_MAGIC):
+        return "zstd"
+    return None
+
+
+def _open_binary(path: str, mode: str, compression: Optional[str]):
+    if compression is None:
+        return open(path, mode + "b", buffering=BUFFER_SIZE)
+    if compression == "gzip":
+        # Niveau 6: presque aussi compact que le niveau 9 par défaut, beaucoup plus rapide
+        return gzip.open(path, mode + "b", compresslevel=6)
+    if zstandard is None:
+        raise ValueError(f"Le fichier '{path}' est compressé en zstd: installez le module zstandard (pip install zstandard)")
+    if mode == "r":
+        return zstandard.ZstdDecompressor().stream_reader(
+            open(path, "rb"), read_size=BUFFER_SIZE, read_across_frames=True, closefd=True
+        )
+    return zstandard.ZstdCompressor().stream_writer(open(path, mode + "b"), write_size=BUFFER_SIZE, closefd=True)
+
+
+def open_csv(path: str, mode: str = "r") -> TextIO:
+    """
+    Ouvre un fichier CSV en texte, avec tampon de BUFFER_SIZE octets et compression transparente
+
+    Args:
+        path: Chemin du fichier
+        mode: "r" (lecture, compression détectée par signature), "w" ou "a" (compression d'après l'extension)
+
+    Returns:
+        Flux texte UTF-8 à passer à csv.reader / csv.writer (newline="")
+    """
+    if mode not in ("r", "w", "a"):
+        raise ValueError(f"Mode d'ouverture non supporté: {mode}")
+    compression = detect_compression(path) if mode == "r" else compression_for_path(path)
+    if compression is None:
+        # Lecture avec utf-8-sig: une marque BOM éventuelle ne fait pas partie du premier nom de colonne
+        encoding = "utf-8-sig" if mode == "r" else ENCODING
+        return open(path, mode, buffering=BUFFER_SIZE, encoding=encoding, newline="")
+    binary = _open_binary(path, mode, compression)
+    if mode == "r":
+        binary = io.BufferedReader(binary, BUFFER_SIZE)
+        return io.TextIOWrapper(binary, encoding="utf-8-sig", newline="")
+    return io.TextIOWrapper(io.BufferedWriter(binary, BUFFER_SIZE), encoding=ENCODING, newline="")
+
+
+class CsvSchema:
+    """
+    Colonnes d'un fichier CSV et index de chaque colonne, calculés une fois à la lecture de l'en-tête
+    """
+
+    def __init__(self, fieldnames: Sequence[str]):
+        self.fieldnames = list(fieldnames)
+        self.width = len(self.fieldnames)
+        # Colonne portant deux fois le même nom: la dernière l'emporte, comme avec csv.DictReader
+        self.index: Dict[str, int] = {name: position for position, name in enumerate(self.fieldnames)}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.index
+
+    def __bool__(self) -> bool:
+        return self.width > 0
+
+    def missing(self, columns: Iterable[str]) -> List[str]:
+        """Colonnes absentes du fichier, dans l'ordre demandé"""
+        return [column for column in columns if column not in self.index]
+
+    def first_of(self, columns: Iterable[str]) -> Optional[str]:
+        """Première colonne présente parmi plusieurs colonnes possibles (None si aucune)"""
+        return next((column for column in columns if column in self.index), None)
+
+    def metier_column(self) -> Optional[str]:
+        """Colonne métier utilisée pour les clés: Metier_normalise, ou Metier à défaut"""
+        return self.first_of(METIER_COLUMNS)
+
+    def getter(self, *columns: str) -> Callable[[Sequence[str]], tuple]:
+        """
+        Accès par index précalculé à plusieurs colonnes d'une ligne
+
+        Returns:
+            Fonction ligne -> tuple des valeurs des colonnes demandées
+
+        Raises:
+            KeyError: Si une colonne est absente
+        """
+        indices = [self.index[column] for column in columns]
+        if len(indices) == 1:
+            position = indices[0]
+            return lambda row: (row[position],)
+        return itemgetter(*indices)
+
+    def record(self, row: Sequence[str]) -> Dict[str, str]:
+        """Dictionnaire colonne -> valeur d'une ligne"""
+        return dict(zip(self.fieldnames, row))
+
+    def projection(self, fieldnames: Sequence[str]) -> Callable[[Sequence[str]], List[str]]:
+        """
+        Réordonne les lignes de ce schéma selon d'autres colonnes (valeur vide pour une colonne absente)
+        """
+        indices = [self.index.get(name) for name in fieldnames]
+        if None not in indices and len(indices) > 1:
+            getter = itemgetter(*indices)
+            return lambda row: list(getter(row))
+        return lambda row: ["" if position is None else row[position] for position in indices]
+
+
+def read_schema(path: str) -> CsvSchema:
+    """Lit uniquement l'en-tête d'un fichier CSV"""
+    with open_csv(path) as file:
+        return CsvSchema(next(csv.reader(file), []))
+
+
+class CsvReader:
+    """
+    Lecture d'un fichier CSV ligne par ligne
+
+    Itérer sur le lecteur produit des listes d'exactement schema.width valeurs (ligne courte complétée
+    par des valeurs vides, valeurs en trop ignorées); records() produit des dictionnaires identiques
+    à ceux de csv.DictReader. Les lignes vides sont ignorées dans les deux cas.
+
+    Usage:
+        with CsvReader("entreprises.csv") as reader:
+            nom_ville = reader.schema.getter("Nom", "Ville")
+            for row in reader:
+                nom, ville = nom_ville(row)
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open_csv(path)
+        try:
+            self._reader = csv.reader(self._file)
+            self.schema = CsvSchema(next(self._reader, []))
+        except BaseException:
+            self._file.close()
+            raise
+
+    @property
+    def fieldnames(self) -> List[str]:
+        return self.schema.fieldnames
+
+    @property
+    def line_num(self) -> int:
+        return self._reader.line_num
+
+    def __iter__(self) -> Iterator[List[str]]:
+        width = self.schema.width
+        for row in self._reader:
+            if len(row) == width:
+                yield row
+            elif row:
+                yield row[:width] + [""] * (width - len(row))
+
+    def records(self) -> Iterator[Dict[str, Optional[str]]]:
+        """Enregistrements sous forme de dictionnaires (mêmes valeurs que csv.DictReader)"""
+        fieldnames = self.schema.fieldnames
+        width = self.schema.width
+        for row in self._reader:
+            record = dict(zip(fieldnames, row))
+            if len(row) != width:
+                if not row:
+                    continue
+                if len(row) > width:
+                    record[None] = row[width:]  # type: ignore[index]
+                else:
+                    for name in fieldnames[len(row) :]:
+                        record[name] = None
+            yield record
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self) -> "CsvReader":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class CsvWriter:
+    """
+    Écriture d'un fichier CSV: en-tête à l'ouverture, puis lignes (listes) ou enregistrements (dictionnaires)
+
+    Le format produit est celui de csv.writer / csv.DictWriter (dialecte excel, fins de ligne \\r\\n).
+    """
+
+    def __init__(self, path: str, fieldnames: Sequence[str], mode: str = "w"):
+        self.path = path
+        self.fieldnames = list(fieldnames)
+        self._file = open_csv(path, mode)
+        self._writer = csv.writer(self._file)
+        self.writerow = self._writer.writerow
+        self.writerows = self._writer.writerows
+        if mode == "w":
+            self.writerow(self.fieldnames)
+        self._getter = itemgetter(*self.fieldnames) if len(self.fieldnames) > 1 else None
+
+    def record_values(self, record: Dict) -> Sequence:
+        """Valeurs d'un enregistrement dans l'ordre des colonnes (vide pour une colonne absente)"""
+        if self._getter is not None:
+            try:
+                return self._getter(record)
+            except KeyError:
+                pass
+        return [record.get(name, "") for name in self.fieldnames]
+
+    def write_record(self, record: Dict):
+        self.writerow(self.record_values(record))
+
+    def write_records(self, records: Iterable[Dict]):
+        self.writerows(map(self.record_values, records))
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self) -> "CsvWriter":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,535 @@
+#!/usr/bin/env python3
+"""
+Format colonnaire de l'historique des entreprises: un dossier avec des fichiers par colonne
+Une étape qui ne lit que quelques colonnes (Filters.py: les champs des règles, supprime_doublons.py:
+les colonnes de la clé) ne lit et ne décode que ces colonnes: le long texte Heures_ouverture n'est
+pas analysé par une étape qui ne s'en sert pas.
+
+Contenu du dossier:
+- schema.json: colonnes (nom, type, fichiers), nombre de lignes
+- colonne texte: <n>.donnees (valeurs UTF-8 concaténées) et <n>.positions (entiers 64 bits,
+  début de chaque valeur puis fin de la dernière)
+- colonne numérique: <n>.entiers ou <n>.reels (entiers ou réels 64 bits), projetés en mémoire (mmap)
+
+Une colonne n'est stockée en numérique que si chaque valeur se relit à l'identique ("4.5", "12", vide):
+l'export CSV reproduit exactement le fichier importé.
+"""
+
+import argparse
+import json
+import math
+import mmap
+import os
+import shutil
+import sys
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+from fichiers_csv import CsvReader, CsvSchema, CsvWriter
+
+SCHEMA_FILE = "schema.json"
+FORMAT_VERSION = 1
+
+TEXT_TYPE = "texte"
+INT_TYPE = "entier"
+FLOAT_TYPE = "reel"
+
+# Valeurs vides des colonnes numériques
+INT_NULL = -(1 << 63)
+FLOAT_NULL = float("nan")
+
+# Nombre de positions gardées en mémoire avant écriture
+FLUSH_SIZE = 65_536
+
+INT_MIN, INT_MAX = INT_NULL + 1, (1 << 63) - 1
+
+
+def is_columnar(path: str) -> bool:
+    """Vrai si le chemin est un dossier d'historique colonnaire"""
+    return os.path.isfile(os.path.join(path, SCHEMA_FILE))
+
+
+def _is_int_text(value: str) -> bool:
+    try:
+        number = int(value)
+    except ValueError:
+        return False
+    return str(number) == value and INT_MIN <= number <= INT_MAX
+
+
+def _is_float_text(value: str) -> bool:
+    try:
+        number = float(value)
+    except ValueError:
+        return False
+    return math.isfinite(number) and repr(number) == value
+
+
+def _map_file(path: str) -> Union[mmap.mmap, bytes]:
+    """Projection en mémoire d'un fichier en lecture seule (un fichier vide ne peut pas être projeté)"""
+    if os.path.getsize(path) == 0:
+        return b""
+    with open(path, "rb") as file:
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class _ColumnFileWriter:
+    """
+    Écrit une colonne au fil des valeurs (fichiers texte), puis la convertit en numérique à la fin
+    si toutes ses valeurs le permettent
+    """
+
+    def __init__(self, directory: str, stem: str):
+        self.directory = directory
+        self.stem = stem
+        self._data = open(os.path.join(directory, f"{stem}.donnees"), "wb", buffering=1 << 20)
+        self._positions_file = open(os.path.join(directory, f"{stem}.positions"), "wb")
+        self._positions = array("q", [0])
+        self._offset = 0
+        self.count = 0
+        self._can_int = True
+        self._can_float = True
+        self._has_value = False
+
+    def append(self, value: Optional[str]):
+        if value:
+            self._has_value = True
+            if self._can_int or self._can_float:
+                # Le texte d'un entier ("4") n'est jamais celui d'un réel ("4.0"): une colonne est l'un ou l'autre
+                if self._can_int and _is_int_text(value):
+                    self._can_float = False
+                else:
+                    self._can_int = False
+                    self._can_float = self._can_float and _is_float_text(value)
+            encoded = value.encode("utf-8")
+            self._data.write(encoded)
+            self._offset += len(encoded)
+        self._positions.append(self._offset)
+        self.count += 1
+        if len(self._positions) >= FLUSH_SIZE:
+            self._positions.tofile(self._positions_file)
+            self._positions = array("q")
+
+    def finish(self) -> Dict[str, str]:
+        """Ferme les fichiers et retourne la description de la colonne (type et fichier principal)"""
+        self._positions.tofile(self._positions_file)
+        self._positions_file.close()
+        self._data.close()
+
+        value_type = INT_TYPE if self._can_int else FLOAT_TYPE if self._can_float else TEXT_TYPE
+        if not self._has_value or value_type == TEXT_TYPE:
+            return {"type": TEXT_TYPE, "fichier": self.stem}
+
+        # Conversion en numérique: relecture des valeurs texte qui viennent d'être écrites
+        text_column = TextColumn(self.directory, self.stem)
+        if value_type == INT_TYPE:
+            numbers = array("q", (int(value) if value else INT_NULL for value in text_column))
+        else:
+            numbers = array("d", (float(value) if value else FLOAT_NULL for value in text_column))
+        text_column.close()
+        with open(os.path.join(self.directory, f"{self.stem}.{value_type}s"), "wb") as file:
+            numbers.tofile(file)
+        os.remove(os.path.join(self.directory, f"{self.stem}.donnees"))
+        os.remove(os.path.join(self.directory, f"{self.stem}.positions"))
+        return {"type": value_type, "fichier": self.stem}
+
+
+class TextColumn:
+    """Colonne texte projetée en mémoire: la valeur i est décodée à la demande"""
+
+    def __init__(self, directory: str, stem: str):
+        self._data = _map_file(os.path.join(directory, f"{stem}.donnees"))
+        self._positions_map = _map_file(os.path.join(directory, f"{stem}.positions"))
+        self._positions = memoryview(self._positions_map).cast("q")
+
+    def __len__(self) -> int:
+        return len(self._positions) - 1
+
+    def __getitem__(self, index: int) -> str:
+        return self._data[self._positions[index] : self._positions[index + 1]].decode("utf-8")
+
+    def __iter__(self) -> Iterator[str]:
+        data = self._data
+        start = 0
+        for end in self._positions[1:]:
+            yield data[start:end].decode("utf-8") if end != start else ""
+            start = end
+
+    def close(self):
+        self._positions.release()
+        for mapped in (self._data, self._positions_map):
+            if isinstance(mapped, mmap.mmap):
+                mapped.close()
+
+
+class NumericColumn:
+    """
+    Colonne numérique projetée en mémoire (entiers ou réels 64 bits, sans copie)
+
+    values donne les nombres bruts (INT_NULL ou NaN pour une valeur vide); l'itération donne le texte
+    d'origine.
+    """
+
+    def __init__(self, directory: str, stem: str, value_type: str):
+        self.value_type = value_type
+        self._map = _map_file(os.path.join(directory, f"{stem}.{value_type}s"))
+        self.values = memoryview(self._map).cast("q" if value_type == INT_TYPE else "d")
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def _format(self, number: Union[int, float]) -> str:
+        if self.value_type == INT_TYPE:
+            return "" if number == INT_NULL else str(number)
+        return "" if number != number else repr(number)
+
+    def __getitem__(self, index: int) -> str:
+        return self._format(self.values[index])
+
+    def __iter__(self) -> Iterator[str]:
+        return map(self._format, self.values)
+
+    def close(self):
+        self.values.release()
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+
+
+Column = Union[TextColumn, NumericColumn]
+
+
+class ColumnarWriter:
+    """
+    Écrit un historique colonnaire ligne par ligne
+
+    Le dossier est écrit à côté du dossier final (suffixe .tmp) puis le remplace à la fermeture.
+    """
+
+    def __init__(self, path: str, fieldnames: Sequence[str]):
+        self.path = path.rstrip("/\\")
+        self.fieldnames = list(fieldnames)
+        self.rows = 0
+        self._temp_path = self.path + ".tmp"
+        shutil.rmtree(self._temp_path, ignore_errors=True)
+        os.makedirs(self._temp_path)
+        self._columns = [_ColumnFileWriter(self._temp_path, str(index)) for index in range(len(self.fieldnames))]
+
+    def writerow(self, row: Sequence[Optional[str]]):
+        for column, value in zip(self._columns, row):
+            column.append(value)
+        self.rows += 1
+
+    def writerows(self, rows: Iterable[Sequence[Optional[str]]]):
+        for row in rows:
+            self.writerow(row)
+
+    def close(self):
+        columns = [dict(nom=name, **column.finish()) for name, column in zip(self.fieldnames, self._columns)]
+        _write_schema(self._temp_path, columns, self.rows)
+        _replace_directory(self._temp_path, self.path)
+
+    def __enter__(self) -> "ColumnarWriter":
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        if exc_type is None:
+            self.close()
+        else:
+            for column in self._columns:
+                column.finish()
+            shutil.rmtree(self._temp_path, ignore_errors=True)
+
+
+def _remove_column_files(directory: str, stem: str):
+    for suffix in (".donnees", ".positions", f".{INT_TYPE}s", f".{FLOAT_TYPE}s"):
+        path = os.path.join(directory, stem + suffix)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _write_schema(directory: str, columns: List[Dict], rows: int):
+    schema = {"version": FORMAT_VERSION, "ordre_octets": sys.byteorder, "lignes": rows, "colonnes": columns}
+    temp_file = os.path.join(directory, SCHEMA_FILE + ".tmp")
+    with open(temp_file, "w", encoding="utf-8") as file:
+        json.dump(schema, file, ensure_ascii=False, indent=2)
+    os.replace(temp_file, os.path.join(directory, SCHEMA_FILE))
+
+
+def _replace_directory(source: str, target: str):
+    """Remplace un dossier par un autre (l'ancien dossier n'est supprimé qu'après le renommage)"""
+    previous = target + ".ancien"
+    shutil.rmtree(previous, ignore_errors=True)
+    if os.path.exists(target):
+        os.rename(target, previous)
+    os.rename(source, target)
+    shutil.rmtree(previous, ignore_errors=True)
+
+
+class ColumnUpdate:
+    """
+    Réécrit des colonnes entières d'un historique colonnaire (ou en ajoute), sans toucher aux autres
+
+    Les nouvelles valeurs sont écrites dans de nouveaux fichiers pendant que les anciennes colonnes restent
+    lisibles; le schéma n'est remplacé qu'à la validation (fin du bloc with sans erreur). En cas
+    d'interruption, l'historique reste dans son état précédent.
+
+    Usage:
+        with table.update_columns(["Filtré", "Raison_Filtrage"]) as update:
+            update.writerows(...)
+    """
+
+    def __init__(self, table: "ColumnarTable", columns: Sequence[str]):
+        self.table = table
+        self.fieldnames = list(columns)
+        first_stem = table.next_stem()
+        self._columns = [_ColumnFileWriter(table.path, str(first_stem + index)) for index in range(len(self.fieldnames))]
+
+    def writerow(self, row: Sequence[Optional[str]]):
+        for column, value in zip(self._columns, row):
+            column.append(value)
+
+    def writerows(self, rows: Iterable[Sequence[Optional[str]]]):
+        for row in rows:
+            self.writerow(row)
+
+    def commit(self):
+        written = self._columns[0].count if self._columns else self.table.rows
+        descriptions = [dict(nom=name, **column.finish()) for name, column in zip(self.fieldnames, self._columns)]
+        if written != self.table.rows:
+            self._discard()
+            raise ValueError(f"{written} valeurs écrites pour un historique de {self.table.rows} lignes")
+        self.table._commit_columns(descriptions)
+
+    def _discard(self):
+        for column in self._columns:
+            _remove_column_files(self.table.path, column.stem)
+
+    def __enter__(self) -> "ColumnUpdate":
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        if exc_type is None:
+            self.commit()
+        else:
+            for column in self._columns:
+                column.finish()
+            self._discard()
+
+
+class ColumnarReader:
+    """
+    Lecture ligne par ligne des seules colonnes demandées, avec la même interface que CsvReader
+    (schema, itération en listes, records)
+    """
+
+    def __init__(self, table: "ColumnarTable", columns: Sequence[str], owns_table: bool = False):
+        self.table = table
+        self.schema = CsvSchema(columns)
+        self._columns = [table.column(name) for name in columns]
+        self._owns_table = owns_table
+
+    @property
+    def fieldnames(self) -> List[str]:
+        return self.schema.fieldnames
+
+    def __iter__(self) -> Iterator[List[str]]:
+        return map(list, zip(*self._columns))
+
+    def records(self) -> Iterator[Dict[str, str]]:
+        fieldnames = self.schema.fieldnames
+        return (dict(zip(fieldnames, values)) for values in zip(*self._columns))
+
+    def close(self):
+        if self._owns_table:
+            self.table.close()
+
+    def __enter__(self) -> "ColumnarReader":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ColumnarTable:
+    """
+    Historique colonnaire ouvert en lecture: les colonnes ne sont projetées en mémoire qu'à leur premier accès
+
+    Usage:
+        with ColumnarTable("historique_colonnes") as table:
+            for record in table.reader(["Nom", "Note"]).records(): ...
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, SCHEMA_FILE), "r", encoding="utf-8") as file:
+            schema = json.load(file)
+        if schema.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Version du format colonnaire non supportée: {schema.get('version')}")
+        if schema.get("ordre_octets") != sys.byteorder:
+            raise ValueError(f"Historique colonnaire écrit sur une machine {schema.get('ordre_octets')}-endian")
+        self.rows: int = schema["lignes"]
+        self._descriptions: List[Dict] = schema["colonnes"]
+        self.fieldnames = [column["nom"] for column in self._descriptions]
+        self._columns: Dict[str, Column] = {}
+
+    def description(self, name: str) -> Dict:
+        for column in self._descriptions:
+            if column["nom"] == name:
+                return column
+        raise KeyError(f"Colonne '{name}' absente de l'historique colonnaire {self.path}")
+
+    def column(self, name: str) -> Column:
+        """Colonne projetée en mémoire (valeurs texte à l'itération, nombres bruts dans .values si numérique)"""
+        if name not in self._columns:
+            description = self.description(name)
+            if description["type"] == TEXT_TYPE:
+                self._columns[name] = TextColumn(self.path, description["fichier"])
+            else:
+                self._columns[name] = NumericColumn(self.path, description["fichier"], description["type"])
+        return self._columns[name]
+
+    def reader(self, columns: Optional[Sequence[str]] = None) -> ColumnarReader:
+        """Lecteur des colonnes demandées (toutes par défaut; les colonnes absentes sont ignorées)"""
+        return ColumnarReader(self, self.existing(columns))
+
+    def existing(self, columns: Optional[Sequence[str]] = None) -> List[str]:
+        """Colonnes demandées présentes dans l'historique (toutes si columns est None)"""
+        return list(self.fieldnames) if columns is None else [name for name in columns if name in self.fieldnames]
+
+    def update_columns(self, columns: Sequence[str]) -> "ColumnUpdate":
+        """Réécriture de colonnes entières, ligne par ligne (voir ColumnUpdate)"""
+        return ColumnUpdate(self, columns)
+
+    def _commit_columns(self, descriptions: List[Dict]):
+        """Remplace ou ajoute des colonnes décrites (fichiers déjà écrits), puis supprime les anciens fichiers"""
+        merged = list(self._descriptions)
+        obsolete: List[str] = []
+        for description in descriptions:
+            for index, column in enumerate(merged):
+                if column["nom"] == description["nom"]:
+                    obsolete.append(column["fichier"])
+                    merged[index] = description
+                    break
+            else:
+                merged.append(description)
+
+        _write_schema(self.path, merged, self.rows)
+        self._descriptions = merged
+        self.fieldnames = [column["nom"] for column in merged]
+        self.close()
+        for stem in obsolete:
+            _remove_column_files(self.path, stem)
+
+    def next_stem(self) -> int:
+        return 1 + max((int(column["fichier"]) for column in self._descriptions), default=-1)
+
+    def export_csv(self, output_file: str) -> int:
+        """Exporte toutes les colonnes au format CSV; retourne le nombre de lignes"""
+        with CsvWriter(output_file, self.fieldnames) as writer:
+            writer.writerows(self.reader())
+        return self.rows
+
+    def close(self):
+        for column in self._columns.values():
+            column.close()
+        self._columns = {}
+
+    def __enter__(self) -> "ColumnarTable":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def import_csv(input_file: str, output_path: str) -> int:
+    """Convertit un historique CSV en historique colonnaire; retourne le nombre de lignes"""
+    with CsvReader(input_file) as reader:
+        if not reader.schema:
+            raise ValueError(f"Impossible de lire les colonnes du fichier '{input_file}'")
+        with ColumnarWriter(output_path, reader.fieldnames) as writer:
+            writer.writerows(reader)
+            return writer.rows
+
+
+def open_reader(path: str, columns: Optional[Sequence[str]] = None) -> Union[CsvReader, ColumnarReader]:
+    """
+    Lecteur d'un historique CSV ou colonnaire (même interface: schema, itération en listes, records)
+
+    Seules les colonnes demandées sont lues dans un historique colonnaire; un CSV est lu en entier.
+    """
+    if not is_columnar(path):
+        return CsvReader(path)
+    table = ColumnarTable(path)
+    return ColumnarReader(table, table.existing(columns), owns_table=True)
+
+
+def copy_columnar(source: str, target: str):
+    """Copie un historique colonnaire (le dossier cible est remplacé)"""
+    temp_path = target.rstrip("/\\") + ".tmp"
+    shutil.rmtree(temp_path, ignore_errors=True)
+    shutil.copytree(source, temp_path)
+    _replace_directory(temp_path, target.rstrip("/\\"))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Historique des entreprises au format colonnaire",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemples d'utilisation:
+  python historique_colonnaire.py importer historique.csv historique_colonnes/
+  python historique_colonnaire.py info historique_colonnes/
+  python historique_colonnaire.py exporter historique_colonnes/ historique.csv
+        """,
+    )
+    subparsers = parser.add_subparsers(dest="commande", required=True)
+
+    import_parser = subparsers.add_parser("importer", help="Convertit un historique CSV en dossier colonnaire")
+    import_parser.add_argument("historique_file", help="Fichier CSV historique")
+    import_parser.add_argument("dossier", help="Dossier colonnaire (remplacé s'il existe)")
+
+    info_parser = subparsers.add_parser("info", help="Affiche les colonnes, leur type et leur taille")
+    info_parser.add_argument("dossier", help="Dossier colonnaire")
+
+    export_parser = subparsers.add_parser("exporter", help="Exporte un dossier colonnaire au format CSV")
+    export_parser.add_argument("dossier", help="Dossier colonnaire")
+    export_parser.add_argument("output_file", help="Fichier CSV de sortie")
+
+    args = parser.parse_args()
+
+    if args.commande != "importer" and not is_columnar(args.dossier):
+        print(f"Erreur: '{args.dossier}' n'est pas un historique colonnaire (utilisez d'abord la commande importer)")
+        sys.exit(1)
+
+    try:
+        if args.commande == "importer":
+            count = import_csv(args.historique_file, args.dossier)
+            print(f"✅ {count} entrées importées dans {args.dossier}")
+
+        elif args.commande == "info":
+            with ColumnarTable(args.dossier) as table:
+                print(f"📦 {args.dossier}: {table.rows} entrées, {len(table.fieldnames)} colonnes")
+                for name in table.fieldnames:
+                    stem = table.description(name)["fichier"]
+                    size = sum(
+                        os.path.getsize(os.path.join(args.dossier, file))
+                        for file in os.listdir(args.dossier)
+                        if file.split(".")[0] == stem
+                    )
+                    print(f"   {name:<24} {table.description(name)['type']:<8} {size / 1024:>10.1f} Ko")
+
+        else:
+            with ColumnarTable(args.dossier) as table:
+                count = table.export_csv(args.output_file)
+            print(f"✅ Historique exporté: {args.output_file} ({count} entrées)")
+
+    except FileNotFoundError as e:
+        print(f"Erreur: Fichier '{e.filename}' non trouvé")
+        sys.exit(1)
+    except ValueError as e:
+        print(f"Erreur: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
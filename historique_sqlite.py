@@ -0,0 +1,551 @@
+#!/usr/bin/env python3
+"""
+Stockage de l'historique des entreprises dans une base SQLite locale
+Les candidats sont appliqués par UPSERT groupés dans une seule transaction: le temps d'exécution
+et les écritures dépendent du nombre de candidats, pas de la taille de l'historique.
+L'import et l'export CSV restent disponibles pour la compatibilité avec les autres scripts.
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+from datetime import datetime
+from operator import itemgetter
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from cles_compactes import digest_key, is_other_place, record_place_id
+from fichiers_csv import CsvReader, CsvWriter
+from maj_historique import (
+    build_output_fieldnames,
+    check_required_columns,
+    create_composite_key,
+    create_location_key,
+    create_new_entry,
+    load_candidats,
+    location_conflicts,
+    merge_candidate,
+    print_conflict,
+    print_stats,
+    record_cell_key,
+    resolve_perimetre,
+)
+
+# Nombre de candidats traités par lot (une requête de lecture et un executemany par lot)
+DEFAULT_BATCH_SIZE = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    cle TEXT PRIMARY KEY,
+    valeur TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entreprises (
+    cle_composite BLOB PRIMARY KEY,
+    cle_localisation BLOB NOT NULL,
+    cle_cellule BLOB NOT NULL,
+    place_id TEXT NOT NULL DEFAULT '',
+    ordre INTEGER NOT NULL,
+    execution_introduction INTEGER NOT NULL,
+    execution_vue INTEGER NOT NULL,
+    donnees TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entreprises_localisation ON entreprises (cle_localisation);
+CREATE INDEX IF NOT EXISTS idx_entreprises_ordre ON entreprises (ordre);
+CREATE TABLE IF NOT EXISTS cellules (
+    cle_cellule BLOB PRIMARY KEY,
+    execution INTEGER NOT NULL
+);
+"""
+
+# Créé après la migration des bases antérieures à la colonne place_id (voir HistoriqueSQLite._migrate)
+PLACE_INDEX_SQL = "CREATE INDEX IF NOT EXISTS idx_entreprises_place ON entreprises (place_id) WHERE place_id != ''"
+
+UPSERT_SQL = """
+INSERT INTO entreprises (
+    cle_composite, cle_localisation, cle_cellule, place_id, ordre, execution_introduction, execution_vue, donnees
+)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (cle_composite) DO UPDATE SET
+    place_id = excluded.place_id, execution_vue = excluded.execution_vue, donnees = excluded.donnees
+"""
+
+UPDATE_SQL = """
+UPDATE entreprises SET cle_localisation = ?, cle_cellule = ?, place_id = ?, execution_vue = ?, donnees = ?
+WHERE rowid = ?
+"""
+
+# Un changement de nom ou d'adresse (rapprochement par Place_id) change la clé composite; si la nouvelle
+# clé appartient déjà à une autre entreprise, la ligne garde son ancienne clé
+REKEY_SQL = "UPDATE OR IGNORE entreprises SET cle_composite = ? WHERE rowid = ?"
+
+STORED_COLUMNS = "rowid, ordre, cle_composite, place_id, execution_introduction, donnees"
+
+# Valeurs par requête IN (limite du nombre de paramètres des anciennes versions de SQLite)
+QUERY_BATCH_SIZE = 500
+
+
+def record_keys(record: Dict) -> Tuple[bytes, bytes]:
+    """Calcule les empreintes des clés composite et de localisation d'un enregistrement"""
+    adresse = record["Adresse"]
+    ville = record["Ville"]
+    metier = record.get("Metier_normalise", record.get("Metier", ""))
+    composite_key = digest_key(create_composite_key(record["Nom"], adresse, ville, metier))
+    location_key = digest_key(create_location_key(adresse, ville, metier))
+    return composite_key, location_key
+
+
+def cell_digest(cell: Tuple[str, str]) -> bytes:
+    """Empreinte d'une cellule de recherche (ville, métier) normalisée"""
+    return digest_key("|".join(cell))
+
+
+def _batched(items: List, size: int) -> Iterator[List]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+class HistoriqueSQLite:
+    """
+    Historique des entreprises stocké dans SQLite
+
+    Chaque entreprise est une ligne indexée par l'empreinte de sa clé composite (clé primaire),
+    par son identifiant Google Places et par l'empreinte de sa clé de localisation (index secondaires);
+    les colonnes CSV sont stockées en JSON. La colonne Actif n'est pas stockée: chaque exécution reçoit un numéro
+    croissant et une entreprise est active si elle a été vue depuis la dernière recherche de sa
+    cellule (ville, métier): dernière exécution complète, ou dernière exécution dont le périmètre
+    contenait la cellule. Désactiver les entreprises absentes des candidats ne demande donc aucune écriture.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.connection = sqlite3.connect(db_path)
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+        self.connection.executescript(SCHEMA)
+        self._migrate()
+        self.connection.execute(PLACE_INDEX_SQL)
+
+    def _migrate(self):
+        """Ajoute la colonne place_id aux bases créées avant elle, remplie d'après les données de chaque entreprise"""
+        columns = {row[1] for row in self.connection.execute("PRAGMA table_info(entreprises)")}
+        if "place_id" in columns:
+            return
+        with self.connection:
+            self.connection.execute("ALTER TABLE entreprises ADD COLUMN place_id TEXT NOT NULL DEFAULT ''")
+            cursor = self.connection.execute("SELECT rowid, donnees FROM entreprises")
+            place_ids = [(record_place_id(json.loads(donnees)), rowid) for rowid, donnees in cursor]
+            self.connection.executemany(
+                "UPDATE entreprises SET place_id = ? WHERE rowid = ?", [row for row in place_ids if row[0]]
+            )
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self) -> "HistoriqueSQLite":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _get_meta(self, cle: str, default: str) -> str:
+        row = self.connection.execute("SELECT valeur FROM meta WHERE cle = ?", (cle,)).fetchone()
+        return row[0] if row else default
+
+    def _set_meta(self, cle: str, valeur: str):
+        self.connection.execute(
+            "INSERT INTO meta (cle, valeur) VALUES (?, ?) ON CONFLICT (cle) DO UPDATE SET valeur = excluded.valeur",
+            (cle, valeur),
+        )
+
+    @property
+    def fieldnames(self) -> List[str]:
+        """Colonnes de l'historique, dans l'ordre du CSV exporté"""
+        return json.loads(self._get_meta("colonnes", "[]"))
+
+    @property
+    def execution(self) -> int:
+        """Numéro de la dernière exécution appliquée"""
+        return int(self._get_meta("execution", "0"))
+
+    @property
+    def full_execution(self) -> int:
+        """Numéro de la dernière exécution sans périmètre (toutes les cellules recherchées)"""
+        return int(self._get_meta("execution_complete", "0"))
+
+    def is_empty(self) -> bool:
+        return self.connection.execute("SELECT 1 FROM entreprises LIMIT 1").fetchone() is None
+
+    def next_order(self) -> int:
+        """Prochain numéro d'ordre (les lignes sont exportées dans l'ordre d'insertion)"""
+        row = self.connection.execute("SELECT MAX(ordre) FROM entreprises").fetchone()
+        return 0 if row[0] is None else row[0] + 1
+
+    def import_csv(self, file_path: str) -> int:
+        """
+        Remplace le contenu de la base par un historique CSV
+
+        Les entreprises marquées Actif=Oui sont considérées comme vues lors de l'exécution courante.
+
+        Returns:
+            Nombre d'entreprises importées
+        """
+        with CsvReader(file_path) as reader:
+            fieldnames = list(reader.fieldnames)
+            check_required_columns(fieldnames, "l'historique")
+
+            with self.connection:
+                self.connection.execute("DELETE FROM entreprises")
+                self.connection.execute("DELETE FROM cellules")
+                execution = self.execution
+                rows = []
+                for ordre, row in enumerate(reader.records()):
+                    composite_key, location_key = record_keys(row)
+                    execution_vue = execution if row.get("Actif", "Oui") == "Oui" else execution - 1
+                    donnees = {field: value for field, value in row.items() if field != "Actif"}
+                    # Une clé composite en double garde sa première position et les données de la dernière ligne
+                    rows.append(
+                        (
+                            composite_key,
+                            location_key,
+                            cell_digest(record_cell_key(row)),
+                            record_place_id(row),
+                            ordre,
+                            execution,
+                            execution_vue,
+                            json.dumps(donnees),
+                        )
+                    )
+                self.connection.executemany(UPSERT_SQL, rows)
+                self._set_meta("colonnes", json.dumps(fieldnames))
+                self._set_meta("execution_complete", str(execution))
+
+        return len(rows)
+
+    def iter_records(self) -> Iterator[Dict[str, str]]:
+        """Parcourt l'historique dans l'ordre d'insertion, avec la colonne Actif calculée"""
+        full_execution = self.full_execution
+        fieldnames = self.fieldnames
+        cursor = self.connection.execute(
+            "SELECT e.execution_vue, e.donnees, c.execution FROM entreprises e "
+            "LEFT JOIN cellules c ON c.cle_cellule = e.cle_cellule ORDER BY e.ordre"
+        )
+        for execution_vue, donnees, cell_execution in cursor:
+            record = json.loads(donnees)
+            last_search = max(full_execution, cell_execution if cell_execution is not None else full_execution)
+            record["Actif"] = "Oui" if execution_vue >= last_search else "Non"
+            # Valeurs par défaut des colonnes ajoutées après l'insertion de l'entreprise
+            if "Filtré" in fieldnames and "Filtré" not in record:
+                record["Filtré"] = "Non"
+            yield {field: record.get(field, "") for field in fieldnames}
+
+    def export_csv(self, output_file: str) -> int:
+        """
+        Exporte l'historique complet au format CSV de maj_historique.py
+
+        Returns:
+            Nombre d'entreprises exportées
+        """
+        count = 0
+        with CsvWriter(output_file, self.fieldnames) as writer:
+            for record in self.iter_records():
+                writer.write_record(record)
+                count += 1
+        return count
+
+    def fetch_stored(self, column: str, values: Iterable) -> List[Tuple]:
+        """
+        Retourne les entreprises dont la colonne (cle_composite ou place_id) vaut l'une des valeurs
+
+        Returns:
+            Liste de (rowid, ordre, clé composite, Place_id, exécution d'introduction, données JSON)
+        """
+        values = list(values)
+        rows = []
+        for start in range(0, len(values), QUERY_BATCH_SIZE):
+            batch = values[start : start + QUERY_BATCH_SIZE]
+            placeholders = ",".join("?" * len(batch))
+            rows += self.connection.execute(
+                f"SELECT {STORED_COLUMNS} FROM entreprises WHERE {column} IN ({placeholders})", batch
+            )
+        return rows
+
+    def load_batch_rows(self, composite_keys: Set[bytes], place_ids: Set[str]) -> Tuple[Dict[bytes, List], Dict[str, List]]:
+        """
+        Lit les entreprises correspondant aux candidats d'un lot
+
+        Chaque entreprise devient une ligne de travail [rowid, ordre, exécution d'introduction, données],
+        partagée par les deux index; à clé égale, la première dans l'ordre d'insertion est retenue.
+
+        Returns:
+            Tuple (clé composite -> ligne, Place_id -> ligne)
+        """
+        stored = self.fetch_stored("cle_composite", composite_keys) + self.fetch_stored("place_id", place_ids)
+        rows: Dict[int, List] = {}
+        by_key: Dict[bytes, List] = {}
+        by_place: Dict[str, List] = {}
+        for rowid, ordre, composite_key, place_id, introduction, donnees in sorted(stored, key=itemgetter(1)):
+            if rowid not in rows:
+                rows[rowid] = [rowid, ordre, introduction, json.loads(donnees)]
+            by_key.setdefault(composite_key, rows[rowid])
+            if place_id:
+                by_place.setdefault(place_id, rows[rowid])
+        return by_key, by_place
+
+    def fetch_by_location(self, keys: Iterable[bytes], before_execution: int) -> Dict[bytes, List[Dict]]:
+        """Retourne {clé de localisation: [données]} pour les entreprises introduites avant une exécution"""
+        keys = list(keys)
+        by_location: Dict[bytes, List[Dict]] = {}
+        # Chaque clé est entière dans un seul lot: l'ordre de ses entreprises est conservé
+        for start in range(0, len(keys), QUERY_BATCH_SIZE):
+            batch = keys[start : start + QUERY_BATCH_SIZE]
+            placeholders = ",".join("?" * len(batch))
+            cursor = self.connection.execute(
+                f"SELECT cle_localisation, donnees FROM entreprises "
+                f"WHERE cle_localisation IN ({placeholders}) AND execution_introduction < ? ORDER BY ordre",
+                [*batch, before_execution],
+            )
+            for key, donnees in cursor:
+                by_location.setdefault(key, []).append(json.loads(donnees))
+        return by_location
+
+    def free_composite_key(self, composite_key: bytes, pending: Dict) -> bytes:
+        """
+        Clé d'une nouvelle entrée: l'empreinte de sa clé composite, ou une empreinte dérivée si cette clé
+        appartient déjà à une entreprise d'un autre identifiant Places
+        """
+        while composite_key in pending or self.fetch_stored("cle_composite", [composite_key]):
+            composite_key = digest_key(composite_key.hex())
+        return composite_key
+
+    def write_rows(self, pending: Dict, execution: int):
+        """
+        Écrit les lignes de travail modifiées d'un lot
+
+        Une entreprise existante (identifiée par son rowid) est mise à jour et prend la clé composite de ses
+        nouvelles données; une nouvelle entrée est insérée (UPSERT sur sa clé, voir free_composite_key).
+        """
+        updates, rekeys, inserts = [], [], []
+        for identifier, ordre, introduction, record in pending.values():
+            composite_key, location_key = record_keys(record)
+            cell_key = cell_digest(record_cell_key(record))
+            donnees = json.dumps({field: value for field, value in record.items() if field != "Actif"})
+            if isinstance(identifier, int):
+                updates.append((location_key, cell_key, record_place_id(record), execution, donnees, identifier))
+                rekeys.append((composite_key, identifier))
+            else:
+                inserts.append(
+                    (identifier, location_key, cell_key, record_place_id(record), ordre, introduction, execution, donnees)
+                )
+        self.connection.executemany(UPDATE_SQL, updates)
+        self.connection.executemany(REKEY_SQL, rekeys)
+        self.connection.executemany(UPSERT_SQL, inserts)
+
+    def apply_batch(
+        self,
+        batch: List[Dict],
+        candidats_fieldnames: List[str],
+        all_fieldnames: List[str],
+        execution: int,
+        next_order: int,
+        stats: Dict[str, int],
+        conflicts: List[Dict],
+        verbose: bool = False,
+    ) -> int:
+        """
+        Applique un lot de candidats (voir apply_candidates)
+
+        Returns:
+            Prochain numéro d'ordre
+        """
+        today = datetime.now().strftime("%Y-%m-%d")
+        keys = [record_keys(candidat) for candidat in batch]
+        place_ids = [record_place_id(candidat) for candidat in batch]
+        by_key, by_place = self.load_batch_rows({key for key, _ in keys}, set(filter(None, place_ids)))
+        unmatched_locations = {
+            location_key
+            for candidat, (composite_key, location_key), place_id in zip(batch, keys, place_ids)
+            if place_id not in by_place and (composite_key not in by_key or is_other_place(candidat, by_key[composite_key][3]))
+        }
+        by_location = self.fetch_by_location(unmatched_locations, execution)
+
+        # Lignes modifiées dans le lot: rowid (entreprise existante) ou clé composite (nouvelle entrée) -> ligne
+        pending: Dict = {}
+
+        for candidat, (composite_key, location_key), place_id in zip(batch, keys, place_ids):
+            nom = candidat["Nom"]
+            adresse = candidat["Adresse"]
+            row = by_place.get(place_id) if place_id else None
+            matched_by_place = row is not None
+            row = row or by_key.get(composite_key)
+            if row is not None and is_other_place(candidat, row[3]):
+                # Même clé composite mais autre identifiant Places: c'est un autre lieu
+                row = None
+            existing_entries = by_location.get(location_key, [])
+
+            if row is not None:
+                # Même lieu Google Places, sinon correspondance exacte : mettre à jour les données et date_verification
+                merge_candidate(row[3], candidat, candidats_fieldnames, today, verbose)
+                pending[row[0]] = row
+                if place_id:
+                    by_place.setdefault(place_id, row)
+                stats["exact_matches"] += 1
+                stats["data_updates"] += 1
+                if verbose:
+                    print(f"✅ Mis à jour{' (Place_id)' if matched_by_place else ''}: {nom} - {adresse}")
+
+            elif not all(is_other_place(candidat, existing_entry) for existing_entry in existing_entries):
+                # Même adresse/ville/métier mais nom différent : conflit potentiel
+                # (sauf avec une entreprise dont l'identifiant Places est différent: c'est un autre lieu)
+                for existing_entry in location_conflicts(candidat, existing_entries):
+                    conflicts.append({"candidat": candidat, "existant": existing_entry})
+                    stats["conflicts"] += 1
+                    print_conflict(candidat, existing_entry)
+            else:
+                # Nouvelle entrée
+                key = self.free_composite_key(composite_key, pending)
+                row = [key, next_order, execution, create_new_entry(candidat, all_fieldnames, today)]
+                next_order += 1
+                pending[key] = row
+                by_key.setdefault(composite_key, row)
+                if place_id:
+                    by_place[place_id] = row
+                stats["new_entries"] += 1
+                stats["data_updates"] += 1
+                if verbose:
+                    print(f"➕ Nouvelle entrée: {nom} - {adresse}")
+
+        self.write_rows(pending, execution)
+        return next_order
+
+    def apply_candidates(
+        self,
+        candidats: List[Dict],
+        candidats_fieldnames: List[str],
+        verbose: bool = False,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        perimetre: Optional[Set[Tuple[str, str]]] = None,
+    ) -> Tuple[List[Dict], Dict[str, int]]:
+        """
+        Applique les candidats avec les mêmes règles que maj_historique.process_updates
+
+        Un candidat est d'abord rapproché par son identifiant Google Places (colonne place_id indexée),
+        puis par sa clé composite; un candidat de même adresse/ville/métier n'est en conflit qu'avec les
+        entreprises sans identifiant Places ou de même identifiant. Une entreprise rapprochée par Place_id
+        après un changement de nom ou d'adresse prend la clé composite de ses nouvelles données.
+
+        Toutes les écritures sont faites dans une seule transaction, par lots.
+        Contrairement au mode CSV, un candidat présent deux fois n'est inséré qu'une fois
+        (la clé composite est unique dans la base): la seconde occurrence le met à jour.
+
+        Args:
+            perimetre: Cellules (ville, métier) recherchées; None désactive toutes les entreprises absentes
+
+        Returns:
+            Tuple (conflicts, stats)
+        """
+        conflicts: List[Dict] = []
+        stats = {"exact_matches": 0, "new_entries": 0, "conflicts": 0, "data_updates": 0}
+
+        with self.connection:
+            execution = self.execution + 1
+            all_fieldnames = build_output_fieldnames(self.fieldnames, candidats_fieldnames)
+            print(f"Colonnes dans le fichier de sortie: {all_fieldnames}")
+            next_order = self.next_order()
+
+            for batch in _batched(candidats, batch_size):
+                next_order = self.apply_batch(
+                    batch, candidats_fieldnames, all_fieldnames, execution, next_order, stats, conflicts, verbose
+                )
+
+            # Désactivation: les cellules recherchées prennent le numéro de cette exécution
+            if perimetre is None:
+                self._set_meta("execution_complete", str(execution))
+            else:
+                self.connection.executemany(
+                    "INSERT INTO cellules (cle_cellule, execution) VALUES (?, ?) "
+                    "ON CONFLICT (cle_cellule) DO UPDATE SET execution = excluded.execution",
+                    [(cell_digest(cell), execution) for cell in perimetre],
+                )
+            self._set_meta("colonnes", json.dumps(all_fieldnames))
+            self._set_meta("execution", str(execution))
+
+        print_stats(stats)
+        return conflicts, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Historique des entreprises stocké dans une base SQLite",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemples d'utilisation:
+  python historique_sqlite.py importer historique.csv historique.db
+  python historique_sqlite.py maj historique.db candidats.csv --verbose
+  python historique_sqlite.py exporter historique.db historique_maj.csv
+        """,
+    )
+    subparsers = parser.add_subparsers(dest="commande", required=True)
+
+    import_parser = subparsers.add_parser("importer", help="Remplace le contenu de la base par un historique CSV")
+    import_parser.add_argument("historique_file", help="Fichier CSV historique")
+    import_parser.add_argument("base", help="Fichier de la base SQLite (créé si absent)")
+
+    maj_parser = subparsers.add_parser("maj", help="Applique un fichier de candidats à la base")
+    maj_parser.add_argument("base", help="Fichier de la base SQLite")
+    maj_parser.add_argument("candidats_file", help="Fichier CSV des candidats (détection automatique des colonnes)")
+    maj_parser.add_argument(
+        "--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help=f"Candidats par lot d'UPSERT (défaut: {DEFAULT_BATCH_SIZE})"
+    )
+    maj_parser.add_argument(
+        "--perimetre",
+        help="CSV des cellules recherchées (colonnes Ville, Metier_normalise): seules leurs entreprises sont désactivées",
+    )
+    maj_parser.add_argument(
+        "--perimetre-candidats",
+        action="store_true",
+        help="Désactive uniquement dans les cellules (ville, métier) présentes dans les candidats",
+    )
+    maj_parser.add_argument("--verbose", "-v", action="store_true", help="Affichage détaillé des opérations")
+
+    export_parser = subparsers.add_parser("exporter", help="Exporte la base au format CSV de maj_historique.py")
+    export_parser.add_argument("base", help="Fichier de la base SQLite")
+    export_parser.add_argument("output_file", help="Fichier CSV de sortie")
+
+    args = parser.parse_args()
+
+    if args.commande != "importer" and not os.path.exists(args.base):
+        print(f"Erreur: Base '{args.base}' non trouvée (utilisez d'abord la commande importer)")
+        sys.exit(1)
+
+    try:
+        with HistoriqueSQLite(args.base) as store:
+            if args.commande == "importer":
+                count = store.import_csv(args.historique_file)
+                print(f"✅ {count} entrées importées dans {args.base}")
+
+            elif args.commande == "maj":
+                print(f"🔄 Mise à jour de l'historique SQLite {args.base}...")
+                candidats, candidats_fieldnames = load_candidats(args.candidats_file)
+                print(f"   Candidats: {len(candidats)} entrées")
+                perimetre = resolve_perimetre(args.perimetre, args.perimetre_candidats, candidats)
+                conflicts, _ = store.apply_candidates(
+                    candidats, candidats_fieldnames, args.verbose, args.batch_size, perimetre
+                )
+                if conflicts:
+                    print(f"\n⚠️  {len(conflicts)} conflit(s) détecté(s) - vérification manuelle recommandée")
+
+            else:
+                count = store.export_csv(args.output_file)
+                print(f"✅ Historique exporté: {args.output_file} ({count} entrées)")
+
+    except FileNotFoundError as e:
+        print(f"Erreur: Fichier '{e.filename}' non trouvé")
+        sys.exit(1)
+    except (ValueError, sqlite3.Error) as e:
+        print(f"Erreur: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
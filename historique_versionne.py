@@ -0,0 +1,459 @@
+#!/usr/bin/env python3
+"""
+Historique versionné des entreprises avec intervalles de validité
+Chaque version d'une entreprise est valide de Valide_depuis (inclus) à Valide_jusqu_a (exclu, vide si
+elle est toujours courante). Les versions sont construites à partir des copies successives de
+l'historique produites par maj_historique.py: une nouvelle version n'est ouverte que si les données
+de l'entreprise ont changé.
+
+La requête "à la date" s'appuie sur un index d'intervalles (arbre de segments sur les bornes des
+intervalles): seules les versions valides à la date demandée sont parcourues, et non tout l'historique.
+L'index est enregistré à côté du fichier des versions (historique_versionne.csv.idx) avec la position
+de chaque version dans le CSV: une requête ne lit que les lignes des versions trouvées.
+"""
+
+import argparse
+import csv
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from cles_compactes import is_other_place, record_digest, record_identity_digest, record_place_id
+from fichiers_csv import ENCODING, CsvReader, CsvWriter, detect_compression, read_schema
+
+VALID_FROM = "Valide_depuis"
+VALID_TO = "Valide_jusqu_a"
+VERSION_FIELDS = (VALID_FROM, VALID_TO)
+
+# Colonnes ignorées pour décider si une entreprise a changé (une simple vérification n'ouvre pas de version)
+IGNORED_FIELDS = ("Date_verification",)
+
+# Borne de fin des versions courantes
+OPEN_END = date.max.toordinal()
+
+# Index persistant: suffixe, en-tête (signature, taille et date de modification du CSV indexé, nombre de bornes,
+# nombre de nœuds), nœuds (numéro, première version, nombre de versions), versions (position et longueur de la ligne)
+INDEX_SUFFIX = ".idx"
+INDEX_MAGIC = b"HVI1"
+INDEX_HEADER = struct.Struct("<4sQQII")
+INDEX_NODE = struct.Struct("<III")
+INDEX_SPAN = struct.Struct("<QI")
+
+
+def parse_day(value: str) -> int:
+    """Convertit une date AAAA-MM-JJ en jour ordinal"""
+    return datetime.strptime(value.strip(), "%Y-%m-%d").date().toordinal()
+
+
+def snapshot_date(records: List[Dict]) -> str:
+    """Date d'une copie de l'historique: la plus récente Date_verification (jour de l'exécution qui l'a produite)"""
+    dates = [record.get("Date_verification") or "" for record in records]
+    latest = max(dates, default="")
+    if not latest:
+        raise ValueError("Impossible de dater la copie de l'historique (colonne Date_verification vide)")
+    return latest
+
+
+class IntervalIndex:
+    """
+    Index d'intervalles [début, fin) sur des jours ordinaux (arbre de segments)
+
+    Les bornes distinctes découpent le temps en segments élémentaires; chaque intervalle est rangé
+    dans O(log m) nœuds disjoints couvrant exactement ses segments. Une requête parcourt le chemin
+    de la racine à la feuille du jour demandé: O(log m + k) pour k intervalles trouvés.
+    """
+
+    def __init__(self, intervals: List[Tuple[int, int]]):
+        self._bounds = sorted({start for start, _ in intervals} | {end for _, end in intervals if end != OPEN_END})
+        self._nodes: Dict[int, List[int]] = {}
+        leaves = len(self._bounds)
+        for position, (start, end) in enumerate(intervals):
+            low = bisect_left(self._bounds, start)
+            high = leaves if end == OPEN_END else bisect_left(self._bounds, end)
+            if low < high:
+                self._insert(1, 0, leaves, low, high, position)
+
+    def _insert(self, node: int, node_low: int, node_high: int, low: int, high: int, position: int):
+        if low <= node_low and node_high <= high:
+            self._nodes.setdefault(node, []).append(position)
+            return
+        middle = (node_low + node_high) // 2
+        if low < middle:
+            self._insert(2 * node, node_low, middle, low, high, position)
+        if middle < high:
+            self._insert(2 * node + 1, middle, node_high, low, high, position)
+
+    @staticmethod
+    def path(bounds: List[int], day: int) -> Iterator[int]:
+        """Nœuds de la racine à la feuille du jour donné (aucun si le jour précède toutes les bornes)"""
+        leaf = bisect_right(bounds, day) - 1
+        if leaf < 0:
+            return
+        node, node_low, node_high = 1, 0, len(bounds)
+        while True:
+            yield node
+            if node_high - node_low == 1:
+                return
+            middle = (node_low + node_high) // 2
+            if leaf < middle:
+                node, node_high = 2 * node, middle
+            else:
+                node, node_low = 2 * node + 1, middle
+
+    def stab(self, day: int) -> Iterator[int]:
+        """Positions des intervalles contenant le jour donné"""
+        for node in self.path(self._bounds, day):
+            yield from self._nodes.get(node, ())
+
+    def write(self, path: str, spans: List[Tuple[int, int]], source_stat: os.stat_result):
+        """
+        Enregistre l'index: bornes, nœuds, puis positions et longueurs des lignes de chaque nœud
+
+        Args:
+            path: Fichier de l'index
+            spans: Position et longueur dans le fichier des versions de la ligne de chaque intervalle
+            source_stat: État du fichier des versions indexé (taille, date de modification)
+        """
+        nodes = sorted(self._nodes.items())
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as file:
+            file.write(
+                INDEX_HEADER.pack(INDEX_MAGIC, source_stat.st_size, source_stat.st_mtime_ns, len(self._bounds), len(nodes))
+            )
+            file.write(array("I", self._bounds).tobytes())
+            first = 0
+            for node, positions in nodes:
+                file.write(INDEX_NODE.pack(node, first, len(positions)))
+                first += len(positions)
+            for _, positions in nodes:
+                file.write(b"".join(INDEX_SPAN.pack(*spans[position]) for position in positions))
+        os.replace(temp_path, path)
+
+
+class CurrentVersions:
+    """
+    Versions courantes (Valide_jusqu_a vide) indexées par identifiant Places et par clé composite
+
+    Une entreprise est retrouvée par son identifiant Places, à défaut par sa clé composite (versions
+    antérieures à la colonne Place_id): un changement de nom ou d'adresse ferme sa version et en ouvre
+    une nouvelle au lieu de créer une autre entreprise. Une clé composite ne rapproche pas deux
+    identifiants Places différents.
+    """
+
+    def __init__(self, versions: List[Dict]):
+        self._versions = {position: version for position, version in enumerate(versions) if not version[VALID_TO]}
+        self._by_place: Dict[str, int] = {}
+        self._by_digest: Dict[bytes, int] = {}
+        for position, version in self._versions.items():
+            if record_place_id(version):
+                self._by_place.setdefault(record_place_id(version), position)
+            self._by_digest.setdefault(record_digest(version), position)
+
+    def pop(self, record: Dict) -> Optional[Dict]:
+        """Retire et retourne la version courante de l'entreprise d'un enregistrement (None si nouvelle)"""
+        place_id = record_place_id(record)
+        position = self._by_place.get(place_id) if place_id else None
+        if position is None:
+            position = self._by_digest.get(record_digest(record))
+        version = self._versions.get(position) if position is not None else None
+        if version is None or is_other_place(record, version):
+            return None
+        return self._versions.pop(position)
+
+    def remaining(self) -> Iterator[Dict]:
+        """Versions courantes non retrouvées (entreprises absentes de la copie)"""
+        return iter(self._versions.values())
+
+
+class HistoriqueVersionne:
+    """Versions des entreprises stockées dans un CSV (colonnes de l'historique + Valide_depuis, Valide_jusqu_a)"""
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.fieldnames: List[str] = []
+        self.versions: List[Dict] = []
+        self._index: Optional[IntervalIndex] = None
+
+        if os.path.exists(file_path):
+            with CsvReader(file_path) as reader:
+                self.fieldnames = [field for field in reader.fieldnames if field not in VERSION_FIELDS]
+                self.versions = list(reader.records())
+
+    @property
+    def last_date(self) -> str:
+        """Date de la dernière copie importée (vide si aucune)"""
+        return max((version[field] for version in self.versions for field in VERSION_FIELDS), default="")
+
+    def add_snapshot(self, records: Iterable[Dict], fieldnames: List[str], day: str) -> Tuple[int, int]:
+        """
+        Ajoute une copie de l'historique valable à partir d'une date
+
+        Les entreprises (identifiées par Place_id, à défaut par leur clé composite, voir CurrentVersions)
+        dont les données ont changé (hors Date_verification) ferment leur version courante et en ouvrent
+        une nouvelle; celles absentes de la copie ferment leur version.
+        Une copie du même jour que la précédente remplace l'état de ce jour.
+
+        Returns:
+            Tuple (versions ouvertes, versions fermées)
+
+        Raises:
+            ValueError: Si la copie est antérieure à la dernière copie importée
+        """
+        parse_day(day)
+        if day < self.last_date:
+            raise ValueError(f"Copie du {day} antérieure à la dernière copie importée ({self.last_date})")
+
+        for field in fieldnames:
+            if field not in self.fieldnames and field not in VERSION_FIELDS:
+                self.fieldnames.append(field)
+        compared_fields = [field for field in self.fieldnames if field not in IGNORED_FIELDS]
+
+        current = CurrentVersions(self.versions)
+        seen = set()
+        opened = closed = 0
+
+        for record in records:
+            key = record_identity_digest(record)
+            if key in seen:
+                continue
+            seen.add(key)
+
+            version = current.pop(record)
+            if version is not None:
+                if all((version.get(field) or "") == (record.get(field) or "") for field in compared_fields):
+                    continue
+                version[VALID_TO] = day
+                closed += 1
+
+            new_version = {field: record.get(field) or "" for field in self.fieldnames}
+            new_version.update({VALID_FROM: day, VALID_TO: ""})
+            self.versions.append(new_version)
+            opened += 1
+
+        for version in current.remaining():
+            version[VALID_TO] = day
+            closed += 1
+
+        # Les versions remplacées le jour même (intervalle vide) ne sont jamais valides
+        self.versions = [version for version in self.versions if version[VALID_FROM] != version[VALID_TO]]
+        self._index = None
+        return opened, closed
+
+    def import_csv(self, historique_file: str, day: Optional[str] = None) -> Tuple[int, int]:
+        """Ajoute une copie CSV de l'historique, datée par sa Date_verification la plus récente à défaut de day"""
+        with CsvReader(historique_file) as reader:
+            records = list(reader.records())
+            fieldnames = reader.fieldnames
+        return self.add_snapshot(records, fieldnames, day or snapshot_date(records))
+
+    def save(self):
+        """Écrit les versions (fichier temporaire puis remplacement atomique) et leur index enregistré"""
+        temp_file = f"{self.file_path}.tmp"
+        with CsvWriter(temp_file, self.fieldnames + list(VERSION_FIELDS)) as writer:
+            writer.write_records(self.versions)
+        os.replace(temp_file, self.file_path)
+
+        index = VersionFileIndex(self.file_path)
+        if index.is_usable():
+            index.build()
+
+    def as_of(self, day: date) -> Iterator[Dict]:
+        """Versions valides à une date, dans l'ordre du fichier des versions"""
+        if self._index is None:
+            self._index = IntervalIndex(
+                [
+                    (parse_day(version[VALID_FROM]), parse_day(version[VALID_TO]) if version[VALID_TO] else OPEN_END)
+                    for version in self.versions
+                ]
+            )
+        for position in sorted(self._index.stab(day.toordinal())):
+            yield self.versions[position]
+
+
+def row_spans(versions_file: str) -> Iterator[Tuple[int, int]]:
+    """Position et longueur en octets de chaque ligne de versions d'un CSV non compressé (en-tête exclu)"""
+    position = 0
+
+    def lines(file) -> Iterator[str]:
+        nonlocal position
+        for line in file:
+            position += len(line)
+            yield line.decode(ENCODING)
+
+    with open(versions_file, "rb") as file:
+        # csv.reader ne lit que les lignes physiques de l'enregistrement qu'il produit
+        reader = csv.reader(lines(file))
+        next(reader, None)
+        start = position
+        for row in reader:
+            if row:
+                yield start, position - start
+            start = position
+
+
+class VersionFileIndex:
+    """
+    Index d'intervalles enregistré à côté d'un fichier de versions non compressé (fichier .idx)
+
+    Une requête lit les bornes et la table des nœuds (proportionnelles au nombre de dates des copies),
+    les positions des versions des nœuds du chemin, puis uniquement ces lignes du CSV. L'index est
+    reconstruit si le fichier des versions a changé depuis son écriture (taille ou date de modification).
+    """
+
+    def __init__(self, versions_file: str):
+        self.versions_file = versions_file
+        self.path = versions_file + INDEX_SUFFIX
+
+    def is_usable(self) -> bool:
+        """Vrai si le fichier des versions existe et n'est pas compressé (positions des lignes accessibles)"""
+        return os.path.exists(self.versions_file) and detect_compression(self.versions_file) is None
+
+    def _read_header(self, file) -> Optional[Tuple[int, int]]:
+        data = file.read(INDEX_HEADER.size)
+        if len(data) < INDEX_HEADER.size:
+            return None
+        magic, size, mtime_ns, bound_count, node_count = INDEX_HEADER.unpack(data)
+        source = os.stat(self.versions_file)
+        if magic != INDEX_MAGIC or size != source.st_size or mtime_ns != source.st_mtime_ns:
+            return None
+        return bound_count, node_count
+
+    def is_current(self) -> bool:
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path, "rb") as file:
+            return self._read_header(file) is not None
+
+    def build(self):
+        """Construit l'index à partir du fichier des versions (une lecture complète)"""
+        source_stat = os.stat(self.versions_file)
+        spans = list(row_spans(self.versions_file))
+        with CsvReader(self.versions_file) as reader:
+            intervals = [
+                (parse_day(version[VALID_FROM]), parse_day(version[VALID_TO]) if version[VALID_TO] else OPEN_END)
+                for version in reader.records()
+            ]
+        IntervalIndex(intervals).write(self.path, spans, source_stat)
+
+    def as_of(self, day: date) -> Iterator[Dict]:
+        """Versions valides à une date, dans l'ordre du fichier des versions"""
+        with open(self.path, "rb") as file:
+            counts = self._read_header(file)
+            if counts is None:
+                raise ValueError(f"Index '{self.path}' périmé: le fichier des versions a changé")
+            bound_count, node_count = counts
+            bounds = array("I")
+            bounds.frombytes(file.read(bound_count * bounds.itemsize))
+            nodes = {
+                node: (first, count) for node, first, count in INDEX_NODE.iter_unpack(file.read(node_count * INDEX_NODE.size))
+            }
+            spans_start = file.tell()
+
+            spans: List[Tuple[int, int]] = []
+            for node in IntervalIndex.path(bounds.tolist(), day.toordinal()):
+                if node in nodes:
+                    first, count = nodes[node]
+                    file.seek(spans_start + first * INDEX_SPAN.size)
+                    spans.extend(INDEX_SPAN.iter_unpack(file.read(count * INDEX_SPAN.size)))
+
+        fieldnames = read_schema(self.versions_file).fieldnames
+        with open(self.versions_file, "rb") as file:
+            for offset, length in sorted(spans):
+                file.seek(offset)
+                row = next(csv.reader([file.read(length).decode(ENCODING)]))
+                yield dict(zip(fieldnames, row + [""] * (len(fieldnames) - len(row))))
+
+
+def versions_as_of(versions_file: str, day: date) -> Tuple[List[str], Iterator[Dict]]:
+    """
+    Colonnes et versions valides à une date, par l'index enregistré (construit s'il est absent ou périmé)
+
+    Un fichier de versions compressé est lu en entier et indexé en mémoire.
+    """
+    index = VersionFileIndex(versions_file)
+    if not index.is_usable():
+        historique = HistoriqueVersionne(versions_file)
+        return historique.fieldnames, historique.as_of(day)
+    if not index.is_current():
+        index.build()
+    fieldnames = [field for field in read_schema(versions_file).fieldnames if field not in VERSION_FIELDS]
+    return fieldnames, index.as_of(day)
+
+
+def is_selected(record: Dict, active_only: bool, unfiltered_only: bool) -> bool:
+    """Applique les filtres --actifs et --non-filtres"""
+    if active_only and record.get("Actif", "Oui") != "Oui":
+        return False
+    if unfiltered_only and record.get("Filtré", "Non") == "Oui":
+        return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Historique versionné des entreprises et état à une date passée",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemples d'utilisation:
+  python historique_versionne.py importer historique_versionne.csv historique_24_10.csv historique_24_11.csv
+  python historique_versionne.py a-la-date historique_versionne.csv 2024-10-24 --actifs --non-filtres
+  python historique_versionne.py a-la-date historique_versionne.csv 2024-10-24 --actifs -o campagne_24_10.csv
+        """,
+    )
+    subparsers = parser.add_subparsers(dest="commande", required=True)
+
+    import_parser = subparsers.add_parser("importer", help="Ajoute des copies de l'historique (dans l'ordre de leurs dates)")
+    import_parser.add_argument("versions_file", help="Fichier CSV des versions (créé si absent)")
+    import_parser.add_argument("historique_files", nargs="+", help="Copies CSV de l'historique")
+    import_parser.add_argument("--date", help="Date de la copie AAAA-MM-JJ (une seule copie; défaut: Date_verification max)")
+
+    as_of_parser = subparsers.add_parser("a-la-date", help="État de l'historique à une date")
+    as_of_parser.add_argument("versions_file", help="Fichier CSV des versions")
+    as_of_parser.add_argument("date", help="Date AAAA-MM-JJ")
+    as_of_parser.add_argument("--actifs", action="store_true", help="Uniquement les entreprises actives (Actif=Oui)")
+    as_of_parser.add_argument("--non-filtres", action="store_true", help="Uniquement les entreprises non filtrées")
+    as_of_parser.add_argument("--output", "-o", help="Fichier CSV de sortie (sinon affiche le nombre d'entreprises)")
+
+    args = parser.parse_args()
+
+    try:
+        if args.commande == "importer":
+            historique = HistoriqueVersionne(args.versions_file)
+            if args.date and len(args.historique_files) > 1:
+                raise ValueError("--date ne s'applique qu'à une seule copie")
+            copies = []
+            for historique_file in args.historique_files:
+                with CsvReader(historique_file) as reader:
+                    copies.append((args.date or snapshot_date(list(reader.records())), historique_file))
+
+            for day, historique_file in sorted(copies):
+                opened, closed = historique.import_csv(historique_file, day)
+                print(f"🕰️  {historique_file} ({day}): {opened} version(s) ouverte(s), {closed} fermée(s)")
+            historique.save()
+            print(f"✅ {len(historique.versions)} version(s) dans {args.versions_file}")
+
+        else:
+            day = datetime.strptime(args.date, "%Y-%m-%d").date()
+            fieldnames, versions = versions_as_of(args.versions_file, day)
+            records = [record for record in versions if is_selected(record, args.actifs, args.non_filtres)]
+            if args.output:
+                with CsvWriter(args.output, fieldnames) as writer:
+                    writer.write_records(records)
+                print(f"✅ État au {args.date}: {len(records)} entreprise(s) écrite(s) dans {args.output}")
+            else:
+                print(f"📅 État au {args.date}: {len(records)} entreprise(s)")
+
+    except FileNotFoundError as e:
+        print(f"Erreur: {e}")
+        sys.exit(1)
+    except ValueError as e:
+        print(f"Erreur: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
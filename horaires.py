@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Module partagé de représentation compacte des horaires d'ouverture
+Une semaine est découpée en 7 x 96 créneaux d'un quart d'heure (lundi 00:00 = créneau 0): les horaires
+d'une entreprise sont un entier dont le bit n est à 1 si l'entreprise est ouverte pendant le créneau n.
+Les questions du type "ouvert le dimanche matin" ou "ouvert après 19:00" deviennent des tests bit à bit
+avec le masque de la plage horaire.
+
+Les horaires sont construits depuis les périodes de l'API Google Places (recherche_entreprises.py) ou,
+à défaut, depuis le texte de la colonne Heures_ouverture ("lundi: 09:00 – 22:30; mardi: ...").
+Les analyses sont mémorisées: la plupart des textes d'horaires se répètent d'une entreprise à l'autre.
+"""
+
+import re
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional
+
+DAYS_PER_WEEK = 7
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+SLOTS_PER_WEEK = DAYS_PER_WEEK * SLOTS_PER_DAY
+FULL_WEEK = (1 << SLOTS_PER_WEEK) - 1
+
+# Colonnes CSV: texte des horaires et créneaux d'ouverture (entier en hexadécimal, vide si inconnus)
+HOURS_FIELD = "Heures_ouverture"
+SLOTS_FIELD = "Creneaux_ouverture"
+
+# Nombre de textes d'horaires distincts mémorisés
+CACHE_SIZE = 65_536
+
+# Jours de la semaine, lundi = 0 (noms français et anglais de weekdayDescriptions)
+DAY_NAMES = {
+    "lundi": 0,
+    "mardi": 1,
+    "mercredi": 2,
+    "jeudi": 3,
+    "vendredi": 4,
+    "samedi": 5,
+    "dimanche": 6,
+    "monday": 0,
+    "tuesday": 1,
+    "wednesday": 2,
+    "thursday": 3,
+    "friday": 4,
+    "saturday": 5,
+    "sunday": 6,
+}
+ALL_DAYS = ("tous", "*")
+
+TIME_PATTERN = re.compile(r"(\d{1,2})\s*(?:[:h]\s*(\d{2})?)?\s*([ap])?\.?\s*m?\.?(?![a-z])", re.IGNORECASE)
+ALWAYS_OPEN_PATTERN = re.compile(r"24\s*h\s*/\s*24|24\s*heures|24\s*hours", re.IGNORECASE)
+CLOSED_WORDS = ("fermé", "ferme", "closed")
+
+
+def slot_range(start_slot: int, end_slot: int) -> int:
+    """Masque des créneaux [start_slot, end_slot) de la semaine (une plage qui dépasse dimanche reprend lundi)"""
+    length = end_slot - start_slot
+    if length <= 0:
+        return 0
+    if length >= SLOTS_PER_WEEK:
+        return FULL_WEEK
+    start_slot %= SLOTS_PER_WEEK
+    mask = ((1 << length) - 1) << start_slot
+    return (mask | (mask >> SLOTS_PER_WEEK)) & FULL_WEEK
+
+
+def minute_range(day: int, start_minute: int, end_minute: int) -> int:
+    """
+    Masque d'une plage horaire d'un jour, en minutes depuis minuit
+
+    Une fin inférieure ou égale au début passe minuit (19:00 – 00:00, 22:00 – 02:00). Un créneau
+    entamé compte comme ouvert.
+    """
+    if end_minute <= start_minute:
+        end_minute += 24 * 60
+    base = day * SLOTS_PER_DAY
+    return slot_range(base + start_minute // SLOT_MINUTES, base + -(-end_minute // SLOT_MINUTES))
+
+
+def _to_minutes(hours: str, mins: str, meridiem: str) -> int:
+    hour = int(hours)
+    if meridiem:
+        hour = hour % 12 + (12 if meridiem.lower() == "p" else 0)
+    return hour * 60 + int(mins or 0)
+
+
+def _parse_times(text: str) -> List[int]:
+    """
+    Heures d'un texte en minutes depuis minuit ("09:00", "9h", "9:30 PM")
+
+    Un début de plage sans AM/PM prend celui de sa fin s'il reste avant elle ("6:00 – 10:00 PM").
+    """
+    times = TIME_PATTERN.findall(text)
+    minutes = [_to_minutes(*time) for time in times]
+    for index in range(0, len(times) - 1, 2):
+        end_meridiem = times[index + 1][2]
+        if not times[index][2] and end_meridiem:
+            start = _to_minutes(times[index][0], times[index][1], end_meridiem)
+            if start <= minutes[index + 1]:
+                minutes[index] = start
+    return minutes
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_opening_hours(text: str) -> Optional[int]:
+    """
+    Convertit le texte des horaires ("lundi: 09:00 – 12:00, 14:00 – 19:00; mardi: Fermé; ...") en créneaux
+
+    Returns:
+        Créneaux d'ouverture, ou None si le texte ne décrit aucun jour ("Non disponible", vide)
+    """
+    bitmap = 0
+    known_day = False
+    for segment in re.split(r"[;\n]", text or ""):
+        name, separator, hours = segment.partition(":")
+        day = DAY_NAMES.get(name.strip().lower())
+        if day is None or not separator:
+            continue
+        known_day = True
+        hours = hours.strip()
+        if ALWAYS_OPEN_PATTERN.search(hours):
+            bitmap |= minute_range(day, 0, 24 * 60)
+            continue
+        if hours.lower() in CLOSED_WORDS:
+            continue
+        times = _parse_times(hours)
+        for start, end in zip(times[::2], times[1::2]):
+            bitmap |= minute_range(day, start, end)
+    return bitmap if known_day else None
+
+
+def periods_to_bitmap(periods: List[Dict]) -> Optional[int]:
+    """
+    Convertit les périodes de l'API Google Places (openingHours.periods) en créneaux
+
+    Les jours de l'API commencent le dimanche (0); une période sans fermeture signifie "ouvert 24h/24".
+
+    Returns:
+        Créneaux d'ouverture, ou None si aucune période n'est exploitable
+    """
+    bitmap = 0
+    found = False
+    for period in periods:
+        opening = period.get("open")
+        if not opening:
+            continue
+        found = True
+        closing = period.get("close")
+        if not closing:
+            return FULL_WEEK
+        start = ((opening.get("day", 0) + 6) % 7) * 24 * 60 + opening.get("hour", 0) * 60 + opening.get("minute", 0)
+        end = ((closing.get("day", 0) + 6) % 7) * 24 * 60 + closing.get("hour", 0) * 60 + closing.get("minute", 0)
+        if end <= start:
+            end += DAYS_PER_WEEK * 24 * 60
+        bitmap |= slot_range(start // SLOT_MINUTES, -(-end // SLOT_MINUTES))
+    return bitmap if found else None
+
+
+def format_bitmap(bitmap: Optional[int]) -> str:
+    """Écrit des créneaux dans une cellule CSV (hexadécimal, vide si inconnus)"""
+    return "" if bitmap is None else format(bitmap, "x")
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_bitmap(text: str) -> Optional[int]:
+    """Relit des créneaux écrits par format_bitmap (None si vide ou invalide)"""
+    try:
+        return int(text, 16) & FULL_WEEK if text.strip() else None
+    except ValueError:
+        return None
+
+
+def record_schedule(record: Dict[str, str]) -> Optional[int]:
+    """Créneaux d'un enregistrement: colonne Creneaux_ouverture, ou texte de Heures_ouverture à défaut"""
+    slots = record.get(SLOTS_FIELD)
+    if slots:
+        bitmap = parse_bitmap(slots)
+        if bitmap is not None:
+            return bitmap
+    return parse_opening_hours(record.get(HOURS_FIELD) or "")
+
+
+def _parse_days(text: str) -> List[int]:
+    days: List[int] = []
+    for part in text.split(","):
+        part = part.strip().lower()
+        if part in ALL_DAYS:
+            days.extend(range(DAYS_PER_WEEK))
+            continue
+        first, _, last = part.partition("-")
+        if first not in DAY_NAMES or (last and last not in DAY_NAMES):
+            raise ValueError(f"Jour inconnu dans '{text}'")
+        start, end = DAY_NAMES[first], DAY_NAMES[last or first]
+        days.extend((start + offset) % DAYS_PER_WEEK for offset in range((end - start) % DAYS_PER_WEEK + 1))
+    return days
+
+
+@lru_cache(maxsize=256)
+def parse_window(text: str) -> int:
+    """
+    Convertit une plage horaire de règle en masque de créneaux
+
+    Format: "<jours> [<début>-<fin>]", par exemple "dimanche 08:00-12:00", "lundi-vendredi 19:00-24:00",
+    "samedi,dimanche" (journées entières) ou "tous 19:00-24:00".
+
+    Raises:
+        ValueError: Si la plage est invalide
+    """
+    days_text, _, hours_text = text.strip().partition(" ")
+    days = _parse_days(days_text)
+    if hours_text.strip():
+        times = _parse_times(hours_text)
+        if len(times) != 2 or any(minute > 24 * 60 for minute in times):
+            raise ValueError(f"Plage horaire invalide '{text}' (attendu: 'jour HH:MM-HH:MM')")
+        start, end = times
+    else:
+        start, end = 0, 24 * 60
+    mask = 0
+    for day in days:
+        mask |= minute_range(day, start, end)
+    return mask
+
+
+# Prédicats bit à bit entre des créneaux et le masque d'une plage horaire
+SCHEDULE_PREDICATES: Dict[str, Callable[[int, int], bool]] = {
+    "ouvert": lambda bitmap, mask: (bitmap & mask) != 0,
+    "ouvert_tout": lambda bitmap, mask: (bitmap & mask) == mask,
+    "ferme": lambda bitmap, mask: (bitmap & mask) == 0,
+}
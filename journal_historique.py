@@ -0,0 +1,757 @@
+#!/usr/bin/env python3
+"""
+Historique des entreprises stocké sous forme de journal d'événements en ajout seul
+Chaque exécution ajoute au journal les insertions, vérifications, modifications de champs
+et désactivations constatées, au lieu de réécrire une copie complète de l'historique.
+Des instantanés compactés (CSV) sont produits périodiquement: l'état courant se lit en
+rejouant uniquement les événements écrits depuis le dernier instantané.
+Une mise à jour ne rejoue rien: elle lit les entreprises des candidats dans un index SQLite
+de l'état courant, tenu à jour à chaque exécution ajoutée au journal.
+
+Organisation du dossier:
+    snapshot_000000.csv   état complet au moment de la compaction n°0
+    journal_000000.jsonl  événements écrits depuis cet instantané
+    snapshot_000001.csv   ...
+    etat_courant.db       index de l'état courant (reconstruit s'il est absent)
+Les anciens instantanés et journaux sont conservés: ils gardent la trace des changements.
+"""
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from cles_compactes import digest_key, is_other_place, record_place_id
+from fichiers_csv import CsvReader, CsvWriter
+from historique_sqlite import QUERY_BATCH_SIZE, cell_digest, record_keys
+from maj_historique import (
+    build_output_fieldnames,
+    changed_fields,
+    check_required_columns,
+    create_composite_key,
+    create_new_entry,
+    create_record_key,
+    extend_historique_record,
+    load_candidats,
+    location_conflicts,
+    merge_candidate,
+    print_conflict,
+    print_stats,
+    record_cell_key,
+    resolve_perimetre,
+)
+
+# Nombre d'événements dans le journal courant au-delà duquel un nouvel instantané est produit
+DEFAULT_COMPACTION_THRESHOLD = 100_000
+
+# Types d'événements
+EVENT_INSERT = "insertion"
+EVENT_VERIFY = "verification"
+EVENT_UPDATE = "modification"
+EVENT_DEACTIVATE = "desactivation"
+EVENT_COLUMNS = "colonnes"
+# Marqueur de fin d'exécution: les événements d'une exécution interrompue ne sont pas rejoués
+EVENT_RUN = "execution"
+
+# Colonne des instantanés portant la clé du journal de chaque entreprise: elle diffère de l'empreinte de la clé
+# composite pour une entreprise renommée (retrouvée par Place_id) ou une entrée de clé dérivée (voir free_key)
+JOURNAL_KEY_FIELD = "_cle_journal"
+
+GENERATION_PATTERN = re.compile(r"^snapshot_(\d{6})\.csv$")
+
+# Index de l'état courant, à côté des instantanés
+INDEX_FILE = "etat_courant.db"
+
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    cle TEXT PRIMARY KEY,
+    valeur TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS etat (
+    ordre INTEGER PRIMARY KEY,
+    cle BLOB NOT NULL UNIQUE,
+    cle_composite BLOB NOT NULL,
+    cle_localisation BLOB NOT NULL,
+    cle_cellule BLOB NOT NULL,
+    place_id TEXT NOT NULL,
+    actif INTEGER NOT NULL,
+    donnees TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_etat_composite ON etat (cle_composite);
+CREATE INDEX IF NOT EXISTS idx_etat_localisation ON etat (cle_localisation);
+CREATE INDEX IF NOT EXISTS idx_etat_place ON etat (place_id) WHERE place_id != '';
+CREATE INDEX IF NOT EXISTS idx_etat_actives ON etat (cle_cellule) WHERE actif = 1;
+"""
+
+# Une entreprise existante garde son ordre (ordre d'insertion dans l'état); une nouvelle prend le suivant
+INDEX_UPSERT_SQL = """
+INSERT INTO etat (cle, cle_composite, cle_localisation, cle_cellule, place_id, actif, donnees)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (cle) DO UPDATE SET
+    cle_composite = excluded.cle_composite, cle_localisation = excluded.cle_localisation,
+    cle_cellule = excluded.cle_cellule, place_id = excluded.place_id, actif = excluded.actif, donnees = excluded.donnees
+"""
+
+
+def export_record(record: Dict, fieldnames: List[str]) -> Dict:
+    """Complète un enregistrement avec toutes les colonnes (valeurs par défaut de maj_historique)"""
+    complete = extend_historique_record(record, fieldnames)
+    if "Actif" in fieldnames:
+        complete["Actif"] = record.get("Actif", "")
+    return complete
+
+
+def apply_event(state: Dict[bytes, Dict], event: Dict):
+    """Applique un événement d'entreprise (insertion, vérification, modification, désactivation) à l'état"""
+    key = bytes.fromhex(event["cle"])
+    event_type = event["type"]
+    if event_type == EVENT_INSERT:
+        state[key] = dict(event["donnees"])
+    elif event_type == EVENT_VERIFY:
+        state[key]["Date_verification"] = event["date"]
+        state[key]["Actif"] = "Oui"
+    elif event_type == EVENT_UPDATE:
+        for field, (_, new_value) in event["champs"].items():
+            state[key][field] = new_value
+    elif event_type == EVENT_DEACTIVATE:
+        state[key]["Actif"] = "Non"
+
+
+def index_row(key: bytes, record: Dict) -> Tuple:
+    """Ligne de l'index pour une entreprise (clé du journal et clés de ses données courantes)"""
+    composite_key, location_key = record_keys(record)
+    return (
+        key,
+        composite_key,
+        location_key,
+        cell_digest(record_cell_key(record)),
+        record_place_id(record),
+        int(record.get("Actif") == "Oui"),
+        json.dumps(record, ensure_ascii=False),
+    )
+
+
+class StateIndex:
+    """
+    Index SQLite de l'état courant du journal
+
+    Chaque entreprise est une ligne identifiée par sa clé dans le journal, indexée par les empreintes des clés
+    composite et de localisation de ses données courantes, par son identifiant Google Places et, si elle est
+    active, par l'empreinte de sa cellule (ville, métier). Les métadonnées donnent l'instantané de référence
+    et la position dans son journal jusqu'à laquelle les exécutions ont été appliquées.
+    """
+
+    def __init__(self, path: str):
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(INDEX_SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _get_meta(self, name: str) -> Optional[str]:
+        row = self.connection.execute("SELECT valeur FROM meta WHERE cle = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, **values):
+        self.connection.executemany(
+            "INSERT INTO meta (cle, valeur) VALUES (?, ?) ON CONFLICT (cle) DO UPDATE SET valeur = excluded.valeur",
+            [(name, str(value)) for name, value in values.items()],
+        )
+
+    def position(self) -> Optional[Tuple[int, int, int]]:
+        """Retourne (instantané, position dans son journal, nombre d'événements appliqués), None si l'index est vide"""
+        values = [self._get_meta(name) for name in ("generation", "position", "evenements")]
+        return None if None in values else tuple(int(value) for value in values)
+
+    def fieldnames(self) -> List[str]:
+        return json.loads(self._get_meta("colonnes"))
+
+    def reset(self, state: Dict[bytes, Dict], fieldnames: List[str], generation: int, position: int, event_count: int):
+        """Remplace le contenu de l'index par un état complet"""
+        with self.connection:
+            self.connection.execute("DELETE FROM etat")
+            self.connection.executemany(INDEX_UPSERT_SQL, (index_row(key, record) for key, record in state.items()))
+            self._set_meta(colonnes=json.dumps(fieldnames), generation=generation, position=position, evenements=event_count)
+
+    def rebase(self, generation: int):
+        """Rattache l'index à un nouvel instantané de l'état qu'il contient (journal vide)"""
+        with self.connection:
+            self._set_meta(generation=generation, position=0, evenements=0)
+
+    def apply_run(self, run: List[Dict], position: int, event_count: int):
+        """Applique les événements d'une exécution et enregistre la position atteinte dans le journal"""
+        keys = {bytes.fromhex(event["cle"]) for event in run if "cle" in event}
+        state = {key: record for _, key, record in self.fetch("cle", keys)}
+        with self.connection:
+            for event in run:
+                if event["type"] == EVENT_COLUMNS:
+                    self._set_meta(colonnes=json.dumps(event["colonnes"]))
+                elif event["type"] != EVENT_RUN:
+                    apply_event(state, event)
+            self.connection.executemany(INDEX_UPSERT_SQL, (index_row(key, record) for key, record in state.items()))
+            self._set_meta(position=position, evenements=event_count)
+
+    def free_key(self, key: bytes) -> bytes:
+        """
+        Clé du journal d'une nouvelle entreprise: l'empreinte de sa clé composite, ou une empreinte dérivée si une
+        entreprise renommée (rapprochée par Place_id) garde déjà cette clé
+        """
+        while self.connection.execute("SELECT 1 FROM etat WHERE cle = ?", (key,)).fetchone():
+            key = digest_key(key.hex())
+        return key
+
+    def _select_in(self, columns: str, condition: str, values: Iterable) -> List[Tuple]:
+        values = list(values)
+        rows = []
+        for start in range(0, len(values), QUERY_BATCH_SIZE):
+            batch = values[start : start + QUERY_BATCH_SIZE]
+            placeholders = ",".join("?" * len(batch))
+            rows += self.connection.execute(f"SELECT {columns} FROM etat WHERE {condition} IN ({placeholders})", batch)
+        return sorted(rows)
+
+    def fetch(self, column: str, values: Iterable) -> List[Tuple[int, bytes, Dict]]:
+        """
+        Retourne les entreprises dont la colonne (cle, cle_composite, cle_localisation ou place_id) vaut l'une des valeurs
+
+        Returns:
+            Liste de (ordre, clé du journal, données), dans l'ordre de l'état
+        """
+        rows = self._select_in("ordre, cle, donnees", column, values)
+        return [(ordre, key, json.loads(donnees)) for ordre, key, donnees in rows]
+
+    def active_keys(self, cells: Optional[Set[Tuple[str, str]]] = None) -> List[Tuple[int, bytes]]:
+        """Retourne (ordre, clé du journal) des entreprises actives, de toutes les cellules ou des cellules données"""
+        if cells is None:
+            return self.connection.execute("SELECT ordre, cle FROM etat WHERE actif = 1 ORDER BY ordre").fetchall()
+        return self._select_in("ordre, cle", "actif = 1 AND cle_cellule", map(cell_digest, cells))
+
+
+class CandidateMatch:
+    """
+    Rapprochement des candidats avec les entreprises de l'index (règles de maj_historique.process_updates)
+
+    Seules les entreprises des candidats sont lues: par identifiant Google Places, par clé composite et,
+    pour les candidats non rapprochés, par clé de localisation.
+    """
+
+    def __init__(self, index: StateIndex, candidats: List[Dict]):
+        keys = [record_keys(candidat) for candidat in candidats]
+        place_ids = {record_place_id(candidat) for candidat in candidats} - {""}
+        self.stored: Dict[bytes, Dict] = {}
+        self.orders: Dict[bytes, int] = {}
+        self.by_place: Dict[str, bytes] = {}
+        self.by_key: Dict[bytes, bytes] = {}
+        # Le premier enregistrement dans l'ordre de l'état est retenu pour un identifiant ou une clé
+        for ordre, key, record in index.fetch("place_id", place_ids) + index.fetch("cle_composite", {k for k, _ in keys}):
+            self.stored[key] = record
+            self.orders[key] = ordre
+        for key in sorted(self.stored, key=self.orders.get):
+            record = self.stored[key]
+            if record_place_id(record):
+                self.by_place.setdefault(record_place_id(record), key)
+            self.by_key.setdefault(record_keys(record)[0], key)
+
+        unmatched = {
+            location_key
+            for candidat, (composite_key, location_key) in zip(candidats, keys)
+            if record_place_id(candidat) not in self.by_place
+            and (composite_key not in self.by_key or is_other_place(candidat, self.stored[self.by_key[composite_key]]))
+        }
+        self.by_location: Dict[bytes, List[Dict]] = {}
+        for _, _, record in index.fetch("cle_localisation", unmatched):
+            self.by_location.setdefault(record_keys(record)[1], []).append(record)
+
+    def find(self, candidat: Dict) -> Tuple[Optional[bytes], bool]:
+        """Retourne (clé du journal de l'entreprise rapprochée ou None, rapprochée par Place_id)"""
+        place_id = record_place_id(candidat)
+        key = self.by_place.get(place_id) if place_id else None
+        if key is not None:
+            return key, True
+        key = self.by_key.get(record_keys(candidat)[0])
+        if key is not None and is_other_place(candidat, self.stored[key]):
+            # Même clé composite mais autre identifiant Places: c'est un autre lieu
+            return None, False
+        if key is not None and place_id:
+            # Ligne antérieure à la colonne Place_id: elle est désormais rapprochée par identifiant
+            self.by_place.setdefault(place_id, key)
+        return key, False
+
+    def conflicts(self, candidat: Dict) -> Optional[List[Dict]]:
+        """Entrées en conflit (même adresse/ville/métier), None si le candidat est une nouvelle entrée"""
+        existing_entries = self.by_location.get(record_keys(candidat)[1], [])
+        if all(is_other_place(candidat, existing) for existing in existing_entries):
+            return None
+        return location_conflicts(candidat, existing_entries)
+
+
+class JournalHistorique:
+    """Historique stocké dans un dossier d'instantanés CSV et de journaux JSONL, avec un index de l'état courant"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def snapshot_path(self, generation: int) -> str:
+        return os.path.join(self.directory, f"snapshot_{generation:06d}.csv")
+
+    def journal_path(self, generation: int) -> str:
+        return os.path.join(self.directory, f"journal_{generation:06d}.jsonl")
+
+    def index_path(self) -> str:
+        return os.path.join(self.directory, INDEX_FILE)
+
+    def generations(self) -> List[int]:
+        """Numéros des instantanés présents, dans l'ordre"""
+        if not os.path.isdir(self.directory):
+            return []
+        numbers = []
+        for name in os.listdir(self.directory):
+            match = GENERATION_PATTERN.match(name)
+            if match:
+                numbers.append(int(match.group(1)))
+        return sorted(numbers)
+
+    def latest_generation(self) -> int:
+        generations = self.generations()
+        if not generations:
+            raise FileNotFoundError(f"Aucun instantané dans '{self.directory}' (utilisez d'abord la commande initialiser)")
+        return generations[-1]
+
+    def initialize(self, historique_file: str) -> int:
+        """
+        Crée le journal à partir d'un historique CSV (instantané n°0)
+
+        Returns:
+            Nombre d'entreprises de l'instantané
+        """
+        if self.generations():
+            raise ValueError(f"Le dossier '{self.directory}' contient déjà un journal")
+
+        state, fieldnames = self._read_snapshot(historique_file)
+        os.makedirs(self.directory, exist_ok=True)
+        self._write_snapshot(0, state, fieldnames)
+        with StateIndex(self.index_path()) as index:
+            index.reset(state, fieldnames, 0, 0, 0)
+        return len(state)
+
+    def _read_snapshot(self, path: str) -> Tuple[Dict[bytes, Dict], List[str]]:
+        state: Dict[bytes, Dict] = {}
+        with CsvReader(path) as reader:
+            fieldnames = list(reader.fieldnames)
+            check_required_columns(fieldnames, "l'historique")
+            if JOURNAL_KEY_FIELD in fieldnames:
+                fieldnames.remove(JOURNAL_KEY_FIELD)
+            for row in reader.records():
+                # Historique importé (sans clé du journal): empreinte de la clé composite
+                key_hex = row.pop(JOURNAL_KEY_FIELD, None)
+                state[bytes.fromhex(key_hex) if key_hex else create_record_key(row)] = row
+        return state, fieldnames
+
+    def _write_snapshot(self, generation: int, state: Dict[bytes, Dict], fieldnames: List[str]):
+        # Écriture dans un fichier temporaire puis renommage: un instantané est complet ou absent
+        path = self.snapshot_path(generation)
+        temp_path = path + ".tmp"
+        with CsvWriter(temp_path, [*fieldnames, JOURNAL_KEY_FIELD]) as writer:
+            writer.write_records(
+                {**export_record(record, fieldnames), JOURNAL_KEY_FIELD: key.hex()} for key, record in state.items()
+            )
+        os.replace(temp_path, path)
+        open(self.journal_path(generation), "a", encoding="utf-8").close()
+
+    def _iter_runs(self, generation: int, start: int = 0) -> Iterator[Tuple[List[Dict], int]]:
+        """Parcourt les exécutions complètes d'un journal depuis une position (événements, position de fin)"""
+        path = self.journal_path(generation)
+        if not os.path.exists(path):
+            return
+        pending: List[Dict] = []
+        position = start
+        with open(path, "rb") as file:
+            file.seek(start)
+            for line in file:
+                position += len(line)
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    # Dernière ligne tronquée par une exécution interrompue
+                    break
+                pending.append(event)
+                if event["type"] == EVENT_RUN:
+                    yield pending, position
+                    pending = []
+
+    def _replay(self, generation: int) -> Tuple[Dict[bytes, Dict], List[str], int, int]:
+        """Rejoue un instantané et son journal: (état, colonnes, nombre d'événements, position de fin)"""
+        state, fieldnames = self._read_snapshot(self.snapshot_path(generation))
+        event_count = 0
+        position = 0
+
+        for run, position in self._iter_runs(generation):
+            event_count += len(run)
+            for event in run:
+                if event["type"] == EVENT_COLUMNS:
+                    fieldnames = event["colonnes"]
+                elif event["type"] != EVENT_RUN:
+                    apply_event(state, event)
+
+        return state, fieldnames, event_count, position
+
+    def load_state(self) -> Tuple[Dict[bytes, Dict], List[str], int]:
+        """
+        Lit l'état courant: dernier instantané puis événements écrits depuis
+
+        Returns:
+            Tuple (entreprises par empreinte de clé composite, colonnes, nombre d'événements rejoués)
+        """
+        state, fieldnames, event_count, _ = self._replay(self.latest_generation())
+        return state, fieldnames, event_count
+
+    def open_index(self) -> StateIndex:
+        """
+        Ouvre l'index de l'état courant, après y avoir appliqué les exécutions écrites depuis sa dernière mise à jour
+
+        L'index est reconstruit (rejeu complet) s'il est absent ou s'il ne correspond pas au dernier instantané.
+        """
+        generation = self.latest_generation()
+        index = StateIndex(self.index_path())
+        indexed = index.position()
+        if indexed is None or indexed[0] != generation or indexed[1] > os.path.getsize(self.journal_path(generation)):
+            state, fieldnames, event_count, position = self._replay(generation)
+            index.reset(state, fieldnames, generation, position, event_count)
+            return index
+
+        _, position, event_count = indexed
+        for run, position in self._iter_runs(generation, position):
+            event_count += len(run)
+            index.apply_run(run, position, event_count)
+        return index
+
+    def iter_events(self, key: Optional[bytes] = None) -> Iterator[Dict]:
+        """Parcourt les événements de tous les journaux (éventuellement ceux d'une seule entreprise)"""
+        key_hex = key.hex() if key is not None else None
+        for generation in self.generations():
+            for run, _ in self._iter_runs(generation):
+                for event in run:
+                    if key_hex is None or event.get("cle") == key_hex:
+                        yield event
+
+    def apply_candidates(
+        self,
+        candidats: List[Dict],
+        candidats_fieldnames: List[str],
+        verbose: bool = False,
+        compaction_threshold: int = DEFAULT_COMPACTION_THRESHOLD,
+        perimetre: Optional[Set[Tuple[str, str]]] = None,
+    ) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Applique les candidats (règles de maj_historique.process_updates) et ajoute les événements au journal
+
+        Seules les entreprises vérifiées, insérées, modifiées ou passées inactives produisent un événement.
+        Les entreprises des candidats sont lues dans l'index de l'état courant, et les entreprises à désactiver
+        dans son index des entreprises actives par cellule: le journal n'est pas rejoué.
+        Avec un périmètre, seules les entreprises de ses cellules (ville, métier) peuvent être désactivées.
+        Une entreprise rapprochée par Place_id et renommée garde sa clé d'origine dans le journal.
+
+        Returns:
+            Tuple (conflicts, events)
+        """
+        today = datetime.now().strftime("%Y-%m-%d")
+        with self.open_index() as index:
+            _, position, event_count = index.position()
+            fieldnames = index.fieldnames()
+            all_fieldnames = build_output_fieldnames(fieldnames, candidats_fieldnames)
+            print(f"Colonnes dans le fichier de sortie: {all_fieldnames}")
+
+            match = CandidateMatch(index, candidats)
+            verified, new_entries, conflicts = self._match_candidates(
+                match, candidats, candidats_fieldnames, all_fieldnames, today, verbose
+            )
+
+            events: List[Dict] = []
+            if all_fieldnames != fieldnames:
+                events.append({"type": EVENT_COLUMNS, "date": today, "colonnes": all_fieldnames})
+            # Entreprises existantes dans l'ordre de l'état: vues dans les candidats, ou actives et absentes
+            deactivated = [(ordre, key) for ordre, key in index.active_keys(perimetre) if key not in verified]
+            for _, key in sorted(deactivated + [(match.orders[key], key) for key in verified]):
+                if key not in verified:
+                    events.append({"type": EVENT_DEACTIVATE, "date": today, "cle": key.hex()})
+                    continue
+                previous, record = match.stored[key], verified[key]
+                if record["Date_verification"] != previous.get("Date_verification") or previous.get("Actif") != "Oui":
+                    events.append({"type": EVENT_VERIFY, "date": today, "cle": key.hex()})
+                changes = changed_fields(previous, record, all_fieldnames)
+                if changes:
+                    events.append({"type": EVENT_UPDATE, "date": today, "cle": key.hex(), "champs": changes})
+            events += new_entry_events(new_entries, all_fieldnames, today, index.free_key)
+
+            run, position = self._append_run(events, today, len(candidats), position)
+            event_count += len(run)
+            index.apply_run(run, position, event_count)
+
+        if event_count > compaction_threshold:
+            generation = self.compact()
+            print(f"🗜️  Journal compacté: instantané n°{generation}")
+
+        return conflicts, events
+
+    @staticmethod
+    def _match_candidates(
+        match: CandidateMatch,
+        candidats: List[Dict],
+        candidats_fieldnames: List[str],
+        all_fieldnames: List[str],
+        today: str,
+        verbose: bool,
+    ) -> Tuple[Dict[bytes, Dict], List[Dict], List[Dict]]:
+        """
+        Classe chaque candidat en mise à jour, conflit ou nouvelle entrée
+
+        Returns:
+            Tuple (entreprises mises à jour par clé du journal, nouvelles entrées, conflits)
+        """
+        stats = {"exact_matches": 0, "new_entries": 0, "conflicts": 0, "data_updates": 0}
+        verified: Dict[bytes, Dict] = {}
+        new_entries: List[Dict] = []
+        conflicts: List[Dict] = []
+
+        for candidat in candidats:
+            nom = candidat["Nom"]
+            adresse = candidat["Adresse"]
+            key, matched_by_place = match.find(candidat)
+            existing_conflicts = match.conflicts(candidat) if key is None else None
+            if key is not None:
+                # Même lieu Google Places, sinon correspondance exacte : mettre à jour les données et date_verification
+                if key not in verified:
+                    verified[key] = extend_historique_record(match.stored[key], all_fieldnames, deactivate=False)
+                merge_candidate(verified[key], candidat, candidats_fieldnames, today, verbose)
+                stats["exact_matches"] += 1
+                stats["data_updates"] += 1
+                if verbose:
+                    print(f"✅ Mis à jour{' (Place_id)' if matched_by_place else ''}: {nom} - {adresse}")
+            elif existing_conflicts is not None:
+                # Même adresse/ville/métier mais nom différent : conflit potentiel
+                for existing in existing_conflicts:
+                    conflicts.append({"candidat": candidat, "existant": existing})
+                    stats["conflicts"] += 1
+                    print_conflict(candidat, existing)
+            else:
+                # Nouvelle entrée
+                new_entries.append(create_new_entry(candidat, all_fieldnames, today))
+                stats["new_entries"] += 1
+                stats["data_updates"] += 1
+                if verbose:
+                    print(f"➕ Nouvelle entrée: {nom} - {adresse}")
+
+        print_stats(stats)
+        return verified, new_entries, conflicts
+
+    def _append_run(self, events: List[Dict], today: str, candidate_count: int, position: int) -> Tuple[List[Dict], int]:
+        """
+        Ajoute une exécution au journal, après la dernière exécution complète (position)
+
+        Les lignes d'une exécution interrompue écrites après cette position sont supprimées.
+
+        Returns:
+            Tuple (événements écrits marqueur de fin compris, position de fin dans le journal)
+        """
+        run = events + [{"type": EVENT_RUN, "date": today, "candidats": candidate_count, "evenements": len(events)}]
+        lines = [(json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8") for event in run]
+        with open(self.journal_path(self.latest_generation()), "r+b") as file:
+            file.truncate(position)
+            file.seek(position)
+            file.writelines(lines)
+            file.flush()
+            os.fsync(file.fileno())
+            return run, file.tell()
+
+    def compact(self) -> int:
+        """
+        Écrit un nouvel instantané de l'état courant; les événements suivants iront dans un nouveau journal
+
+        Returns:
+            Numéro du nouvel instantané
+        """
+        with self.open_index() as index:
+            state, fieldnames, _ = self.load_state()
+            generation = self.latest_generation() + 1
+            self._write_snapshot(generation, state, fieldnames)
+            index.rebase(generation)
+        return generation
+
+    def export_csv(self, output_file: str) -> int:
+        """
+        Exporte l'état courant au format CSV de maj_historique.py
+
+        Returns:
+            Nombre d'entreprises exportées
+        """
+        state, fieldnames, _ = self.load_state()
+        with CsvWriter(output_file, fieldnames) as writer:
+            writer.write_records(export_record(record, fieldnames) for record in state.values())
+        return len(state)
+
+
+def new_entry_events(
+    new_entries: List[Dict], fieldnames: List[str], today: str, journal_key: Callable[[bytes], bytes]
+) -> List[Dict]:
+    """
+    Événements des nouvelles entrées: un candidat présent deux fois modifie l'entrée insérée
+
+    Args:
+        journal_key: Clé du journal attribuée à l'empreinte de la clé composite d'une nouvelle entrée
+    """
+    events: List[Dict] = []
+    inserted: Dict[bytes, Tuple[bytes, Dict]] = {}
+    for record in new_entries:
+        composite_key = create_record_key(record)
+        key, previous = inserted.get(composite_key) or (journal_key(composite_key), None)
+        inserted[composite_key] = key, record
+        if previous is None:
+            events.append({"type": EVENT_INSERT, "date": today, "cle": key.hex(), "donnees": record})
+            continue
+        changes = changed_fields(previous, record, fieldnames)
+        if changes:
+            events.append({"type": EVENT_UPDATE, "date": today, "cle": key.hex(), "champs": changes})
+    return events
+
+
+def format_event(event: Dict) -> str:
+    """Décrit un événement sur une ligne"""
+    event_type = event["type"]
+    if event_type == EVENT_INSERT:
+        donnees = event["donnees"]
+        return f"{event['date']} ➕ insertion: {donnees.get('Nom', '')} - {donnees.get('Adresse', '')}"
+    if event_type == EVENT_UPDATE:
+        changes = ", ".join(f"{field}: '{old}' → '{new}'" for field, (old, new) in event["champs"].items())
+        return f"{event['date']} 📝 modification: {changes}"
+    if event_type == EVENT_VERIFY:
+        return f"{event['date']} ✅ vérification"
+    if event_type == EVENT_DEACTIVATE:
+        return f"{event['date']} 💤 désactivation"
+    if event_type == EVENT_COLUMNS:
+        return f"{event['date']} 🧱 colonnes: {', '.join(event['colonnes'])}"
+    return f"{event['date']} 🏁 exécution: {event['candidats']} candidats, {event['evenements']} événements"
+
+
+def run_initialize(journal: JournalHistorique, args):
+    """Commande initialiser: crée le journal à partir d'un historique CSV"""
+    count = journal.initialize(args.historique_file)
+    print(f"✅ Journal initialisé dans {args.dossier} ({count} entrées)")
+
+
+def run_update(journal: JournalHistorique, args):
+    """Commande maj: applique un fichier de candidats et ajoute les événements"""
+    print(f"🔄 Mise à jour du journal {args.dossier}...")
+    candidats, candidats_fieldnames = load_candidats(args.candidats_file)
+    print(f"   Candidats: {len(candidats)} entrées")
+    perimetre = resolve_perimetre(args.perimetre, args.perimetre_candidats, candidats)
+    conflicts, events = journal.apply_candidates(
+        candidats, candidats_fieldnames, args.verbose, args.compacter_apres, perimetre
+    )
+    print(f"✅ {len(events)} événement(s) ajouté(s) au journal")
+    if conflicts:
+        print(f"\n⚠️  {len(conflicts)} conflit(s) détecté(s) - vérification manuelle recommandée")
+
+
+def run_compact(journal: JournalHistorique, args):
+    """Commande compacter: écrit un nouvel instantané de l'état courant"""
+    generation = journal.compact()
+    print(f"🗜️  Instantané n°{generation} écrit")
+
+
+def run_export(journal: JournalHistorique, args):
+    """Commande exporter: exporte l'état courant au format CSV de maj_historique.py"""
+    count = journal.export_csv(args.output_file)
+    print(f"✅ Historique exporté: {args.output_file} ({count} entrées)")
+
+
+def run_events(journal: JournalHistorique, args):
+    """Commande evenements: affiche les événements enregistrés"""
+    key = None
+    if args.entreprise:
+        parts = args.entreprise.split("|")
+        if len(parts) != 4:
+            raise ValueError("--entreprise attend 'Nom|Adresse|Ville|Metier'")
+        key = digest_key(create_composite_key(*parts))
+    for event in journal.iter_events(key):
+        print(format_event(event))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Historique des entreprises en journal d'événements avec instantanés",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemples d'utilisation:
+  python journal_historique.py initialiser historique.csv journal_historique/
+  python journal_historique.py maj journal_historique/ candidats.csv --verbose
+  python journal_historique.py evenements journal_historique/ --entreprise "Nom|Adresse|Ville|Metier"
+  python journal_historique.py compacter journal_historique/
+  python journal_historique.py exporter journal_historique/ historique_maj.csv
+        """,
+    )
+    subparsers = parser.add_subparsers(dest="commande", required=True)
+
+    init_parser = subparsers.add_parser("initialiser", help="Crée le journal à partir d'un historique CSV")
+    init_parser.add_argument("historique_file", help="Fichier CSV historique")
+    init_parser.add_argument("dossier", help="Dossier du journal (créé si absent)")
+    init_parser.set_defaults(run=run_initialize)
+
+    maj_parser = subparsers.add_parser("maj", help="Applique un fichier de candidats et ajoute les événements")
+    maj_parser.add_argument("dossier", help="Dossier du journal")
+    maj_parser.add_argument("candidats_file", help="Fichier CSV des candidats (détection automatique des colonnes)")
+    maj_parser.add_argument(
+        "--compacter-apres",
+        type=int,
+        default=DEFAULT_COMPACTION_THRESHOLD,
+        help=f"Compacte le journal au-delà de ce nombre d'événements (défaut: {DEFAULT_COMPACTION_THRESHOLD})",
+    )
+    maj_parser.add_argument(
+        "--perimetre",
+        help="CSV des cellules recherchées (colonnes Ville, Metier_normalise): seules leurs entreprises sont désactivées",
+    )
+    maj_parser.add_argument(
+        "--perimetre-candidats",
+        action="store_true",
+        help="Désactive uniquement dans les cellules (ville, métier) présentes dans les candidats",
+    )
+    maj_parser.add_argument("--verbose", "-v", action="store_true", help="Affichage détaillé des opérations")
+    maj_parser.set_defaults(run=run_update)
+
+    compact_parser = subparsers.add_parser("compacter", help="Écrit un nouvel instantané de l'état courant")
+    compact_parser.add_argument("dossier", help="Dossier du journal")
+    compact_parser.set_defaults(run=run_compact)
+
+    export_parser = subparsers.add_parser("exporter", help="Exporte l'état courant au format CSV de maj_historique.py")
+    export_parser.add_argument("dossier", help="Dossier du journal")
+    export_parser.add_argument("output_file", help="Fichier CSV de sortie")
+    export_parser.set_defaults(run=run_export)
+
+    events_parser = subparsers.add_parser("evenements", help="Affiche les événements enregistrés")
+    events_parser.add_argument("dossier", help="Dossier du journal")
+    events_parser.add_argument("--entreprise", help="Limite aux événements d'une entreprise: 'Nom|Adresse|Ville|Metier'")
+    events_parser.set_defaults(run=run_events)
+
+    args = parser.parse_args()
+    journal = JournalHistorique(args.dossier)
+
+    try:
+        args.run(journal, args)
+    except FileNotFoundError as e:
+        print(f"Erreur: {e}")
+        sys.exit(1)
+    except ValueError as e:
+        print(f"Erreur: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,11 +5,37 @@ Compare un fichier historique avec des candidats à insérer/mettre à jour
 """
 
 import argparse
-import csv
+import glob
 import os
 import sys
 from datetime import datetime
-from typing import Dict, List, Set, Tuple
+from itertools import groupby
+from operator import itemgetter
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from cles_compactes import build_composite_key, digest_key, is_other_place, record_place_id
+from fichiers_csv import BUSINESS_COLUMNS, CsvReader, CsvSchema, CsvWriter, read_schema
+from historique_versionne import HistoriqueVersionne
+from series_metriques import SeriesMetriques
+from tri_externe import DEFAULT_MAX_ROWS_IN_MEMORY, external_sort
+
+# Colonnes de suivi gérées par le script (jamais recopiées depuis les candidats)
+TRACKING_FIELDS = ["Date_introduction", "Date_verification", "Actif", "Filtré", "Raison_Filtrage"]
+
+# Champs de statut: mis à jour à chaque vérification, ils ne comptent pas comme des modifications de données
+STATUS_FIELDS = ("Date_verification", "Actif")
+
+# Types de changement et colonnes du fichier delta (--delta)
+DELTA_INSERT = "insertion"
+DELTA_UPDATE = "mise_a_jour"
+DELTA_REACTIVATE = "reactivation"
+DELTA_DEACTIVATE = "desactivation"
+DELTA_FIELDNAMES = ["Changement", "Cle", "Nom", "Adresse", "Ville", "Metier_normalise", "Colonnes_modifiees"]
+
+# Politiques de résolution des candidats présents dans plusieurs fichiers
+POLICY_RECENT = "recent"
+POLICY_COMPLETE = "complet"
+COLLISION_POLICIES = (POLICY_RECENT, POLICY_COMPLETE)
 
 
 def normalize_for_comparison(text: str) -> str:
@@ -19,7 +45,7 @@ def normalize_for_comparison(text: str) -> str:
 
 def create_composite_key(nom: str, adresse: str, ville: str, metier: str) -> str:
     """Crée une clé composite pour identifier uniquement une entreprise"""
-    return f"{normalize_for_comparison(nom)}|{normalize_for_comparison(adresse)}|{normalize_for_comparison(ville)}|{normalize_for_comparison(metier)}"
+    return build_composite_key(nom, adresse, ville, metier)
 
 
 def create_location_key(adresse: str, ville: str, metier: str) -> str:
@@ -27,10 +53,100 @@ def create_location_key(adresse: str, ville: str, metier: str) -> str:
     return f"{normalize_for_comparison(adresse)}|{normalize_for_comparison(ville)}|{normalize_for_comparison(metier)}"
 
 
-def load_historique(file_path: str) -> Tuple[Dict[str, Dict], Dict[str, List[Dict]], List[str]]:
+def create_record_key(record: Dict) -> bytes:
+    """Calcule l'empreinte de la clé composite d'un enregistrement (Metier_normalise, ou Metier à défaut)"""
+    return digest_key(
+        create_composite_key(
+            record["Nom"],
+            record["Adresse"],
+            record["Ville"],
+            record.get("Metier_normalise", record.get("Metier", "")),
+        )
+    )
+
+
+def check_required_columns(fieldnames: List[str], source: str):
+    """
+    Vérifie la présence des colonnes minimales (Nom, Adresse, Ville et une colonne métier)
+
+    Args:
+        fieldnames: Colonnes du fichier
+        source: Désignation du fichier dans les messages d'erreur ("l'historique", "les candidats")
+
+    Raises:
+        ValueError: Si une colonne requise manque
+    """
+    # Vérification des colonnes minimales requises
+    schema = CsvSchema(fieldnames)
+    missing_cols = schema.missing(BUSINESS_COLUMNS)
+    if missing_cols:
+        raise ValueError(f"Colonnes minimales manquantes dans {source}: {set(missing_cols)}")
+
+    # Vérifier qu'on a au moins une colonne métier
+    if schema.metier_column() is None:
+        raise ValueError(f"Aucune colonne 'Metier' ou 'Metier_normalise' trouvée dans {source}")
+
+
+def create_cell_key(ville: str, metier: str) -> Tuple[str, str]:
+    """Crée la clé d'une cellule de recherche (ville, métier) normalisée"""
+    return normalize_for_comparison(ville), normalize_for_comparison(metier)
+
+
+def record_cell_key(record: Dict) -> Tuple[str, str]:
+    """Cellule de recherche (ville, métier) d'un enregistrement (Metier_normalise, ou Metier à défaut)"""
+    return create_cell_key(record["Ville"] or "", record.get("Metier_normalise", record.get("Metier", "")) or "")
+
+
+def build_candidates_perimetre(candidats: Iterable[Dict]) -> Set[Tuple[str, str]]:
+    """Cellules (ville, métier) présentes dans les candidats"""
+    return {record_cell_key(candidat) for candidat in candidats}
+
+
+def load_perimetre(file_path: str) -> Set[Tuple[str, str]]:
+    """
+    Charge les cellules (ville, métier) effectivement recherchées
+
+    Le fichier CSV contient une colonne Ville et une colonne Metier_normalise (ou Metier),
+    avec les métiers normalisés tels qu'ils apparaissent dans l'historique.
+
+    Returns:
+        Ensemble des cellules normalisées
+    """
+    with CsvReader(file_path) as reader:
+        if "Ville" not in reader.schema or reader.schema.metier_column() is None:
+            raise ValueError(f"Le fichier de périmètre '{file_path}' doit contenir les colonnes Ville et Metier_normalise")
+        return build_candidates_perimetre(reader.records())
+
+
+def resolve_perimetre(
+    perimetre_file: Optional[str], use_candidates: bool, candidats: Iterable[Dict]
+) -> Optional[Set[Tuple[str, str]]]:
+    """
+    Détermine le périmètre de désactivation demandé en ligne de commande
+
+    Returns:
+        Cellules dans lesquelles les entreprises absentes des candidats sont désactivées,
+        ou None pour désactiver dans tout l'historique
+    """
+    if perimetre_file is None and not use_candidates:
+        return None
+
+    perimetre: Set[Tuple[str, str]] = set()
+    if perimetre_file is not None:
+        perimetre |= load_perimetre(perimetre_file)
+    if use_candidates:
+        perimetre |= build_candidates_perimetre(candidats)
+    print(f"   Périmètre de désactivation: {len(perimetre)} cellule(s) (ville, métier)")
+    return perimetre
+
+
+def load_historique(file_path: str) -> Tuple[Dict[bytes, Dict], Dict[bytes, List[Dict]], List[str]]:
     """
     Charge le fichier historique
 
+    Les dictionnaires sont indexés par l'empreinte binaire (cles_compactes.digest_key)
+    des clés composite et de localisation.
+
     Returns:
         Tuple (dict_by_composite_key, dict_by_location_key, fieldnames)
     """
@@ -39,42 +155,28 @@ def load_historique(file_path: str) -> Tuple[Dict[str, Dict], Dict[str, List[Dic
     fieldnames = []
 
     try:
-        with open(file_path, "r", encoding="utf-8") as file:
-            reader = csv.DictReader(file)
-
+        with CsvReader(file_path) as reader:
             # Détection automatique des colonnes
-            fieldnames = reader.fieldnames or []
+            fieldnames = reader.fieldnames
             if not fieldnames:
                 raise ValueError("Impossible de lire les colonnes du fichier historique")
 
             print(f"Colonnes détectées dans l'historique: {fieldnames}")
 
-            # Vérification des colonnes minimales requises
-            required_cols = {"Nom", "Adresse", "Ville"}
-            available_cols = set(fieldnames)
-
-            missing_cols = required_cols - available_cols
-            if missing_cols:
-                raise ValueError(f"Colonnes minimales manquantes dans l'historique: {missing_cols}")
-
-            # Vérifier qu'on a au moins une colonne métier
-            has_metier = "Metier" in fieldnames
-            has_metier_normalise = "Metier_normalise" in fieldnames
-            if not (has_metier or has_metier_normalise):
-                raise ValueError("Aucune colonne 'Metier' ou 'Metier_normalise' trouvée dans l'historique")
+            check_required_columns(fieldnames, "l'historique")
 
-            for row in reader:
+            for row in reader.records():
                 nom = row["Nom"]
                 adresse = row["Adresse"]
                 ville = row["Ville"]
                 metier = row.get("Metier_normalise", row.get("Metier", ""))
 
                 # Clé composite complète (nom + adresse + ville + métier)
-                composite_key = create_composite_key(nom, adresse, ville, metier)
+                composite_key = digest_key(create_composite_key(nom, adresse, ville, metier))
                 historique_by_composite[composite_key] = row
 
                 # Clé par localisation (adresse + ville + métier, sans nom)
-                location_key = create_location_key(adresse, ville, metier)
+                location_key = digest_key(create_location_key(adresse, ville, metier))
                 if location_key not in historique_by_location:
                     historique_by_location[location_key] = []
                 historique_by_location[location_key].append(row)
@@ -95,33 +197,18 @@ def load_candidats(file_path: str) -> Tuple[List[Dict], List[str]]:
     fieldnames = []
 
     try:
-        with open(file_path, "r", encoding="utf-8") as file:
-            reader = csv.DictReader(file)
-
+        with CsvReader(file_path) as reader:
             # Détection automatique des colonnes
-            fieldnames = reader.fieldnames or []
+            fieldnames = reader.fieldnames
             if not fieldnames:
                 raise ValueError("Impossible de lire les colonnes du fichier candidats")
 
             print(f"Colonnes détectées dans les candidats: {fieldnames}")
 
-            # Vérification des colonnes minimales requises
-            required_cols = {"Nom", "Adresse", "Ville"}
-            available_cols = set(fieldnames)
-
-            missing_cols = required_cols - available_cols
-            if missing_cols:
-                raise ValueError(f"Colonnes minimales manquantes dans les candidats: {missing_cols}")
-
-            # Vérifier qu'on a au moins une colonne métier
-            has_metier = "Metier" in fieldnames
-            has_metier_normalise = "Metier_normalise" in fieldnames
-            if not (has_metier or has_metier_normalise):
-                raise ValueError("Aucune colonne 'Metier' ou 'Metier_normalise' trouvée dans les candidats")
+            check_required_columns(fieldnames, "les candidats")
 
             # Lecture des candidats
-            for row in reader:
-                candidats.append(row)
+            candidats = list(reader.records())
 
         return candidats, fieldnames
 
@@ -133,6 +220,330 @@ def load_candidats(file_path: str) -> Tuple[List[Dict], List[str]]:
         sys.exit(1)
 
 
+def expand_candidate_paths(patterns: List[str]) -> List[str]:
+    """
+    Développe les motifs glob des fichiers candidats (utile sous Windows où le shell ne le fait pas)
+
+    Returns:
+        Chemins dans l'ordre de la ligne de commande, sans doublon
+
+    Raises:
+        FileNotFoundError: Si un motif ne correspond à aucun fichier
+    """
+    paths: List[str] = []
+    for pattern in patterns:
+        if any(char in pattern for char in "*?["):
+            matches = sorted(glob.glob(pattern))
+            if not matches:
+                raise FileNotFoundError(f"Aucun fichier ne correspond au motif '{pattern}'")
+        else:
+            matches = [pattern]
+        for path in matches:
+            if path not in paths:
+                paths.append(path)
+    return paths
+
+
+def iter_csv_rows(file_paths: List[str]) -> Iterator[Dict]:
+    """Parcourt en flux les lignes de plusieurs fichiers CSV"""
+    for path in file_paths:
+        with CsvReader(path) as reader:
+            yield from reader.records()
+
+
+def merge_fieldnames(fieldnames_list: Iterable[List[str]]) -> List[str]:
+    """Union ordonnée des colonnes de plusieurs fichiers"""
+    merged: List[str] = []
+    for fieldnames in fieldnames_list:
+        for field in fieldnames:
+            if field not in merged:
+                merged.append(field)
+    return merged
+
+
+def filter_collisions(
+    rows: List[Tuple[int, Dict]], key_function, politique: str, file_dates: List[float]
+) -> Tuple[List[Dict], int]:
+    """
+    Résout les candidats présents dans plusieurs fichiers
+
+    Pour chaque clé présente dans plusieurs fichiers, seules les lignes du fichier retenu sont gardées:
+    le plus récent (date de modification, puis position sur la ligne de commande) avec la politique
+    "recent", ou celui dont la ligne a le plus de valeurs renseignées avec la politique "complet".
+    Les doublons à l'intérieur d'un même fichier sont conservés comme avec un seul fichier.
+
+    Args:
+        rows: Couples (numéro du fichier, candidat) dans l'ordre des fichiers
+        key_function: Fonction de clé identifiant une entreprise
+        politique: POLICY_RECENT ou POLICY_COMPLETE
+        file_dates: Date de modification de chaque fichier
+
+    Returns:
+        Tuple (candidats retenus dans l'ordre d'origine, nombre de candidats écartés)
+    """
+    keys = [key_function(candidat) for _, candidat in rows]
+    by_key: Dict = {}
+    for key, (source, candidat) in zip(keys, rows):
+        by_key.setdefault(key, []).append((source, candidat))
+
+    def rank(item: Tuple[int, Dict]):
+        source, candidat = item
+        if politique == POLICY_COMPLETE:
+            return (sum(1 for value in candidat.values() if value), file_dates[source], source)
+        return (file_dates[source], source)
+
+    winners = {key: max(items, key=rank)[0] for key, items in by_key.items() if len({source for source, _ in items}) > 1}
+    kept = [candidat for key, (source, candidat) in zip(keys, rows) if winners.get(key, source) == source]
+    return kept, len(rows) - len(kept)
+
+
+def load_candidats_files(file_paths: List[str], politique: str = POLICY_RECENT) -> Tuple[List[Dict], List[str]]:
+    """
+    Charge et fusionne plusieurs fichiers de candidats
+
+    Returns:
+        Tuple (candidats après résolution des collisions entre fichiers, colonnes fusionnées)
+    """
+    if len(file_paths) == 1:
+        return load_candidats(file_paths[0])
+
+    rows: List[Tuple[int, Dict]] = []
+    fieldnames_list = []
+    for source, path in enumerate(file_paths):
+        candidats, fieldnames = load_candidats(path)
+        rows.extend((source, candidat) for candidat in candidats)
+        fieldnames_list.append(fieldnames)
+
+    file_dates = [os.path.getmtime(path) for path in file_paths]
+    candidats, dropped = filter_collisions(rows, create_record_key, politique, file_dates)
+    print(f"   Collisions entre fichiers: {dropped} candidat(s) écarté(s) (politique: {politique})")
+    return candidats, merge_fieldnames(fieldnames_list)
+
+
+def build_output_fieldnames(historique_fieldnames: List[str], candidats_fieldnames: List[str]) -> List[str]:
+    """
+    Fusionne les colonnes de l'historique et des candidats
+
+    Returns:
+        Colonnes de données (historique puis candidats) suivies des colonnes de suivi
+    """
+    # Collecter toutes les colonnes non-suivi
+    data_fieldnames = []
+    for field in historique_fieldnames:
+        if field not in TRACKING_FIELDS and field not in data_fieldnames:
+            data_fieldnames.append(field)
+
+    for field in candidats_fieldnames:
+        if field not in TRACKING_FIELDS and field not in data_fieldnames:
+            data_fieldnames.append(field)
+
+    # Construire la liste finale : colonnes de données + colonnes de suivi dans l'ordre voulu
+    # Ordre : [données, Date_introduction, Date_verification, Filtré, Raison_Filtrage, Actif]
+    return data_fieldnames + ["Date_introduction", "Date_verification", "Filtré", "Raison_Filtrage", "Actif"]
+
+
+def extend_historique_record(record: Dict, all_fieldnames: List[str], deactivate: bool = True) -> Dict:
+    """
+    Copie un enregistrement de l'historique avec toutes les colonnes de sortie
+
+    Args:
+        record: Enregistrement de l'historique
+        all_fieldnames: Colonnes de sortie
+        deactivate: Marquer l'entreprise inactive (sinon son statut Actif est conservé)
+    """
+    updated_record = {}
+    for field in all_fieldnames:
+        if field == "Filtré" and field not in record:
+            # Valeur par défaut pour la colonne Filtré si elle n'existe pas
+            updated_record[field] = "Non"
+        elif field == "Raison_Filtrage" and field not in record:
+            # Valeur par défaut pour la colonne Raison_Filtrage si elle n'existe pas
+            updated_record[field] = ""
+        elif field == "Actif":
+            # Marquer initialement comme inactives les entreprises du périmètre recherché
+            updated_record[field] = "Non" if deactivate else record.get(field, "Oui")
+        else:
+            updated_record[field] = record.get(field, "")
+    return updated_record
+
+
+def merge_candidate(record: Dict, candidat: Dict, candidats_fieldnames: List[str], today: str, verbose: bool = False) -> bool:
+    """
+    Applique un candidat en correspondance exacte sur l'enregistrement existant
+
+    Met à jour la date de vérification, marque l'entreprise active et recopie les valeurs
+    non vides du candidat (hors champs de suivi).
+
+    Returns:
+        True si au moins une donnée a été modifiée
+    """
+    # Mettre à jour la date de vérification et marquer comme actif
+    record["Date_verification"] = today
+    record["Actif"] = "Oui"  # Marquer comme actif car présent dans les candidats
+
+    # Vérifier et mettre à jour les nouvelles données
+    data_updated = False
+    for field in candidats_fieldnames:
+        candidat_value = candidat.get(field, "")
+        existing_value = record.get(field, "")
+
+        # Si le candidat a une valeur et l'historique n'en a pas ou a une valeur différente
+        if candidat_value and (not existing_value or existing_value != candidat_value):
+            if field not in [
+                "Date_introduction",
+                "Date_verification",
+                "Actif",
+            ]:  # Ne pas écraser les champs de suivi
+                record[field] = candidat_value
+                data_updated = True
+                if verbose:
+                    print(f"   📝 Mise à jour {field}: '{existing_value}' → '{candidat_value}'")
+
+    return data_updated
+
+
+def create_new_entry(candidat: Dict, all_fieldnames: List[str], today: str) -> Dict:
+    """Crée une nouvelle entrée d'historique à partir d'un candidat"""
+    new_entry = {}
+    for field in all_fieldnames:
+        new_entry[field] = candidat.get(field, "")
+
+    # Ajouter les champs de suivi
+    new_entry["Date_introduction"] = today
+    new_entry["Date_verification"] = today
+    new_entry["Actif"] = "Oui"
+    new_entry["Filtré"] = "Non"  # Valeur par défaut pour les nouvelles entrées
+    new_entry["Raison_Filtrage"] = ""  # Valeur par défaut vide pour les nouvelles entrées
+    return new_entry
+
+
+def print_conflict(candidat: Dict, existing: Dict):
+    """Affiche un conflit entre un candidat et une entrée existante"""
+    metier = candidat.get("Metier_normalise", candidat.get("Metier", ""))
+    print(f"⚠️  CONFLIT DÉTECTÉ:")
+    print(f"   Candidat: {candidat['Nom']} | {candidat['Adresse']} | {candidat['Ville']} | {metier}")
+    print(
+        f"   Existant: {existing['Nom']} | {existing['Adresse']} | {existing['Ville']} | {existing.get('Metier_normalise', existing.get('Metier', ''))}"
+    )
+    print()
+
+
+def print_stats(stats: Dict[str, int]):
+    """Affiche les statistiques de traitement"""
+    print(f"\n📊 Statistiques de traitement:")
+    print(f"   Mises à jour (correspondances exactes): {stats['exact_matches']}")
+    print(f"   Nouvelles entrées: {stats['new_entries']}")
+    print(f"   Conflits détectés: {stats['conflicts']}")
+    print(f"   🔄 Mises à jour de données: {stats['data_updates']}")
+
+
+def changed_fields(previous: Dict, record: Dict, fieldnames: List[str]) -> Dict[str, List[str]]:
+    """Retourne {champ: [ancienne valeur, nouvelle valeur]} hors date de vérification et statut"""
+    baseline = extend_historique_record(previous, fieldnames, deactivate=False)
+    return {
+        field: [baseline[field], record.get(field, "")]
+        for field in fieldnames
+        if field not in STATUS_FIELDS and baseline[field] != record.get(field, "")
+    }
+
+
+class DeltaWriter:
+    """
+    Écrit le fichier delta d'une mise à jour: une ligne par entreprise insérée, modifiée,
+    réactivée ou désactivée, avec la liste des colonnes modifiées
+
+    Une simple vérification (Date_verification mise à jour, sans autre changement) n'apparaît pas.
+    Le fichier est écrit dans un fichier temporaire renommé à la fermeture.
+    """
+
+    def __init__(self, output_file: str, fieldnames: List[str]):
+        self.output_file = output_file
+        self.fieldnames = fieldnames
+        self.counts = {DELTA_INSERT: 0, DELTA_UPDATE: 0, DELTA_REACTIVATE: 0, DELTA_DEACTIVATE: 0}
+        self._temp_file = output_file + ".tmp"
+        self._writer = CsvWriter(self._temp_file, DELTA_FIELDNAMES)
+
+    def add(self, previous: Optional[Dict], record: Dict):
+        """Compare l'état précédent d'une entreprise (None si nouvelle) à son état mis à jour"""
+        changes: Dict[str, List[str]] = {}
+        if previous is None:
+            change = DELTA_INSERT
+        else:
+            changes = changed_fields(previous, record, self.fieldnames)
+            was_active = previous.get("Actif", "Oui") == "Oui"
+            is_active = record.get("Actif") == "Oui"
+            if is_active and not was_active:
+                change = DELTA_REACTIVATE
+            elif was_active and not is_active:
+                change = DELTA_DEACTIVATE
+            elif changes:
+                change = DELTA_UPDATE
+            else:
+                return
+
+        self.counts[change] += 1
+        self._writer.write_record(
+            {
+                "Changement": change,
+                "Cle": create_record_key(record).hex(),
+                "Nom": record["Nom"],
+                "Adresse": record["Adresse"],
+                "Ville": record["Ville"],
+                "Metier_normalise": record.get("Metier_normalise", record.get("Metier", "")),
+                "Colonnes_modifiees": ";".join(changes),
+            }
+        )
+
+    def close(self):
+        self._writer.close()
+        os.replace(self._temp_file, self.output_file)
+        print(
+            f"📝 Delta sauvegardé: {self.output_file} ({self.counts[DELTA_INSERT]} insertions, "
+            f"{self.counts[DELTA_UPDATE]} mises à jour, {self.counts[DELTA_REACTIVATE]} réactivations, "
+            f"{self.counts[DELTA_DEACTIVATE]} désactivations)"
+        )
+
+    def __enter__(self) -> "DeltaWriter":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def build_working_historique(
+    historique_composite: Dict, all_fieldnames: List[str], perimetre: Optional[Set[Tuple[str, str]]] = None
+) -> Tuple[List[Dict], Dict[bytes, Dict], Dict[str, Dict]]:
+    """
+    Copie l'historique en l'étendant aux nouvelles colonnes; les entreprises du périmètre sont
+    initialement marquées inactives
+
+    Returns:
+        Tuple (historique de travail, index clé composite -> enregistrement, index Place_id -> enregistrement)
+    """
+    updated_historique = []
+    updated_by_key: Dict[bytes, Dict] = {}
+    updated_by_place: Dict[str, Dict] = {}
+    for record in historique_composite.values():
+        deactivate = perimetre is None or record_cell_key(record) in perimetre
+        updated_record = extend_historique_record(record, all_fieldnames, deactivate)
+        updated_historique.append(updated_record)
+        # Le premier enregistrement rencontré pour une clé est conservé, comme lors d'un parcours séquentiel
+        updated_by_key.setdefault(create_record_key(updated_record), updated_record)
+        if record_place_id(updated_record):
+            updated_by_place.setdefault(record_place_id(updated_record), updated_record)
+    return updated_historique, updated_by_key, updated_by_place
+
+
+def location_conflicts(candidat: Dict, existing_entries: List[Dict]) -> List[Dict]:
+    """Entrées de même adresse/ville/métier mais de nom différent, hors autres lieux Google Places"""
+    nom = normalize_for_comparison(candidat["Nom"])
+    return [
+        existing
+        for existing in existing_entries
+        if not is_other_place(candidat, existing) and normalize_for_comparison(existing["Nom"]) != nom
+    ]
+
+
 def process_updates(
     historique_composite: Dict,
     historique_location: Dict,
@@ -140,55 +551,36 @@ def process_updates(
     candidats_fieldnames: List[str],
     historique_fieldnames: List[str],
     verbose: bool = False,
+    perimetre: Optional[Set[Tuple[str, str]]] = None,
 ) -> Tuple[List[Dict], List[Dict], List[str]]:
     """
     Traite les mises à jour
 
+    Un candidat est d'abord rapproché par son identifiant Google Places (colonne Place_id): un
+    changement de nom ou d'adresse ne crée alors ni conflit ni nouvelle entrée. La clé composite
+    nom/adresse/ville/métier n'est utilisée qu'à défaut (lignes sans Place_id).
+
+    Args:
+        perimetre: Cellules (ville, métier) recherchées; seules les entreprises de ces cellules absentes
+            des candidats sont désactivées. None désactive toutes les entreprises absentes.
+
     Returns:
         Tuple (updated_historique, conflicts, output_fieldnames)
+        updated_historique commence par les entrées de historique_composite, dans le même ordre,
+        suivies des nouvelles entrées.
     """
     today = datetime.now().strftime("%Y-%m-%d")
-    updated_historique = []
     conflicts = []
     stats = {"exact_matches": 0, "new_entries": 0, "conflicts": 0, "data_updates": 0}
 
-    # Fusionner les colonnes de l'historique et des candidats
-    # Commencer par toutes les colonnes sauf les colonnes de suivi
-    tracking_fields = ["Date_introduction", "Date_verification", "Actif", "Filtré", "Raison_Filtrage"]
-
-    # Collecter toutes les colonnes non-suivi
-    data_fieldnames = []
-    for field in historique_fieldnames:
-        if field not in tracking_fields and field not in data_fieldnames:
-            data_fieldnames.append(field)
-
-    for field in candidats_fieldnames:
-        if field not in tracking_fields and field not in data_fieldnames:
-            data_fieldnames.append(field)
-
-    # Construire la liste finale : colonnes de données + colonnes de suivi dans l'ordre voulu
-    # Ordre : [données, Date_introduction, Date_verification, Filtré, Raison_Filtrage, Actif]
-    all_fieldnames = data_fieldnames + ["Date_introduction", "Date_verification", "Filtré", "Raison_Filtrage", "Actif"]
+    all_fieldnames = build_output_fieldnames(historique_fieldnames, candidats_fieldnames)
 
     print(f"Colonnes dans le fichier de sortie: {all_fieldnames}")
 
-    # Copier l'historique existant en étendant avec les nouvelles colonnes
-    # Marquer initialement toutes les entreprises comme inactives
-    for record in historique_composite.values():
-        updated_record = {}
-        for field in all_fieldnames:
-            if field == "Filtré" and field not in record:
-                # Valeur par défaut pour la colonne Filtré si elle n'existe pas
-                updated_record[field] = "Non"
-            elif field == "Raison_Filtrage" and field not in record:
-                # Valeur par défaut pour la colonne Raison_Filtrage si elle n'existe pas
-                updated_record[field] = ""
-            elif field == "Actif":
-                # Marquer initialement toutes les entreprises comme inactives
-                updated_record[field] = "Non"
-            else:
-                updated_record[field] = record.get(field, "")
-        updated_historique.append(updated_record)
+    # Copier l'historique existant en étendant avec les nouvelles colonnes, indexé par clé et par identifiant Places
+    updated_historique, updated_by_key, updated_by_place = build_working_historique(
+        historique_composite, all_fieldnames, perimetre
+    )
 
     # Traiter chaque candidat
     for candidat in candidats:
@@ -196,99 +588,313 @@ def process_updates(
         adresse = candidat["Adresse"]
         ville = candidat["Ville"]
         metier = candidat.get("Metier_normalise", candidat.get("Metier", ""))
+        place_id = record_place_id(candidat)
 
         # Clé composite complète
-        composite_key = create_composite_key(nom, adresse, ville, metier)
-        location_key = create_location_key(adresse, ville, metier)
+        composite_key = digest_key(create_composite_key(nom, adresse, ville, metier))
+        location_key = digest_key(create_location_key(adresse, ville, metier))
+        matched_by_place = place_id in updated_by_place
+        # Recherche directe dans l'index de l'historique de travail (plus de parcours linéaire)
+        record = updated_by_place[place_id] if matched_by_place else updated_by_key.get(composite_key)
+        if record is not None and is_other_place(candidat, record):
+            # Même clé composite mais autre identifiant Places: c'est un autre lieu
+            record = None
+
+        if record is not None:
+            # Même lieu Google Places, quels que soient le nom et l'adresse (aucune normalisation nécessaire),
+            # sinon correspondance exacte : mettre à jour les données et date_verification
+            merge_candidate(record, candidat, candidats_fieldnames, today, verbose)
+            if place_id:
+                # Ligne antérieure à la colonne Place_id: elle est désormais rapprochée par identifiant
+                updated_by_place.setdefault(place_id, record)
+            stats["exact_matches"] += 1
+
+            # Incrémenter le compteur pour chaque ligne modifiée (date_verification + Actif)
+            stats["data_updates"] += 1
 
-        if composite_key in historique_composite:
-            # Correspondance exacte : mettre à jour les données et date_verification
-            for record in updated_historique:
-                existing_key = create_composite_key(
-                    record["Nom"], record["Adresse"], record["Ville"], record.get("Metier_normalise", record.get("Metier", ""))
-                )
-                if existing_key == composite_key:
-                    # Mettre à jour la date de vérification et marquer comme actif
-                    record["Date_verification"] = today
-                    record["Actif"] = "Oui"  # Marquer comme actif car présent dans les candidats
-                    stats["exact_matches"] += 1
-
-                    # Incrémenter le compteur pour chaque ligne modifiée (date_verification + Actif)
-                    stats["data_updates"] += 1
-
-                    # Vérifier et mettre à jour les nouvelles données
-                    data_updated = False
-                    for field in candidats_fieldnames:
-                        candidat_value = candidat.get(field, "")
-                        existing_value = record.get(field, "")
-
-                        # Si le candidat a une valeur et l'historique n'en a pas ou a une valeur différente
-                        if candidat_value and (not existing_value or existing_value != candidat_value):
-                            if field not in [
-                                "Date_introduction",
-                                "Date_verification",
-                                "Actif",
-                            ]:  # Ne pas écraser les champs de suivi
-                                record[field] = candidat_value
-                                data_updated = True
-                                if verbose:
-                                    print(f"   📝 Mise à jour {field}: '{existing_value}' → '{candidat_value}'")
-
-                    if verbose:
-                        print(f"✅ Mis à jour: {nom} - {adresse}")
-                    break
-
-        elif location_key in historique_location:
+            if verbose:
+                print(f"✅ Mis à jour{' (Place_id)' if matched_by_place else ''}: {nom} - {adresse}")
+
+        elif location_key in historique_location and not all(
+            is_other_place(candidat, existing) for existing in historique_location[location_key]
+        ):
             # Même adresse/ville/métier mais nom différent : conflit potentiel
-            existing_entries = historique_location[location_key]
-            for existing in existing_entries:
-                if normalize_for_comparison(existing["Nom"]) != normalize_for_comparison(nom):
-                    conflict = {"candidat": candidat, "existant": existing}
-                    conflicts.append(conflict)
-                    stats["conflicts"] += 1
-
-                    print(f"⚠️  CONFLIT DÉTECTÉ:")
-                    print(f"   Candidat: {nom} | {adresse} | {ville} | {metier}")
-                    print(
-                        f"   Existant: {existing['Nom']} | {existing['Adresse']} | {existing['Ville']} | {existing.get('Metier_normalise', existing.get('Metier', ''))}"
-                    )
-                    print()
+            # (sauf avec une entreprise dont l'identifiant Places est différent: c'est un autre lieu)
+            for existing in location_conflicts(candidat, historique_location[location_key]):
+                conflicts.append({"candidat": candidat, "existant": existing})
+                stats["conflicts"] += 1
+                print_conflict(candidat, existing)
         else:
             # Nouvelle entrée
-            new_entry = {}
-            for field in all_fieldnames:
-                new_entry[field] = candidat.get(field, "")
-
-            # Ajouter les champs de suivi
-            new_entry["Date_introduction"] = today
-            new_entry["Date_verification"] = today
-            new_entry["Actif"] = "Oui"
-            new_entry["Filtré"] = "Non"  # Valeur par défaut pour les nouvelles entrées
-            new_entry["Raison_Filtrage"] = ""  # Valeur par défaut vide pour les nouvelles entrées
-
-            updated_historique.append(new_entry)
+            updated_historique.append(create_new_entry(candidat, all_fieldnames, today))
             stats["new_entries"] += 1
             # Incrémenter le compteur pour chaque nouvelle entrée (ligne modifiée)
             stats["data_updates"] += 1
             if verbose:
                 print(f"➕ Nouvelle entrée: {nom} - {adresse}")
 
-    print(f"\n📊 Statistiques de traitement:")
-    print(f"   Mises à jour (correspondances exactes): {stats['exact_matches']}")
-    print(f"   Nouvelles entrées: {stats['new_entries']}")
-    print(f"   Conflits détectés: {stats['conflicts']}")
-    print(f"   🔄 Mises à jour de données: {stats['data_updates']}")
+    print_stats(stats)
 
     return updated_historique, conflicts, all_fieldnames
 
 
+def iter_sorted_location_groups(
+    file_paths: List[str],
+    sort_buffer_rows: int = DEFAULT_MAX_ROWS_IN_MEMORY,
+    temp_dir: Optional[str] = None,
+) -> Iterator[Tuple[str, List[Tuple[int, Dict]]]]:
+    """
+    Lit un ou plusieurs fichiers CSV triés ensemble par clé de localisation puis par nom (tri externe, mémoire bornée)
+
+    Les lignes sont préfixées par leur clé de localisation et leur nom normalisés avant le tri:
+    les entreprises d'une même adresse/ville/métier sont consécutives et, au sein de ce groupe,
+    une correspondance exacte se réduit à l'égalité des noms normalisés.
+
+    Yields:
+        Tuple (clé de localisation, couples (numéro du fichier, ligne) dans l'ordre des fichiers)
+    """
+    files_fieldnames = [read_schema(path).fieldnames for path in file_paths]
+    fieldnames = merge_fieldnames(files_fieldnames)
+
+    def prefixed_rows() -> Iterator[List[str]]:
+        for source, path in enumerate(file_paths):
+            with CsvReader(path) as reader:
+                # Colonnes de la clé et colonnes fusionnées repérées une fois par leur index
+                key_values = reader.schema.projection(("Adresse", "Ville", reader.schema.metier_column() or "Metier", "Nom"))
+                values = reader.schema.projection(fieldnames)
+                for row in reader:
+                    adresse, ville, metier, nom = key_values(row)
+                    prefix = [create_location_key(adresse, ville, metier), normalize_for_comparison(nom), str(source)]
+                    yield prefix + values(row)
+
+    sorted_rows = external_sort(prefixed_rows(), itemgetter(0, 1), sort_buffer_rows, temp_dir)
+    for location, group in groupby(sorted_rows, key=itemgetter(0)):
+        rows = []
+        for values in group:
+            source = int(values[2])
+            # Seules les colonnes du fichier d'origine sont restituées (Metier_normalise ou Metier)
+            row = {field: value for field, value in zip(fieldnames, values[3:]) if field in files_fieldnames[source]}
+            rows.append((source, row))
+        yield location, rows
+
+
+def read_streaming_fieldnames(historique_file: str, candidats_files: List[str]) -> Tuple[List[str], List[List[str]]]:
+    """
+    Lit et vérifie les colonnes de l'historique et de chaque fichier de candidats
+
+    Returns:
+        Tuple (colonnes de l'historique, colonnes de chaque fichier de candidats)
+    """
+    historique_fieldnames = read_schema(historique_file).fieldnames
+    check_required_columns(historique_fieldnames, "l'historique")
+    files_fieldnames = []
+    for candidats_file in candidats_files:
+        files_fieldnames.append(read_schema(candidats_file).fieldnames)
+        check_required_columns(files_fieldnames[-1], "les candidats")
+    return historique_fieldnames, files_fieldnames
+
+
+def join_location_groups(
+    historique_groups: Iterator[Tuple[str, List[Tuple[int, Dict]]]],
+    candidats_groups: Iterator[Tuple[str, List[Tuple[int, Dict]]]],
+) -> Iterator[Tuple[List[Dict], List[Tuple[int, Dict]]]]:
+    """
+    Parcourt en parallèle deux flux de groupes triés par clé de localisation (jointure tri-fusion)
+
+    Yields:
+        Tuple (lignes de l'historique, candidats avec leur fichier d'origine) d'une même localisation;
+        l'un des deux est vide quand la localisation n'est présente que d'un côté
+    """
+    historique_group = next(historique_groups, None)
+    candidats_group = next(candidats_groups, None)
+    while historique_group is not None or candidats_group is not None:
+        if candidats_group is None or (historique_group is not None and historique_group[0] < candidats_group[0]):
+            yield [row for _, row in historique_group[1]], []
+            historique_group = next(historique_groups, None)
+        elif historique_group is None or candidats_group[0] < historique_group[0]:
+            yield [], candidats_group[1]
+            candidats_group = next(candidats_groups, None)
+        else:
+            yield [row for _, row in historique_group[1]], candidats_group[1]
+            historique_group = next(historique_groups, None)
+            candidats_group = next(candidats_groups, None)
+
+
+def find_group_record(candidat: Dict, records: Dict[str, Dict], records_by_place: Dict[str, Dict]) -> Optional[Dict]:
+    """
+    Entreprise du groupe correspondant à un candidat: par identifiant Places, à défaut par nom normalisé
+    tant que l'entreprise trouvée n'a pas un autre identifiant Places
+    """
+    place_id = record_place_id(candidat)
+    record = records_by_place.get(place_id) if place_id else None
+    if record is None:
+        record = records.get(normalize_for_comparison(candidat["Nom"]))
+        if record is not None and is_other_place(candidat, record):
+            # Même nom mais autre identifiant Places: c'est un autre lieu
+            return None
+    return record
+
+
+def update_location_group(
+    existing_rows: List[Dict],
+    candidats: List[Dict],
+    all_fieldnames: List[str],
+    candidats_fieldnames: List[str],
+    today: str,
+    stats: Dict[str, int],
+    verbose: bool = False,
+    perimetre: Optional[Set[Tuple[str, str]]] = None,
+) -> Tuple[Dict[str, Dict], Dict[str, Dict], List[Dict]]:
+    """
+    Applique les candidats d'une localisation (adresse/ville/métier) à ses lignes de l'historique
+
+    Au sein du groupe, une entreprise est identifiée par son identifiant Places, à défaut par son nom normalisé.
+
+    Returns:
+        Tuple (lignes d'origine par nom, lignes mises à jour par nom, nouvelles entrées)
+    """
+    # Entreprises du groupe par nom normalisé (une clé en double garde sa première position)
+    existing_by_name: Dict[str, Dict] = {}
+    for row in existing_rows:
+        existing_by_name[normalize_for_comparison(row["Nom"])] = row
+    records = {
+        name: extend_historique_record(row, all_fieldnames, perimetre is None or record_cell_key(row) in perimetre)
+        for name, row in existing_by_name.items()
+    }
+    records_by_place = {record_place_id(record): record for record in records.values() if record_place_id(record)}
+
+    new_entries = []
+    for candidat in candidats:
+        nom = candidat["Nom"]
+        place_id = record_place_id(candidat)
+        record = find_group_record(candidat, records, records_by_place)
+        conflicting_rows = [existing for existing in existing_rows if not is_other_place(candidat, existing)]
+        if record is not None:
+            # Correspondance exacte : mettre à jour les données et date_verification
+            merge_candidate(record, candidat, candidats_fieldnames, today, verbose)
+            if place_id:
+                records_by_place.setdefault(place_id, record)
+            stats["exact_matches"] += 1
+            stats["data_updates"] += 1
+            if verbose:
+                print(f"✅ Mis à jour: {nom} - {candidat['Adresse']}")
+        elif conflicting_rows:
+            # Même adresse/ville/métier mais nom différent : conflit potentiel
+            for existing in conflicting_rows:
+                stats["conflicts"] += 1
+                print_conflict(candidat, existing)
+        else:
+            # Nouvelle entrée
+            new_entries.append(create_new_entry(candidat, all_fieldnames, today))
+            stats["new_entries"] += 1
+            stats["data_updates"] += 1
+            if verbose:
+                print(f"➕ Nouvelle entrée: {nom} - {candidat['Adresse']}")
+
+    return existing_by_name, records, new_entries
+
+
+def process_updates_streaming(
+    historique_file: str,
+    candidats_files: List[str],
+    output_file: str,
+    verbose: bool = False,
+    sort_buffer_rows: int = DEFAULT_MAX_ROWS_IN_MEMORY,
+    temp_dir: Optional[str] = None,
+    perimetre: Optional[Set[Tuple[str, str]]] = None,
+    delta_file: Optional[str] = None,
+    politique: str = POLICY_RECENT,
+) -> Tuple[int, Dict[str, int]]:
+    """
+    Traite les mises à jour par jointure tri-fusion, avec une mémoire bornée
+
+    L'historique et les candidats sont triés en externe par clé de localisation puis par nom,
+    puis parcourus en parallèle groupe par groupe: chaque candidat est classé en correspondance
+    exacte, conflit ou nouvelle entrée avec les mêmes règles que process_updates, et l'historique
+    mis à jour est écrit au fil de l'eau. Seul un groupe (une adresse/ville/métier) est gardé en mémoire.
+    Le fichier de sortie est trié par adresse/ville/métier au lieu de suivre l'ordre de l'historique.
+    Avec delta_file, les changements sont aussi écrits au fil de l'eau dans un fichier delta.
+    Plusieurs fichiers de candidats sont triés ensemble; une entreprise présente dans plusieurs
+    fichiers est résolue selon la politique (voir filter_collisions).
+    L'identifiant Places n'est utilisé qu'au sein d'un groupe: une entreprise dont l'adresse a changé
+    n'est pas rapprochée, contrairement à process_updates.
+
+    Returns:
+        Tuple (nombre de conflits, statistiques)
+    """
+    today = datetime.now().strftime("%Y-%m-%d")
+    stats = {"exact_matches": 0, "new_entries": 0, "conflicts": 0, "data_updates": 0}
+
+    historique_fieldnames, files_fieldnames = read_streaming_fieldnames(historique_file, candidats_files)
+    candidats_fieldnames = merge_fieldnames(files_fieldnames)
+    file_dates = [os.path.getmtime(path) for path in candidats_files]
+    dropped = 0
+
+    all_fieldnames = build_output_fieldnames(historique_fieldnames, candidats_fieldnames)
+    print(f"Colonnes dans le fichier de sortie: {all_fieldnames}")
+
+    groups = join_location_groups(
+        iter_sorted_location_groups([historique_file], sort_buffer_rows, temp_dir),
+        iter_sorted_location_groups(candidats_files, sort_buffer_rows, temp_dir),
+    )
+
+    written = 0
+    delta = DeltaWriter(delta_file, all_fieldnames) if delta_file else None
+    # Écriture dans un fichier temporaire: la sortie peut remplacer le fichier historique
+    temp_output = output_file + ".tmp"
+    with CsvWriter(temp_output, all_fieldnames) as writer:
+        for existing_rows, sourced_candidats in groups:
+            # Au sein d'un groupe, une entreprise est identifiée par son nom normalisé
+            candidats, group_dropped = filter_collisions(
+                sourced_candidats, lambda candidat: normalize_for_comparison(candidat["Nom"]), politique, file_dates
+            )
+            dropped += group_dropped
+
+            existing_by_name, records, new_entries = update_location_group(
+                existing_rows, candidats, all_fieldnames, candidats_fieldnames, today, stats, verbose, perimetre
+            )
+            writer.write_records(records.values())
+            writer.write_records(new_entries)
+            written += len(records) + len(new_entries)
+
+            if delta is not None:
+                for name, row in existing_by_name.items():
+                    delta.add(row, records[name])
+                for entry in new_entries:
+                    delta.add(None, entry)
+
+    os.replace(temp_output, output_file)
+    if delta is not None:
+        delta.close()
+
+    if len(candidats_files) > 1:
+        print(f"   Collisions entre fichiers: {dropped} candidat(s) écarté(s) (politique: {politique})")
+
+    print_stats(stats)
+    print(f"✅ Historique mis à jour sauvegardé: {output_file} ({written} entrées)")
+    return stats["conflicts"], stats
+
+
+def record_metric_series(series_file: str, output_file: str):
+    """Ajoute aux séries de métriques la note et le nombre d'avis des entreprises vérifiées aujourd'hui"""
+    today = datetime.now().strftime("%Y-%m-%d")
+    written = SeriesMetriques(series_file).record_history(iter_csv_rows([output_file]), today)
+    print(f"📈 Séries de métriques: {written} point(s) ajouté(s) dans {series_file}")
+
+
+def record_versions(versions_file: str, output_file: str):
+    """Ajoute l'historique mis à jour comme nouvelle copie de l'historique versionné (datée d'aujourd'hui)"""
+    historique = HistoriqueVersionne(versions_file)
+    opened, closed = historique.import_csv(output_file, datetime.now().strftime("%Y-%m-%d"))
+    historique.save()
+    print(f"🕰️  Historique versionné: {opened} version(s) ouverte(s), {closed} fermée(s) dans {versions_file}")
+
+
 def save_updated_historique(data: List[Dict], output_file: str, fieldnames: List[str]):
     """Sauvegarde l'historique mis à jour"""
     try:
-        with open(output_file, "w", newline="", encoding="utf-8") as file:
-            writer = csv.DictWriter(file, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(data)
+        with CsvWriter(output_file, fieldnames) as writer:
+            writer.write_records(data)
 
         print(f"✅ Historique mis à jour sauvegardé: {output_file} ({len(data)} entrées)")
 
@@ -297,6 +903,73 @@ def save_updated_historique(data: List[Dict], output_file: str, fieldnames: List
         sys.exit(1)
 
 
+def run_streaming_update(args: argparse.Namespace, candidats_files: List[str]) -> int:
+    """Mise à jour en flux (--streaming); retourne le nombre de conflits"""
+    print(f"\n🔄 Traitement des mises à jour en flux (tri-fusion)...")
+    try:
+        candidats_cells = iter_csv_rows(candidats_files) if args.perimetre_candidats else []
+        perimetre = resolve_perimetre(args.perimetre, args.perimetre_candidats, candidats_cells)
+        conflict_count, _ = process_updates_streaming(
+            args.historique_file,
+            candidats_files,
+            args.output_file,
+            args.verbose,
+            args.sort_buffer,
+            args.temp_dir,
+            perimetre,
+            args.delta,
+            args.politique,
+        )
+    except FileNotFoundError as e:
+        print(f"Erreur: Fichier '{e.filename}' non trouvé")
+        sys.exit(1)
+    except ValueError as e:
+        print(f"Erreur: {e}")
+        sys.exit(1)
+    return conflict_count
+
+
+def run_update(args: argparse.Namespace, candidats_files: List[str]) -> int:
+    """Mise à jour en mémoire; retourne le nombre de conflits"""
+    # Chargement des données
+    print(f"\n📖 Chargement des fichiers...")
+    historique_composite, historique_location, historique_fieldnames = load_historique(args.historique_file)
+    candidats, candidats_fieldnames = load_candidats_files(candidats_files, args.politique)
+
+    print(f"   Historique: {len(historique_composite)} entrées")
+    print(f"   Candidats: {len(candidats)} entrées")
+
+    try:
+        perimetre = resolve_perimetre(args.perimetre, args.perimetre_candidats, candidats)
+    except (OSError, ValueError) as e:
+        print(f"Erreur lors du chargement du périmètre: {e}")
+        sys.exit(1)
+
+    # Traitement des mises à jour
+    print(f"\n🔄 Traitement des mises à jour...")
+    updated_historique, conflicts, output_fieldnames = process_updates(
+        historique_composite,
+        historique_location,
+        candidats,
+        candidats_fieldnames,
+        historique_fieldnames,
+        args.verbose,
+        perimetre,
+    )
+
+    # Sauvegarde
+    save_updated_historique(updated_historique, args.output_file, output_fieldnames)
+
+    if args.delta:
+        # Les premières entrées de updated_historique correspondent à l'historique chargé, dans le même ordre
+        previous_records = list(historique_composite.values())
+        with DeltaWriter(args.delta, output_fieldnames) as delta:
+            for index, record in enumerate(updated_historique):
+                delta.add(previous_records[index] if index < len(previous_records) else None, record)
+
+    return len(conflicts)
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Mise à jour de l'historique des entreprises",
@@ -313,6 +986,9 @@ Fonctionnement:
 
 4. Si aucune correspondance: ajoute comme nouvelle entrée avec toutes les colonnes
 
+5. Les entreprises de l'historique absentes des candidats sont marquées Actif=Non
+   -> Avec --perimetre ou --perimetre-candidats: uniquement dans les cellules (ville, métier) recherchées
+
 Nouvelles fonctionnalités:
 - Support automatique de toutes les colonnes (Heures_ouverture, Nombre_avis, Note, etc.)
 - Mise à jour des données existantes avec de nouvelles informations
@@ -322,40 +998,87 @@ Nouvelles fonctionnalités:
 Exemples d'utilisation:
   python maj_historique.py historique.csv candidats.csv output.csv
   python maj_historique.py historique.csv candidats.csv output.csv --verbose
+  python maj_historique.py historique.csv candidats.csv output.csv --streaming --sort-buffer 200000
+  python maj_historique.py historique.csv candidats_marseille.csv output.csv --perimetre-candidats
+  python maj_historique.py historique.csv candidats.csv output.csv --delta output_delta.csv
+  python maj_historique.py historique.csv "candidats_*.csv" output.csv --politique complet
+  python maj_historique.py historique.csv candidats.csv output.csv --series series_metriques.bin
+  python maj_historique.py historique.csv candidats.csv output.csv --versions historique_versionne.csv
         """,
     )
 
     parser.add_argument("historique_file", help="Fichier CSV historique (détection automatique des colonnes)")
-    parser.add_argument("candidats_file", help="Fichier CSV des candidats (détection automatique des colonnes)")
+    parser.add_argument(
+        "candidats_files",
+        nargs="+",
+        help="Fichier(s) CSV des candidats ou motifs glob (détection automatique des colonnes)",
+    )
     parser.add_argument("output_file", help="Fichier CSV de sortie mis à jour (toutes colonnes fusionnées)")
     parser.add_argument("--verbose", "-v", action="store_true", help="Affichage détaillé des opérations")
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        help="Jointure tri-fusion en flux à mémoire bornée (sortie triée par adresse/ville/métier)",
+    )
+    parser.add_argument(
+        "--sort-buffer",
+        type=int,
+        default=DEFAULT_MAX_ROWS_IN_MEMORY,
+        help=f"Lignes gardées en mémoire par segment de tri en mode --streaming (défaut: {DEFAULT_MAX_ROWS_IN_MEMORY})",
+    )
+    parser.add_argument("--temp-dir", help="Dossier des fichiers temporaires du tri (mode --streaming)")
+    parser.add_argument(
+        "--perimetre",
+        help="CSV des cellules recherchées (colonnes Ville, Metier_normalise): seules leurs entreprises sont désactivées",
+    )
+    parser.add_argument(
+        "--perimetre-candidats",
+        action="store_true",
+        help="Désactive uniquement dans les cellules (ville, métier) présentes dans les candidats",
+    )
+    parser.add_argument(
+        "--delta",
+        help="Fichier CSV des changements (insertions, mises à jour, réactivations, désactivations)",
+    )
+    parser.add_argument(
+        "--series",
+        help="Fichier des séries de métriques (series_metriques.py): ajoute la note et le nombre d'avis du jour",
+    )
+    parser.add_argument(
+        "--versions",
+        help="Historique versionné (historique_versionne.py): ajoute l'historique mis à jour avec la date du jour",
+    )
+    parser.add_argument(
+        "--politique",
+        choices=COLLISION_POLICIES,
+        default=POLICY_RECENT,
+        help="Résolution d'une entreprise présente dans plusieurs fichiers de candidats: fichier le plus récent "
+        "ou ligne la plus complète (défaut: recent)",
+    )
 
     args = parser.parse_args()
 
     print(f"🔄 Mise à jour de l'historique...")
     print(f"   Historique: {args.historique_file}")
-    print(f"   Candidats: {args.candidats_file}")
+    try:
+        candidats_files = expand_candidate_paths(args.candidats_files)
+    except FileNotFoundError as e:
+        print(f"Erreur: {e}")
+        sys.exit(1)
+    print(f"   Candidats: {', '.join(candidats_files)}")
     print(f"   Sortie: {args.output_file}")
 
-    # Chargement des données
-    print(f"\n📖 Chargement des fichiers...")
-    historique_composite, historique_location, historique_fieldnames = load_historique(args.historique_file)
-    candidats, candidats_fieldnames = load_candidats(args.candidats_file)
-
-    print(f"   Historique: {len(historique_composite)} entrées")
-    print(f"   Candidats: {len(candidats)} entrées")
-
-    # Traitement des mises à jour
-    print(f"\n🔄 Traitement des mises à jour...")
-    updated_historique, conflicts, output_fieldnames = process_updates(
-        historique_composite, historique_location, candidats, candidats_fieldnames, historique_fieldnames, args.verbose
-    )
-
-    # Sauvegarde
-    save_updated_historique(updated_historique, args.output_file, output_fieldnames)
-
-    if conflicts:
-        print(f"\n⚠️  {len(conflicts)} conflit(s) détecté(s) - vérification manuelle recommandée")
+    if args.streaming:
+        conflict_count = run_streaming_update(args, candidats_files)
+    else:
+        conflict_count = run_update(args, candidats_files)
+
+    if args.series:
+        record_metric_series(args.series, args.output_file)
+    if args.versions:
+        record_versions(args.versions, args.output_file)
+    if conflict_count:
+        print(f"\n⚠️  {conflict_count} conflit(s) détecté(s) - vérification manuelle recommandée")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Chaîne de traitement complète dans un seul processus
+recherche_entreprises -> NormaliseMetiers -> supprime_doublons -> maj_historique -> Filters
+
+Les étapes sont enchaînées par des générateurs de lignes: pas de démarrage de Python ni d'écriture
+puis relecture d'un CSV intermédiaire entre deux étapes. Le fichier final est identique, octet pour
+octet, à celui produit par les cinq scripts lancés l'un après l'autre (avec leurs options par défaut).
+Les fichiers intermédiaires peuvent être écrits pour le débogage (--intermediaires).
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from fichiers_csv import CsvReader, CsvWriter, read_schema
+from Filters import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_RULES_FILE,
+    FilterRule,
+    apply_rule_ids,
+    classify_records,
+    iter_batches,
+    load_rules,
+    new_filter_stats,
+    np,
+    print_filter_stats,
+)
+from maj_historique import build_output_fieldnames, check_required_columns, load_historique, process_updates
+from NormaliseMetiers import afficher_statistiques, charger_metiers_reference, colonnes_sortie, normaliser_lignes
+from recherche_entreprises import (
+    OUTPUT_FIELDNAMES,
+    GooglePlacesSearcher,
+    iter_businesses,
+    load_csv_column,
+    print_search_stats,
+)
+from supprime_doublons import iter_unique_records, validate_input_columns
+
+# Fichier de référence des métiers par défaut
+DEFAULT_REFERENCE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "referencesMetiers.csv")
+
+# Noms des fichiers intermédiaires (--intermediaires), comme dans l'enchaînement des scripts du README
+INTERMEDIATE_FILES = {
+    "recherche": "entreprises_brutes.csv",
+    "normalisation": "entreprises_normalisees.csv",
+    "doublons": "entreprises_sans_doublons.csv",
+    "historique": "historique_maj.csv",
+}
+
+Rows = Iterator[Dict[str, str]]
+
+
+def as_csv_values(rows: Iterable[Dict], fieldnames: List[str]) -> Rows:
+    """
+    Convertit les valeurs comme une écriture puis relecture CSV (None -> "", nombres -> texte)
+
+    Les étapes reçoivent ainsi exactement les valeurs qu'elles liraient dans le fichier intermédiaire.
+    """
+    for row in rows:
+        yield {field: "" if row.get(field) is None else str(row[field]) for field in fieldnames}
+
+
+class StageTimer:
+    """
+    Mesure d'une étape: lignes produites et temps passé à les produire
+
+    Le temps mesuré inclut celui des étapes précédentes (une étape tire ses lignes de la précédente);
+    le temps propre de chaque étape est calculé par différence dans print_timings.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.rows = 0
+        self.seconds = 0.0
+
+    def wrap(self, rows: Iterable[Dict]) -> Rows:
+        iterator = iter(rows)
+        while True:
+            start = time.perf_counter()
+            try:
+                row = next(iterator)
+            except StopIteration:
+                self.seconds += time.perf_counter() - start
+                return
+            self.seconds += time.perf_counter() - start
+            self.rows += 1
+            yield row
+
+
+def dump_rows(rows: Iterable[Dict], file_path: str, fieldnames: List[str]) -> Rows:
+    """Écrit au passage les lignes d'une étape dans un fichier CSV intermédiaire"""
+    with CsvWriter(file_path, fieldnames) as writer:
+        for row in rows:
+            writer.write_record(row)
+            yield row
+
+
+def read_csv_source(input_file: str) -> Tuple[List[str], Rows]:
+    """Lignes d'un fichier d'entreprises brutes (sortie de recherche_entreprises.py)"""
+    fieldnames = read_schema(input_file).fieldnames
+
+    def rows() -> Rows:
+        # Lignes complétées par des valeurs vides: les valeurs sont déjà celles de as_csv_values
+        with CsvReader(input_file) as reader:
+            yield from map(reader.schema.record, reader)
+
+    return fieldnames, rows()
+
+
+def search_source(
+    metiers_file: str, villes_file: str, api_key: str, max_per_search: int, delay: float, verbose: bool
+) -> Tuple[List[str], Rows]:
+    """Lignes des entreprises trouvées par l'API Google Places, au fil des recherches"""
+    metiers = load_csv_column(metiers_file, "Metier")
+    villes = load_csv_column(villes_file, "Ville")
+    if not metiers or not villes:
+        raise ValueError("Aucun métier ou aucune ville trouvé dans les fichiers d'entrée")
+
+    searcher = GooglePlacesSearcher(api_key)
+    if not searcher.test_api_key():
+        raise ValueError("Clé API invalide")
+
+    def rows() -> Rows:
+        stats = {"entreprises": 0, "pagination": 0}
+        yield from as_csv_values(
+            iter_businesses(searcher, metiers, villes, min(max_per_search, 20), delay, verbose, stats), OUTPUT_FIELDNAMES
+        )
+        print_search_stats(stats, len(metiers) * len(villes))
+
+    return list(OUTPUT_FIELDNAMES), rows()
+
+
+def normalize_stage(rows: Rows, fieldnames: List[str], reference_file: str) -> Tuple[List[str], Rows]:
+    """Étape NormaliseMetiers: Metier remplacé par Metier_normalise"""
+    metiers_ref = charger_metiers_reference(reference_file)
+
+    def stage() -> Rows:
+        stats = {"lignes_lues": 0, "metiers_normalises": 0, "metiers_non_traites": 0}
+        yield from normaliser_lignes(rows, fieldnames, metiers_ref, stats)
+        afficher_statistiques(stats)
+
+    return colonnes_sortie(fieldnames), stage()
+
+
+def dedupe_stage(rows: Rows, fieldnames: List[str], verbose: bool) -> Tuple[List[str], Rows]:
+    """Étape supprime_doublons: première occurrence de chaque entreprise (nom/adresse/ville/métier)"""
+    fieldnames = validate_input_columns(fieldnames)
+
+    def stage() -> Rows:
+        stats = {"total": 0, "unique": 0}
+        for record in iter_unique_records(rows, stats, verbose):
+            yield {field: record.get(field, "") or "" for field in fieldnames}
+        print(f"   Doublons supprimés: {stats['total'] - stats['unique']} sur {stats['total']}")
+
+    return fieldnames, stage()
+
+
+def update_stage(rows: Rows, fieldnames: List[str], historique_file: str, verbose: bool) -> Tuple[List[str], Rows]:
+    """
+    Étape maj_historique: fusion des candidats dans l'historique
+
+    La jointure a besoin de tous les candidats: ils sont rassemblés en mémoire, comme le fait
+    maj_historique.py (hors mode --streaming).
+    """
+    check_required_columns(fieldnames, "les candidats")
+    output_fieldnames = build_output_fieldnames(read_schema(historique_file).fieldnames, fieldnames)
+
+    def stage() -> Rows:
+        historique_composite, historique_location, historique_fieldnames = load_historique(historique_file)
+        candidats = list(rows)
+        print(f"   Historique: {len(historique_composite)} entrées")
+        print(f"   Candidats: {len(candidats)} entrées")
+
+        updated, conflicts, _ = process_updates(
+            historique_composite, historique_location, candidats, fieldnames, historique_fieldnames, verbose
+        )
+        yield from as_csv_values(updated, output_fieldnames)
+        if conflicts:
+            print(f"\n⚠️  {len(conflicts)} conflit(s) détecté(s) - vérification manuelle recommandée")
+
+    return output_fieldnames, stage()
+
+
+def filter_stage(
+    rows: Rows, fieldnames: List[str], rules: List[FilterRule], vectorized: bool, verbose: bool
+) -> Tuple[List[str], Rows]:
+    """Étape Filters: Filtré et Raison_Filtrage d'après les règles, par lots"""
+    missing_columns = [column for column in ("Filtré", "Raison_Filtrage") if column not in fieldnames]
+    if missing_columns:
+        raise ValueError(f"Colonnes requises manquantes pour le filtrage: {', '.join(missing_columns)}")
+    if vectorized and np is None:
+        print("⚠️  NumPy non installé: évaluation ligne par ligne")
+        vectorized = False
+
+    def stage() -> Rows:
+        stats = new_filter_stats(rules)
+        for records in iter_batches(rows, DEFAULT_BATCH_SIZE):
+            rule_ids, _ = classify_records(records, rules, vectorized)
+            apply_rule_ids(records, rule_ids, rules, stats, verbose)
+            yield from records
+        print_filter_stats(stats, rules)
+
+    return fieldnames, stage()
+
+
+def write_output(rows: Rows, output_file: str, fieldnames: List[str]):
+    """Écrit le fichier final (fichier temporaire puis remplacement atomique)"""
+    temp_output = output_file + ".tmp"
+    try:
+        with CsvWriter(temp_output, fieldnames) as writer:
+            writer.write_records(rows)
+        os.replace(temp_output, output_file)
+    finally:
+        if os.path.exists(temp_output):
+            os.remove(temp_output)
+
+
+def print_timings(timers: List[StageTimer], total_seconds: float):
+    """Affiche le temps propre et le nombre de lignes produites par étape"""
+    print("⏱️  Temps par étape:")
+    previous = 0.0
+    for timer in timers:
+        print(f"   {timer.name:<15} {timer.seconds - previous:>8.3f}s  {timer.rows:>9} ligne(s)")
+        previous = timer.seconds
+    print(f"   {'écriture':<15} {total_seconds - previous:>8.3f}s")
+    print(f"   {'total':<15} {total_seconds:>8.3f}s")
+
+
+def run_pipeline(
+    source: Tuple[List[str], Rows],
+    historique_file: str,
+    output_file: str,
+    reference_file: str = DEFAULT_REFERENCE_FILE,
+    rules: Optional[List[FilterRule]] = None,
+    vectorized: bool = False,
+    intermediate_dir: Optional[str] = None,
+    verbose: bool = False,
+) -> List[StageTimer]:
+    """
+    Enchaîne les étapes depuis une source de lignes brutes jusqu'au fichier filtré
+
+    Args:
+        source: Colonnes et lignes des entreprises brutes (read_csv_source ou search_source)
+        historique_file: Historique à mettre à jour (lu seulement)
+        output_file: Historique mis à jour et filtré
+        reference_file: Référentiel des métiers (NormaliseMetiers)
+        rules: Règles de filtrage compilées (règles par défaut si absent)
+        vectorized: Évaluation vectorisée des règles (Filters --vectorise)
+        intermediate_dir: Dossier où écrire les fichiers intermédiaires de chaque étape (débogage)
+        verbose: Affichage détaillé des étapes
+
+    Returns:
+        Mesures de chaque étape
+    """
+    rules = load_rules(DEFAULT_RULES_FILE) if rules is None else rules
+    if intermediate_dir:
+        os.makedirs(intermediate_dir, exist_ok=True)
+
+    start = time.perf_counter()
+    fieldnames, rows = source
+    timers: List[StageTimer] = []
+
+    def add_stage(name: str, stage_fieldnames: List[str], stage_rows: Rows) -> Rows:
+        timer = StageTimer(name)
+        timers.append(timer)
+        stage_rows = timer.wrap(stage_rows)
+        if intermediate_dir and name in INTERMEDIATE_FILES:
+            stage_rows = dump_rows(stage_rows, os.path.join(intermediate_dir, INTERMEDIATE_FILES[name]), stage_fieldnames)
+        return stage_rows
+
+    rows = add_stage("recherche", fieldnames, rows)
+    fieldnames, rows = normalize_stage(rows, fieldnames, reference_file)
+    rows = add_stage("normalisation", fieldnames, rows)
+    fieldnames, rows = dedupe_stage(rows, fieldnames, verbose)
+    rows = add_stage("doublons", fieldnames, rows)
+
+    fieldnames, rows = update_stage(rows, fieldnames, historique_file, verbose)
+    rows = add_stage("historique", fieldnames, rows)
+    fieldnames, rows = filter_stage(rows, fieldnames, rules, vectorized, verbose)
+    rows = add_stage("filtrage", fieldnames, rows)
+
+    write_output(rows, output_file, fieldnames)
+    print_timings(timers, time.perf_counter() - start)
+    print(f"✅ Historique mis à jour et filtré: {output_file}")
+    return timers
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Chaîne complète (recherche, normalisation, doublons, historique, filtrage) en un seul processus",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemples d'utilisation:
+  python pipeline.py historique.csv historique_filtre.csv --brut entreprises_brutes.csv
+  python pipeline.py historique.csv historique_filtre.csv --recherche metiers.csv villes.csv --api-key YOUR_API_KEY
+  python pipeline.py historique.csv historique_filtre.csv --brut entreprises_brutes.csv --intermediaires debug/
+        """,
+    )
+    parser.add_argument("historique_file", help="Fichier CSV historique à mettre à jour")
+    parser.add_argument("output_file", help="Fichier CSV de sortie (historique mis à jour et filtré)")
+    source_group = parser.add_mutually_exclusive_group(required=True)
+    source_group.add_argument("--brut", help="Entreprises déjà collectées (sortie de recherche_entreprises.py)")
+    source_group.add_argument(
+        "--recherche", nargs=2, metavar=("METIERS", "VILLES"), help="Collecte par l'API Google Places (métiers, villes)"
+    )
+    parser.add_argument("--api-key", help="Clé API Google Places (avec --recherche)")
+    parser.add_argument("--max-per-search", type=int, default=20, help="Résultats maximum par recherche (défaut: 20)")
+    parser.add_argument("--delay", type=float, default=0.1, help="Délai entre les requêtes en secondes (défaut: 0.1)")
+    parser.add_argument(
+        "--reference", default=DEFAULT_REFERENCE_FILE, help="Référentiel des métiers (défaut: data/referencesMetiers.csv)"
+    )
+    parser.add_argument("--regles", default=DEFAULT_RULES_FILE, help="Règles de filtrage (défaut: data/regles_filtrage.json)")
+    parser.add_argument("--vectorise", action="store_true", help="Évaluation vectorisée des règles (nécessite NumPy)")
+    parser.add_argument("--intermediaires", metavar="DOSSIER", help="Écrit les fichiers intermédiaires de chaque étape")
+    parser.add_argument("--verbose", "-v", action="store_true", help="Affichage détaillé des étapes")
+
+    args = parser.parse_args()
+
+    if args.recherche and not args.api_key:
+        print("Erreur: --api-key est requis avec --recherche")
+        sys.exit(1)
+
+    try:
+        rules = load_rules(args.regles)
+        if args.brut:
+            source = read_csv_source(args.brut)
+        else:
+            source = search_source(*args.recherche, args.api_key, args.max_per_search, args.delay, args.verbose)
+        run_pipeline(
+            source,
+            args.historique_file,
+            args.output_file,
+            args.reference,
+            rules,
+            args.vectorise,
+            args.intermediaires,
+            args.verbose,
+        )
+    except FileNotFoundError as e:
+        print(f"Erreur: Fichier '{e.filename}' non trouvé")
+        sys.exit(1)
+    except ValueError as e:
+        print(f"Erreur: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
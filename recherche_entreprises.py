@@ -1,11 +1,27 @@
 import argparse
-import csv
 import sys
 import time
-from typing import Dict, List, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 
 import requests
 
+from fichiers_csv import CsvReader, CsvWriter
+from horaires import format_bitmap, parse_opening_hours, periods_to_bitmap
+
+# Colonnes du fichier de sortie
+OUTPUT_FIELDNAMES = [
+    "Nom",
+    "Adresse",
+    "Ville",
+    "Metier",
+    "Heures_ouverture",
+    "Nombre_avis",
+    "Note",
+    "Jours_fermeture",
+    "Place_id",
+    "Creneaux_ouverture",
+]
+
 
 class GooglePlacesSearcher:
     """Classe pour rechercher des entreprises via Google Places API"""
@@ -19,7 +35,7 @@ class GooglePlacesSearcher:
             {
                 "Content-Type": "application/json",
                 "X-Goog-Api-Key": api_key,
-                "X-Goog-FieldMask": "places.displayName,places.formattedAddress,places.location,places.types,places.rating,places.userRatingCount,places.nationalPhoneNumber,places.websiteUri",
+                "X-Goog-FieldMask": "places.id,places.displayName,places.formattedAddress,places.location,places.types,places.rating,places.userRatingCount,places.nationalPhoneNumber,places.websiteUri,places.currentOpeningHours,places.regularOpeningHours",
             }
         )
 
@@ -172,6 +188,7 @@ class GooglePlacesSearcher:
 
         # Extraction des nouveaux champs
         heures_ouverture = self._extract_opening_hours(place)
+        creneaux_ouverture = self._extract_opening_slots(place, heures_ouverture)
         nombre_avis = place.get("userRatingCount", 0)
         note = place.get("rating", 0.0)
         jours_fermeture = self._extract_closure_days(place)
@@ -185,6 +202,8 @@ class GooglePlacesSearcher:
             "Nombre_avis": nombre_avis,
             "Note": note,
             "Jours_fermeture": jours_fermeture,
+            "Place_id": place.get("id", ""),
+            "Creneaux_ouverture": creneaux_ouverture,
         }
 
     def _extract_business_info(self, place: Dict, metier_recherche: str) -> Dict:
@@ -213,6 +232,8 @@ class GooglePlacesSearcher:
             "Nombre_avis": 0,
             "Note": 0.0,
             "Jours_fermeture": 0,
+            "Place_id": place.get("place_id", ""),
+            "Creneaux_ouverture": "",
         }
 
     def _extract_city_new_api(self, place: Dict) -> str:
@@ -307,6 +328,24 @@ class GooglePlacesSearcher:
 
         return "Non disponible"
 
+    def _extract_opening_slots(self, place: Dict, heures_ouverture: str) -> str:
+        """
+        Calcule les créneaux d'ouverture de la semaine (voir horaires.py)
+
+        Args:
+            place: Données du lieu depuis l'API Google Places
+            heures_ouverture: Texte des horaires extrait par _extract_opening_hours
+
+        Returns:
+            Créneaux en hexadécimal, vide si les horaires sont inconnus
+        """
+        # Les périodes de l'API sont exactes; le texte des horaires n'est analysé qu'à défaut
+        for hours_key in ("currentOpeningHours", "regularOpeningHours"):
+            bitmap = periods_to_bitmap(place.get(hours_key, {}).get("periods", []))
+            if bitmap is not None:
+                return format_bitmap(bitmap)
+        return format_bitmap(parse_opening_hours(heures_ouverture))
+
     def _extract_closure_days(self, place: Dict) -> int:
         """
         Calcule le nombre de jours de fermeture par semaine
@@ -353,12 +392,10 @@ def load_csv_column(filepath: str, column_name: str) -> List[str]:
     """
     values = []
     try:
-        with open(filepath, "r", encoding="utf-8") as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                value = row.get(column_name, "").strip()
-                if value:
-                    values.append(value)
+        with CsvReader(filepath) as reader:
+            if column_name in reader.schema:
+                column = reader.schema.index[column_name]
+                values = [value for value in (row[column].strip() for row in reader) if value]
     except FileNotFoundError:
         print(f"Erreur: Fichier {filepath} non trouvé")
         sys.exit(1)
@@ -369,6 +406,73 @@ def load_csv_column(filepath: str, column_name: str) -> List[str]:
     return values
 
 
+def iter_businesses(
+    searcher: GooglePlacesSearcher,
+    metiers: List[str],
+    villes: List[str],
+    max_per_search: int = 20,
+    delay: float = 0.1,
+    verbose: bool = False,
+    stats: Optional[Dict[str, int]] = None,
+) -> Iterator[Dict]:
+    """
+    Recherche chaque combinaison métier/ville et produit les entreprises trouvées au fil des recherches
+
+    Args:
+        searcher: Chercheur Google Places
+        metiers: Liste des métiers
+        villes: Liste des villes
+        max_per_search: Nombre maximum de résultats par recherche
+        delay: Délai entre les requêtes en secondes
+        verbose: Affichage détaillé des informations récupérées
+        stats: Compteurs "entreprises" et "pagination" mis à jour au fil des recherches (optionnel)
+    """
+    if stats is None:
+        stats = {"entreprises": 0, "pagination": 0}
+    total_searches = len(metiers) * len(villes)
+    current_search = 0
+
+    print(f"\nDébut de la recherche ({total_searches} combinaisons métier/ville)...")
+
+    for metier in metiers:
+        for ville in villes:
+            current_search += 1
+            print(f"[{current_search}/{total_searches}] Recherche: {metier} à {ville}")
+
+            businesses, pagination_count = searcher.search_businesses(metier, ville, max_per_search)
+            stats["entreprises"] += len(businesses)
+            stats["pagination"] += pagination_count
+
+            print(f"  Trouvé: {len(businesses)} entreprises")
+            if pagination_count > 0:
+                print(f"  📄 {pagination_count} page(s) suivante(s) utilisée(s)")
+
+            # Affichage détaillé si mode verbose activé
+            if verbose and businesses:
+                for business in businesses:
+                    print(
+                        f"    • {business.get('Nom', 'N/A')} - Note: {business.get('Note', 'N/A')}/5 ({business.get('Nombre_avis', 'N/A')} avis)"
+                    )
+
+            yield from businesses
+
+            # Délai entre les requêtes pour respecter les limites de l'API
+            if current_search < total_searches:
+                time.sleep(delay)
+
+
+def print_search_stats(stats: Dict[str, int], total_searches: int):
+    """Affiche le bilan de la recherche"""
+    print(f"\nRecherche terminée. Total: {stats['entreprises']} entreprises trouvées")
+    print(f"📊 Statistiques de pagination :")
+    print(f"   • Total de pages suivantes utilisées : {stats['pagination']}")
+    print(f"   • Requêtes de pagination effectuées : {stats['pagination']}")
+    if stats["pagination"] > 0:
+        print(
+            f"   • Économie sans pagination : {stats['entreprises'] - (total_searches * 20)} entreprises supplémentaires récupérées"
+        )
+
+
 def save_results_to_csv(businesses: List[Dict], output_file: str):
     """
     Sauvegarde les résultats dans un fichier CSV
@@ -377,13 +481,9 @@ def save_results_to_csv(businesses: List[Dict], output_file: str):
         businesses: Liste des entreprises trouvées
         output_file: Chemin du fichier de sortie
     """
-    fieldnames = ["Nom", "Adresse", "Ville", "Metier", "Heures_ouverture", "Nombre_avis", "Note", "Jours_fermeture"]
-
     try:
-        with open(output_file, "w", newline="", encoding="utf-8") as file:
-            writer = csv.DictWriter(file, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(businesses)
+        with CsvWriter(output_file, OUTPUT_FIELDNAMES) as writer:
+            writer.write_records(businesses)
 
         print(f"Résultats sauvegardés dans {output_file} ({len(businesses)} entreprises)")
 
@@ -454,46 +554,9 @@ Format des fichiers CSV d'entrée:
         sys.exit(1)
 
     # Recherche des entreprises
-    all_businesses = []
-    total_searches = len(metiers) * len(villes)
-    current_search = 0
-    total_pagination_calls = 0
-
-    print(f"\nDébut de la recherche ({total_searches} combinaisons métier/ville)...")
-
-    for metier in metiers:
-        for ville in villes:
-            current_search += 1
-            print(f"[{current_search}/{total_searches}] Recherche: {metier} à {ville}")
-
-            businesses, pagination_count = searcher.search_businesses(metier, ville, args.max_per_search)
-            all_businesses.extend(businesses)
-            total_pagination_calls += pagination_count
-
-            print(f"  Trouvé: {len(businesses)} entreprises")
-            if pagination_count > 0:
-                print(f"  📄 {pagination_count} page(s) suivante(s) utilisée(s)")
-
-            # Affichage détaillé si mode verbose activé
-            if args.verbose and businesses:
-                for business in businesses:
-                    print(
-                        f"    • {business.get('Nom', 'N/A')} - Note: {business.get('Note', 'N/A')}/5 ({business.get('Nombre_avis', 'N/A')} avis)"
-                    )
-
-            # Délai entre les requêtes pour respecter les limites de l'API
-            if current_search < total_searches:
-                time.sleep(args.delay)
-
-    # Sauvegarde des résultats
-    print(f"\nRecherche terminée. Total: {len(all_businesses)} entreprises trouvées")
-    print(f"📊 Statistiques de pagination :")
-    print(f"   • Total de pages suivantes utilisées : {total_pagination_calls}")
-    print(f"   • Requêtes de pagination effectuées : {total_pagination_calls}")
-    if total_pagination_calls > 0:
-        print(
-            f"   • Économie sans pagination : {len(all_businesses) - (total_searches * 20)} entreprises supplémentaires récupérées"
-        )
+    stats = {"entreprises": 0, "pagination": 0}
+    all_businesses = list(iter_businesses(searcher, metiers, villes, args.max_per_search, args.delay, args.verbose, stats))
+    print_search_stats(stats, len(metiers) * len(villes))
 
     save_results_to_csv(all_businesses, args.output_file)
 
@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+"""
+Séries temporelles des métriques des entreprises (Note, Nombre_avis)
+maj_historique.py écrase la note et le nombre d'avis à chaque vérification: ce stockage annexe
+conserve un point (date, note, nombre d'avis) par entreprise et par jour de vérification.
+
+Le fichier est un journal binaire en ajout seul d'enregistrements de taille fixe
+(empreinte de l'entreprise, jour, note, nombre d'avis). Une entreprise est identifiée par son
+identifiant Places, à défaut par sa clé composite (cles_compactes.record_identity_digest).
+Au chargement, les points sont rangés en colonnes (indice de l'entreprise, jour, note, nombre d'avis)
+triées par entreprise puis par date: la série d'une entreprise est une tranche des colonnes, et la
+croissance sur une fenêtre de dates est calculée pour toutes les entreprises à la fois par recherche
+dichotomique vectorisée, sans relire les copies CSV de l'historique.
+"""
+
+import argparse
+import math
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from cles_compactes import build_composite_key, digest_key, place_id_digest, record_identity_digest
+from fichiers_csv import CsvReader
+
+# NumPy est optionnel: il accélère le chargement, le tri des points et les requêtes de croissance
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - dépend de l'environnement
+    np = None
+
+# Empreinte de 16 octets, jour (ordinal), note (NaN si absente), nombre d'avis (-1 si absent)
+POINT_STRUCT = struct.Struct("<16sIfi")
+MISSING_REVIEWS = -1
+
+# Types des colonnes en mémoire: indice de l'entreprise, jour, note, nombre d'avis
+COLUMN_TYPES = ("I", "I", "f", "i")
+
+# Fenêtre par défaut des requêtes de croissance
+DEFAULT_WINDOW_DAYS = 90
+
+# Points lus par bloc au chargement
+READ_CHUNK_POINTS = 65_536
+
+Series = Tuple[Sequence[int], Sequence[float], Sequence[int]]
+Columns = Tuple[array, array, array, array]
+
+
+def parse_rating(value: Optional[str]) -> float:
+    """Convertit une note CSV ("4.5" ou "4,5") en float, NaN si absente ou invalide"""
+    try:
+        return float((value or "").strip().replace(",", "."))
+    except ValueError:
+        return math.nan
+
+
+def parse_review_count(value: Optional[str]) -> int:
+    """Convertit un nombre d'avis CSV en entier, MISSING_REVIEWS si absent ou invalide"""
+    try:
+        return int(float((value or "").strip()))
+    except ValueError:
+        return MISSING_REVIEWS
+
+
+def parse_day(value: str) -> int:
+    """Convertit une date AAAA-MM-JJ en jour ordinal"""
+    return datetime.strptime(value.strip(), "%Y-%m-%d").date().toordinal()
+
+
+def _same_value(left: float, right: float) -> bool:
+    return left == right or (math.isnan(left) and math.isnan(right))
+
+
+def _empty_columns() -> Columns:
+    return tuple(array(typecode) for typecode in COLUMN_TYPES)
+
+
+def _as_array(typecode: str, values) -> array:
+    """Copie un tableau NumPy dans un array du type donné"""
+    column = array(typecode)
+    column.frombytes(np.ascontiguousarray(values, dtype=typecode).tobytes())
+    return column
+
+
+class SeriesMetriques:
+    """
+    Stockage des séries (date, note, nombre d'avis) par entreprise
+
+    Un seul point est gardé par entreprise et par jour: le dernier écrit.
+    Les points sont rangés en colonnes triées par indice d'entreprise puis par jour;
+    offsets[i]:offsets[i + 1] délimite les points de l'entreprise d'indice i. Les points ajoutés
+    depuis le dernier tri sont gardés à part et fusionnés avant la requête suivante.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self._loaded = False
+        self._keys: List[bytes] = []
+        self._key_index: Dict[bytes, int] = {}
+        self._columns: Columns = _empty_columns()
+        self._offsets = array("Q", [0])
+        # Points ajoutés depuis le dernier tri: (indice, jour) -> (note, nombre d'avis)
+        self._pending: Dict[Tuple[int, int], Tuple[float, int]] = {}
+
+    def _index_of(self, key: bytes) -> int:
+        index = self._key_index.get(key)
+        if index is None:
+            index = self._key_index[key] = len(self._keys)
+            self._keys.append(key)
+        return index
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        if not os.path.exists(self.file_path):
+            return
+
+        read = _empty_columns()
+        chunk_size = POINT_STRUCT.size * READ_CHUNK_POINTS
+        with open(self.file_path, "rb") as file:
+            while True:
+                data = file.read(chunk_size)
+                # Un dernier point incomplet (écriture interrompue) est ignoré
+                self._read_points(data[: len(data) - len(data) % POINT_STRUCT.size], read)
+                if len(data) < chunk_size:
+                    break
+        self._merge(read)
+
+    def _read_points(self, data: bytes, read: Columns):
+        """Ajoute aux colonnes lues les points d'un bloc du fichier, dans l'ordre d'écriture"""
+        if np is None:
+            for key, day, rating, reviews in POINT_STRUCT.iter_unpack(data):
+                for column, value in zip(read, (self._index_of(key), day, rating, reviews)):
+                    column.append(value)
+            return
+
+        points = np.frombuffer(data, dtype=np.dtype([("cle", "V16"), ("jour", "<u4"), ("note", "<f4"), ("avis", "<i4")]))
+        keys, inverse = np.unique(points["cle"], return_inverse=True)
+        indexes = np.array([self._index_of(bytes(key)) for key in keys], dtype=np.int64)[inverse.ravel()]
+        for column, values in zip(read, (indexes, points["jour"], points["note"], points["avis"])):
+            column.extend(_as_array(column.typecode, values))
+
+    def _merge(self, added: Columns):
+        """Trie les colonnes complétées des points ajoutés, en ne gardant que le dernier point de chaque jour"""
+        columns = tuple(current + new for current, new in zip(self._columns, added))
+        count = len(columns[0])
+        if np is not None:
+            keys, days = (np.frombuffer(column, dtype=column.typecode) for column in columns[:2])
+            # Tri stable: à entreprise et jour égaux, le dernier point écrit reste le dernier
+            order = np.lexsort((days, keys))
+            last = np.ones(count, dtype=bool)
+            last[:-1] = (keys[order][1:] != keys[order][:-1]) | (days[order][1:] != days[order][:-1])
+            kept = order[last]
+            self._columns = tuple(
+                _as_array(column.typecode, np.frombuffer(column, dtype=column.typecode)[kept]) for column in columns
+            )
+            kept_keys = np.frombuffer(self._columns[0], dtype=self._columns[0].typecode)
+            self._offsets = _as_array("Q", np.searchsorted(kept_keys, np.arange(len(self._keys) + 1)))
+            return
+
+        keys, days = columns[:2]
+        order = sorted(range(count), key=lambda position: (keys[position], days[position]))
+        kept = [
+            position
+            for rank, position in enumerate(order)
+            if rank + 1 == count or (keys[order[rank + 1]], days[order[rank + 1]]) != (keys[position], days[position])
+        ]
+        self._columns = tuple(array(column.typecode, (column[position] for position in kept)) for column in columns)
+        self._offsets = array("Q", (bisect_left(self._columns[0], index) for index in range(len(self._keys) + 1)))
+
+    def _flush(self):
+        """Charge le fichier et fusionne les points en attente dans les colonnes triées"""
+        self._load()
+        if not self._pending:
+            return
+        added = _empty_columns()
+        for (index, day), (rating, reviews) in self._pending.items():
+            for column, value in zip(added, (index, day, rating, reviews)):
+                column.append(value)
+        self._pending = {}
+        self._merge(added)
+
+    def _known_point(self, index: int, day: int) -> Optional[Tuple[float, int]]:
+        """Point déjà connu d'une entreprise pour un jour (en attente ou dans les colonnes triées)"""
+        point = self._pending.get((index, day))
+        if point is not None or index + 1 >= len(self._offsets):
+            return point
+        _, days, ratings, review_counts = self._columns
+        position = bisect_left(days, day, self._offsets[index], self._offsets[index + 1])
+        if position < self._offsets[index + 1] and days[position] == day:
+            return ratings[position], review_counts[position]
+        return None
+
+    def _store(self, key: bytes, day: int, rating: float, reviews: int) -> bool:
+        """Range un point en attente; retourne False s'il est identique au point déjà connu pour ce jour"""
+        index = self._index_of(key)
+        known = self._known_point(index, day)
+        if known is not None and _same_value(known[0], rating) and known[1] == reviews:
+            return False
+        self._pending[(index, day)] = (rating, reviews)
+        return True
+
+    def append(self, points: Iterable[Tuple[bytes, int, float, int]]) -> int:
+        """
+        Ajoute des points (empreinte, jour ordinal, note, nombre d'avis) au fichier
+
+        Les points identiques à ceux déjà enregistrés pour le même jour sont ignorés.
+
+        Returns:
+            Nombre de points écrits
+        """
+        self._load()
+        # Arrondi à la précision float32 du fichier pour comparer avec les points déjà chargés
+        packed = [
+            POINT_STRUCT.pack(key, day, rating, reviews)
+            for key, day, rating, reviews in points
+            if self._store(key, day, array("f", [rating])[0], reviews)
+        ]
+        if packed:
+            with open(self.file_path, "ab") as file:
+                file.write(b"".join(packed))
+                file.flush()
+                os.fsync(file.fileno())
+        return len(packed)
+
+    def record_history(self, records: Iterable[Dict], day: Optional[str] = None) -> int:
+        """
+        Ajoute un point pour chaque entreprise active d'un historique
+
+        Args:
+            records: Enregistrements au format de maj_historique.py
+            day: Ne garde que les entreprises vérifiées ce jour (AAAA-MM-JJ); sinon chaque entreprise
+                 est datée par sa colonne Date_verification (import d'anciennes copies de l'historique)
+
+        Returns:
+            Nombre de points écrits
+        """
+
+        def points():
+            for record in records:
+                verification = (record.get("Date_verification") or "").strip()
+                if record.get("Actif", "Oui") != "Oui" or not verification or (day and verification != day):
+                    continue
+                yield (
+                    record_identity_digest(record),
+                    parse_day(verification),
+                    parse_rating(record.get("Note")),
+                    parse_review_count(record.get("Nombre_avis")),
+                )
+
+        return self.append(points())
+
+    def series(self, key: bytes) -> Optional[Series]:
+        """Retourne les tableaux (jours ordinaux, notes, nombres d'avis) d'une entreprise"""
+        self._flush()
+        index = self._key_index.get(key)
+        if index is None:
+            return None
+        start, end = self._offsets[index], self._offsets[index + 1]
+        _, days, ratings, review_counts = self._columns
+        return days[start:end], ratings[start:end], review_counts[start:end]
+
+    def point_count(self) -> int:
+        """Nombre total de points en mémoire"""
+        self._flush()
+        return len(self._columns[0])
+
+    def __len__(self) -> int:
+        self._load()
+        return len(self._keys)
+
+    def review_growth(self, days: int = DEFAULT_WINDOW_DAYS, as_of: Optional[date] = None) -> Dict[bytes, int]:
+        """
+        Croissance du nombre d'avis sur une fenêtre glissante
+
+        La valeur de départ est le dernier nombre d'avis connu au début de la fenêtre (ou le premier
+        relevé dans la fenêtre), la valeur d'arrivée le dernier connu à la date as_of; les relevés
+        sans nombre d'avis sont ignorés.
+
+        Args:
+            days: Taille de la fenêtre en jours
+            as_of: Date de fin de la fenêtre (aujourd'hui par défaut)
+
+        Returns:
+            Dictionnaire empreinte -> croissance, pour les entreprises ayant au moins deux relevés utiles
+        """
+        self._flush()
+        end_day = (as_of or date.today()).toordinal()
+        if np is None:
+            return self._review_growth_bisect(end_day - days, end_day)
+
+        key_column, day_column, _, review_column = (np.frombuffer(column, dtype=column.typecode) for column in self._columns)
+        known = review_column != MISSING_REVIEWS
+        keys = key_column[known].astype(np.int64)
+        counts = review_column[known]
+        # Clé (entreprise, jour) sur 64 bits: triée comme les colonnes, une seule recherche vectorisée
+        # donne pour chaque entreprise le dernier relevé au début et à la fin de la fenêtre
+        combined = (keys << 32) | day_column[known]
+        present = np.unique(keys)
+        first = np.searchsorted(keys, present)
+        end = np.searchsorted(combined, (present << 32) | end_day, side="right") - 1
+        start = np.maximum(np.searchsorted(combined, (present << 32) | (end_day - days), side="right") - 1, first)
+        useful = (end >= first) & (start < end)
+        growth = counts[end[useful]].astype(np.int64) - counts[start[useful]]
+        return {self._keys[index]: value for index, value in zip(present[useful].tolist(), growth.tolist())}
+
+    def _review_growth_bisect(self, start_day: int, end_day: int) -> Dict[bytes, int]:
+        """review_growth sans NumPy: deux recherches dichotomiques par entreprise"""
+        _, day_column, _, review_column = self._columns
+        growth: Dict[bytes, int] = {}
+        for index, key in enumerate(self._keys):
+            low, high = self._offsets[index], self._offsets[index + 1]
+            end = bisect_right(day_column, end_day, low, high) - 1
+            while end >= low and review_column[end] == MISSING_REVIEWS:
+                end -= 1
+            start = bisect_right(day_column, start_day, low, high) - 1
+            while start >= low and review_column[start] == MISSING_REVIEWS:
+                start -= 1
+            if start < low:
+                # Aucun relevé avant la fenêtre: premier relevé connu
+                start = low
+                while start < end and review_column[start] == MISSING_REVIEWS:
+                    start += 1
+            if low <= start < end:
+                growth[key] = review_column[end] - review_column[start]
+        return growth
+
+    def rating_at(self, key: bytes, as_of: date) -> float:
+        """Dernière note connue d'une entreprise à une date (NaN si inconnue)"""
+        series = self.series(key)
+        if series is None:
+            return math.nan
+        position = bisect_right(series[0], as_of.toordinal()) - 1
+        return series[1][position] if position >= 0 else math.nan
+
+
+def load_business_names(historique_file: str) -> Dict[bytes, str]:
+    """Associe l'empreinte de chaque entreprise de l'historique à 'Nom (Ville)' pour l'affichage"""
+    with CsvReader(historique_file) as reader:
+        return {record_identity_digest(row): f"{row.get('Nom', '')} ({row.get('Ville', '')})" for row in reader.records()}
+
+
+def parse_business_key(value: str) -> bytes:
+    """Empreinte d'une entreprise désignée par 'Nom|Adresse|Ville|Metier' ou par son identifiant Places"""
+    if "|" not in value:
+        return place_id_digest(value)
+    parts = value.split("|")
+    if len(parts) != 4:
+        raise ValueError("--entreprise attend 'Nom|Adresse|Ville|Metier' ou un identifiant Places")
+    return digest_key(build_composite_key(*parts))
+
+
+def format_point(day: int, rating: float, reviews: int) -> str:
+    """Décrit un point sur une ligne"""
+    note = "-" if math.isnan(rating) else f"{rating:.1f}"
+    avis = "-" if reviews == MISSING_REVIEWS else str(reviews)
+    return f"{date.fromordinal(day).isoformat()}  note {note:>4}  avis {avis:>6}"
+
+
+def run_import(store: SeriesMetriques, args):
+    """Commande importer: ajoute les points d'anciennes copies de l'historique"""
+    written = 0
+    for historique_file in args.historique_files:
+        with CsvReader(historique_file) as reader:
+            written += store.record_history(reader.records())
+    print(f"✅ {written} point(s) ajouté(s) ({len(store)} entreprises, {store.point_count()} points)")
+
+
+def run_growth(store: SeriesMetriques, args):
+    """Commande croissance: classe les entreprises par croissance du nombre d'avis"""
+    as_of = datetime.strptime(args.date, "%Y-%m-%d").date() if args.date else date.today()
+    growth = store.review_growth(args.jours, as_of)
+    names = load_business_names(args.historique) if args.historique else {}
+    print(f"📈 Croissance du nombre d'avis du {as_of - timedelta(days=args.jours)} au {as_of}")
+    ranking: List[Tuple[bytes, int]] = sorted(growth.items(), key=lambda item: item[1], reverse=True)
+    for key, value in ranking[: args.top]:
+        print(f"   {value:+6d}  {names.get(key, key.hex())}")
+
+
+def run_series(store: SeriesMetriques, args):
+    """Commande serie: affiche la série d'une entreprise"""
+    series = store.series(parse_business_key(args.entreprise))
+    if series is None:
+        print("Aucun point enregistré pour cette entreprise")
+        return
+    for day, rating, reviews in zip(*series):
+        print(format_point(day, rating, reviews))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Séries temporelles de la note et du nombre d'avis des entreprises",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemples d'utilisation:
+  python series_metriques.py importer series.bin historique_24_10.csv historique_24_11.csv
+  python series_metriques.py croissance series.bin --jours 90 --historique historique.csv --top 20
+  python series_metriques.py serie series.bin --entreprise "Nom|Adresse|Ville|Metier"
+  python series_metriques.py serie series.bin --entreprise ChIJN1t_tDeuEmsRUsoyG83frY4
+        """,
+    )
+    subparsers = parser.add_subparsers(dest="commande", required=True)
+
+    import_parser = subparsers.add_parser("importer", help="Ajoute les points d'anciennes copies de l'historique")
+    import_parser.add_argument("series_file", help="Fichier des séries (créé si absent)")
+    import_parser.add_argument("historique_files", nargs="+", help="Fichiers CSV historique (datés par Date_verification)")
+    import_parser.set_defaults(run=run_import)
+
+    growth_parser = subparsers.add_parser("croissance", help="Classe les entreprises par croissance du nombre d'avis")
+    growth_parser.add_argument("series_file", help="Fichier des séries")
+    growth_parser.add_argument(
+        "--jours", type=int, default=DEFAULT_WINDOW_DAYS, help=f"Taille de la fenêtre (défaut: {DEFAULT_WINDOW_DAYS})"
+    )
+    growth_parser.add_argument("--date", help="Fin de la fenêtre AAAA-MM-JJ (défaut: aujourd'hui)")
+    growth_parser.add_argument("--historique", help="Historique CSV pour afficher le nom des entreprises")
+    growth_parser.add_argument("--top", type=int, default=20, help="Nombre d'entreprises affichées (défaut: 20)")
+    growth_parser.set_defaults(run=run_growth)
+
+    series_parser = subparsers.add_parser("serie", help="Affiche la série d'une entreprise")
+    series_parser.add_argument("series_file", help="Fichier des séries")
+    series_parser.add_argument(
+        "--entreprise", required=True, help="Entreprise: 'Nom|Adresse|Ville|Metier' ou identifiant Places (Place_id)"
+    )
+    series_parser.set_defaults(run=run_series)
+
+    args = parser.parse_args()
+
+    try:
+        args.run(SeriesMetriques(args.series_file), args)
+    except FileNotFoundError as e:
+        print(f"Erreur: {e}")
+        sys.exit(1)
+    except ValueError as e:
+        print(f"Erreur: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,9 +6,63 @@ Supprime les lignes dupliquées basées sur les colonnes: Nom, Adresse, Ville, M
 
 import argparse
 import csv
-import hashlib
+import heapq
+import os
+import random
+import re
 import sys
-from typing import Dict, List, Set, Tuple
+import tempfile
+import unicodedata
+import zlib
+from array import array
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from cles_compactes import CompactKeySet, build_composite_key, digest_key, record_digest
+from fichiers_csv import BUSINESS_COLUMNS, METIER_COLUMNS, CsvReader, CsvSchema, CsvWriter, detect_compression, read_schema
+from historique_colonnaire import is_columnar, open_reader
+from tri_externe import DEFAULT_MAX_ROWS_IN_MEMORY, column_sort_key, external_sort
+
+# Colonnes lues par l'analyse des doublons (seules colonnes chargées depuis un historique colonnaire)
+DEDUPE_COLUMNS = BUSINESS_COLUMNS + METIER_COLUMNS
+
+# Abréviations courantes des types de voie, développées avant la comparaison floue
+STREET_ABBREVIATIONS = {
+    "all": "allee",
+    "av": "avenue",
+    "ave": "avenue",
+    "bd": "boulevard",
+    "bld": "boulevard",
+    "blvd": "boulevard",
+    "ch": "chemin",
+    "chem": "chemin",
+    "crs": "cours",
+    "fbg": "faubourg",
+    "imp": "impasse",
+    "pl": "place",
+    "qu": "quai",
+    "r": "rue",
+    "rte": "route",
+    "sq": "square",
+    "st": "saint",
+    "ste": "sainte",
+}
+
+# Paramètres MinHash (nombre premier de Mersenne 2^61 - 1 pour les permutations universelles)
+MINHASH_PRIME = (1 << 61) - 1
+MINHASH_MAX_HASH = (1 << 32) - 1
+DEFAULT_NUM_PERM = 64
+SHINGLE_SIZE = 3
+FUZZY_REPORT_LIMIT = 10
+
+# Estimations utilisées pour dimensionner les partitions du mode mémoire limitée
+ESTIMATED_BYTES_PER_ROW = 100
+BYTES_PER_SEEN_HASH = 70  # CompactKeySet 128 bits, pendant un agrandissement de la table
+ESTIMATED_BYTES_PER_SORTED_ROW = 1024  # Ligne CSV (liste de chaînes) gardée en mémoire pendant le tri
+MAX_BUCKETS = 512  # Nombre de fichiers temporaires ouverts simultanément
 
 
 def normalize_text(text: str) -> str:
@@ -24,7 +78,7 @@ def normalize_text(text: str) -> str:
     return text.strip().lower().replace("  ", " ")
 
 
-def create_record_hash(record: Dict[str, str]) -> str:
+def create_record_hash(record: Dict[str, str]) -> bytes:
     """
     Crée un hash unique pour un enregistrement basé sur les champs clés
 
@@ -32,128 +86,684 @@ def create_record_hash(record: Dict[str, str]) -> str:
         record: Dictionnaire contenant les données d'une ligne
 
     Returns:
-        Hash MD5 de l'enregistrement normalisé
+        Empreinte binaire blake2b (128 bits) de la clé composite normalisée nom|adresse|ville|métier
     """
-    # Normalisation des champs clés
-    nom = normalize_text(record.get("Nom", ""))
-    adresse = normalize_text(record.get("Adresse", ""))
-    ville = normalize_text(record.get("Ville", ""))
-    metier = normalize_text(record.get("Metier_normalise", record.get("Metier", "")))
+    return record_digest(record)
 
-    # Création d'une clé composite
-    composite_key = f"{nom}|{adresse}|{ville}|{metier}"
 
-    # Génération du hash
-    return hashlib.md5(composite_key.encode("utf-8")).hexdigest()
+def row_hash_function(schema: CsvSchema) -> Callable[[Sequence[str]], bytes]:
+    """
+    Fonction de hash des lignes d'un fichier (listes de valeurs), équivalente à create_record_hash
+
+    Les colonnes de la clé sont repérées une fois par leur index; une colonne absente compte comme vide.
+    """
+    key_values = schema.projection(BUSINESS_COLUMNS + (schema.metier_column() or "Metier",))
+    return lambda row: digest_key(build_composite_key(*key_values(row)))
 
 
 def are_similar_records(record1: Dict[str, str], record2: Dict[str, str], similarity_threshold: float = 0.9) -> bool:
     """
-    Vérifie si deux enregistrements sont similaires (optionnel pour détection avancée)
+    Vérifie si deux enregistrements sont similaires: même clé composite, ou même bloc (code postal + métier)
+    et similarité floue (voir fuzzy_similarity) au moins égale au seuil
 
     Args:
         record1: Premier enregistrement
         record2: Deuxième enregistrement
-        similarity_threshold: Seuil de similarité (non utilisé dans cette version simple)
+        similarity_threshold: Seuil de similarité (0 à 1), comme la valeur de --fuzzy
 
     Returns:
         True si les enregistrements sont considérés comme des doublons
     """
-    # Pour cette version, on utilise une correspondance exacte après normalisation
-    return create_record_hash(record1) == create_record_hash(record2)
+    if create_record_hash(record1) == create_record_hash(record2):
+        return True
+
+    # Comparaison floue uniquement au sein d'un même bloc (code postal + métier)
+    block1, nom1, voie1, numbers1 = create_fuzzy_fields(record1)
+    block2, nom2, voie2, numbers2 = create_fuzzy_fields(record2)
+    if block1 != block2:
+        return False
+
+    similarity = fuzzy_similarity(prepare_fuzzy_shingles(nom1, voie1, numbers1), prepare_fuzzy_shingles(nom2, voie2, numbers2))
+    return similarity >= similarity_threshold
+
+
+def normalize_for_fuzzy(text: str) -> str:
+    """
+    Normalise le texte pour la détection floue des doublons
+
+    Args:
+        text: Texte à normaliser
+
+    Returns:
+        Texte sans accents ni ponctuation, abréviations de voie développées
+    """
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    tokens = re.sub(r"[^a-z0-9]+", " ", text).split()
+    return " ".join(STREET_ABBREVIATIONS.get(token, token) for token in tokens)
+
+
+def extract_postal_code(adresse: str) -> str:
+    """
+    Extrait le code postal (5 chiffres) d'une adresse
+
+    Args:
+        adresse: Adresse complète (ex: "12 rue de la Paix, 75001 Paris, France")
+
+    Returns:
+        Code postal trouvé ou chaîne vide
+    """
+    codes = re.findall(r"\b\d{5}\b", adresse)
+    return codes[-1] if codes else ""
+
+
+def create_fuzzy_fields(record: Dict[str, str]) -> Tuple[str, str, str, str]:
+    """
+    Prépare les champs utilisés par la détection floue
+
+    Args:
+        record: Dictionnaire contenant les données d'une ligne
+
+    Returns:
+        Tuple (clé de bloc, nom normalisé, voie normalisée, numéros de voie)
+    """
+    adresse = record.get("Adresse", "")
+    metier = normalize_text(record.get("Metier_normalise", record.get("Metier", "")))
+    postal_code = extract_postal_code(adresse)
+
+    # Bloc: code postal (ou ville à défaut) + métier
+    block_key = f"{postal_code or normalize_for_fuzzy(record.get('Ville', ''))}|{metier}"
+
+    # Le code postal, la ville et le pays sont communs à tout le bloc: on ne garde que la voie
+    voie = normalize_for_fuzzy(adresse.split(",")[0]) if adresse else ""
+    street_numbers = " ".join(token for token in voie.split() if token.isdigit())
+
+    return block_key, normalize_for_fuzzy(record.get("Nom", "")), voie, street_numbers
+
+
+def create_shingles(nom: str, voie: str, size: int = SHINGLE_SIZE) -> Set[str]:
+    """
+    Découpe le nom et la voie en n-grammes de caractères (shingles)
+
+    Args:
+        nom: Nom normalisé
+        voie: Voie normalisée
+        size: Taille des n-grammes
+
+    Returns:
+        Ensemble de shingles préfixés par leur champ d'origine
+    """
+    shingles = set()
+    for prefix, text in (("n", nom), ("a", voie)):
+        padded = f" {text} "
+        if len(padded) <= size:
+            shingles.add(f"{prefix}:{padded}")
+        for i in range(len(padded) - size + 1):
+            shingles.add(f"{prefix}:{padded[i:i + size]}")
+    return shingles
+
+
+def jaccard(set1: Set[str], set2: Set[str]) -> float:
+    """Similarité de Jaccard entre deux ensembles"""
+    if not set1 and not set2:
+        return 1.0
+    return len(set1 & set2) / len(set1 | set2)
+
+
+def prepare_fuzzy_shingles(nom: str, voie: str, street_numbers: str) -> Tuple[Set[str], Set[str], str]:
+    """Prépare les shingles du nom et de la voie pour la comparaison floue"""
+    return create_shingles(nom, ""), create_shingles("", voie), street_numbers
+
+
+def fuzzy_similarity(prepared1: Tuple[Set[str], Set[str], str], prepared2: Tuple[Set[str], Set[str], str]) -> float:
+    """
+    Calcule la similarité entre deux enregistrements d'un même bloc
+
+    Args:
+        prepared1: Shingles du nom, de la voie et numéros de voie (voir prepare_fuzzy_shingles)
+        prepared2: Idem pour le second enregistrement
+
+    Returns:
+        Minimum des similarités de Jaccard du nom et de la voie (0 si numéros de voie différents)
+    """
+    name1, street1, numbers1 = prepared1
+    name2, street2, numbers2 = prepared2
+
+    # Deux numéros de voie différents désignent deux établissements distincts
+    if numbers1 and numbers2 and numbers1 != numbers2:
+        return 0.0
+
+    return min(jaccard(name1, name2), jaccard(street1, street2))
+
+
+@lru_cache(maxsize=None)
+def minhash_permutations(num_perm: int, seed: int = 1) -> Tuple[Tuple[int, int], ...]:
+    """Génère les coefficients (a, b) des permutations universelles de MinHash"""
+    rng = random.Random(seed)
+    return tuple((rng.randint(1, MINHASH_PRIME - 1), rng.randint(0, MINHASH_PRIME - 1)) for _ in range(num_perm))
+
+
+@lru_cache(maxsize=1 << 16)
+def permuted_shingle_hashes(shingle: str, num_perm: int) -> array:
+    """
+    Applique toutes les permutations MinHash au hash d'un shingle
+
+    Les trigrammes se répètent énormément d'un enregistrement à l'autre: le cache évite
+    de recalculer les permutations, la signature se réduit alors à des minimums colonne par colonne.
+    """
+    h = zlib.crc32(shingle.encode("utf-8"))
+    return array("L", (((a * h + b) % MINHASH_PRIME) & MINHASH_MAX_HASH for a, b in minhash_permutations(num_perm)))
+
+
+def compute_minhash(shingles: Set[str], num_perm: int = DEFAULT_NUM_PERM) -> Tuple[int, ...]:
+    """
+    Calcule la signature MinHash d'un ensemble de shingles
+
+    Args:
+        shingles: Ensemble de shingles
+        num_perm: Nombre de permutations (longueur de la signature)
+
+    Returns:
+        Signature MinHash
+    """
+    if not shingles:
+        return (MINHASH_MAX_HASH,) * num_perm
+    return tuple(map(min, zip(*(permuted_shingle_hashes(shingle, num_perm) for shingle in shingles))))
+
+
+@lru_cache(maxsize=None)
+def choose_lsh_bands(threshold: float, num_perm: int = DEFAULT_NUM_PERM) -> Tuple[int, int]:
+    """
+    Choisit le découpage LSH (bandes, lignes par bande) adapté au seuil
+
+    Minimise la somme des probabilités de faux positifs et de faux négatifs
+    (intégrées numériquement) pour b * r <= num_perm.
+
+    Args:
+        threshold: Seuil de similarité de Jaccard
+        num_perm: Nombre de permutations MinHash
+
+    Returns:
+        Tuple (bandes, lignes_par_bande)
+    """
+
+    def integrate(function, start: float, end: float, steps: int = 100) -> float:
+        width = (end - start) / steps
+        return sum(function(start + (i + 0.5) * width) for i in range(steps)) * width
+
+    best = (1, num_perm)
+    best_error = float("inf")
+    for bands in range(1, num_perm + 1):
+        for rows in range(1, num_perm // bands + 1):
+            false_positive = integrate(lambda s: 1 - (1 - s**rows) ** bands, 0.0, threshold)
+            false_negative = integrate(lambda s: (1 - s**rows) ** bands, threshold, 1.0)
+            if false_positive + false_negative < best_error:
+                best_error = false_positive + false_negative
+                best = (bands, rows)
+    return best
+
+
+def block_fuzzy_records(records: Iterable[Dict[str, str]]) -> Dict[str, List[Tuple[int, str, str, str]]]:
+    """Répartit les enregistrements par bloc (code postal ou ville, et métier): (index, nom, voie, numéros)"""
+    blocks: Dict[str, List[Tuple[int, str, str, str]]] = {}
+    for index, record in enumerate(records):
+        block_key, nom, voie, street_numbers = create_fuzzy_fields(record)
+        blocks.setdefault(block_key, []).append((index, nom, voie, street_numbers))
+    return blocks
+
+
+def lsh_candidate_pairs(
+    prepared: List[Tuple[Set[str], Set[str], str]], num_perm: int, bands: int, rows: int
+) -> Iterator[Tuple[int, int]]:
+    """
+    Paires candidates d'un bloc par LSH: positions dont les signatures MinHash partagent au moins une bande
+
+    Chaque paire n'est produite qu'une fois, dans l'ordre des positions.
+    """
+    buckets: Dict[Tuple[int, Tuple[int, ...]], List[int]] = {}
+    for position, (name_shingles, street_shingles, _) in enumerate(prepared):
+        signature = compute_minhash(name_shingles | street_shingles, num_perm)
+        for band in range(bands):
+            band_key = (band, signature[band * rows : (band + 1) * rows])
+            buckets.setdefault(band_key, []).append(position)
+
+    checked: Set[Tuple[int, int]] = set()
+    for positions in buckets.values():
+        for i, first in enumerate(positions):
+            for second in positions[i + 1 :]:
+                if (first, second) not in checked:
+                    checked.add((first, second))
+                    yield first, second
+
+
+def find_fuzzy_clusters(
+    records: Iterable[Dict[str, str]], threshold: float, num_perm: int = DEFAULT_NUM_PERM
+) -> List[List[int]]:
+    """
+    Regroupe les quasi-doublons par blocage puis MinHash/LSH
+
+    1. Blocage par code postal (ou ville) et métier
+    2. Dans chaque bloc, signatures MinHash des shingles nom + voie
+    3. LSH par bandes pour obtenir les paires candidates en temps sous-quadratique
+    4. Vérification des paires candidates, puis regroupement (union-find)
+
+    Args:
+        records: Enregistrements à analyser (itérable, parcouru une seule fois)
+        threshold: Seuil de similarité (0 à 1)
+        num_perm: Nombre de permutations MinHash
+
+    Returns:
+        Liste des groupes de quasi-doublons (indices des enregistrements, 0-based, triés)
+    """
+    blocks = block_fuzzy_records(records)
+    bands, rows = choose_lsh_bands(threshold, num_perm)
+    parents: Dict[int, int] = {}
+
+    def find(index: int) -> int:
+        root = parents.setdefault(index, index)
+        while root != parents[root]:
+            root = parents[root]
+        while index != root:
+            parents[index], index = root, parents[index]
+        return root
+
+    for members in blocks.values():
+        # Un bloc d'un seul enregistrement ne peut pas contenir de doublon
+        if len(members) < 2:
+            continue
+
+        prepared = [prepare_fuzzy_shingles(nom, voie, street_numbers) for _, nom, voie, street_numbers in members]
+        for first, second in lsh_candidate_pairs(prepared, num_perm, bands, rows):
+            index1, index2 = members[first][0], members[second][0]
+            if find(index1) != find(index2) and fuzzy_similarity(prepared[first], prepared[second]) >= threshold:
+                parents[find(index2)] = find(index1)
+
+    clusters: Dict[int, List[int]] = {}
+    for index in parents:
+        clusters.setdefault(find(index), []).append(index)
+
+    return sorted((sorted(members) for members in clusters.values() if len(members) > 1), key=lambda group: group[0])
+
+
+def print_fuzzy_clusters(clusters: List[List[int]], records, limit: int = FUZZY_REPORT_LIMIT):
+    """
+    Affiche les groupes de quasi-doublons détectés
+
+    Args:
+        clusters: Groupes d'indices retournés par find_fuzzy_clusters
+        records: Enregistrements indexables par les indices des groupes (liste ou dictionnaire)
+        limit: Nombre maximum de groupes affichés
+    """
+    print(f"\n🧩 Groupes de quasi-doublons: {len(clusters)}")
+    for i, cluster in enumerate(clusters[:limit], 1):
+        print(f"   {i}. {len(cluster)} enregistrements:")
+        for index in cluster:
+            record = records[index]
+            print(f"      - {record.get('Nom', '')[:40]} | {record.get('Adresse', '')[:50]}")
+    if len(clusters) > limit:
+        print(f"   ... et {len(clusters) - limit} autre(s) groupe(s)")
+
+
+def validate_input_columns(input_fieldnames: Optional[Sequence[str]]) -> List[str]:
+    """
+    Vérifie que le fichier d'entrée contient les colonnes nécessaires à la détection de doublons
+
+    Args:
+        input_fieldnames: Colonnes lues dans l'en-tête du fichier
+
+    Returns:
+        Liste des colonnes d'entrée
+    """
+    if not input_fieldnames:
+        raise ValueError("Impossible de lire les colonnes du fichier d'entrée")
+
+    print(f"Colonnes détectées dans le fichier d'entrée: {input_fieldnames}")
+
+    # Vérification des colonnes requises pour la détection de doublons
+    schema = CsvSchema(input_fieldnames)
+    missing = schema.missing(BUSINESS_COLUMNS)
+    if missing:
+        print(f"Colonnes disponibles: {input_fieldnames}")
+        print(f"Colonnes minimales requises: {set(BUSINESS_COLUMNS)}")
+        raise ValueError(f"Colonnes manquantes: {set(missing)}")
+
+    # Vérifier qu'on a au moins une colonne métier
+    if schema.metier_column() is None:
+        raise ValueError("Aucune colonne 'Metier' ou 'Metier_normalise' trouvée")
+
+    return list(input_fieldnames)
+
+
+def iter_unique_records(
+    reader: Iterable[Any],
+    stats: Optional[Dict[str, int]] = None,
+    verbose: bool = False,
+    record_hash: Callable[[Any], bytes] = create_record_hash,
+    record_name: Callable[[Any], str] = lambda record: record.get("Nom", ""),
+) -> Iterator[Any]:
+    """
+    Parcourt les enregistrements en ne produisant que la première occurrence de chaque clé
+
+    Args:
+        reader: Enregistrements lus (dictionnaires, ou lignes de CsvReader avec record_hash et record_name adaptés)
+        stats: Compteurs "total" et "unique" mis à jour au fil de la lecture (optionnel)
+        verbose: Affichage détaillé des opérations
+        record_hash: Empreinte de la clé d'un enregistrement
+        record_name: Nom d'un enregistrement (affichage détaillé)
+
+    Yields:
+        Enregistrements uniques, dans l'ordre d'apparition
+    """
+    seen_hashes = CompactKeySet()
+    if stats is None:
+        stats = {"total": 0, "unique": 0}
+
+    for row_num, record in enumerate(reader, 1):
+        stats["total"] += 1
+
+        if seen_hashes.add(record_hash(record)):
+            # Nouvel enregistrement unique
+            stats["unique"] += 1
+            if verbose:
+                print(f"[{row_num}] Unique: {record_name(record)[:30]}...")
+            yield record
+        elif verbose:
+            # Doublon détecté
+            print(f"[{row_num}] Doublon supprimé: {record_name(record)[:30]}...")
+
+
+def filter_fuzzy_duplicates(
+    unique_records: Iterable[Dict[str, str]],
+    fuzzy_duplicates: Set[int],
+    wanted: Set[int],
+    cluster_records: Dict[int, Dict[str, str]],
+) -> Iterator[Dict[str, str]]:
+    """
+    Retire les quasi-doublons (indices parmi les enregistrements uniques) d'un flux
+
+    Args:
+        unique_records: Enregistrements uniques, dans l'ordre d'apparition
+        fuzzy_duplicates: Indices des enregistrements à retirer
+        wanted: Indices des enregistrements à conserver pour le rapport des groupes
+        cluster_records: Dictionnaire rempli avec les enregistrements demandés dans wanted
+
+    Yields:
+        Enregistrements conservés
+    """
+    for index, record in enumerate(unique_records):
+        if index in wanted:
+            cluster_records[index] = record
+        if index not in fuzzy_duplicates:
+            yield record
+
+
+def write_csv_rows(
+    output_file: str, fieldnames: List[str], rows: Iterable[List[str]]
+) -> Optional[Tuple[List[str], List[str]]]:
+    """
+    Écrit les lignes en flux dans un fichier temporaire renommé à la fin
+
+    Le renommage final permet d'utiliser le fichier d'entrée comme fichier de sortie.
 
+    Args:
+        output_file: Chemin du fichier CSV de sortie
+        fieldnames: Colonnes de l'en-tête
+        rows: Lignes à écrire (listes de valeurs)
 
-def remove_duplicates(input_file: str, output_file: str, verbose: bool = False, sort_by: str = None) -> Tuple[int, int]:
+    Returns:
+        Tuple (première ligne, dernière ligne) écrites, ou None si aucune ligne
+    """
+    first_row: Optional[List[str]] = None
+    last_row: Optional[List[str]] = None
+    temp_output = f"{output_file}.tmp"
+
+    try:
+        with CsvWriter(temp_output, fieldnames) as writer:
+            for row in rows:
+                writer.writerow(row)
+                if first_row is None:
+                    first_row = row
+                last_row = row
+        os.replace(temp_output, output_file)
+    finally:
+        if os.path.exists(temp_output):
+            os.unlink(temp_output)
+
+    if first_row is None or last_row is None:
+        return None
+    return first_row, last_row
+
+
+def resolve_sort_column(sort_by: Optional[str], input_fieldnames: List[str]) -> Optional[str]:
+    """Colonne de tri retenue: None (tri ignoré, avec un avertissement) si elle n'existe pas dans le fichier"""
+    if sort_by and sort_by not in input_fieldnames:
+        print(f"⚠️  Colonne '{sort_by}' non trouvée. Colonnes disponibles: {', '.join(input_fieldnames)}")
+        print("   Tri ignoré, suppression des doublons effectuée.")
+        return None
+    return sort_by
+
+
+def remove_duplicates(
+    input_file: str,
+    output_file: str,
+    verbose: bool = False,
+    sort_by: Optional[str] = None,
+    fuzzy_threshold: Optional[float] = None,
+    sort_buffer_rows: int = DEFAULT_MAX_ROWS_IN_MEMORY,
+    temp_dir: Optional[str] = None,
+) -> Tuple[int, int]:
     """
     Supprime les doublons d'un fichier CSV
 
+    Sans tri, chaque ligne est écrite dès qu'elle est reconnue comme unique: seules les
+    empreintes des clés restent en mémoire. Avec tri, un tri externe borne la mémoire
+    à sort_buffer_rows lignes.
+
     Args:
         input_file: Chemin du fichier CSV d'entrée
         output_file: Chemin du fichier CSV de sortie
         verbose: Affichage détaillé des opérations
         sort_by: Colonne sur laquelle trier (optionnel)
+        fuzzy_threshold: Seuil de similarité pour supprimer aussi les quasi-doublons (optionnel)
+        sort_buffer_rows: Nombre de lignes triées en mémoire avant écriture d'un segment temporaire
+        temp_dir: Dossier des fichiers temporaires (dossier système par défaut)
 
     Returns:
         Tuple (nombre_total, nombre_uniques)
     """
-    seen_hashes: Set[str] = set()
-    unique_records: List[Dict[str, str]] = []
-    total_records = 0
-    duplicate_records = 0
+    stats = {"total": 0, "unique": 0}
 
     try:
-        # Lecture du fichier d'entrée
-        with open(input_file, "r", encoding="utf-8") as file:
-            reader = csv.DictReader(file)
-
-            # Détection automatique des colonnes d'entrée
-            input_fieldnames = reader.fieldnames
-            if not input_fieldnames:
-                raise ValueError("Impossible de lire les colonnes du fichier d'entrée")
-
-            print(f"Colonnes détectées dans le fichier d'entrée: {input_fieldnames}")
-
-            # Vérification des colonnes requises pour la détection de doublons
-            required_base_columns = {"Nom", "Adresse", "Ville"}
-            if not required_base_columns.issubset(set(input_fieldnames)):
-                missing = required_base_columns - set(input_fieldnames)
-                print(f"Colonnes disponibles: {input_fieldnames}")
-                print(f"Colonnes minimales requises: {required_base_columns}")
-                raise ValueError(f"Colonnes manquantes: {missing}")
-
-            # Vérifier qu'on a au moins une colonne métier
-            has_metier = "Metier" in input_fieldnames
-            has_metier_normalise = "Metier_normalise" in input_fieldnames
-            if not (has_metier or has_metier_normalise):
-                raise ValueError("Aucune colonne 'Metier' ou 'Metier_normalise' trouvée")
-
-            for row_num, record in enumerate(reader, 1):
-                total_records += 1
+        # Détection automatique des colonnes d'entrée
+        schema = CsvSchema(validate_input_columns(read_schema(input_file).fieldnames))
+        input_fieldnames = schema.fieldnames
+        row_hash = row_hash_function(schema)
+        name_index = schema.index["Nom"]
 
-                # Création du hash pour ce record
-                record_hash = create_record_hash(record)
+        sort_by = resolve_sort_column(sort_by, input_fieldnames)
 
-                if record_hash not in seen_hashes:
-                    # Nouvel enregistrement unique
-                    seen_hashes.add(record_hash)
-                    unique_records.append(record)
+        # Détection des quasi-doublons (première lecture): seul le premier enregistrement de chaque groupe est conservé
+        fuzzy_duplicates: Set[int] = set()
+        if fuzzy_threshold is not None:
+            with CsvReader(input_file) as reader:
+                clusters = find_fuzzy_clusters(iter_unique_records(reader.records()), fuzzy_threshold)
+            fuzzy_duplicates = {index for cluster in clusters for index in cluster[1:]}
 
-                    if verbose:
-                        print(f"[{row_num}] Unique: {record.get('Nom', '')[:30]}...")
-                else:
-                    # Doublon détecté
-                    duplicate_records += 1
+        with CsvReader(input_file) as reader:
+            # Lignes en listes de valeurs: toutes les colonnes d'entrée, dans l'ordre du fichier
+            rows: Iterable[List[str]] = iter_unique_records(reader, stats, verbose, row_hash, lambda row: row[name_index])
 
-                    if verbose:
-                        print(f"[{row_num}] Doublon supprimé: {record.get('Nom', '')[:30]}...")
+            if fuzzy_threshold is not None:
+                wanted = {index for cluster in clusters[:FUZZY_REPORT_LIMIT] for index in cluster}
+                cluster_rows: Dict[int, List[str]] = {}
+                rows = filter_fuzzy_duplicates(rows, fuzzy_duplicates, wanted, cluster_rows)
 
-        # Tri des données si demandé
-        if sort_by:
-            if unique_records and sort_by in unique_records[0]:
+            # Tri externe si demandé (mémoire bornée, clé typée: numérique si la valeur est un nombre)
+            if sort_by:
                 if verbose:
                     print(f"📊 Tri des données par '{sort_by}'...")
-                unique_records = sorted(unique_records, key=lambda x: x.get(sort_by, "").lower())
-                if verbose:
-                    print(f"   Premier: {unique_records[0].get(sort_by, '')}")
-                    print(f"   Dernier: {unique_records[-1].get(sort_by, '')}")
-            else:
-                available_columns = list(unique_records[0].keys()) if unique_records else []
-                print(f"⚠️  Colonne '{sort_by}' non trouvée. Colonnes disponibles: {', '.join(available_columns)}")
-                print("   Tri ignoré, suppression des doublons effectuée.")
+                rows = external_sort(rows, column_sort_key(input_fieldnames.index(sort_by)), sort_buffer_rows, temp_dir)
+
+            written = write_csv_rows(output_file, input_fieldnames, rows)
 
-        # Écriture du fichier de sortie avec toutes les colonnes détectées
-        output_fieldnames = input_fieldnames  # Conserver toutes les colonnes d'entrée
+        if fuzzy_threshold is not None:
+            cluster_records = {index: schema.record(row) for index, row in cluster_rows.items()}
+            print_fuzzy_clusters(clusters, cluster_records, FUZZY_REPORT_LIMIT)
 
-        with open(output_file, "w", newline="", encoding="utf-8") as file:
-            writer = csv.DictWriter(file, fieldnames=output_fieldnames)
-            writer.writeheader()
+        if sort_by and verbose and written:
+            sort_index = input_fieldnames.index(sort_by)
+            print(f"   Premier: {written[0][sort_index]}")
+            print(f"   Dernier: {written[1][sort_index]}")
 
-            for record in unique_records:
-                # Créer un enregistrement avec toutes les colonnes présentes
-                clean_record = {col: record.get(col, "") for col in output_fieldnames}
-                writer.writerow(clean_record)
+        return stats["total"], stats["unique"] - len(fuzzy_duplicates)
 
-        return total_records, len(unique_records)
+    except FileNotFoundError:
+        print(f"Erreur: Fichier d'entrée '{input_file}' non trouvé")
+        sys.exit(1)
+    except Exception as e:
+        print(f"Erreur lors du traitement: {e}")
+        sys.exit(1)
+
+
+def estimate_bucket_count(input_file: str, memory_limit_mb: int, jobs: int = 1) -> int:
+    """
+    Estime le nombre de partitions nécessaires pour respecter la limite mémoire
+
+    Chaque partition est dédoublonnée avec un ensemble de hash en mémoire; avec plusieurs
+    processus, autant de partitions sont traitées simultanément.
+
+    Args:
+        input_file: Chemin du fichier CSV d'entrée
+        memory_limit_mb: Mémoire maximale (en Mo)
+        jobs: Nombre de partitions traitées en parallèle
+
+    Returns:
+        Nombre de partitions (au moins 1)
+    """
+    file_size = os.path.getsize(input_file)
+    estimated_rows = file_size // ESTIMATED_BYTES_PER_ROW + 1
+    needed_bytes = estimated_rows * BYTES_PER_SEEN_HASH * max(1, jobs)
+    return min(MAX_BUCKETS, max(1, -(-needed_bytes // (memory_limit_mb * 1024 * 1024))))
+
+
+def dedupe_bucket(bucket_path: str, unique_path: str) -> Tuple[int, int]:
+    """
+    Dédoublonne une partition (les lignes y sont déjà dans l'ordre d'apparition)
+
+    Args:
+        bucket_path: Fichier de partition (index, hash, colonnes...)
+        unique_path: Fichier des lignes uniques de la partition (même format)
+
+    Returns:
+        Tuple (lignes_lues, lignes_uniques)
+    """
+    seen_hashes = CompactKeySet()
+    total_rows = 0
+    unique_rows = 0
+
+    with open(bucket_path, "r", newline="", encoding="utf-8") as bucket_file:
+        with open(unique_path, "w", newline="", encoding="utf-8") as unique_file:
+            writer = csv.writer(unique_file)
+            for row in csv.reader(bucket_file):
+                total_rows += 1
+                if seen_hashes.add(bytes.fromhex(row[1])):
+                    writer.writerow(row)
+                    unique_rows += 1
+
+    os.unlink(bucket_path)
+    return total_rows, unique_rows
+
+
+def partition_rows(rows: Iterable[List[str]], bucket_paths: List[str], row_hash: Callable[[List[str]], bytes]) -> int:
+    """
+    Écrit chaque ligne, précédée de son numéro et de son hash, dans la partition choisie par le préfixe du hash
+
+    Returns:
+        Nombre de lignes lues
+    """
+    total_rows = 0
+    with ExitStack() as stack:
+        bucket_writers = [
+            csv.writer(stack.enter_context(open(path, "w", newline="", encoding="utf-8"))) for path in bucket_paths
+        ]
+        for row_num, row in enumerate(rows):
+            total_rows += 1
+            record_hash = row_hash(row)
+            bucket = int.from_bytes(record_hash[:4], "big") % len(bucket_paths)
+            bucket_writers[bucket].writerow([row_num, record_hash.hex()] + row)
+    return total_rows
+
+
+def remove_duplicates_external(
+    input_file: str,
+    output_file: str,
+    memory_limit_mb: int,
+    jobs: int = 1,
+    verbose: bool = False,
+    temp_dir: Optional[str] = None,
+    sort_by: Optional[str] = None,
+) -> Tuple[int, int]:
+    """
+    Supprime les doublons d'un fichier plus grand que la mémoire disponible
+
+    1. Partitionnement: chaque ligne est écrite dans une partition temporaire choisie
+       par le préfixe de son hash, avec son numéro de ligne
+    2. Dédoublonnage indépendant de chaque partition (éventuellement en parallèle)
+    3. Fusion des partitions par numéro de ligne pour conserver l'ordre d'apparition,
+       suivie d'un tri externe si une colonne de tri est demandée
+
+    Args:
+        input_file: Chemin du fichier CSV d'entrée
+        output_file: Chemin du fichier CSV de sortie
+        memory_limit_mb: Mémoire maximale (en Mo) utilisée pour le dédoublonnage
+        jobs: Nombre de partitions dédoublonnées en parallèle
+        verbose: Affichage détaillé des opérations
+        temp_dir: Dossier des fichiers temporaires (dossier système par défaut)
+        sort_by: Colonne sur laquelle trier (optionnel)
+
+    Returns:
+        Tuple (nombre_total, nombre_uniques)
+    """
+    try:
+        bucket_count = estimate_bucket_count(input_file, memory_limit_mb, jobs)
+        print(f"💾 Mode mémoire limitée: {memory_limit_mb} Mo, {bucket_count} partition(s), {jobs} processus")
+
+        with tempfile.TemporaryDirectory(prefix="doublons_", dir=temp_dir) as work_dir:
+            bucket_paths = [os.path.join(work_dir, f"partition_{i}.csv") for i in range(bucket_count)]
+            unique_paths = [os.path.join(work_dir, f"partition_{i}_uniques.csv") for i in range(bucket_count)]
+
+            # 1. Partitionnement par préfixe de hash
+            with CsvReader(input_file) as reader:
+                input_fieldnames = validate_input_columns(reader.fieldnames)
+                row_hash = row_hash_function(reader.schema)
+                sort_by = resolve_sort_column(sort_by, input_fieldnames)
+                total_records = partition_rows(reader, bucket_paths, row_hash)
+
+            # 2. Dédoublonnage de chaque partition
+            if jobs > 1:
+                with ProcessPoolExecutor(max_workers=jobs) as executor:
+                    results = list(executor.map(dedupe_bucket, bucket_paths, unique_paths))
+            else:
+                results = [dedupe_bucket(bucket, unique) for bucket, unique in zip(bucket_paths, unique_paths)]
+
+            if verbose:
+                for i, (bucket_rows, bucket_unique) in enumerate(results):
+                    print(f"   Partition {i}: {bucket_rows} lignes, {bucket_rows - bucket_unique} doublon(s)")
+
+            # 3. Fusion dans l'ordre d'apparition (puis tri externe éventuel)
+            unique_count = sum(bucket_unique for _, bucket_unique in results)
+            with ExitStack() as stack:
+                readers = [
+                    csv.reader(stack.enter_context(open(path, "r", newline="", encoding="utf-8"))) for path in unique_paths
+                ]
+                rows: Iterable[List[str]] = (row[2:] for row in heapq.merge(*readers, key=lambda row: int(row[0])))
+                if sort_by:
+                    sort_buffer_rows = max(1, memory_limit_mb * 1024 * 1024 // ESTIMATED_BYTES_PER_SORTED_ROW)
+                    sort_key = column_sort_key(input_fieldnames.index(sort_by))
+                    rows = external_sort(rows, sort_key, sort_buffer_rows, work_dir)
+                write_csv_rows(output_file, input_fieldnames, rows)
+
+        return total_records, unique_count
 
     except FileNotFoundError:
         print(f"Erreur: Fichier d'entrée '{input_file}' non trouvé")
@@ -163,30 +773,32 @@ def remove_duplicates(input_file: str, output_file: str, verbose: bool = False,
         sys.exit(1)
 
 
-def analyze_duplicates(input_file: str):
+def analyze_duplicates(input_file: str, fuzzy_threshold: Optional[float] = None):
     """
     Analyse les doublons sans les supprimer (mode analyse)
 
     Args:
-        input_file: Chemin du fichier CSV à analyser
+        input_file: Chemin du fichier CSV à analyser (ou d'un historique colonnaire, lu sur DEDUPE_COLUMNS)
+        fuzzy_threshold: Seuil de similarité pour rapporter aussi les groupes de quasi-doublons (optionnel)
     """
-    hash_count: Dict[str, int] = {}
-    hash_examples: Dict[str, Dict[str, str]] = {}
+    hash_count: Dict[bytes, int] = {}
+    hash_examples: Dict[bytes, Dict[str, str]] = {}
     total_records = 0
 
     try:
-        with open(input_file, "r", encoding="utf-8") as file:
-            reader = csv.DictReader(file)
+        with open_reader(input_file, DEDUPE_COLUMNS) as reader:
+            schema = reader.schema
+            row_hash = row_hash_function(schema)
 
-            for record in reader:
+            for row in reader:
                 total_records += 1
-                record_hash = create_record_hash(record)
+                record_hash = row_hash(row)
 
                 if record_hash in hash_count:
                     hash_count[record_hash] += 1
                 else:
                     hash_count[record_hash] = 1
-                    hash_examples[record_hash] = record
+                    hash_examples[record_hash] = schema.record(row)
 
         # Affichage des statistiques
         duplicates = {h: count for h, count in hash_count.items() if count > 1}
@@ -204,11 +816,326 @@ def analyze_duplicates(input_file: str):
                 example = hash_examples[hash_key]
                 print(f"   {i}. {example.get('Nom', '')[:40]} ({count} occurrences)")
 
+        if fuzzy_threshold is not None:
+            report_fuzzy_clusters(input_file, fuzzy_threshold)
+
+    except Exception as e:
+        print(f"Erreur lors de l'analyse: {e}")
+        sys.exit(1)
+
+
+def report_fuzzy_clusters(input_file: str, fuzzy_threshold: float):
+    """
+    Affiche les groupes de quasi-doublons d'un fichier (deux lectures, mémoire limitée aux blocs)
+
+    Args:
+        input_file: Chemin du fichier CSV à analyser
+        fuzzy_threshold: Seuil de similarité (0 à 1)
+    """
+    with open_reader(input_file) as reader:
+        clusters = find_fuzzy_clusters(reader.records(), fuzzy_threshold)
+
+    # Seconde lecture: on ne conserve que les enregistrements à afficher
+    wanted = {index for cluster in clusters[:FUZZY_REPORT_LIMIT] for index in cluster}
+    with open_reader(input_file) as reader:
+        cluster_records = {index: reader.schema.record(row) for index, row in enumerate(reader) if index in wanted}
+    print_fuzzy_clusters(clusters, cluster_records)
+
+
+def split_file_chunks(input_file: str, chunk_count: int) -> Tuple[List[str], List[Tuple[int, int]]]:
+    """
+    Découpe un fichier CSV en plages d'octets alignées sur les fins de ligne
+
+    Hypothèse: aucun champ ne contient de retour à la ligne (cas des exports du projet,
+    les horaires étant joints par "; ").
+
+    Args:
+        input_file: Chemin du fichier CSV
+        chunk_count: Nombre de plages souhaitées
+
+    Returns:
+        Tuple (colonnes de l'en-tête, liste de plages (début, fin) après l'en-tête)
+    """
+    with open(input_file, "rb") as file:
+        header = file.readline()
+        data_start = file.tell()
+        file_size = os.path.getsize(input_file)
+
+    fieldnames = next(csv.reader([header.decode("utf-8-sig")]), [])
+    chunk_size = max(1, -(-(file_size - data_start) // max(1, chunk_count)))
+    chunks = [(start, min(start + chunk_size, file_size)) for start in range(data_start, file_size, chunk_size)]
+    return fieldnames, chunks
+
+
+def iter_chunk_records(input_file: str, fieldnames: List[str], start: int, end: int) -> Iterator[Dict[str, str]]:
+    """
+    Lit les enregistrements dont la ligne commence dans la plage [start, end)
+
+    Args:
+        input_file: Chemin du fichier CSV
+        fieldnames: Colonnes de l'en-tête
+        start: Début de la plage (octets)
+        end: Fin de la plage (octets)
+
+    Yields:
+        Enregistrements de la plage
+    """
+
+    def lines(file) -> Iterator[str]:
+        # Lignes commençant avant la fin de plage, lues au fur et à mesure par csv.reader
+        while file.tell() < end:
+            line = file.readline()
+            if not line:
+                return
+            yield line.decode("utf-8")
+
+    with open(input_file, "rb") as file:
+        # La ligne à cheval sur le début de plage appartient à la plage précédente
+        file.seek(start - 1)
+        file.readline()
+
+        for row in csv.reader(lines(file)):
+            if row:
+                yield dict(zip(fieldnames, row))
+
+
+def count_chunk_groups(input_file: str, fieldnames: List[str], start: int, end: int) -> Counter:
+    """
+    Étape map: compte les occurrences de chaque clé dans une plage du fichier
+
+    Returns:
+        Counter indexé par (ville normalisée, métier normalisé, empreinte de la clé)
+    """
+    counts: Counter = Counter()
+    for record in iter_chunk_records(input_file, fieldnames, start, end):
+        ville = sys.intern(normalize_text(record.get("Ville", "") or ""))
+        metier = sys.intern(normalize_text(record.get("Metier_normalise", record.get("Metier", "")) or ""))
+        counts[(ville, metier, create_record_hash(record))] += 1
+    return counts
+
+
+def sample_chunk_groups(
+    input_file: str, fieldnames: List[str], start: int, end: int, wanted: Set[bytes], sample_size: int
+) -> Dict[bytes, List[Dict[str, str]]]:
+    """
+    Collecte au plus sample_size enregistrements par groupe demandé dans une plage du fichier
+
+    Returns:
+        Dictionnaire empreinte -> échantillon d'enregistrements
+    """
+    samples: Dict[bytes, List[Dict[str, str]]] = {}
+    for record in iter_chunk_records(input_file, fieldnames, start, end):
+        record_hash = create_record_hash(record)
+        if record_hash in wanted:
+            sample = samples.setdefault(record_hash, [])
+            if len(sample) < sample_size:
+                sample.append(record)
+    return samples
+
+
+def print_group_breakdown(title: str, groups: Dict[str, List[int]], limit: int = 10):
+    """
+    Affiche la répartition des groupes de doublons par valeur (ville ou métier)
+
+    Args:
+        title: Titre de la section
+        groups: Valeur -> [groupes de doublons, doublons en trop]
+        limit: Nombre maximum de valeurs affichées
+    """
+    print(f"\n{title}")
+    ranked = sorted(groups.items(), key=lambda item: (-item[1][1], item[0]))
+    for value, (group_count, extra_count) in ranked[:limit]:
+        print(f"   {value or '(vide)'}: {group_count} groupe(s), {extra_count} doublon(s)")
+    if len(ranked) > limit:
+        print(f"   ... et {len(ranked) - limit} autre(s)")
+
+
+def summarize_group_counts(counts: Counter) -> Dict[str, Any]:
+    """
+    Statistiques de doublons à partir des compteurs par clé (voir count_chunk_groups)
+
+    Returns:
+        Dictionnaire: total, uniques, groupes de doublons, doublons en trop, répartition par ville et par métier
+    """
+    summary: Dict[str, Any] = {
+        "total": sum(counts.values()),
+        "uniques": sum(1 for count in counts.values() if count == 1),
+        "groupes": 0,
+        "doublons": 0,
+        "par_ville": {},
+        "par_metier": {},
+    }
+    for (ville, metier, _), count in counts.items():
+        if count > 1:
+            summary["groupes"] += 1
+            summary["doublons"] += count - 1
+            for breakdown, value in ((summary["par_ville"], ville), (summary["par_metier"], metier)):
+                stats = breakdown.setdefault(value, [0, 0])
+                stats[0] += 1
+                stats[1] += count - 1
+    return summary
+
+
+def merge_samples(
+    partials: Iterable[Dict[bytes, List[Dict[str, str]]]], sample_size: int
+) -> Dict[bytes, List[Dict[str, str]]]:
+    """Fusionne les échantillons partiels des plages, dans l'ordre du fichier, en gardant sample_size enregistrements"""
+    samples: Dict[bytes, List[Dict[str, str]]] = {}
+    for partial_samples in partials:
+        for record_hash, sample in partial_samples.items():
+            merged = samples.setdefault(record_hash, [])
+            merged.extend(sample[: sample_size - len(merged)])
+    return samples
+
+
+def print_parallel_analysis(
+    summary: Dict[str, Any], top_groups: List[Tuple[int, bytes]], samples: Dict[bytes, List[Dict[str, str]]]
+):
+    """Affiche les statistiques de l'analyse parallèle et les plus gros groupes de doublons"""
+    print(f"\n📊 Analyse des doublons:")
+    print(f"   Total d'enregistrements: {summary['total']}")
+    print(f"   Enregistrements uniques: {summary['uniques']}")
+    print(f"   Groupes de doublons: {summary['groupes']}")
+    print(f"   Total de doublons: {summary['doublons']}")
+
+    if not top_groups:
+        return
+    print(f"\n🔍 {len(top_groups)} plus gros groupes de doublons:")
+    for i, (count, record_hash) in enumerate(top_groups, 1):
+        sample = samples.get(record_hash, [])
+        name = sample[0].get("Nom", "")[:40] if sample else "?"
+        print(f"   {i}. {name} ({count} occurrences)")
+        for record in sample:
+            print(f"      - {record.get('Adresse', '')[:50]} | {record.get('Ville', '')}")
+
+    print_group_breakdown("🏙️  Doublons par Ville:", summary["par_ville"])
+    print_group_breakdown("🧰 Doublons par Metier_normalise:", summary["par_metier"])
+
+
+def sequential_analysis_reason(input_file: str) -> Optional[str]:
+    """Raison d'analyser séquentiellement: les plages d'octets n'ont pas de sens dans un fichier compressé ou colonnaire"""
+    if is_columnar(input_file):
+        return "Historique colonnaire"
+    if detect_compression(input_file):
+        return "Fichier compressé"
+    return None
+
+
+def analyze_duplicates_parallel(
+    input_file: str,
+    jobs: int,
+    top_k: int = 10,
+    sample_size: int = 3,
+    fuzzy_threshold: Optional[float] = None,
+):
+    """
+    Analyse les doublons en map-reduce sur plusieurs processus
+
+    1. Map: chaque processus compte les clés d'une plage du fichier
+    2. Reduce: fusion des compteurs partiels
+    3. Seuls les top_k plus gros groupes sont conservés, avec un échantillon borné
+       de sample_size enregistrements collecté par une seconde lecture parallèle
+    4. Répartition des groupes de doublons par Ville et par Metier_normalise
+
+    Args:
+        input_file: Chemin du fichier CSV à analyser
+        jobs: Nombre de processus
+        top_k: Nombre de groupes de doublons détaillés
+        sample_size: Nombre maximal d'enregistrements affichés par groupe
+        fuzzy_threshold: Seuil de similarité pour rapporter aussi les groupes de quasi-doublons (optionnel)
+    """
+    try:
+        reason = sequential_analysis_reason(input_file)
+        if reason:
+            print(f"⚠️  {reason}: analyse séquentielle")
+            analyze_duplicates(input_file, fuzzy_threshold)
+            return
+
+        fieldnames, chunks = split_file_chunks(input_file, jobs * 4)
+        validate_input_columns(fieldnames)
+        print(f"⚙️  Analyse parallèle: {len(chunks)} plage(s), {jobs} processus")
+
+        arguments = [(input_file, fieldnames, start, end) for start, end in chunks]
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            # Map puis reduce des compteurs partiels
+            counts: Counter = Counter()
+            for partial in executor.map(count_chunk_groups, *zip(*arguments)):
+                counts.update(partial)
+
+            summary = summarize_group_counts(counts)
+            top_groups = heapq.nlargest(
+                top_k, ((count, key[2]) for key, count in counts.items() if count > 1), key=lambda item: item[0]
+            )
+            del counts
+
+            # Seconde lecture: échantillons bornés des seuls top_k groupes
+            wanted = {record_hash for _, record_hash in top_groups}
+            sample_arguments = [arguments_chunk + (wanted, sample_size) for arguments_chunk in arguments]
+            samples = merge_samples(executor.map(sample_chunk_groups, *zip(*sample_arguments)), sample_size)
+
+        print_parallel_analysis(summary, top_groups, samples)
+        if fuzzy_threshold is not None:
+            report_fuzzy_clusters(input_file, fuzzy_threshold)
+
     except Exception as e:
         print(f"Erreur lors de l'analyse: {e}")
         sys.exit(1)
 
 
+def validate_arguments(args: argparse.Namespace, parser: argparse.ArgumentParser):
+    """Vérifie les combinaisons d'options (arrêt avec un message d'erreur sinon)"""
+    if args.jobs < 1:
+        print("Erreur: --jobs doit être au moins égal à 1")
+        sys.exit(1)
+
+    if args.memory_limit is not None:
+        if args.memory_limit < 1:
+            print("Erreur: --memory-limit doit être au moins égal à 1 Mo")
+            sys.exit(1)
+        if args.fuzzy is not None:
+            print("Erreur: --memory-limit n'est pas compatible avec --fuzzy")
+            sys.exit(1)
+
+    if args.fuzzy is not None and not 0 < args.fuzzy <= 1:
+        print("Erreur: le seuil --fuzzy doit être compris entre 0 et 1")
+        sys.exit(1)
+
+    if not args.analyze and not args.output_file:
+        print("Erreur: fichier de sortie requis (sauf avec --analyze)")
+        parser.print_help()
+        sys.exit(1)
+
+
+def run_removal(args: argparse.Namespace):
+    """Mode suppression: dédoublonne le fichier d'entrée et affiche le bilan"""
+    print(f"🧹 Suppression des doublons...")
+    print(f"   Entrée: {args.input_file}")
+    print(f"   Sortie: {args.output_file}")
+    if args.sort:
+        print(f"   Tri par: {args.sort}")
+    if args.fuzzy is not None:
+        print(f"   Seuil de similarité: {args.fuzzy}")
+
+    if args.memory_limit is not None:
+        total, unique = remove_duplicates_external(
+            args.input_file, args.output_file, args.memory_limit, args.jobs, args.verbose, args.temp_dir, args.sort
+        )
+    else:
+        total, unique = remove_duplicates(
+            args.input_file, args.output_file, args.verbose, args.sort, args.fuzzy, args.sort_buffer, args.temp_dir
+        )
+    duplicates_removed = total - unique
+
+    print(f"\n✅ Traitement terminé:")
+    print(f"   Enregistrements traités: {total}")
+    print(f"   Enregistrements uniques: {unique}")
+    print(f"   Doublons supprimés: {duplicates_removed}")
+
+    if total > 0:
+        reduction_percent = (duplicates_removed / total) * 100
+        print(f"   Réduction: {reduction_percent:.1f}%")
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Suppression des doublons dans les fichiers CSV d'entreprises",
@@ -219,6 +1146,10 @@ Exemples d'utilisation:
   python supprime_doublons.py input.csv output.csv --verbose --sort Nom
   python supprime_doublons.py input.csv output.csv --sort Note
   python supprime_doublons.py input.csv --analyze
+  python supprime_doublons.py input.csv output.csv --fuzzy 0.8
+  python supprime_doublons.py input.csv --analyze --fuzzy 0.8
+  python supprime_doublons.py input.csv --analyze --jobs 4 --top 20
+  python supprime_doublons.py input.csv output.csv --memory-limit 256 --jobs 4
 
 Le script compare les enregistrements sur la base des colonnes:
   - Nom (normalisé)
@@ -230,7 +1161,23 @@ Ce script conserve automatiquement toutes les colonnes présentes dans le fichie
 Cela inclut les nouvelles colonnes comme Heures_ouverture, Nombre_avis, Note, Jours_fermeture.
 
 Options de tri disponibles: toutes les colonnes détectées dans le fichier
+Le tri est externe (mémoire bornée) et typé: les valeurs numériques (Note, Nombre_avis...) sont triées numériquement.
 La normalisation supprime les espaces en trop et convertit en minuscules.
+
+Mode --fuzzy: détection des quasi-doublons ("Chem. des Campanules" / "Chemin des Campanules")
+  - blocage par code postal (ou ville) et métier
+  - MinHash/LSH sur les shingles du nom et de la voie (pas de comparaison O(n²))
+  - rapport des groupes détectés; seul le premier enregistrement de chaque groupe est conservé
+
+Mode --memory-limit: pour les fichiers plus grands que la mémoire disponible
+  - partitionnement des lignes dans des fichiers temporaires selon le préfixe de leur hash
+  - dédoublonnage indépendant de chaque partition (en parallèle avec --jobs)
+  - fusion des partitions dans l'ordre d'apparition des lignes
+
+Mode --analyze --jobs N: analyse map-reduce sur N processus
+  - chaque processus compte les clés d'une plage du fichier, les compteurs partiels sont fusionnés
+  - seuls les --top plus gros groupes sont détaillés, avec --sample-size lignes chacun
+  - répartition des groupes de doublons par Ville et par Metier_normalise
         """,
     )
 
@@ -241,38 +1188,45 @@ La normalisation supprime les espaces en trop et convertit en minuscules.
         "--analyze", "-a", action="store_true", help="Mode analyse: affiche les statistiques sans créer de fichier de sortie"
     )
     parser.add_argument("--sort", "-s", metavar="COLUMN", help="Trier les résultats par colonne (ex: Nom, Ville, Metier)")
+    parser.add_argument(
+        "--fuzzy",
+        type=float,
+        metavar="THRESHOLD",
+        help="Détecte aussi les quasi-doublons au-delà de ce seuil de similarité (0 à 1, ex: 0.8)",
+    )
 
-    args = parser.parse_args()
+    parser.add_argument(
+        "--memory-limit",
+        type=int,
+        metavar="MO",
+        help="Dédoublonnage sur disque pour les gros fichiers: mémoire maximale en Mo",
+    )
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="Nombre de processus parallèles (défaut: 1)")
+    parser.add_argument("--temp-dir", metavar="DOSSIER", help="Dossier des fichiers temporaires (défaut: dossier système)")
+    parser.add_argument("--top", type=int, default=10, help="Analyse parallèle: nombre de groupes détaillés (défaut: 10)")
+    parser.add_argument(
+        "--sample-size", type=int, default=3, help="Analyse parallèle: lignes affichées par groupe (défaut: 3)"
+    )
+    parser.add_argument(
+        "--sort-buffer",
+        type=int,
+        default=DEFAULT_MAX_ROWS_IN_MEMORY,
+        metavar="LIGNES",
+        help=f"Lignes triées en mémoire avant écriture d'un segment temporaire (défaut: {DEFAULT_MAX_ROWS_IN_MEMORY})",
+    )
 
-    # Validation des arguments
-    if not args.analyze and not args.output_file:
-        print("Erreur: fichier de sortie requis (sauf avec --analyze)")
-        parser.print_help()
-        sys.exit(1)
+    args = parser.parse_args()
+    validate_arguments(args, parser)
 
     if args.analyze:
         # Mode analyse
         print(f"🔍 Analyse des doublons dans: {args.input_file}")
-        analyze_duplicates(args.input_file)
+        if args.jobs > 1:
+            analyze_duplicates_parallel(args.input_file, args.jobs, args.top, args.sample_size, args.fuzzy)
+        else:
+            analyze_duplicates(args.input_file, args.fuzzy)
     else:
-        # Mode suppression
-        print(f"🧹 Suppression des doublons...")
-        print(f"   Entrée: {args.input_file}")
-        print(f"   Sortie: {args.output_file}")
-        if args.sort:
-            print(f"   Tri par: {args.sort}")
-
-        total, unique = remove_duplicates(args.input_file, args.output_file, args.verbose, args.sort)
-        duplicates_removed = total - unique
-
-        print(f"\n✅ Traitement terminé:")
-        print(f"   Enregistrements traités: {total}")
-        print(f"   Enregistrements uniques: {unique}")
-        print(f"   Doublons supprimés: {duplicates_removed}")
-
-        if total > 0:
-            reduction_percent = (duplicates_removed / total) * 100
-            print(f"   Réduction: {reduction_percent:.1f}%")
+        run_removal(args)
 
 
 if __name__ == "__main__":
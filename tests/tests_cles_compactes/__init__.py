@@ -0,0 +1 @@
+# Tests pour le module cles_compactes.py
@@ -0,0 +1,67 @@
+import sys
+import unittest
+from pathlib import Path
+
+# Ajouter le répertoire parent au path pour importer le module à tester
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+from cles_compactes import CompactKeySet, build_composite_key, digest_key, record_digest
+
+
+class TestClesCompactes(unittest.TestCase):
+
+    def test_empreinte_normalisee(self):
+        """Test que l'empreinte ne dépend que des champs clés normalisés"""
+        record1 = {
+            "Nom": "Boulangerie Martin ",
+            "Adresse": "12 RUE de la Paix",
+            "Ville": "Paris",
+            "Metier_normalise": "Boulanger",
+        }
+        record2 = {
+            "Nom": "boulangerie martin",
+            "Adresse": "12 rue de la paix",
+            "Ville": "PARIS",
+            "Metier_normalise": "boulanger",
+        }
+
+        self.assertEqual(record_digest(record1), record_digest(record2))
+        self.assertEqual(len(record_digest(record1)), 16, "Empreinte de 128 bits par défaut")
+        self.assertEqual(len(digest_key(build_composite_key("a", "b", "c", "d"), 8)), 8)
+
+    def test_ajout_et_appartenance(self):
+        """Test de l'ajout et de la recherche de clés, avec agrandissement de la table"""
+        for digest_size in (8, 16):
+            keys = CompactKeySet(digest_size, capacity=8)
+            digests = [digest_key(f"entreprise {i}", digest_size) for i in range(5000)]
+
+            for digest in digests:
+                self.assertTrue(keys.add(digest), "Une nouvelle clé doit être signalée comme ajoutée")
+            for digest in digests[:100]:
+                self.assertFalse(keys.add(digest), "Une clé déjà présente ne doit pas être ajoutée")
+
+            self.assertEqual(len(keys), 5000)
+            self.assertTrue(all(digest in keys for digest in digests))
+            self.assertNotIn(digest_key("absente", digest_size), keys)
+            self.assertLess(keys.memory_bytes(), 5000 * digest_size * 4, "La table doit rester compacte")
+
+    def test_empreinte_nulle(self):
+        """Test que l'empreinte nulle (marqueur d'emplacement vide) est gérée"""
+        keys = CompactKeySet(16)
+        zero = bytes(16)
+
+        self.assertNotIn(zero, keys)
+        self.assertTrue(keys.add(zero))
+        self.assertFalse(keys.add(zero))
+        self.assertIn(zero, keys)
+        self.assertEqual(len(keys), 1)
+
+    def test_taille_empreinte_invalide(self):
+        """Test du rejet des tailles d'empreinte non supportées"""
+        with self.assertRaises(ValueError):
+            CompactKeySet(4)
+        with self.assertRaises(ValueError):
+            CompactKeySet(16).add(bytes(8))
+
+
+if __name__ == "__main__":
+    unittest.main()
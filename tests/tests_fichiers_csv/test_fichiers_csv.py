@@ -0,0 +1,100 @@
+import csv
+import gzip
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Ajouter le répertoire parent au path pour importer le module à tester
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+from fichiers_csv import CsvReader, CsvWriter, compression_for_path, read_schema, zstandard
+
+
+class TestFichiersCsv(unittest.TestCase):
+
+    def setUp(self):
+        """Configuration avant chaque test"""
+        self.test_dir = Path(__file__).parent
+        self.projet_root = self.test_dir.parent.parent
+        self.fixture = self.test_dir / "lignes_irregulieres.csv"
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_lecture_identique_a_dictreader(self):
+        """Test des lignes courtes, longues, vides et multilignes: mêmes enregistrements que csv.DictReader"""
+        with open(self.fixture, "r", newline="", encoding="utf-8") as file:
+            expected = list(csv.DictReader(file))
+
+        with CsvReader(str(self.fixture)) as reader:
+            self.assertEqual(list(reader.records()), expected)
+
+        with CsvReader(str(self.fixture)) as reader:
+            nom_ville = reader.schema.getter("Nom", "Ville")
+            rows = list(reader)
+        self.assertEqual(len(rows), 4, "La ligne vide est ignorée")
+        self.assertTrue(all(len(row) == 4 for row in rows), "Lignes complétées ou tronquées à la largeur de l'en-tête")
+        self.assertEqual(rows[1], ["Courte", "2 rue B", "", ""])
+        self.assertEqual(nom_ville(rows[3]), ("Multi\nligne", "Nantes"))
+
+        schema = read_schema(str(self.fixture))
+        self.assertEqual(schema.missing(["Nom", "Metier_normalise", "Place_id"]), ["Metier_normalise", "Place_id"])
+        self.assertEqual(schema.metier_column(), "Metier")
+        self.assertEqual(schema.projection(["Ville", "Note"])(rows[0]), ["Paris", ""])
+
+    def test_compression_gzip(self):
+        """Test de l'écriture et de la relecture transparentes d'un fichier .csv.gz"""
+        output_file = os.path.join(self.temp_dir, "sortie.csv.gz")
+        records = [{"Nom": "La Table", "Ville": "Paris"}, {"Nom": "Sans ville"}]
+        with CsvWriter(output_file, ["Nom", "Ville"]) as writer:
+            writer.write_records(records)
+
+        with open(output_file, "rb") as file:
+            self.assertEqual(file.read(2), b"\x1f\x8b", "Le fichier doit être compressé en gzip")
+        with gzip.open(output_file, "rb") as file:
+            self.assertEqual(file.read(), b"Nom,Ville\r\nLa Table,Paris\r\nSans ville,\r\n")
+        with CsvReader(output_file) as reader:
+            self.assertEqual(list(reader), [["La Table", "Paris"], ["Sans ville", ""]])
+
+        # Le fichier temporaire d'une écriture atomique est compressé comme le fichier final
+        self.assertEqual(compression_for_path("historique.csv.gz.tmp"), "gzip")
+        self.assertIsNone(compression_for_path("historique.csv.tmp"))
+
+    @unittest.skipIf(zstandard is not None, "zstandard est installé")
+    def test_zstd_sans_module(self):
+        """Test du message d'erreur quand le module optionnel zstandard est absent"""
+        with self.assertRaises(ValueError):
+            CsvWriter(os.path.join(self.temp_dir, "sortie.csv.zst"), ["Nom"])
+
+    def test_suppression_doublons_compressee(self):
+        """Test de supprime_doublons.py sur une entrée et une sortie gzip: même contenu qu'en CSV brut"""
+        input_file = self.projet_root / "tests" / "tests_supprime_doublons" / "input_avec_doublons.csv"
+        compressed_input = os.path.join(self.temp_dir, "entree.csv.gz")
+        with open(input_file, "rb") as source, gzip.open(compressed_input, "wb") as target:
+            shutil.copyfileobj(source, target)
+
+        outputs = []
+        for source, output_name in ((str(input_file), "sortie.csv"), (compressed_input, "sortie.csv.gz")):
+            output_file = os.path.join(self.temp_dir, output_name)
+            result = subprocess.run(
+                ["python", str(self.projet_root / "supprime_doublons.py"), source, output_file],
+                capture_output=True,
+                text=True,
+                encoding="utf-8",
+                env=dict(os.environ, PYTHONIOENCODING="utf-8"),
+            )
+            self.assertEqual(result.returncode, 0, f"Erreur d'exécution: {result.stdout} {result.stderr}")
+            opener = gzip.open if output_name.endswith(".gz") else open
+            with opener(output_file, "rb") as file:
+                outputs.append(file.read())
+
+        self.assertEqual(outputs[0], outputs[1])
+        self.assertEqual(outputs[0].count(b"\r\n"), 6, "En-tête et 5 entreprises uniques")
+
+
+if __name__ == "__main__":
+    unittest.main()
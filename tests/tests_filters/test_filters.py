@@ -1,4 +1,5 @@
 import csv
+import json
 import os
 import subprocess
 import tempfile
@@ -327,6 +328,231 @@ class TestFilters(unittest.TestCase):
             if os.path.exists(temp_output_path):
                 os.unlink(temp_output_path)
 
+    def test_regles_personnalisees(self):
+        """Test d'un fichier de règles personnalisé (règle par métier, priorités, compteurs par règle)"""
+        input_file = self.test_dir / "input_a_filtrer.csv"
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            output = os.path.join(temp_dir, "sortie.csv")
+            result = subprocess.run(
+                [
+                    "python",
+                    str(self.script),
+                    str(input_file),
+                    output,
+                    "--regles",
+                    str(self.test_dir / "regles_personnalisees.json"),
+                ],
+                capture_output=True,
+                text=True,
+                encoding="utf-8",
+                env=dict(os.environ, PYTHONIOENCODING="utf-8"),
+            )
+            self.assertEqual(result.returncode, 0, f"Erreur d'exécution: {result.stderr}")
+
+            with open(output, "r", encoding="utf-8") as f:
+                rows = {row["Nom"]: row for row in csv.DictReader(f)}
+
+            # Les deux règles s'appliquent: la priorité la plus petite donne la raison
+            self.assertEqual(rows["Boulangerie Peu Connue"]["Raison_Filtrage"], "Boulanger - Note insuffisante (< 4.2)")
+            self.assertEqual(rows["Coiffeur Fermé"]["Raison_Filtrage"], "Nombre d'avis insuffisant (< 10)")
+            # Les règles par défaut (restaurants) ne sont plus appliquées
+            self.assertEqual(rows["Restaurant Médiocre"]["Filtré"], "NON")
+            self.assertIn("Règle 1 (Boulanger note < 4.2):", result.stdout)
+            self.assertIn("Règle 2 (Nombre d'avis < 10):", result.stdout)
+
+            # Un fichier de règles invalide est refusé avant tout traitement
+            invalid_rules = os.path.join(temp_dir, "regles_invalides.json")
+            with open(invalid_rules, "w", encoding="utf-8") as f:
+                f.write('{"regles": [{"id": "note", "priorite": 1, "champ": "Note", "type": "texte", "operateur": "<", ')
+                f.write('"seuil": 4, "raison": "Note"}]}')
+            result = subprocess.run(
+                ["python", str(self.script), str(input_file), output, "--regles", invalid_rules],
+                capture_output=True,
+                text=True,
+                encoding="utf-8",
+                env=dict(os.environ, PYTHONIOENCODING="utf-8"),
+            )
+            self.assertEqual(result.returncode, 1)
+            self.assertIn("type inconnu 'texte'", result.stdout)
+
+    def test_evaluation_vectorisee_identique(self):
+        """Test que --vectorise produit le même fichier et les mêmes statistiques que l'évaluation ligne par ligne"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for input_name in ["input_a_filtrer.csv", "input_donnees_manquantes.csv", "input_nominal.csv"]:
+                outputs = []
+                for options in [[], ["--vectorise"]]:
+                    output = os.path.join(temp_dir, f"sortie_{len(options)}.csv")
+                    result = subprocess.run(
+                        ["python", str(self.script), str(self.test_dir / input_name), output, *options],
+                        capture_output=True,
+                        text=True,
+                        encoding="utf-8",
+                        env=dict(os.environ, PYTHONIOENCODING="utf-8"),
+                    )
+                    self.assertEqual(result.returncode, 0, f"Erreur d'exécution: {result.stderr}")
+                    with open(output, "r", encoding="utf-8") as f:
+                        statistiques = result.stdout[result.stdout.index("📈") : result.stdout.index("✅")]
+                        outputs.append((f.read(), statistiques))
+
+                self.assertEqual(outputs[0], outputs[1], f"Résultats différents pour {input_name}")
+
+    def test_regles_horaires(self):
+        """Test des règles sur les horaires d'ouverture, identiques en évaluation ligne par ligne et vectorisée"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            outputs = []
+            for options in [[], ["--vectorise"]]:
+                output = os.path.join(temp_dir, f"sortie_{len(options)}.csv")
+                result = subprocess.run(
+                    [
+                        "python",
+                        str(self.script),
+                        str(self.test_dir / "input_a_filtrer.csv"),
+                        output,
+                        "--regles",
+                        str(self.test_dir / "regles_horaires.json"),
+                        *options,
+                    ],
+                    capture_output=True,
+                    text=True,
+                    encoding="utf-8",
+                    env=dict(os.environ, PYTHONIOENCODING="utf-8"),
+                )
+                self.assertEqual(result.returncode, 0, f"Erreur d'exécution: {result.stderr}")
+                with open(output, "r", encoding="utf-8") as f:
+                    outputs.append(f.read())
+                    f.seek(0)
+                    rows = {row["Nom"]: row for row in csv.DictReader(f)}
+
+                self.assertEqual(rows["Restaurant Mauvais"]["Raison_Filtrage"], "Restaurant - Fermé le soir")
+                self.assertEqual(rows["Restaurant Très Populaire"]["Raison_Filtrage"], "Restaurant - Fermé le soir")
+                self.assertEqual(rows["Restaurant Médiocre"]["Filtré"], "NON", "Service le soir")
+                self.assertEqual(rows["Boulangerie Peu Connue"]["Raison_Filtrage"], "Boulanger - Fermé le dimanche matin")
+                self.assertEqual(rows["Boulangerie Bien Notée"]["Filtré"], "NON", "Ouverte le dimanche matin")
+                self.assertEqual(rows["Garage Ouvert"]["Filtré"], "NON", "Règles restreintes à un métier")
+
+            self.assertEqual(outputs[0], outputs[1])
+
+    def test_filtrage_incremental(self):
+        """Test du mode --incremental: seules les entrées dont l'empreinte a changé sont réévaluées"""
+
+        def run(input_file, output_file, *options):
+            result = subprocess.run(
+                ["python", str(self.script), input_file, output_file, "--incremental", *options],
+                capture_output=True,
+                text=True,
+                encoding="utf-8",
+                env=dict(os.environ, PYTHONIOENCODING="utf-8"),
+            )
+            self.assertEqual(result.returncode, 0, f"Erreur d'exécution: {result.stderr}")
+            return result.stdout
+
+        def read(path):
+            with open(path, "r", encoding="utf-8") as f:
+                return list(csv.DictReader(f))
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            etape1 = os.path.join(temp_dir, "etape1.csv")
+            etape2 = os.path.join(temp_dir, "etape2.csv")
+
+            # Premier passage: aucune empreinte, tout est évalué
+            stdout = run(str(self.test_dir / "input_a_filtrer.csv"), etape1)
+            self.assertIn("Évaluations évitées (empreinte inchangée): 0", stdout)
+            rows = read(etape1)
+            self.assertTrue(all(row["Empreinte_Filtrage"] for row in rows))
+
+            # Second passage sans changement: aucune évaluation, résultat identique
+            stdout = run(etape1, etape2)
+            self.assertIn(f"Évaluations évitées (empreinte inchangée): {len(rows)}", stdout)
+            self.assertEqual(read(etape2), rows)
+
+            # Une note modifiée et un filtrage manuel: seules ces deux entrées sont réévaluées
+            restaurant = next(row for row in rows if row["Metier_normalise"] == "Restaurant" and row["Filtré"] == "NON")
+            restaurant["Note"] = "3.0"
+            rows[0]["Filtré"], rows[0]["Raison_Filtrage"] = "OUI", "Filtrage manuel"
+            with open(etape1, "w", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+                writer.writeheader()
+                writer.writerows(rows)
+
+            # La sortie peut remplacer l'entrée
+            stdout = run(etape1, etape1)
+            self.assertIn(f"Évaluations évitées (empreinte inchangée): {len(rows) - 2}", stdout)
+            resultats = {row["Nom"]: row for row in read(etape1)}
+            self.assertEqual(resultats[restaurant["Nom"]]["Raison_Filtrage"], "Restaurant - Note insuffisante (< 4.5)")
+            self.assertNotEqual(resultats[rows[0]["Nom"]]["Raison_Filtrage"], "Filtrage manuel")
+
+            # Un changement de règles change la version: tout est réévalué
+            stdout = run(etape1, etape2, "--regles", str(self.test_dir / "regles_personnalisees.json"))
+            self.assertIn("Évaluations évitées (empreinte inchangée): 0", stdout)
+
+    def test_traitement_en_flux_sur_place(self):
+        """Test du traitement par lots: sortie identique quel que soit --lot, y compris quand la sortie est l'entrée"""
+
+        def run(input_file, output_file, *options):
+            result = subprocess.run(
+                ["python", str(self.script), input_file, output_file, *options],
+                capture_output=True,
+                text=True,
+                encoding="utf-8",
+                env=dict(os.environ, PYTHONIOENCODING="utf-8"),
+            )
+            self.assertEqual(result.returncode, 0, f"Erreur d'exécution: {result.stderr}")
+            # Les statistiques ne dépendent pas des chemins
+            return result.stdout[result.stdout.index("📊") :].split("✅")[0]
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            reference = os.path.join(temp_dir, "reference.csv")
+            sur_place = os.path.join(temp_dir, "sur_place.csv")
+            with open(self.test_dir / "input_a_filtrer.csv", "r", encoding="utf-8") as f:
+                contenu = f.read()
+            with open(sur_place, "w", encoding="utf-8", newline="") as f:
+                f.write(contenu)
+
+            stats_reference = run(str(self.test_dir / "input_a_filtrer.csv"), reference)
+            stats_sur_place = run(sur_place, sur_place, "--lot", "2")
+
+            self.assertEqual(stats_sur_place, stats_reference)
+            with open(reference, "r", encoding="utf-8") as f_ref, open(sur_place, "r", encoding="utf-8") as f_out:
+                self.assertEqual(f_out.read(), f_ref.read())
+            self.assertFalse(os.path.exists(sur_place + ".tmp"), "Le fichier temporaire doit être supprimé")
+
+    def test_profil_et_ordre_optimise(self):
+        """Test de --profil et --optimise: rapport JSON cohérent et résultat identique à l'ordre des priorités"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            reference = os.path.join(temp_dir, "reference.csv")
+            optimise = os.path.join(temp_dir, "optimise.csv")
+            profil = os.path.join(temp_dir, "profil.json")
+            input_file = str(self.test_dir / "input_a_filtrer.csv")
+
+            for output_file, options in ((reference, []), (optimise, ["--lot", "2", "--optimise", "--profil", profil])):
+                result = subprocess.run(
+                    ["python", str(self.script), input_file, output_file, *options],
+                    capture_output=True,
+                    text=True,
+                    encoding="utf-8",
+                    env=dict(os.environ, PYTHONIOENCODING="utf-8"),
+                )
+                self.assertEqual(result.returncode, 0, f"Erreur d'exécution: {result.stderr}")
+            self.assertIn("Ordre d'évaluation des règles", result.stdout)
+
+            with open(reference, "r", encoding="utf-8") as f_ref, open(optimise, "r", encoding="utf-8") as f_out:
+                self.assertEqual(f_out.read(), f_ref.read())
+
+            with open(profil, "r", encoding="utf-8") as f:
+                rapport = json.load(f)
+            with open(reference, "r", encoding="utf-8") as f:
+                rows = list(csv.DictReader(f))
+
+            self.assertEqual(rapport["entrees"], len(rows))
+            self.assertEqual(len(rapport["ordre_evaluation"]), 4)
+            for regle in rapport["regles"]:
+                self.assertLessEqual(regle["declenchements"], regle["evaluations"])
+                self.assertLessEqual(regle["evaluations"], len(rows))
+            # Chaque entrée filtrée a déclenché au moins une règle
+            filtrees = sum(1 for row in rows if row["Filtré"] == "OUI")
+            self.assertGreaterEqual(sum(regle["declenchements"] for regle in rapport["regles"]), filtrees)
+
 
 if __name__ == "__main__":
     unittest.main()
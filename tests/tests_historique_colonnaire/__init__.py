@@ -0,0 +1 @@
+# Tests pour le module historique_colonnaire.py
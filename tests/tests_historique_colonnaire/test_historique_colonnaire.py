@@ -0,0 +1,114 @@
+import csv
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Ajouter le répertoire parent au path pour importer le module à tester
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+from historique_colonnaire import ColumnarTable, import_csv, open_reader
+
+
+class TestHistoriqueColonnaire(unittest.TestCase):
+
+    def setUp(self):
+        """Configuration avant chaque test"""
+        self.test_dir = Path(__file__).parent
+        self.projet_root = self.test_dir.parent.parent
+        self.fixture = self.projet_root / "tests" / "tests_filters" / "input_a_filtrer.csv"
+        self.temp_dir = tempfile.mkdtemp()
+        self.dossier = os.path.join(self.temp_dir, "historique_colonnes")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def run_script(self, script, *args):
+        result = subprocess.run(
+            ["python", str(self.projet_root / script), *map(str, args)],
+            capture_output=True,
+            text=True,
+            encoding="utf-8",
+            env=dict(os.environ, PYTHONIOENCODING="utf-8"),
+        )
+        self.assertEqual(result.returncode, 0, f"Erreur d'exécution: {result.stdout} {result.stderr}")
+        return result.stdout
+
+    def test_import_export_identique(self):
+        """Test de l'aller-retour CSV -> colonnaire -> CSV: mêmes valeurs, puis fichier identique octet pour octet"""
+        first_export = os.path.join(self.temp_dir, "export.csv")
+        second_export = os.path.join(self.temp_dir, "export_2.csv")
+        self.run_script("historique_colonnaire.py", "importer", self.fixture, self.dossier)
+        self.run_script("historique_colonnaire.py", "exporter", self.dossier, first_export)
+
+        with open(self.fixture, "r", newline="", encoding="utf-8") as expected:
+            with open(first_export, "r", newline="", encoding="utf-8") as generated:
+                self.assertEqual(list(csv.reader(generated)), list(csv.reader(expected)))
+
+        # Le fichier exporté (fins de ligne \r\n de csv.writer) se reproduit à l'identique
+        self.run_script("historique_colonnaire.py", "importer", first_export, self.dossier)
+        self.run_script("historique_colonnaire.py", "exporter", self.dossier, second_export)
+        with open(first_export, "rb") as expected, open(second_export, "rb") as generated:
+            self.assertEqual(generated.read(), expected.read())
+
+    def test_types_et_projection(self):
+        """Test des colonnes numériques projetées en mémoire et de la lecture limitée à quelques colonnes"""
+        count = import_csv(str(self.fixture), self.dossier)
+
+        with ColumnarTable(self.dossier) as table:
+            self.assertEqual(table.rows, count)
+            self.assertEqual(table.description("Nombre_avis")["type"], "entier")
+            self.assertEqual(table.description("Note")["type"], "reel")
+            self.assertEqual(table.description("Nom")["type"], "texte")
+
+        with open(self.fixture, "r", newline="", encoding="utf-8") as file:
+            expected = [{"Nom": row["Nom"], "Note": row["Note"]} for row in csv.DictReader(file)]
+
+        with open_reader(self.dossier, ["Nom", "Note", "Colonne_absente"]) as reader:
+            self.assertEqual(reader.fieldnames, ["Nom", "Note"])
+            self.assertEqual(list(reader.records()), expected)
+
+    def test_filtrage_colonnaire(self):
+        """Test de Filters.py sur un dossier colonnaire: même résultat qu'en CSV, seules les colonnes de résultat réécrites"""
+        csv_output = os.path.join(self.temp_dir, "filtre.csv")
+        self.run_script("Filters.py", self.fixture, csv_output)
+
+        import_csv(str(self.fixture), self.dossier)
+        with ColumnarTable(self.dossier) as table:
+            stems_before = {name: table.description(name)["fichier"] for name in table.fieldnames}
+
+        output = self.run_script("Filters.py", self.dossier, self.dossier)
+        self.assertIn("Historique colonnaire", output)
+
+        with ColumnarTable(self.dossier) as table:
+            stems_after = {name: table.description(name)["fichier"] for name in table.fieldnames}
+            with table.reader(["Nom", "Filtré", "Raison_Filtrage"]) as reader:
+                columnar_results = list(reader)
+        with open(csv_output, "r", newline="", encoding="utf-8") as file:
+            csv_results = [[row["Nom"], row["Filtré"], row["Raison_Filtrage"]] for row in csv.DictReader(file)]
+
+        self.assertEqual(columnar_results, csv_results)
+        self.assertIn(["Café Fermé", "OUI", "Trop de jours de fermeture (> 3)"], columnar_results)
+        for name, stem in stems_before.items():
+            if name in ("Filtré", "Raison_Filtrage"):
+                self.assertNotEqual(stems_after[name], stem, f"La colonne {name} doit être réécrite")
+            else:
+                self.assertEqual(stems_after[name], stem, f"La colonne {name} ne doit pas être réécrite")
+
+    def test_analyse_doublons_colonnaire(self):
+        """Test de supprime_doublons.py --analyze sur un dossier colonnaire: mêmes statistiques qu'en CSV"""
+        input_file = self.projet_root / "tests" / "tests_supprime_doublons" / "input_avec_doublons.csv"
+        import_csv(str(input_file), self.dossier)
+
+        csv_output = self.run_script("supprime_doublons.py", input_file, "--analyze")
+        columnar_output = self.run_script("supprime_doublons.py", self.dossier, "--analyze", "--jobs", "2")
+
+        statistics = csv_output[csv_output.index("📊") :]
+        self.assertIn("Historique colonnaire: analyse séquentielle", columnar_output)
+        self.assertEqual(columnar_output[columnar_output.index("📊") :], statistics)
+
+
+if __name__ == "__main__":
+    unittest.main()
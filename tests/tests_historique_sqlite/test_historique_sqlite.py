@@ -0,0 +1,224 @@
+import csv
+import os
+import sqlite3
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+
+
+class TestHistoriqueSQLite(unittest.TestCase):
+
+    def setUp(self):
+        """Configuration avant chaque test"""
+        self.test_dir = Path(__file__).parent
+        self.projet_root = self.test_dir.parent.parent
+        self.fixtures_dir = self.projet_root / "tests" / "tests_maj_historique"
+        self.script = self.projet_root / "historique_sqlite.py"
+        self.script_csv = self.projet_root / "maj_historique.py"
+        self.work_dir = tempfile.TemporaryDirectory()
+        self.base = os.path.join(self.work_dir.name, "historique.db")
+
+    def tearDown(self):
+        self.work_dir.cleanup()
+
+    def run_script(self, script, *args):
+        result = subprocess.run(
+            ["python", str(script), *[str(arg) for arg in args]],
+            capture_output=True,
+            text=True,
+            encoding="utf-8",
+            env=dict(os.environ, PYTHONIOENCODING="utf-8"),
+        )
+        self.assertEqual(result.returncode, 0, f"Erreur d'exécution: {result.stdout}\n{result.stderr}")
+        return result
+
+    def read_csv(self, path):
+        with open(path, "r", encoding="utf-8") as f:
+            return list(csv.DictReader(f))
+
+    def test_equivalence_avec_mode_csv(self):
+        """Test que deux exécutions successives donnent le même historique qu'en mode CSV"""
+        historique_file = self.fixtures_dir / "historique_existant.csv"
+        etape1_csv = os.path.join(self.work_dir.name, "etape1.csv")
+        etape2_csv = os.path.join(self.work_dir.name, "etape2.csv")
+        export_csv = os.path.join(self.work_dir.name, "export.csv")
+
+        # Mode CSV: chaque exécution relit et réécrit l'historique complet
+        self.run_script(self.script_csv, historique_file, self.fixtures_dir / "candidats_inconnues.csv", etape1_csv)
+        self.run_script(self.script_csv, etape1_csv, self.fixtures_dir / "candidats_manquantes.csv", etape2_csv)
+
+        # Mode SQLite: import unique puis application des candidats par UPSERT
+        self.run_script(self.script, "importer", historique_file, self.base)
+        self.run_script(self.script, "maj", self.base, self.fixtures_dir / "candidats_inconnues.csv")
+        result = self.run_script(self.script, "maj", self.base, self.fixtures_dir / "candidats_manquantes.csv")
+        self.run_script(self.script, "exporter", self.base, export_csv)
+
+        self.assertIn("🔄 Mises à jour de données: 6", result.stdout)
+        self.assertEqual(self.read_csv(export_csv), self.read_csv(etape2_csv))
+
+        # Les entreprises de la première exécution absentes de la seconde sont désactivées
+        actifs = {row["Nom"]: row["Actif"] for row in self.read_csv(export_csv)}
+        self.assertEqual(actifs["Boulangerie Ancienne"], "Oui")
+        self.assertIn("Non", [actif for nom, actif in actifs.items() if "Entreprise Exotique" in nom])
+
+    def test_import_export_aller_retour(self):
+        """Test que l'import puis l'export restituent l'historique CSV"""
+        historique_file = self.fixtures_dir / "historique_existant.csv"
+        export_csv = os.path.join(self.work_dir.name, "export.csv")
+
+        self.run_script(self.script, "importer", historique_file, self.base)
+        self.run_script(self.script, "exporter", self.base, export_csv)
+
+        self.assertEqual(self.read_csv(export_csv), self.read_csv(historique_file))
+
+    def test_conflit_et_doublon_candidats(self):
+        """Test de la détection des conflits et de l'UPSERT d'un candidat présent deux fois"""
+        historique_file = self.fixtures_dir / "historique_existant.csv"
+        candidats_file = os.path.join(self.work_dir.name, "candidats.csv")
+        export_csv = os.path.join(self.work_dir.name, "export.csv")
+
+        with open(candidats_file, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["Nom", "Adresse", "Ville", "Metier_normalise", "Note"])
+            writer.writerow(["Boulangerie Nouvelle", "10 rue Vieille", "Paris", "Boulanger_Patissier", "4.0"])
+            writer.writerow(["Fleuriste du Port", "1 quai Sud", "Nice", "Fleuriste", "4.1"])
+            writer.writerow(["Fleuriste du Port", "1 quai Sud", "Nice", "Fleuriste", "4.3"])
+
+        self.run_script(self.script, "importer", historique_file, self.base)
+        result = self.run_script(self.script, "maj", self.base, candidats_file, "--batch-size", "2")
+        self.run_script(self.script, "exporter", self.base, export_csv)
+
+        self.assertIn("CONFLIT DÉTECTÉ", result.stdout)
+        self.assertIn("Conflits détectés: 1", result.stdout)
+        self.assertIn("Nouvelles entrées: 1", result.stdout)
+
+        fleuristes = [row for row in self.read_csv(export_csv) if row["Nom"] == "Fleuriste du Port"]
+        self.assertEqual(len(fleuristes), 1, "Un candidat en double ne doit être inséré qu'une fois")
+        self.assertEqual(fleuristes[0]["Note"], "4.3")
+        self.assertEqual(fleuristes[0]["Actif"], "Oui")
+
+    def test_desactivation_limitee_au_perimetre(self):
+        """Test que les exécutions partielles ne désactivent que leurs cellules, comme en mode CSV"""
+        historique_file = self.fixtures_dir / "historique_existant.csv"
+        etapes = [
+            ("candidats_manquantes.csv", []),
+            ("candidats_marseille.csv", ["--perimetre-candidats"]),
+            ("candidats_nominal.csv", ["--perimetre", self.fixtures_dir / "perimetre_lyon.csv"]),
+        ]
+        export_csv = os.path.join(self.work_dir.name, "export.csv")
+
+        previous = historique_file
+        self.run_script(self.script, "importer", historique_file, self.base)
+        for numero, (candidats, options) in enumerate(etapes):
+            output = os.path.join(self.work_dir.name, f"etape{numero}.csv")
+            self.run_script(self.script_csv, previous, self.fixtures_dir / candidats, output, *options)
+            self.run_script(self.script, "maj", self.base, self.fixtures_dir / candidats, *options)
+            previous = output
+
+        self.run_script(self.script, "exporter", self.base, export_csv)
+        self.assertEqual(self.read_csv(export_csv), self.read_csv(previous))
+
+    def test_rapprochement_par_place_id(self):
+        """Test du rapprochement par Place_id avant la clé composite, comme en mode CSV"""
+        historique_file = self.fixtures_dir / "historique_place_id.csv"
+        candidats_file = self.fixtures_dir / "candidats_place_id.csv"
+        etape_csv = os.path.join(self.work_dir.name, "etape.csv")
+        export_csv = os.path.join(self.work_dir.name, "export.csv")
+
+        self.run_script(self.script_csv, historique_file, candidats_file, etape_csv)
+        self.run_script(self.script, "importer", historique_file, self.base)
+        result = self.run_script(self.script, "maj", self.base, candidats_file)
+        self.run_script(self.script, "exporter", self.base, export_csv)
+
+        # Renommage, changement d'adresse et autre lieu à la même adresse: ni conflit ni doublon
+        self.assertNotIn("CONFLIT", result.stdout)
+        self.assertIn("Nouvelles entrées: 1", result.stdout)
+        self.assertEqual(self.read_csv(export_csv), self.read_csv(etape_csv))
+
+        # L'entreprise renommée a pris la clé composite de ses nouvelles données: elle est retrouvée sans Place_id
+        candidats_sans_place_id = os.path.join(self.work_dir.name, "candidats.csv")
+        with open(candidats_sans_place_id, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["Nom", "Adresse", "Ville", "Metier_normalise", "Note"])
+            writer.writerow(
+                ["Boulangerie Ancienne - Maison Dupont", "10 Rue Vieille, 75001 Paris", "Paris", "Boulanger_Patissier", "4.4"]
+            )
+        result = self.run_script(self.script, "maj", self.base, candidats_sans_place_id)
+        self.assertIn("Mises à jour (correspondances exactes): 1", result.stdout)
+        self.assertIn("Nouvelles entrées: 0", result.stdout)
+
+    def test_meme_cle_composite_autre_place_id(self):
+        """Test d'un candidat de même clé composite qu'une entreprise d'identifiant Places différent, comme en mode CSV"""
+        historique_file = self.fixtures_dir / "historique_autre_place.csv"
+        candidats_file = self.fixtures_dir / "candidats_autre_place.csv"
+        etape_csv = os.path.join(self.work_dir.name, "etape.csv")
+        export_csv = os.path.join(self.work_dir.name, "export.csv")
+
+        self.run_script(self.script_csv, historique_file, candidats_file, etape_csv)
+        self.run_script(self.script, "importer", historique_file, self.base)
+        result = self.run_script(self.script, "maj", self.base, candidats_file)
+        self.run_script(self.script, "exporter", self.base, export_csv)
+
+        self.assertIn("Nouvelles entrées: 1", result.stdout)
+        self.assertEqual(self.read_csv(export_csv), self.read_csv(etape_csv))
+
+        # La nouvelle entrée est retrouvée par son identifiant à l'exécution suivante
+        result = self.run_script(self.script, "maj", self.base, candidats_file)
+        self.assertIn("Nouvelles entrées: 0", result.stdout)
+
+    def test_lot_au_dela_de_la_limite_de_parametres(self):
+        """Test d'un lot de plus de 999 candidats (limite de paramètres par requête de SQLite < 3.32)"""
+        historique_file = self.fixtures_dir / "historique_existant.csv"
+        candidats_file = os.path.join(self.work_dir.name, "candidats.csv")
+        etape_csv = os.path.join(self.work_dir.name, "etape.csv")
+        export_csv = os.path.join(self.work_dir.name, "export.csv")
+
+        with open(candidats_file, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["Nom", "Adresse", "Ville", "Metier_normalise", "Nombre_avis", "Note", "Place_id"])
+            for numero in range(1200):
+                writer.writerow([f"Commerce {numero}", f"{numero} rue Longue", "Lyon", "Fleuriste", "5", "4.0", f"P{numero}"])
+
+        self.run_script(self.script_csv, historique_file, candidats_file, etape_csv)
+        self.run_script(self.script, "importer", historique_file, self.base)
+        result = self.run_script(self.script, "maj", self.base, candidats_file, "--batch-size", "1500")
+        self.run_script(self.script, "exporter", self.base, export_csv)
+
+        self.assertIn("Nouvelles entrées: 1200", result.stdout)
+        self.assertEqual(self.read_csv(export_csv), self.read_csv(etape_csv))
+
+    def test_migration_colonne_place_id(self):
+        """Test qu'une base créée avant la colonne place_id est migrée et rapproche par Place_id"""
+        historique_file = self.fixtures_dir / "historique_place_id.csv"
+        self.run_script(self.script, "importer", historique_file, self.base)
+
+        # Base au format précédent: table entreprises sans colonne place_id
+        connection = sqlite3.connect(self.base)
+        connection.executescript(
+            """
+            CREATE TABLE ancienne (
+                cle_composite BLOB PRIMARY KEY,
+                cle_localisation BLOB NOT NULL,
+                cle_cellule BLOB NOT NULL,
+                ordre INTEGER NOT NULL,
+                execution_introduction INTEGER NOT NULL,
+                execution_vue INTEGER NOT NULL,
+                donnees TEXT NOT NULL
+            );
+            INSERT INTO ancienne SELECT cle_composite, cle_localisation, cle_cellule, ordre, execution_introduction,
+                execution_vue, donnees FROM entreprises;
+            DROP TABLE entreprises;
+            ALTER TABLE ancienne RENAME TO entreprises;
+            """
+        )
+        connection.close()
+
+        result = self.run_script(self.script, "maj", self.base, self.fixtures_dir / "candidats_place_id.csv")
+        self.assertNotIn("CONFLIT", result.stdout)
+        self.assertIn("Mises à jour (correspondances exactes): 2", result.stdout)
+        self.assertIn("Nouvelles entrées: 1", result.stdout)
+
+
+if __name__ == "__main__":
+    unittest.main()
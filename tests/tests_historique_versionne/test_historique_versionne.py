@@ -0,0 +1,198 @@
+import csv
+import os
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+
+
+class TestHistoriqueVersionne(unittest.TestCase):
+
+    def setUp(self):
+        """Configuration avant chaque test"""
+        self.test_dir = Path(__file__).parent
+        self.projet_root = self.test_dir.parent.parent
+        self.fixtures_dir = self.projet_root / "tests" / "tests_maj_historique"
+        self.script = self.projet_root / "historique_versionne.py"
+        self.script_maj = self.projet_root / "maj_historique.py"
+        self.work_dir = tempfile.TemporaryDirectory()
+        self.versions = os.path.join(self.work_dir.name, "historique_versionne.csv")
+
+    def tearDown(self):
+        self.work_dir.cleanup()
+
+    def run_script(self, script, *args):
+        result = subprocess.run(
+            ["python", str(script), *[str(arg) for arg in args]],
+            capture_output=True,
+            text=True,
+            encoding="utf-8",
+            env=dict(os.environ, PYTHONIOENCODING="utf-8"),
+        )
+        self.assertEqual(result.returncode, 0, f"Erreur d'exécution: {result.stdout}\n{result.stderr}")
+        return result
+
+    def read_csv(self, path):
+        with open(path, "r", encoding="utf-8") as f:
+            return list(csv.DictReader(f))
+
+    def write_copy(self, name, date_verification, changes, removed=()):
+        """Écrit une copie datée de l'historique de test avec des modifications par entreprise"""
+        with open(self.fixtures_dir / "historique_existant.csv", "r", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            fieldnames = reader.fieldnames
+            rows = [row for row in reader if row["Nom"] not in removed]
+
+        path = os.path.join(self.work_dir.name, name)
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            for row in rows:
+                row["Date_verification"] = date_verification
+                row.update(changes.get(row["Nom"], {}))
+                writer.writerow(row)
+        return path
+
+    def count_as_of(self, date, *options):
+        result = self.run_script(self.script, "a-la-date", self.versions, date, *options)
+        return int(result.stdout.split(": ")[1].split()[0])
+
+    def test_etat_a_une_date(self):
+        """Test des intervalles de validité construits à partir de copies successives de l'historique"""
+        mai = self.write_copy("historique_24_05.csv", "2024-05-01", {})
+        aout = self.write_copy(
+            "historique_24_08.csv",
+            "2024-08-01",
+            {"Coiffure Vintage": {"Actif": "Non"}, "Boulangerie Ancienne": {"Note": "4.4"}},
+        )
+        octobre = self.write_copy(
+            "historique_24_10.csv",
+            "2024-10-01",
+            {"Coiffure Vintage": {"Actif": "Non"}, "Restaurant Classique": {"Filtré": "Oui"}},
+            removed=("Boulangerie Ancienne",),
+        )
+
+        # Les copies sont importées dans l'ordre de leurs dates, quel que soit l'ordre des arguments
+        result = self.run_script(self.script, "importer", self.versions, octobre, mai, aout)
+        self.assertIn("historique_24_05.csv (2024-05-01): 3 version(s) ouverte(s), 0 fermée(s)", result.stdout)
+        # La vérification seule du restaurant n'ouvre pas de nouvelle version
+        self.assertIn("historique_24_08.csv (2024-08-01): 2 version(s) ouverte(s), 2 fermée(s)", result.stdout)
+        self.assertIn("historique_24_10.csv (2024-10-01): 1 version(s) ouverte(s), 2 fermée(s)", result.stdout)
+        self.assertEqual(len(self.read_csv(self.versions)), 6)
+
+        self.assertEqual(self.count_as_of("2024-04-30"), 0)
+        self.assertEqual(self.count_as_of("2024-07-31", "--actifs"), 3)
+        self.assertEqual(self.count_as_of("2024-08-01", "--actifs"), 2)
+        self.assertEqual(self.count_as_of("2024-10-24"), 2)
+        self.assertEqual(self.count_as_of("2024-10-24", "--actifs"), 1)
+        self.assertEqual(self.count_as_of("2024-10-24", "--actifs", "--non-filtres"), 0)
+
+        # L'état d'une date reproduit la copie correspondante (hors Date_verification)
+        etat = os.path.join(self.work_dir.name, "etat.csv")
+        self.run_script(self.script, "a-la-date", self.versions, "2024-09-15", "-o", etat)
+
+        def sans_verification(rows):
+            return sorted(tuple((k, v) for k, v in row.items() if k != "Date_verification") for row in rows)
+
+        self.assertEqual(sans_verification(self.read_csv(etat)), sans_verification(self.read_csv(aout)))
+
+        # Une copie plus ancienne que la dernière importée est refusée
+        result = subprocess.run(
+            ["python", str(self.script), "importer", self.versions, mai],
+            capture_output=True,
+            text=True,
+            encoding="utf-8",
+            env=dict(os.environ, PYTHONIOENCODING="utf-8"),
+        )
+        self.assertEqual(result.returncode, 1)
+        self.assertIn("antérieure", result.stdout)
+
+    def test_index_enregistre(self):
+        """Test de l'index enregistré à côté des versions: même état qu'un index reconstruit, reconstruit si périmé"""
+        mai = self.write_copy("historique_24_05.csv", "2024-05-01", {})
+        aout = self.write_copy(
+            "historique_24_08.csv", "2024-08-01", {"Boulangerie Ancienne": {"Nom": "Boulangerie\nAncienne"}}
+        )
+        self.run_script(self.script, "importer", self.versions, mai, aout)
+        index_file = self.versions + ".idx"
+        self.assertTrue(os.path.exists(index_file))
+
+        etat = os.path.join(self.work_dir.name, "etat.csv")
+        etat_reconstruit = os.path.join(self.work_dir.name, "etat_reconstruit.csv")
+        self.run_script(self.script, "a-la-date", self.versions, "2024-09-15", "-o", etat)
+        os.remove(index_file)
+        self.run_script(self.script, "a-la-date", self.versions, "2024-09-15", "-o", etat_reconstruit)
+        self.assertTrue(os.path.exists(index_file))
+        self.assertEqual(self.read_csv(etat), self.read_csv(etat_reconstruit))
+        self.assertIn("Boulangerie\nAncienne", [row["Nom"] for row in self.read_csv(etat)])
+
+        # Versions modifiées hors de l'outil: l'index périmé est reconstruit
+        versions = self.read_csv(self.versions)
+        with open(self.versions, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=list(versions[0]))
+            writer.writeheader()
+            writer.writerows(versions[:-1])
+        self.assertEqual(self.count_as_of("2024-09-15"), 2)
+
+    def test_option_versions_de_maj_historique(self):
+        """Test de l'option --versions: deux exécutions le même jour ne laissent que l'état final du jour"""
+        etape1 = os.path.join(self.work_dir.name, "etape1.csv")
+        etape2 = os.path.join(self.work_dir.name, "etape2.csv")
+        historique_file = self.fixtures_dir / "historique_existant.csv"
+
+        self.run_script(
+            self.script_maj, historique_file, self.fixtures_dir / "candidats_nominal.csv", etape1, "--versions", self.versions
+        )
+        result = self.run_script(
+            self.script_maj, etape1, self.fixtures_dir / "candidats_marseille.csv", etape2, "--versions", self.versions
+        )
+        self.assertIn("🕰️  Historique versionné:", result.stdout)
+
+        versions = self.read_csv(self.versions)
+        self.assertTrue(all(version["Valide_depuis"] != version["Valide_jusqu_a"] for version in versions))
+        courantes = {(row["Nom"], row["Actif"]) for row in versions if not row["Valide_jusqu_a"]}
+        self.assertEqual(courantes, {(row["Nom"], row["Actif"]) for row in self.read_csv(etape2)})
+
+    def test_identite_par_place_id(self):
+        """Test que les versions suivent l'identifiant Places, à défaut la clé composite"""
+        with open(self.fixtures_dir / "historique_place_id.csv", "r", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            fieldnames = reader.fieldnames
+            rows = list(reader)
+        # Autre lieu de même nom et même adresse que le restaurant
+        rows.append(dict(rows[1], Place_id="ChIJ_restaurant_2"))
+
+        def write(name, date_verification, changes):
+            path = os.path.join(self.work_dir.name, name)
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=fieldnames)
+                writer.writeheader()
+                for row in rows:
+                    writer.writerow(dict(row, Date_verification=date_verification, **changes.get(row["Place_id"], {})))
+            return path
+
+        juin = write("historique_24_06.csv", "2024-06-01", {})
+        # Renommée (même Place_id), et ligne sans Place_id qui reçoit son identifiant
+        juillet = write(
+            "historique_24_07.csv",
+            "2024-07-01",
+            {"ChIJ_boulangerie": {"Nom": "Maison Dupont"}, "": {"Place_id": "ChIJ_coiffure"}},
+        )
+
+        result = self.run_script(self.script, "importer", self.versions, juin, juillet)
+        self.assertIn("historique_24_06.csv (2024-06-01): 4 version(s) ouverte(s), 0 fermée(s)", result.stdout)
+        self.assertIn("historique_24_07.csv (2024-07-01): 2 version(s) ouverte(s), 2 fermée(s)", result.stdout)
+
+        etat = os.path.join(self.work_dir.name, "etat.csv")
+        self.run_script(self.script, "a-la-date", self.versions, "2024-07-15", "-o", etat)
+        self.assertEqual(
+            sorted(row["Place_id"] for row in self.read_csv(etat)),
+            ["ChIJ_boulangerie", "ChIJ_coiffure", "ChIJ_restaurant", "ChIJ_restaurant_2"],
+        )
+        versions = [row for row in self.read_csv(self.versions) if row["Place_id"] == "ChIJ_boulangerie"]
+        self.assertEqual([row["Nom"] for row in versions], ["Boulangerie Ancienne", "Maison Dupont"])
+        self.assertEqual(versions[0]["Valide_jusqu_a"], versions[1]["Valide_depuis"])
+
+
+if __name__ == "__main__":
+    unittest.main()
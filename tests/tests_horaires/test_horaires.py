@@ -0,0 +1,93 @@
+import sys
+import unittest
+from pathlib import Path
+
+# Ajouter le répertoire parent au path pour importer le module à tester
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+from horaires import (
+    SCHEDULE_PREDICATES,
+    SLOTS_PER_DAY,
+    format_bitmap,
+    parse_bitmap,
+    parse_opening_hours,
+    parse_window,
+    periods_to_bitmap,
+    record_schedule,
+)
+
+
+def is_open_at(bitmap: int, day: int, hour: int, minute: int = 0) -> bool:
+    """Ouverture pendant le quart d'heure commençant à day hour:minute (lundi = 0)"""
+    return bool(bitmap >> (day * SLOTS_PER_DAY + (hour * 60 + minute) // 15) & 1)
+
+
+class TestHoraires(unittest.TestCase):
+
+    def test_analyse_du_texte(self):
+        """Test de l'analyse du texte des horaires: plages multiples, fermeture, passage de minuit, 24h/24"""
+        texte = (
+            "lundi: 12:00 – 14:30, 19:00 – 22:30; mardi: Fermé; mercredi: Ouvert 24h/24; "
+            "samedi: 22:00 – 02:00; dimanche: 9:00 AM – 12:30 PM"
+        )
+        bitmap = parse_opening_hours(texte)
+
+        self.assertTrue(is_open_at(bitmap, 0, 12))
+        self.assertTrue(is_open_at(bitmap, 0, 14, 15))
+        self.assertFalse(is_open_at(bitmap, 0, 14, 30), "Fermé à la fin de la plage")
+        self.assertFalse(is_open_at(bitmap, 1, 12), "Mardi fermé")
+        self.assertTrue(is_open_at(bitmap, 2, 3), "Mercredi ouvert 24h/24")
+        self.assertTrue(is_open_at(bitmap, 6, 1), "La plage du samedi soir continue le dimanche")
+        self.assertTrue(is_open_at(bitmap, 6, 12, 15), "Format 12 heures")
+        self.assertFalse(is_open_at(bitmap, 6, 12, 30))
+
+        # Début de plage sans AM/PM: celui de la fin s'applique s'il garde le début avant la fin
+        self.assertEqual(
+            parse_opening_hours("Monday: 11:30 AM – 2:00 PM, 6:00 – 10:00 PM"),
+            parse_opening_hours("lundi: 11:30 – 14:00, 18:00 – 22:00"),
+        )
+        self.assertEqual(parse_opening_hours("Monday: 11:00 – 2:00 PM"), parse_opening_hours("lundi: 11:00 – 14:00"))
+
+        self.assertIsNone(parse_opening_hours("Non disponible (ancienne API)"), "Horaires inconnus")
+        self.assertEqual(parse_opening_hours("lundi: Fermé"), 0, "Toujours fermé n'est pas inconnu")
+
+    def test_periodes_api(self):
+        """Test de la conversion des périodes Google Places (dimanche = 0), y compris dimanche soir -> lundi"""
+        periodes = [
+            {"open": {"day": 1, "hour": 12, "minute": 0}, "close": {"day": 1, "hour": 14, "minute": 30}},
+            {"open": {"day": 0, "hour": 22, "minute": 0}, "close": {"day": 1, "hour": 2, "minute": 0}},
+        ]
+        self.assertEqual(periods_to_bitmap(periodes), parse_opening_hours("lundi: 12:00 – 14:30; dimanche: 22:00 – 02:00"))
+        self.assertTrue(is_open_at(periods_to_bitmap([{"open": {"day": 0, "hour": 0, "minute": 0}}]), 3, 4))
+        self.assertIsNone(periods_to_bitmap([]))
+
+        # Aller-retour par la colonne CSV
+        bitmap = periods_to_bitmap(periodes)
+        self.assertEqual(parse_bitmap(format_bitmap(bitmap)), bitmap)
+        self.assertEqual(format_bitmap(None), "")
+
+    def test_predicats_et_plages(self):
+        """Test des prédicats bit à bit sur des plages horaires de règles"""
+        soir = {"Heures_ouverture": "lundi: 19:00 – 23:00; vendredi: 19:00 – 00:00; dimanche: Fermé"}
+        matin = {"Heures_ouverture": "lundi: 07:00 – 13:00; dimanche: 08:00 – 12:00"}
+        ouvert, ouvert_tout, ferme = (SCHEDULE_PREDICATES[name] for name in ("ouvert", "ouvert_tout", "ferme"))
+
+        dimanche_matin = parse_window("dimanche 08:00-12:00")
+        apres_19h = parse_window("tous 19:00-24:00")
+        self.assertFalse(ouvert(record_schedule(soir), dimanche_matin))
+        self.assertTrue(ouvert(record_schedule(matin), dimanche_matin))
+        self.assertTrue(ouvert_tout(record_schedule(matin), dimanche_matin))
+        self.assertTrue(ouvert(record_schedule(soir), apres_19h))
+        self.assertTrue(ferme(record_schedule(matin), apres_19h))
+
+        self.assertEqual(parse_window("samedi-lundi"), parse_window("samedi,dimanche,lundi"), "Plage de jours circulaire")
+        for invalide in ("lundy 10:00-12:00", "lundi 10:00", "lundi 10:00-25:00"):
+            with self.assertRaises(ValueError):
+                parse_window(invalide)
+
+        # Creneaux_ouverture l'emporte sur le texte quand il est renseigné
+        record = dict(soir, Creneaux_ouverture=format_bitmap(record_schedule(matin)))
+        self.assertEqual(record_schedule(record), record_schedule(matin))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1 @@
+# Tests pour le module journal_historique.py
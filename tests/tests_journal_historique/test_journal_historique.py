@@ -0,0 +1,222 @@
+import csv
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+
+
+class TestJournalHistorique(unittest.TestCase):
+
+    def setUp(self):
+        """Configuration avant chaque test"""
+        self.test_dir = Path(__file__).parent
+        self.projet_root = self.test_dir.parent.parent
+        self.fixtures_dir = self.projet_root / "tests" / "tests_maj_historique"
+        self.script = self.projet_root / "journal_historique.py"
+        self.script_csv = self.projet_root / "maj_historique.py"
+        self.work_dir = tempfile.TemporaryDirectory()
+        self.journal = os.path.join(self.work_dir.name, "journal")
+
+    def tearDown(self):
+        self.work_dir.cleanup()
+
+    def run_script(self, script, *args):
+        result = subprocess.run(
+            ["python", str(script), *[str(arg) for arg in args]],
+            capture_output=True,
+            text=True,
+            encoding="utf-8",
+            env=dict(os.environ, PYTHONIOENCODING="utf-8"),
+        )
+        self.assertEqual(result.returncode, 0, f"Erreur d'exécution: {result.stdout}\n{result.stderr}")
+        return result
+
+    def read_csv(self, path):
+        with open(path, "r", encoding="utf-8") as f:
+            return list(csv.DictReader(f))
+
+    def read_events(self, generation=0):
+        with open(os.path.join(self.journal, f"journal_{generation:06d}.jsonl"), "r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+
+    def test_equivalence_avec_mode_csv(self):
+        """Test que le rejeu du journal donne le même historique que des exécutions CSV successives"""
+        historique_file = self.fixtures_dir / "historique_existant.csv"
+        etapes = ["candidats_inconnues.csv", "candidats_mises_a_jour.csv"]
+        export_csv = os.path.join(self.work_dir.name, "export.csv")
+
+        previous = historique_file
+        for numero, candidats in enumerate(etapes):
+            output = os.path.join(self.work_dir.name, f"etape{numero}.csv")
+            self.run_script(self.script_csv, previous, self.fixtures_dir / candidats, output)
+            previous = output
+
+        self.run_script(self.script, "initialiser", historique_file, self.journal)
+        for candidats in etapes:
+            self.run_script(self.script, "maj", self.journal, self.fixtures_dir / candidats)
+        self.run_script(self.script, "exporter", self.journal, export_csv)
+
+        self.assertEqual(self.read_csv(export_csv), self.read_csv(previous))
+
+        # Le journal garde la trace des champs modifiés et des changements de statut
+        events = self.read_events()
+        types = [event["type"] for event in events]
+        self.assertEqual(types.count("execution"), 2)
+        # 3 entreprises absentes de la première exécution + l'entreprise insérée puis absente de la seconde
+        self.assertEqual(types.count("desactivation"), 4)
+        modifications = [event["champs"] for event in events if event["type"] == "modification"]
+        self.assertIn({"Nombre_avis": ["85", "90"], "Note": ["4.2", "4.9"]}, modifications)
+
+    def test_entreprise_renommee_par_place_id(self):
+        """Test d'une entreprise renommée par Place_id puis d'un candidat portant son ancien nom: même résultat qu'en CSV"""
+        historique_file = self.fixtures_dir / "historique_place_id.csv"
+        ancien_nom = os.path.join(self.work_dir.name, "candidats_ancien_nom.csv")
+        with open(ancien_nom, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["Nom", "Adresse", "Ville", "Metier_normalise", "Nombre_avis"])
+            writer.writerow(["Boulangerie Ancienne", "10 rue Vieille", "Paris", "Boulanger_Patissier", "12"])
+        etapes = [self.fixtures_dir / "candidats_place_id.csv", ancien_nom]
+
+        previous = historique_file
+        for numero, candidats in enumerate(etapes):
+            output = os.path.join(self.work_dir.name, f"etape{numero}.csv")
+            self.run_script(self.script_csv, previous, candidats, output, "--perimetre-candidats")
+            previous = output
+
+        export_csv = os.path.join(self.work_dir.name, "export.csv")
+        self.run_script(self.script, "initialiser", historique_file, self.journal)
+        for candidats in etapes:
+            self.run_script(self.script, "maj", self.journal, candidats, "--perimetre-candidats")
+        self.run_script(self.script, "exporter", self.journal, export_csv)
+
+        self.assertEqual(self.read_csv(export_csv), self.read_csv(previous))
+        # L'entreprise renommée garde sa clé: la nouvelle entrée reçoit une clé dérivée
+        insertions = [event["cle"] for event in self.read_events() if event["type"] == "insertion"]
+        self.assertEqual(len(insertions), len(set(insertions)))
+
+    def test_meme_cle_composite_autre_place_id(self):
+        """Test d'un candidat de même clé composite qu'une entreprise d'identifiant Places différent, comme en mode CSV"""
+        historique_file = self.fixtures_dir / "historique_autre_place.csv"
+        candidats_file = self.fixtures_dir / "candidats_autre_place.csv"
+        etape_csv = os.path.join(self.work_dir.name, "etape.csv")
+        export_csv = os.path.join(self.work_dir.name, "export.csv")
+
+        self.run_script(self.script_csv, historique_file, candidats_file, etape_csv)
+        self.run_script(self.script, "initialiser", historique_file, self.journal)
+        self.run_script(self.script, "maj", self.journal, candidats_file)
+        self.run_script(self.script, "exporter", self.journal, export_csv)
+
+        self.assertEqual(self.read_csv(export_csv), self.read_csv(etape_csv))
+        types = [event["type"] for event in self.read_events()]
+        self.assertEqual(types.count("insertion"), 1)
+        self.assertEqual(types.count("desactivation"), 1)
+
+    def test_index_etat_courant(self):
+        """Test de l'index de l'état courant: rattrapage d'un index en retard, reconstruction, exécution interrompue"""
+        historique_file = self.fixtures_dir / "historique_existant.csv"
+        etapes = ["candidats_nominal.csv", "candidats_inconnues.csv", "candidats_mises_a_jour.csv"]
+        index_file = os.path.join(self.journal, "etat_courant.db")
+        index_copy = os.path.join(self.work_dir.name, "etat_courant.db")
+
+        previous = historique_file
+        for numero, candidats in enumerate(etapes):
+            output = os.path.join(self.work_dir.name, f"etape{numero}.csv")
+            self.run_script(self.script_csv, previous, self.fixtures_dir / candidats, output)
+            previous = output
+
+        self.run_script(self.script, "initialiser", historique_file, self.journal)
+        self.run_script(self.script, "maj", self.journal, self.fixtures_dir / etapes[0])
+        self.assertTrue(os.path.exists(index_file))
+        shutil.copy(index_file, index_copy)
+        self.run_script(self.script, "maj", self.journal, self.fixtures_dir / etapes[1])
+
+        # Index en retard d'une exécution, suivie d'une exécution interrompue
+        shutil.copy(index_copy, index_file)
+        with open(os.path.join(self.journal, "journal_000000.jsonl"), "a", encoding="utf-8") as f:
+            f.write(json.dumps({"type": "desactivation", "date": "2025-01-01", "cle": "00" * 16}) + "\n")
+            f.write('{"type": "verif')
+        self.run_script(self.script, "maj", self.journal, self.fixtures_dir / etapes[2])
+
+        export_csv = os.path.join(self.work_dir.name, "export.csv")
+        self.run_script(self.script, "exporter", self.journal, export_csv)
+        self.assertEqual(self.read_csv(export_csv), self.read_csv(previous))
+        # Les lignes de l'exécution interrompue ont été retirées du journal avant l'ajout de la suivante
+        events = self.read_events()
+        self.assertEqual([event["type"] for event in events].count("execution"), 3)
+        self.assertNotIn("00" * 16, [event.get("cle") for event in events])
+
+        # Un index supprimé est reconstruit à la mise à jour suivante
+        os.remove(index_file)
+        self.run_script(self.script, "maj", self.journal, self.fixtures_dir / etapes[2])
+        self.assertTrue(os.path.exists(index_file))
+
+    def test_compaction_et_execution_interrompue(self):
+        """Test de la compaction et du rejeu limité aux exécutions complètes"""
+        historique_file = self.fixtures_dir / "historique_existant.csv"
+        export_avant = os.path.join(self.work_dir.name, "avant.csv")
+        export_apres = os.path.join(self.work_dir.name, "apres.csv")
+
+        self.run_script(self.script, "initialiser", historique_file, self.journal)
+        self.run_script(self.script, "maj", self.journal, self.fixtures_dir / "candidats_nominal.csv")
+        self.run_script(self.script, "exporter", self.journal, export_avant)
+
+        # Seuil bas: la mise à jour suivante déclenche la compaction
+        result = self.run_script(
+            self.script, "maj", self.journal, self.fixtures_dir / "candidats_manquantes.csv", "--compacter-apres", "5"
+        )
+        self.assertIn("Journal compacté", result.stdout)
+        self.assertTrue(os.path.exists(os.path.join(self.journal, "snapshot_000001.csv")))
+        self.assertEqual(self.read_events(1), [], "Le nouveau journal doit être vide après compaction")
+        self.run_script(self.script, "exporter", self.journal, export_apres)
+
+        # Une exécution interrompue (sans marqueur de fin) n'est pas rejouée
+        with open(os.path.join(self.journal, "journal_000001.jsonl"), "a", encoding="utf-8") as f:
+            f.write(json.dumps({"type": "desactivation", "date": "2025-01-01", "cle": "00" * 16}) + "\n")
+            f.write('{"type": "verif')
+
+        export_final = os.path.join(self.work_dir.name, "final.csv")
+        self.run_script(self.script, "exporter", self.journal, export_final)
+        self.assertEqual(self.read_csv(export_final), self.read_csv(export_apres))
+        self.assertNotEqual(self.read_csv(export_apres), self.read_csv(export_avant))
+
+    def test_compaction_entreprise_renommee(self):
+        """Test d'une entreprise renommée (retrouvée par Place_id) mise à jour après compaction"""
+        colonnes = ["Nom", "Adresse", "Ville", "Metier_normalise", "Nombre_avis", "Note", "Place_id"]
+        fichiers = {}
+        for name, nom, note in (
+            ("historique.csv", "Ancien Nom", "4.0"),
+            ("candidats_renomme.csv", "Nouveau Nom", "4.0"),
+            ("candidats_note.csv", "Nouveau Nom", "4.6"),
+        ):
+            fichiers[name] = os.path.join(self.work_dir.name, name)
+            with open(fichiers[name], "w", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                writer.writerow(colonnes)
+                writer.writerow([nom, "1 place du Marché", "Lyon", "Restaurant", "12", note, "P1"])
+
+        etape1 = os.path.join(self.work_dir.name, "etape1.csv")
+        etape2 = os.path.join(self.work_dir.name, "etape2.csv")
+        self.run_script(self.script_csv, fichiers["historique.csv"], fichiers["candidats_renomme.csv"], etape1)
+        self.run_script(self.script_csv, etape1, fichiers["candidats_note.csv"], etape2)
+
+        self.run_script(self.script, "initialiser", fichiers["historique.csv"], self.journal)
+        self.run_script(self.script, "maj", self.journal, fichiers["candidats_renomme.csv"])
+        self.run_script(self.script, "compacter", self.journal)
+        self.run_script(self.script, "maj", self.journal, fichiers["candidats_note.csv"])
+
+        export_csv = os.path.join(self.work_dir.name, "export.csv")
+        self.run_script(self.script, "exporter", self.journal, export_csv)
+        self.assertEqual(self.read_csv(export_csv), self.read_csv(etape2))
+        self.assertEqual([event["type"] for event in self.read_events(1)], ["modification", "execution"])
+
+        # L'index reconstruit depuis l'instantané retrouve la même clé
+        os.remove(os.path.join(self.journal, "etat_courant.db"))
+        result = self.run_script(self.script, "maj", self.journal, fichiers["candidats_note.csv"])
+        self.assertIn("Nouvelles entrées: 0", result.stdout)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -288,6 +288,286 @@ class TestMajHistorique(unittest.TestCase):
                 if os.path.exists(path):
                     os.unlink(path)
 
+    def test_mise_a_jour_donnees_correspondances_exactes(self):
+        """Test que chaque candidat en correspondance exacte met à jour l'entrée existante (fusion indexée)"""
+        historique_file = self.test_dir / "historique_existant.csv"
+        candidats_file = self.test_dir / "candidats_mises_a_jour.csv"
+
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".csv", delete=False, encoding="utf-8") as temp_output:
+            temp_output_path = temp_output.name
+
+        try:
+            result = subprocess.run(
+                ["python", str(self.script), str(historique_file), str(candidats_file), temp_output_path],
+                capture_output=True,
+                text=True,
+                encoding="utf-8",
+                env=dict(os.environ, PYTHONIOENCODING="utf-8"),
+            )
+
+            self.assertEqual(result.returncode, 0, f"Erreur d'exécution: {result.stderr}")
+
+            # 3 candidats en correspondance exacte (dont 2 pour la même boulangerie, casse différente)
+            self.assertIn("Mises à jour (correspondances exactes): 3", result.stdout)
+            self.assertIn("🔄 Mises à jour de données: 3", result.stdout)
+
+            with open(temp_output_path, "r", encoding="utf-8") as f:
+                updated_content = {row["Adresse"]: row for row in csv.DictReader(f)}
+
+            with open(historique_file, "r", encoding="utf-8") as f:
+                original_count = len(list(csv.DictReader(f)))
+
+            # Aucune nouvelle entrée: les correspondances sont fusionnées dans les lignes existantes
+            self.assertEqual(len(updated_content), original_count)
+
+            boulangerie = updated_content["10 rue Vieille"]
+            self.assertEqual(boulangerie["Note"], "4.9", "La dernière valeur du candidat devrait être retenue")
+            self.assertEqual(boulangerie["Nombre_avis"], "90", "Une valeur vide du candidat ne doit pas écraser l'existant")
+            self.assertEqual(boulangerie["Nom"], "Boulangerie Ancienne")
+            self.assertEqual(boulangerie["Actif"], "Oui")
+
+            coiffure = updated_content["20 avenue Principale"]
+            self.assertEqual(coiffure["Actif"], "Oui")
+            self.assertEqual(coiffure["Date_verification"], datetime.now().strftime("%Y-%m-%d"))
+
+        finally:
+            if os.path.exists(temp_output_path):
+                os.unlink(temp_output_path)
+
+    def test_mode_streaming_tri_fusion(self):
+        """Test que la jointure tri-fusion en flux donne le même historique que le mode en mémoire"""
+        historique_file = self.test_dir / "historique_existant.csv"
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for candidats_name in ["candidats_manquantes.csv", "candidats_mises_a_jour.csv"]:
+                candidats_file = self.test_dir / candidats_name
+                outputs = {}
+                for mode, options in [("memoire", []), ("streaming", ["--streaming", "--sort-buffer", "1"])]:
+                    output_path = os.path.join(temp_dir, f"{mode}.csv")
+                    result = subprocess.run(
+                        ["python", str(self.script), str(historique_file), str(candidats_file), output_path, *options],
+                        capture_output=True,
+                        text=True,
+                        encoding="utf-8",
+                        env=dict(os.environ, PYTHONIOENCODING="utf-8"),
+                    )
+                    self.assertEqual(result.returncode, 0, f"Erreur d'exécution: {result.stderr}")
+
+                    stats = result.stdout[result.stdout.index("📊 Statistiques de traitement:") :].splitlines()[:5]
+                    with open(output_path, "r", encoding="utf-8") as f:
+                        outputs[mode] = (stats, sorted(tuple(row.items()) for row in csv.DictReader(f)))
+
+                # Mêmes lignes et mêmes statistiques; seul l'ordre des lignes diffère (tri par localisation)
+                self.assertEqual(outputs["streaming"], outputs["memoire"], candidats_name)
+
+    def test_desactivation_limitee_au_perimetre(self):
+        """Test que seules les entreprises des cellules (ville, métier) recherchées sont désactivées"""
+        historique_file = self.test_dir / "historique_existant.csv"
+        candidats_file = self.test_dir / "candidats_marseille.csv"  # Uniquement des coiffeurs à Marseille
+        perimetre_file = self.test_dir / "perimetre_lyon.csv"  # Restaurants à Lyon
+
+        cas = [
+            # Périmètre déduit des candidats: aucune entreprise de Paris ou Lyon n'est désactivée
+            (["--perimetre-candidats"], {"Boulangerie Ancienne": "Oui", "Restaurant Classique": "Oui"}),
+            # Périmètre explicite: les restaurants de Lyon ont été recherchés sans résultat
+            (["--perimetre", str(perimetre_file)], {"Boulangerie Ancienne": "Oui", "Restaurant Classique": "Non"}),
+            # Sans périmètre: toutes les entreprises absentes des candidats sont désactivées
+            ([], {"Boulangerie Ancienne": "Non", "Restaurant Classique": "Non"}),
+        ]
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            output_path = os.path.join(temp_dir, "sortie.csv")
+            for options in cas:
+                for streaming in ([], ["--streaming"]):
+                    result = subprocess.run(
+                        [
+                            "python",
+                            str(self.script),
+                            str(historique_file),
+                            str(candidats_file),
+                            output_path,
+                            *options[0],
+                            *streaming,
+                        ],
+                        capture_output=True,
+                        text=True,
+                        encoding="utf-8",
+                        env=dict(os.environ, PYTHONIOENCODING="utf-8"),
+                    )
+                    self.assertEqual(result.returncode, 0, f"Erreur d'exécution: {result.stderr}")
+
+                    with open(output_path, "r", encoding="utf-8") as f:
+                        actifs = {row["Nom"]: row["Actif"] for row in csv.DictReader(f)}
+
+                    expected = dict(options[1], **{"Coiffure Vintage": "Oui", "Salon du Vieux Port": "Oui"})
+                    for nom, actif in expected.items():
+                        self.assertEqual(actifs[nom], actif, f"{nom} avec {options[0] + streaming}")
+
+    def test_fichier_delta(self):
+        """Test du fichier delta: insertions, mises à jour, réactivations et désactivations"""
+        historique_file = self.test_dir / "historique_existant.csv"
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            etape1 = os.path.join(temp_dir, "etape1.csv")
+            etape2 = os.path.join(temp_dir, "etape2.csv")
+            delta1 = os.path.join(temp_dir, "delta1.csv")
+            delta2 = os.path.join(temp_dir, "delta2.csv")
+
+            for args in [
+                # Aucune entreprise de l'historique n'est présente: toutes sont désactivées
+                [str(historique_file), str(self.test_dir / "candidats_inconnues.csv"), etape1, "--delta", delta1],
+                # Boulangerie et coiffure reviennent (la boulangerie avec une nouvelle note)
+                [etape1, str(self.test_dir / "candidats_mises_a_jour.csv"), etape2, "--delta", delta2],
+            ]:
+                result = subprocess.run(
+                    ["python", str(self.script), *args],
+                    capture_output=True,
+                    text=True,
+                    encoding="utf-8",
+                    env=dict(os.environ, PYTHONIOENCODING="utf-8"),
+                )
+                self.assertEqual(result.returncode, 0, f"Erreur d'exécution: {result.stderr}")
+
+            with open(delta1, "r", encoding="utf-8") as f:
+                changements1 = [row["Changement"] for row in csv.DictReader(f)]
+            self.assertEqual(changements1.count("desactivation"), 3)
+            self.assertGreater(changements1.count("insertion"), 0)
+
+            with open(delta2, "r", encoding="utf-8") as f:
+                delta = {row["Nom"]: row for row in csv.DictReader(f)}
+
+            self.assertEqual(delta["Boulangerie Ancienne"]["Changement"], "reactivation")
+            self.assertEqual(delta["Boulangerie Ancienne"]["Colonnes_modifiees"], "Nombre_avis;Note")
+            self.assertEqual(delta["Coiffure Vintage"]["Changement"], "reactivation")
+            self.assertNotIn("Restaurant Classique", delta, "Une entreprise déjà inactive ne change pas")
+            self.assertNotIn("insertion", [row["Changement"] for row in delta.values()])
+            self.assertIn("desactivation", [row["Changement"] for row in delta.values()])
+
+            # Le delta ne contient que les lignes changées de l'historique complet
+            with open(etape2, "r", encoding="utf-8") as f:
+                self.assertLess(len(delta), len(list(csv.DictReader(f))))
+
+    def test_plusieurs_fichiers_candidats(self):
+        """Test de la fusion de plusieurs fichiers candidats (motif glob, politiques de collision)"""
+        historique_file = self.test_dir / "historique_existant.csv"
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # candidats_2 (Marseille, seulement la note) est plus récent que candidats_1 (plus complet)
+            for index, name in enumerate(["candidats_complets.csv", "candidats_marseille.csv"], start=1):
+                path = os.path.join(temp_dir, f"candidats_{index}.csv")
+                shutil.copy(self.test_dir / name, path)
+                os.utime(path, (1_700_000_000 + index, 1_700_000_000 + index))
+
+            resultats = {}
+            for politique in ["recent", "complet"]:
+                for mode in [[], ["--streaming"]]:
+                    output = os.path.join(temp_dir, f"sortie_{politique}_{len(mode)}.csv")
+                    result = subprocess.run(
+                        [
+                            "python",
+                            str(self.script),
+                            str(historique_file),
+                            os.path.join(temp_dir, "candidats_*.csv"),
+                            output,
+                            "--politique",
+                            politique,
+                            *mode,
+                        ],
+                        capture_output=True,
+                        text=True,
+                        encoding="utf-8",
+                        env=dict(os.environ, PYTHONIOENCODING="utf-8"),
+                    )
+                    self.assertEqual(result.returncode, 0, f"Erreur d'exécution: {result.stderr}")
+                    self.assertIn("Collisions entre fichiers: 1 candidat(s) écarté(s)", result.stdout)
+
+                    with open(output, "r", encoding="utf-8") as f:
+                        rows = {row["Nom"]: row for row in csv.DictReader(f)}
+                    resultats.setdefault(politique, []).append(rows)
+
+            for politique, (memoire, flux) in resultats.items():
+                self.assertEqual(memoire, flux, f"Modes en mémoire et en flux différents ({politique})")
+
+            recent, complet = resultats["recent"][0], resultats["complet"][0]
+            # Un seul passage: les candidats des deux fichiers sont fusionnés
+            self.assertEqual(recent["Restaurant Classique"]["Note"], "4.4")
+            self.assertEqual(recent["Salon du Vieux Port"]["Actif"], "Oui")
+            self.assertEqual(recent["Boulangerie Ancienne"]["Actif"], "Non")
+            # Collision sur Coiffure Vintage: fichier le plus récent ou ligne la plus complète
+            self.assertEqual(recent["Coiffure Vintage"]["Note"], "4.3")
+            self.assertEqual(recent["Coiffure Vintage"]["Nombre_avis"], "67")
+            self.assertEqual(complet["Coiffure Vintage"]["Note"], "4.0")
+            self.assertEqual(complet["Coiffure Vintage"]["Nombre_avis"], "75")
+
+    def test_rapprochement_par_place_id(self):
+        """Test du rapprochement par identifiant Google Places avant la clé composite"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            output = os.path.join(temp_dir, "historique_maj.csv")
+            result = subprocess.run(
+                [
+                    "python",
+                    str(self.script),
+                    str(self.test_dir / "historique_place_id.csv"),
+                    str(self.test_dir / "candidats_place_id.csv"),
+                    output,
+                ],
+                capture_output=True,
+                text=True,
+                encoding="utf-8",
+                env=dict(os.environ, PYTHONIOENCODING="utf-8"),
+            )
+            self.assertEqual(result.returncode, 0, f"Erreur d'exécution: {result.stderr}")
+            self.assertNotIn("CONFLIT", result.stdout)
+
+            with open(output, "r", encoding="utf-8") as f:
+                rows = {row["Place_id"]: row for row in csv.DictReader(f)}
+
+            # Renommée et adresse reformatée: même lieu, mis à jour sans nouvelle entrée
+            self.assertEqual(len(rows), 4)
+            self.assertEqual(rows["ChIJ_boulangerie"]["Nom"], "Boulangerie Ancienne - Maison Dupont")
+            self.assertEqual(rows["ChIJ_boulangerie"]["Adresse"], "10 Rue Vieille, 75001 Paris")
+            self.assertEqual(rows["ChIJ_boulangerie"]["Date_introduction"], "2024-01-01")
+            self.assertEqual(rows["ChIJ_boulangerie"]["Actif"], "Oui")
+            # Ligne sans Place_id: rapprochée par la clé composite, elle reçoit son identifiant
+            self.assertEqual(rows["ChIJ_coiffure"]["Nom"], "Coiffure Vintage")
+            self.assertEqual(rows["ChIJ_coiffure"]["Nombre_avis"], "70")
+            # Même adresse/ville/métier qu'une entreprise d'identifiant différent: autre lieu, pas de conflit
+            self.assertEqual(rows["ChIJ_pizzeria"]["Actif"], "Oui")
+            self.assertEqual(rows["ChIJ_restaurant"]["Actif"], "Non")
+
+    def test_meme_cle_composite_autre_place_id(self):
+        """Test d'un candidat de même nom/adresse/ville/métier qu'une entreprise d'identifiant Places différent"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for streaming in ([], ["--streaming"]):
+                output = os.path.join(temp_dir, "historique_maj.csv")
+                result = subprocess.run(
+                    [
+                        "python",
+                        str(self.script),
+                        str(self.test_dir / "historique_autre_place.csv"),
+                        str(self.test_dir / "candidats_autre_place.csv"),
+                        output,
+                        *streaming,
+                    ],
+                    capture_output=True,
+                    text=True,
+                    encoding="utf-8",
+                    env=dict(os.environ, PYTHONIOENCODING="utf-8"),
+                )
+                self.assertEqual(result.returncode, 0, f"Erreur d'exécution: {result.stderr}")
+                self.assertNotIn("CONFLIT", result.stdout)
+                self.assertIn("Nouvelles entrées: 1", result.stdout)
+
+                with open(output, "r", encoding="utf-8") as f:
+                    rows = {row["Place_id"]: row for row in csv.DictReader(f)}
+
+                # Autre lieu: nouvelle entrée, l'ancienne pharmacie absente des candidats est désactivée
+                self.assertEqual(len(rows), 3, streaming)
+                self.assertEqual(rows["P_OLD"]["Actif"], "Non")
+                self.assertEqual(rows["P_OLD"]["Nombre_avis"], "40")
+                self.assertEqual(rows["P_NEW"]["Actif"], "Oui")
+                self.assertEqual(rows["P_NEW"]["Nombre_avis"], "3")
+
 
 if __name__ == "__main__":
     unittest.main()
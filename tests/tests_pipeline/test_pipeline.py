@@ -0,0 +1,87 @@
+import csv
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Ajouter le répertoire parent au path pour importer le module à tester
+ROOT_DIR = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+
+class TestPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = Path(__file__).parent
+        self.brut = str(self.test_dir / "entreprises_brutes.csv")
+        self.historique = str(ROOT_DIR / "tests" / "tests_maj_historique" / "historique_existant.csv")
+        self.env = dict(os.environ, PYTHONIOENCODING="utf-8")
+
+    def run_script(self, script, *arguments):
+        result = subprocess.run(
+            ["python", str(ROOT_DIR / script), *arguments],
+            capture_output=True,
+            text=True,
+            encoding="utf-8",
+            env=self.env,
+        )
+        self.assertEqual(result.returncode, 0, f"Erreur d'exécution de {script}: {result.stdout}{result.stderr}")
+        return result.stdout
+
+    def read_bytes(self, path):
+        with open(path, "rb") as f:
+            return f.read()
+
+    def test_identique_aux_scripts_separes(self):
+        """Test que la chaîne en un seul processus produit les mêmes fichiers que les cinq scripts enchaînés"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            normalisees = os.path.join(temp_dir, "entreprises_normalisees.csv")
+            sans_doublons = os.path.join(temp_dir, "entreprises_sans_doublons.csv")
+            historique_maj = os.path.join(temp_dir, "historique_maj.csv")
+            reference = os.path.join(temp_dir, "historique_filtre.csv")
+
+            self.run_script("NormaliseMetiers.py", self.brut, normalisees, str(ROOT_DIR / "data" / "referencesMetiers.csv"))
+            self.run_script("supprime_doublons.py", normalisees, sans_doublons)
+            self.run_script("maj_historique.py", self.historique, sans_doublons, historique_maj)
+            self.run_script("Filters.py", historique_maj, reference)
+
+            sortie = os.path.join(temp_dir, "sortie.csv")
+            debug_dir = os.path.join(temp_dir, "debug")
+            stdout = self.run_script(
+                "pipeline.py", self.historique, sortie, "--brut", self.brut, "--intermediaires", debug_dir
+            )
+
+            self.assertEqual(self.read_bytes(sortie), self.read_bytes(reference), "Fichier final différent")
+            for nom, attendu in [
+                ("entreprises_normalisees.csv", normalisees),
+                ("entreprises_sans_doublons.csv", sans_doublons),
+                ("historique_maj.csv", historique_maj),
+            ]:
+                self.assertEqual(self.read_bytes(os.path.join(debug_dir, nom)), self.read_bytes(attendu), f"{nom} différent")
+            with open(os.path.join(debug_dir, "entreprises_brutes.csv"), encoding="utf-8") as f_dump:
+                with open(self.brut, encoding="utf-8") as f_brut:
+                    self.assertEqual(list(csv.reader(f_dump)), list(csv.reader(f_brut)))
+
+            # Mesures par étape: lignes produites (un doublon supprimé)
+            self.assertIn("⏱️  Temps par étape:", stdout)
+            lignes = {line.split()[0]: line.split()[-2] for line in stdout.splitlines() if "ligne(s)" in line}
+            self.assertEqual(lignes["recherche"], "7")
+            self.assertEqual(lignes["normalisation"], "7")
+            self.assertEqual(lignes["doublons"], "6")
+
+    def test_source_obligatoire(self):
+        """Test que la source des entreprises (--brut ou --recherche) est obligatoire"""
+        result = subprocess.run(
+            ["python", str(ROOT_DIR / "pipeline.py"), self.historique, "sortie.csv"],
+            capture_output=True,
+            text=True,
+            encoding="utf-8",
+            env=self.env,
+        )
+        self.assertNotEqual(result.returncode, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -61,6 +61,7 @@ class TestRechercheEntreprisesMock(unittest.TestCase):
         mock_response.json.return_value = {
             "places": [
                 {
+                    "id": "ChIJ_boulangerie_dupont",
                     "displayName": {"text": "Boulangerie Dupont"},
                     "formattedAddress": "12 rue de la Paix, 38000 Grenoble, France",
                     "addressComponents": [{"types": ["locality"], "longText": "Grenoble"}],
@@ -93,6 +94,9 @@ class TestRechercheEntreprisesMock(unittest.TestCase):
         self.assertEqual(first_business["Metier"], "boulanger")
         self.assertEqual(first_business["Note"], 4.5)
         self.assertEqual(first_business["Nombre_avis"], 142)
+        self.assertEqual(first_business["Place_id"], "ChIJ_boulangerie_dupont")
+        self.assertEqual(businesses[1]["Place_id"], "", "Identifiant absent de la réponse: colonne vide")
+        self.assertIn("places.id,", self.searcher.session.headers["X-Goog-FieldMask"])
 
     @patch("recherche_entreprises.requests.Session.post")
     def test_recherche_sans_resultats_mock(self, mock_post):
@@ -185,6 +189,23 @@ class TestRechercheEntreprisesMock(unittest.TestCase):
         jours_fermeture = self.searcher._extract_closure_days(place_data)
         self.assertEqual(jours_fermeture, 2, "Devrait calculer 2 jours de fermeture")
 
+    def test_extraction_creneaux_ouverture(self):
+        """Test du calcul des créneaux d'ouverture: périodes de l'API, ou texte des horaires à défaut"""
+        periodes = {
+            "regularOpeningHours": {
+                "periods": [
+                    {"open": {"day": 1, "hour": 7, "minute": 0}, "close": {"day": 1, "hour": 19, "minute": 0}},
+                    {"open": {"day": 2, "hour": 7, "minute": 0}, "close": {"day": 2, "hour": 19, "minute": 0}},
+                ]
+            }
+        }
+        texte = "lundi: 07:00–19:00; mardi: 07:00–19:00; mercredi: Fermé"
+
+        creneaux = self.searcher._extract_opening_slots(periodes, "")
+        self.assertNotEqual(creneaux, "", "Les périodes doivent donner des créneaux")
+        self.assertEqual(creneaux, self.searcher._extract_opening_slots({}, texte), "Périodes et texte équivalents")
+        self.assertEqual(self.searcher._extract_opening_slots({}, "Non disponible"), "", "Horaires inconnus: colonne vide")
+
 
 if __name__ == "__main__":
     unittest.main()
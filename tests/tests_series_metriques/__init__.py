@@ -0,0 +1 @@
+# Tests pour le module series_metriques.py
@@ -0,0 +1,139 @@
+import csv
+import os
+import subprocess
+import tempfile
+import unittest
+from datetime import datetime
+from pathlib import Path
+
+
+class TestSeriesMetriques(unittest.TestCase):
+
+    def setUp(self):
+        """Configuration avant chaque test"""
+        self.test_dir = Path(__file__).parent
+        self.projet_root = self.test_dir.parent.parent
+        self.fixtures_dir = self.projet_root / "tests" / "tests_maj_historique"
+        self.script = self.projet_root / "series_metriques.py"
+        self.script_maj = self.projet_root / "maj_historique.py"
+        self.work_dir = tempfile.TemporaryDirectory()
+        self.series = os.path.join(self.work_dir.name, "series.bin")
+
+    def tearDown(self):
+        self.work_dir.cleanup()
+
+    def run_script(self, script, *args):
+        result = subprocess.run(
+            ["python", str(script), *[str(arg) for arg in args]],
+            capture_output=True,
+            text=True,
+            encoding="utf-8",
+            env=dict(os.environ, PYTHONIOENCODING="utf-8"),
+        )
+        self.assertEqual(result.returncode, 0, f"Erreur d'exécution: {result.stdout}\n{result.stderr}")
+        return result
+
+    def write_copy(self, name, date_verification, nombre_avis):
+        """Écrit une ancienne copie de l'historique datée et avec des nombres d'avis donnés"""
+        with open(self.fixtures_dir / "historique_existant.csv", "r", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            fieldnames = reader.fieldnames
+            rows = list(reader)
+
+        path = os.path.join(self.work_dir.name, name)
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            for row, avis in zip(rows, nombre_avis):
+                row["Date_verification"] = date_verification
+                row["Nombre_avis"] = avis
+                writer.writerow(row)
+        return path
+
+    def test_croissance_sur_fenetre(self):
+        """Test de l'import d'anciennes copies et de la croissance du nombre d'avis sur 90 jours"""
+        copies = [
+            self.write_copy("historique_24_05.csv", "2024-05-01", ["60", "100", "50"]),
+            self.write_copy("historique_24_08.csv", "2024-08-01", ["70", "130", "50"]),
+            self.write_copy("historique_24_10.csv", "2024-10-01", ["85", "142", ""]),
+        ]
+
+        result = self.run_script(self.script, "importer", self.series, *copies)
+        self.assertIn("9 point(s) ajouté(s)", result.stdout)
+
+        # Réimporter les mêmes copies n'ajoute aucun point
+        result = self.run_script(self.script, "importer", self.series, *copies)
+        self.assertIn("0 point(s) ajouté(s)", result.stdout)
+
+        # Fenêtre du 2024-07-03 au 2024-10-01: départ au dernier relevé connu avant la fenêtre (2024-05-01)
+        result = self.run_script(
+            self.script,
+            "croissance",
+            self.series,
+            "--jours",
+            "90",
+            "--date",
+            "2024-10-01",
+            "--historique",
+            self.fixtures_dir / "historique_existant.csv",
+        )
+        lignes = [line.strip() for line in result.stdout.splitlines()[1:]]
+        self.assertEqual(lignes[0], "+42  Restaurant Classique (Lyon)")
+        self.assertEqual(lignes[1], "+25  Boulangerie Ancienne (Paris)")
+        # Coiffure: le nombre d'avis manquant du dernier relevé est ignoré
+        self.assertEqual(lignes[2], "+0  Coiffure Vintage (Marseille)")
+
+        result = self.run_script(
+            self.script, "serie", self.series, "--entreprise", "Boulangerie Ancienne|10 rue Vieille|Paris|Boulanger_Patissier"
+        )
+        self.assertEqual(len(result.stdout.splitlines()), 3)
+        self.assertIn("2024-08-01  note  4.2  avis     70", result.stdout)
+
+    def test_identite_par_place_id(self):
+        """Test d'une entreprise renommée: même série grâce au Place_id, retrouvée par son identifiant Places"""
+        copies = []
+        for name, date_verification, nom, avis in (
+            ("historique_24_05.csv", "2024-05-01", "Chez Paul", "10"),
+            ("historique_24_08.csv", "2024-08-01", "Bistrot Paul", "35"),
+        ):
+            path = os.path.join(self.work_dir.name, name)
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                writer.writerow(
+                    ["Nom", "Adresse", "Ville", "Metier_normalise", "Place_id", "Nombre_avis", "Date_verification"]
+                )
+                writer.writerow([nom, "1 place du Marché", "Lyon", "Restaurant", "ChIJ_paul", avis, date_verification])
+                writer.writerow(["Sans Identifiant", "2 rue Neuve", "Lyon", "Fleuriste", "", avis, date_verification])
+            copies.append(path)
+
+        self.run_script(self.script, "importer", self.series, *copies)
+        result = self.run_script(self.script, "croissance", self.series, "--date", "2024-08-01", "--historique", copies[-1])
+        lignes = [line.strip() for line in result.stdout.splitlines()[1:]]
+        self.assertEqual(lignes, ["+25  Bistrot Paul (Lyon)", "+25  Sans Identifiant (Lyon)"])
+
+        result = self.run_script(self.script, "serie", self.series, "--entreprise", "ChIJ_paul")
+        self.assertEqual(len(result.stdout.splitlines()), 2)
+        self.assertIn("2024-05-01  note    -  avis     10", result.stdout)
+
+    def test_maj_historique_ajoute_les_points_du_jour(self):
+        """Test de l'option --series de maj_historique.py (seules les entreprises vérifiées ce jour)"""
+        output = os.path.join(self.work_dir.name, "historique_maj.csv")
+        result = self.run_script(
+            self.script_maj,
+            self.fixtures_dir / "historique_existant.csv",
+            self.fixtures_dir / "candidats_mises_a_jour.csv",
+            output,
+            "--series",
+            self.series,
+        )
+        self.assertIn("📈 Séries de métriques: 2 point(s) ajouté(s)", result.stdout)
+
+        result = self.run_script(
+            self.script, "serie", self.series, "--entreprise", "Boulangerie Ancienne|10 rue Vieille|Paris|Boulanger_Patissier"
+        )
+        today = datetime.now().strftime("%Y-%m-%d")
+        self.assertIn(f"{today}  note  4.9  avis     90", result.stdout)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -112,6 +112,144 @@ class TestSupprimeDoublons(unittest.TestCase):
             if os.path.exists(temp_output_path):
                 os.unlink(temp_output_path)
 
+    def test_mode_fuzzy_quasi_doublons(self):
+        """Test de suppression des quasi-doublons (abréviations de voie, accents)"""
+        input_file = self.test_dir / "input_quasi_doublons.csv"
+
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".csv", delete=False, encoding="utf-8") as temp_output:
+            temp_output_path = temp_output.name
+
+        try:
+            result = subprocess.run(
+                ["python", str(self.script), str(input_file), temp_output_path, "--fuzzy", "0.8"],
+                capture_output=True,
+                text=True,
+                encoding="utf-8",
+                env=dict(os.environ, PYTHONIOENCODING="utf-8"),
+            )
+
+            self.assertEqual(result.returncode, 0, f"Erreur d'exécution: {result.stderr}")
+            self.assertIn("Groupes de quasi-doublons: 2", result.stdout)
+
+            with open(temp_output_path, "r", encoding="utf-8") as f:
+                generated_content = list(csv.DictReader(f))
+
+            # "Chem." / "Chemin" et "Av." / "avenue" fusionnés; numéro de voie ou métier différent conservés
+            self.assertEqual(len(generated_content), 5, "Les quasi-doublons n'ont pas été supprimés correctement")
+            adresses = [row["Adresse"] for row in generated_content]
+            self.assertIn(
+                "12 Chem. des Campanules, 38500 Voiron, France", adresses, "Le premier exemplaire doit être conservé"
+            )
+            self.assertIn("14 Chemin des Campanules, 38500 Voiron, France", adresses)
+            noms = [row["Nom"] for row in generated_content]
+            self.assertIn("Restaurant des Campanules", noms)
+
+        finally:
+            if os.path.exists(temp_output_path):
+                os.unlink(temp_output_path)
+
+    def test_mode_fuzzy_analyse(self):
+        """Test du rapport des groupes de quasi-doublons en mode analyse"""
+        input_file = self.test_dir / "input_quasi_doublons.csv"
+
+        result = subprocess.run(
+            ["python", str(self.script), str(input_file), "--analyze", "--fuzzy", "0.8"],
+            capture_output=True,
+            text=True,
+            encoding="utf-8",
+            env=dict(os.environ, PYTHONIOENCODING="utf-8"),
+        )
+
+        self.assertEqual(result.returncode, 0, f"Erreur d'exécution: {result.stderr}")
+        self.assertIn("Groupes de doublons: 0", result.stdout, "Aucun doublon exact dans ce fichier")
+        self.assertIn("Groupes de quasi-doublons: 2", result.stdout)
+        self.assertIn("12 Chemin des Campanules", result.stdout)
+
+    def test_mode_memoire_limitee(self):
+        """Test du dédoublonnage sur disque: même résultat et même ordre que le mode en mémoire"""
+        input_file = self.test_dir / "input_avec_doublons.csv"
+        expected_output = self.test_dir / "output_sans_doublons.csv"
+
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".csv", delete=False, encoding="utf-8") as temp_output:
+            temp_output_path = temp_output.name
+
+        try:
+            result = subprocess.run(
+                ["python", str(self.script), str(input_file), temp_output_path, "--memory-limit", "1", "--jobs", "2"],
+                capture_output=True,
+                text=True,
+                encoding="utf-8",
+                env=dict(os.environ, PYTHONIOENCODING="utf-8"),
+            )
+
+            self.assertEqual(result.returncode, 0, f"Erreur d'exécution: {result.stderr}")
+            self.assertIn("Mode mémoire limitée", result.stdout)
+
+            with open(temp_output_path, "r", encoding="utf-8") as f:
+                generated_content = list(csv.DictReader(f))
+
+            with open(expected_output, "r", encoding="utf-8") as f:
+                expected_content = list(csv.DictReader(f))
+
+            self.assertEqual(generated_content, expected_content, "Les lignes uniques doivent garder leur ordre d'apparition")
+
+        finally:
+            if os.path.exists(temp_output_path):
+                os.unlink(temp_output_path)
+
+    def test_tri_externe_numerique(self):
+        """Test du tri externe typé: --sort Note trie numériquement, valeurs vides en dernier, tri stable"""
+        input_file = self.test_dir / "input_tri_numerique.csv"
+
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".csv", delete=False, encoding="utf-8") as temp_output:
+            temp_output_path = temp_output.name
+
+        try:
+            # Un tampon de 2 lignes force l'écriture de segments temporaires puis leur fusion
+            result = subprocess.run(
+                ["python", str(self.script), str(input_file), temp_output_path, "--sort", "Note", "--sort-buffer", "2"],
+                capture_output=True,
+                text=True,
+                encoding="utf-8",
+                env=dict(os.environ, PYTHONIOENCODING="utf-8"),
+            )
+
+            self.assertEqual(result.returncode, 0, f"Erreur d'exécution: {result.stderr}")
+
+            with open(temp_output_path, "r", encoding="utf-8") as f:
+                generated_content = list(csv.DictReader(f))
+
+            self.assertEqual(
+                [row["Nom"] for row in generated_content],
+                ["Restaurant E", "Restaurant A", "Restaurant F", "Restaurant D", "Restaurant B", "Restaurant C"],
+                "Les notes doivent être triées numériquement (9 avant 10), à égalité dans l'ordre d'apparition",
+            )
+
+        finally:
+            if os.path.exists(temp_output_path):
+                os.unlink(temp_output_path)
+
+    def test_analyse_parallele(self):
+        """Test de l'analyse map-reduce: mêmes statistiques, top-K groupes et répartition par Ville/Métier"""
+        input_file = self.test_dir / "input_avec_doublons.csv"
+
+        result = subprocess.run(
+            ["python", str(self.script), str(input_file), "--analyze", "--jobs", "2", "--top", "2", "--sample-size", "1"],
+            capture_output=True,
+            text=True,
+            encoding="utf-8",
+            env=dict(os.environ, PYTHONIOENCODING="utf-8"),
+        )
+
+        self.assertEqual(result.returncode, 0, f"Erreur d'exécution: {result.stderr}")
+        self.assertIn("Total d'enregistrements: 8", result.stdout)
+        self.assertIn("Enregistrements uniques: 2", result.stdout)
+        self.assertIn("Groupes de doublons: 3", result.stdout)
+        self.assertIn("2 plus gros groupes de doublons", result.stdout, "Seuls les top-K groupes doivent être détaillés")
+        self.assertIn("Doublons par Ville", result.stdout)
+        self.assertIn("paris: 1 groupe(s), 1 doublon(s)", result.stdout)
+        self.assertIn("Doublons par Metier_normalise", result.stdout)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1 @@
+# Tests pour le module tri_externe.py
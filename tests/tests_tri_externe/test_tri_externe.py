@@ -0,0 +1,43 @@
+import sys
+import unittest
+from pathlib import Path
+
+# Ajouter le répertoire parent au path pour importer le module à tester
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+from tri_externe import column_sort_key, external_sort
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - Windows
+    resource = None
+
+
+class TestTriExterne(unittest.TestCase):
+
+    def setUp(self):
+        """Lignes (note, numéro d'arrivée) avec de nombreuses clés égales"""
+        self.rows = [[str((i * 7919) % 23), str(i)] for i in range(3001)]
+        # sorted est stable: même ordre que le tri externe à clé égale
+        self.expected = sorted(self.rows, key=column_sort_key(0))
+
+    def test_fusion_en_plusieurs_passes_stable(self):
+        """Test des fusions intermédiaires: même résultat, stable, quel que soit le nombre de segments fusionnés"""
+        for max_fan_in in (2, 3, 10, 1000):
+            with self.subTest(max_fan_in=max_fan_in):
+                result = list(external_sort(iter(self.rows), column_sort_key(0), 17, max_fan_in=max_fan_in))
+                self.assertEqual(result, self.expected)
+
+    @unittest.skipIf(resource is None, "module resource indisponible")
+    def test_limite_de_fichiers_ouverts(self):
+        """Test d'un tri de 300 segments avec une limite de 64 fichiers ouverts"""
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (64, hard))
+        try:
+            result = list(external_sort(iter(self.rows), column_sort_key(0), 10, max_fan_in=16))
+        finally:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
+        self.assertEqual(result, self.expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
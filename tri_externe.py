@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Tri externe (fusion de segments triés) pour les fichiers CSV plus grands que la mémoire
+Les lignes sont triées par paquets de taille bornée, écrites dans des fichiers temporaires,
+puis fusionnées en flux (en plusieurs passes au-delà de DEFAULT_MAX_FAN_IN segments)
+"""
+
+import csv
+import heapq
+import os
+import tempfile
+from typing import Any, Callable, Generator, Iterable, Iterator, List, Optional, Tuple
+
+# Nombre de lignes triées en mémoire avant écriture d'un segment sur disque
+DEFAULT_MAX_ROWS_IN_MEMORY = 100_000
+
+# Nombre maximal de segments fusionnés (donc de fichiers ouverts) à la fois
+DEFAULT_MAX_FAN_IN = 64
+
+
+def typed_sort_key(value: Optional[str]) -> Tuple[int, float, str]:
+    """
+    Clé de tri typée pour une valeur CSV
+
+    Les valeurs numériques sont triées numériquement (4.5 avant 10), puis le texte sans
+    tenir compte de la casse, et les valeurs vides en dernier.
+
+    Args:
+        value: Valeur brute lue dans le CSV
+
+    Returns:
+        Tuple comparable (catégorie, valeur numérique, texte)
+    """
+    text = (value or "").strip()
+    if not text:
+        return (2, 0.0, "")
+
+    try:
+        number = float(text.replace(",", "."))
+        if number == number:  # NaN exclu: il n'est pas ordonnable
+            return (0, number, "")
+    except ValueError:
+        pass
+
+    return (1, 0.0, text.lower())
+
+
+def column_sort_key(column_index: int) -> Callable[[List[str]], Tuple[int, float, str]]:
+    """Retourne une clé de tri typée sur une colonne d'une ligne CSV (liste de valeurs)"""
+
+    def key(row: List[str]) -> Tuple[int, float, str]:
+        return typed_sort_key(row[column_index] if column_index < len(row) else "")
+
+    return key
+
+
+def _write_run(rows: List[List[str]], directory: str, run_number: int) -> str:
+    path = os.path.join(directory, f"segment_{run_number}.csv")
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        csv.writer(file).writerows(rows)
+    return path
+
+
+def _read_run(path: str) -> Iterator[List[str]]:
+    with open(path, "r", newline="", encoding="utf-8") as file:
+        yield from csv.reader(file)
+
+
+def _merge_runs(paths: List[str], key: Callable[[List[str]], Any], directory: str, run_number: int) -> str:
+    """Fusionne des segments consécutifs en un nouveau segment, puis supprime les segments fusionnés"""
+    path = os.path.join(directory, f"segment_{run_number}.csv")
+    runs = [_read_run(run_path) for run_path in paths]
+    try:
+        with open(path, "w", newline="", encoding="utf-8") as file:
+            csv.writer(file).writerows(heapq.merge(*runs, key=key))
+    finally:
+        for run in runs:
+            run.close()
+    for run_path in paths:
+        os.unlink(run_path)
+    return path
+
+
+def external_sort(
+    rows: Iterable[List[str]],
+    key: Callable[[List[str]], Any],
+    max_rows_in_memory: int = DEFAULT_MAX_ROWS_IN_MEMORY,
+    temp_dir: Optional[str] = None,
+    max_fan_in: int = DEFAULT_MAX_FAN_IN,
+) -> Iterator[List[str]]:
+    """
+    Trie des lignes CSV avec une mémoire bornée
+
+    Le tri est stable: à clé égale, les lignes gardent leur ordre d'arrivée.
+    Si toutes les lignes tiennent dans un seul paquet, aucun fichier temporaire n'est créé.
+    Au plus max_fan_in segments sont ouverts à la fois: au-delà, des segments consécutifs sont
+    fusionnés par groupes de max_fan_in jusqu'à ce qu'il en reste au plus max_fan_in.
+
+    Args:
+        rows: Lignes à trier (listes de valeurs), parcourues une seule fois
+        key: Fonction de clé de tri appliquée à chaque ligne
+        max_rows_in_memory: Nombre maximal de lignes gardées en mémoire
+        temp_dir: Dossier des fichiers temporaires (dossier système par défaut)
+        max_fan_in: Nombre maximal de segments fusionnés à la fois (au moins 2)
+
+    Yields:
+        Lignes triées
+    """
+    max_rows_in_memory = max(1, max_rows_in_memory)
+    max_fan_in = max(2, max_fan_in)
+    buffer: List[List[str]] = []
+    run_paths: List[str] = []
+    runs: List[Generator[List[str], None, None]] = []
+    work_dir: Optional[tempfile.TemporaryDirectory] = None
+
+    try:
+        for row in rows:
+            buffer.append(row)
+            if len(buffer) >= max_rows_in_memory:
+                if work_dir is None:
+                    work_dir = tempfile.TemporaryDirectory(prefix="tri_externe_", dir=temp_dir)
+                buffer.sort(key=key)
+                run_paths.append(_write_run(buffer, work_dir.name, len(run_paths)))
+                buffer = []
+
+        buffer.sort(key=key)
+        if not run_paths:
+            yield from buffer
+            return
+
+        # Passes de fusion intermédiaires: des segments consécutifs fusionnés restent dans l'ordre d'arrivée
+        run_number = len(run_paths)
+        while len(run_paths) > max_fan_in:
+            merged_paths = []
+            for start in range(0, len(run_paths), max_fan_in):
+                group = run_paths[start : start + max_fan_in]
+                if len(group) == 1:
+                    merged_paths.extend(group)
+                    continue
+                merged_paths.append(_merge_runs(group, key, work_dir.name, run_number))
+                run_number += 1
+            run_paths = merged_paths
+
+        # heapq.merge privilégie le premier itérable à clé égale: les segments sont dans l'ordre d'arrivée
+        runs = [_read_run(path) for path in run_paths]
+        yield from heapq.merge(*runs, iter(buffer), key=key)
+
+    finally:
+        # Fermeture des segments avant suppression (nécessaire sous Windows si le tri est interrompu)
+        for run in runs:
+            run.close()
+        if work_dir is not None:
+            work_dir.cleanup()